@@ -3,6 +3,6 @@ from .models import Almacen
 
 @admin.register(Almacen)
 class AlmacenAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'direccion')
+    list_display = ('nombre', 'direccion', 'lotes_por_dia')
     search_fields = ('nombre', 'direccion')
     ordering = ('nombre',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AlmacenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'innoquim.apps.almacen'
+
+    def ready(self):
+        """Registrar signals al iniciar la app."""
+        import innoquim.apps.almacen.signals
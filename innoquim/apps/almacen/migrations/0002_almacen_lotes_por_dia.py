@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='almacen',
+            name='lotes_por_dia',
+            field=models.PositiveIntegerField(blank=True, help_text='Capacidad de producción diaria (vacío: sin límite)', null=True, verbose_name='Lotes por Día'),
+        ),
+    ]
@@ -5,6 +5,12 @@ from django.db import models
 class Almacen(models.Model):
     nombre = models.CharField(max_length=100)
     direccion = models.CharField(max_length=255)
+    lotes_por_dia = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Lotes por Día",
+        help_text="Capacidad de producción diaria (vacío: sin límite)",
+    )
 
     def __str__(self):
         return self.nombre
@@ -4,4 +4,4 @@ from .models import Almacen
 class AlmacenSerializer(serializers.ModelSerializer):
     class Meta:
         model = Almacen
-        fields = ['id', 'nombre', 'direccion']
\ No newline at end of file
+        fields = ['id', 'nombre', 'direccion', 'lotes_por_dia']
\ No newline at end of file
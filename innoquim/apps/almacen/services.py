@@ -0,0 +1,90 @@
+"""
+Resolución del almacén donde se registra cada movimiento de inventario.
+
+Orden de prioridad:
+
+1. El almacén explícito del documento (OrdenCliente.almacen,
+   LoteProduccion.almacen, ...)
+2. El almacén preferido del item (MateriaPrima / Producto.almacen_preferido)
+3. El almacén predeterminado: settings.ALMACEN_PREDETERMINADO o, si no está
+   configurado, el de menor ID
+
+Los almacenes son pocos y casi nunca cambian: se cargan una vez por proceso
+y se resuelven por ID sin consultar la BD en cada movimiento. Guardar o
+eliminar un Almacen invalida la caché en todos los procesos (ver
+signals.py e innoquim/cache_proceso.py).
+"""
+
+from django.conf import settings
+
+from innoquim.cache_proceso import CacheProceso
+
+from .models import Almacen
+
+_cache = CacheProceso("almacenes", lambda: Almacen.objects.in_bulk())
+
+
+def almacenes():
+    """{id: Almacen} de todos los almacenes, cargado una vez por proceso."""
+    return _cache.obtener()
+
+
+def limpiar_cache():
+    """Vacía la caché de este proceso."""
+    _cache.limpiar()
+
+
+def invalidar_cache():
+    """Vacía la caché de este proceso y la de los demás al confirmar."""
+    _cache.invalidar()
+
+
+def obtener_almacen(almacen_id):
+    """Almacen por ID desde la caché del proceso (None si no existe)."""
+    if almacen_id is None:
+        return None
+    almacen = almacenes().get(int(almacen_id))
+    if almacen is None:
+        # Creado en otro proceso después de cargar la caché
+        limpiar_cache()
+        almacen = almacenes().get(int(almacen_id))
+    return almacen
+
+
+def almacen_predeterminado():
+    """
+    Almacén de settings.ALMACEN_PREDETERMINADO o, sin configuración, el de
+    menor ID. None si no hay almacenes.
+    """
+    if settings.ALMACEN_PREDETERMINADO:
+        almacen = obtener_almacen(settings.ALMACEN_PREDETERMINADO)
+        if almacen is None:
+            raise ValueError(
+                f"ALMACEN_PREDETERMINADO={settings.ALMACEN_PREDETERMINADO} no existe"
+            )
+        return almacen
+    todos = almacenes()
+    return todos[min(todos)] if todos else None
+
+
+def resolver_almacen(almacen=None, item=None):
+    """
+    Almacén para un movimiento: el explícito, el preferido del item o el
+    predeterminado.
+
+    Parámetros:
+        almacen: Almacen o ID explícito del documento (opcional)
+        item: MateriaPrima o Producto (opcional)
+
+    Lanza ValueError si no hay ningún almacén.
+    """
+    if isinstance(almacen, Almacen):
+        return almacen
+    resuelto = obtener_almacen(almacen)
+    if resuelto is None and item is not None:
+        resuelto = obtener_almacen(getattr(item, "almacen_preferido_id", None))
+    if resuelto is None:
+        resuelto = almacen_predeterminado()
+    if resuelto is None:
+        raise ValueError("No hay almacenes registrados para el movimiento")
+    return resuelto
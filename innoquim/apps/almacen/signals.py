@@ -0,0 +1,15 @@
+"""
+Signals de Almacen: mantienen al día la caché de almacenes de todos los procesos.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Almacen
+from .services import invalidar_cache
+
+
+@receiver(post_save, sender=Almacen)
+@receiver(post_delete, sender=Almacen)
+def almacen_modificado(sender, **kwargs):
+    invalidar_cache()
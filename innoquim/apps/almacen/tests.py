@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .models import Almacen
+from . import services
+
+
+class ResolucionAlmacenTest(TestCase):
+    """Tests para la resolución del almacén de cada movimiento"""
+
+    def setUp(self):
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        services.limpiar_cache()
+        self.central = Almacen.objects.create(nombre="Central", direccion="-")
+        self.planta = Almacen.objects.create(nombre="Planta", direccion="-")
+        self.bodega = Almacen.objects.create(nombre="Bodega", direccion="-")
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad,
+            categoria_id=categoria, almacen_preferido=self.planta,
+        )
+
+    def test_prioridad_documento_item_predeterminado(self):
+        """Test que se use el almacén explícito, luego el preferido y luego el predeterminado"""
+        services.almacenes()
+        with self.assertNumQueries(0):
+            self.assertEqual(services.resolver_almacen(self.bodega.id, self.mp), self.bodega)
+            self.assertEqual(services.resolver_almacen(None, self.mp), self.planta)
+            self.assertEqual(services.resolver_almacen(None, None), self.central)
+
+        with override_settings(ALMACEN_PREDETERMINADO=str(self.bodega.id)):
+            self.assertEqual(services.resolver_almacen(), self.bodega)
+
+        # Un almacén nuevo invalida la caché del proceso
+        nuevo = Almacen.objects.create(nombre="Norte", direccion="-")
+        self.assertEqual(services.resolver_almacen(nuevo.id), nuevo)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_eliminar_invalida_otros_procesos(self):
+        """Test que un almacén eliminado deje de resolverse en la caché de otro proceso"""
+        from innoquim.cache_proceso import CacheProceso
+
+        otro_proceso = CacheProceso("almacenes", lambda: Almacen.objects.in_bulk(), revisar_cada=0)
+        bodega_id = self.bodega.id
+        self.assertIn(bodega_id, otro_proceso.obtener())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bodega.delete()
+        self.assertNotIn(bodega_id, otro_proceso.obtener())
@@ -0,0 +1,219 @@
+"""
+Vistas async (ASGI) para los endpoints de archivos que esperan al File Manager.
+
+Subir, eliminar y consultar el estado del File Manager pasan la mayor parte
+del tiempo esperando a Google Drive. Como vistas async, mientras esperan la
+respuesta HTTP el worker de uvicorn sigue atendiendo otros requests.
+
+El resto de operaciones (listar, detalle, actualizar, download, estadisticas)
+siguen en ArchivoViewSet; estas vistas les delegan los demas metodos HTTP.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import Archivo
+from .serializers import ArchivoDetailSerializer, ArchivoUploadSerializer
+from .services import get_file_manager_client
+from .views import ArchivoViewSet
+
+logger = logging.getLogger(__name__)
+
+archivo_list_view = ArchivoViewSet.as_view({'get': 'list'})
+archivo_detail_view = ArchivoViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+})
+
+
+async def _autenticar(request):
+    """
+    Autentica el request con las mismas clases que DRF (JWT / sesion).
+    Retorna (usuario, None) o (None, respuesta de error).
+    """
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except exceptions.APIException as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+
+    if not user or not user.is_authenticated:
+        error = exceptions.NotAuthenticated()
+        return None, JsonResponse({'detail': str(error.detail)}, status=error.status_code)
+    return user, None
+
+
+@csrf_exempt
+async def archivo_collection(request):
+    """
+    GET  /api/archivos/ -> listado (ArchivoViewSet.list)
+    POST /api/archivos/ -> subida async al File Manager
+    """
+    if request.method != 'POST':
+        return await sync_to_async(archivo_list_view)(request)
+
+    user, error_response = await _autenticar(request)
+    if error_response:
+        return error_response
+
+    data = request.POST.copy()
+    data.update(request.FILES)
+    serializer = ArchivoUploadSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    archivo_subido = serializer.validated_data['archivo']
+    tipo_reporte = serializer.validated_data['tipo_reporte']
+    descripcion = serializer.validated_data.get('descripcion', '')
+
+    try:
+        # Se envia el UploadedFile directamente, sin archivo temporal
+        file_manager = get_file_manager_client()
+        drive_result = await file_manager.aupload_file(
+            archivo_subido, file_name=archivo_subido.name
+        )
+
+        archivo = await Archivo.objects.acreate(
+            nombre=archivo_subido.name,
+            tipo_reporte=tipo_reporte,
+            descripcion=descripcion,
+            google_drive_id=drive_result['google_drive_id'],
+            url_descarga=drive_result['url_descarga'],
+            tamaño=drive_result['tamaño'],
+            usuario_generador=user
+        )
+
+        data = await sync_to_async(lambda: ArchivoDetailSerializer(archivo).data)()
+        return JsonResponse(data, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        logger.error(f"Error al subir archivo: {str(e)}", exc_info=True)
+        return JsonResponse(
+            {'error': f'Error al subir archivo: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@csrf_exempt
+async def archivo_detail(request, archivo_id):
+    """
+    DELETE /api/archivos/{archivo_id}/ -> eliminacion async en Drive y BD
+    Otros metodos -> ArchivoViewSet (retrieve/update/partial_update)
+    """
+    if request.method != 'DELETE':
+        return await sync_to_async(archivo_detail_view)(request, archivo_id=archivo_id)
+
+    user, error_response = await _autenticar(request)
+    if error_response:
+        return error_response
+
+    try:
+        archivo = await Archivo.objects.select_related('usuario_generador').aget(
+            archivo_id=archivo_id
+        )
+    except Archivo.DoesNotExist:
+        return JsonResponse(
+            {'detail': 'No encontrado.'}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    # Verificar que el usuario sea el creador
+    if archivo.usuario_generador_id != user.pk:
+        logger.warning(
+            f"Usuario {user.id} intentó eliminar archivo {archivo.archivo_id} "
+            f"que pertenece a {archivo.usuario_generador_id}"
+        )
+        return JsonResponse(
+            {'error': 'No tienes permisos para eliminar este archivo'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    google_drive_id = archivo.google_drive_id
+    file_manager = get_file_manager_client()
+
+    try:
+        # CRÍTICO: Primero eliminar de Google Drive
+        logger.info(f"Intentando eliminar archivo {google_drive_id} de Google Drive")
+        eliminado = await file_manager.adelete_file(google_drive_id)
+
+        if not eliminado:
+            logger.error(f"File Manager reportó fallo al eliminar {google_drive_id}")
+            return JsonResponse(
+                {
+                    'error': 'No se pudo eliminar el archivo de Google Drive',
+                    'detail': 'El servicio de archivos no pudo completar la operación'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        # Solo si Google Drive confirma, eliminar de BD
+        logger.info(f"Archivo {google_drive_id} eliminado de Drive, eliminando de BD")
+        await archivo.adelete()
+
+        return JsonResponse(
+            {
+                'message': 'Archivo eliminado exitosamente',
+                'archivo_id': str(archivo_id),
+                'google_drive_id': google_drive_id
+            },
+            status=status.HTTP_204_NO_CONTENT
+        )
+
+    except Exception as e:
+        logger.error(
+            f"Error al eliminar archivo {google_drive_id}: {str(e)}",
+            exc_info=True
+        )
+
+        # Verificar si el archivo realmente existe en Drive
+        try:
+            info = await file_manager.aget_file_info(google_drive_id)
+            if info is None:
+                logger.warning(
+                    f"Archivo {google_drive_id} no existe en Drive, "
+                    f"eliminando solo de BD"
+                )
+                await archivo.adelete()
+                return JsonResponse(
+                    {
+                        'message': 'Archivo eliminado de la base de datos '
+                                '(no existía en Google Drive)',
+                        'warning': 'El archivo ya no existía en Google Drive'
+                    },
+                    status=status.HTTP_200_OK
+                )
+        except Exception as verify_error:
+            logger.error(f"Error verificando archivo: {verify_error}")
+
+        return JsonResponse(
+            {
+                'error': f'Error al eliminar archivo: {str(e)}',
+                'detail': 'No se pudo completar la eliminación. '
+                        'El archivo puede seguir en Google Drive.'
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_GET
+async def file_manager_status(request):
+    """
+    GET /api/archivos/file_manager_status/
+    Verifica el estado del File Manager Service.
+    """
+    user, error_response = await _autenticar(request)
+    if error_response:
+        return error_response
+
+    health = await get_file_manager_client().ahealth_check()
+    return JsonResponse({'file_manager': health})
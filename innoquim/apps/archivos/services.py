@@ -4,7 +4,7 @@ Cliente HTTP para comunicarse con el File Manager Service.
 Django Backend NO interactúa directamente con Google Drive.
 """
 
-import requests
+import httpx
 from django.conf import settings
 from typing import Dict, Optional
 import logging
@@ -25,87 +25,87 @@ class FileManagerClient:
         )
         self.timeout = 30
     
-    def upload_file(self, file_path: str, file_name: str) -> Dict:
+    # Metodos async (vistas ASGI) con httpx.AsyncClient: mientras Drive
+    # responde, el worker de uvicorn sigue atendiendo otros requests en
+    # lugar de quedar bloqueado.
+
+    async def aupload_file(self, file_obj, file_name: str) -> Dict:
         """
-        Sube un archivo al File Manager para que lo guarde en Google Drive.
+        Sube un archivo al File Manager sin pasar por un archivo temporal.
+        file_obj puede ser el UploadedFile recibido por Django.
         """
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': (file_name, f)}
-                
-                response = requests.post(
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
                     f"{self.base_url}/api/upload",
-                    files=files,
-                    timeout=self.timeout
+                    files={'file': (file_name, file_obj)},
                 )
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                return {
-                    'google_drive_id': result.get('google_drive_id'),
-                    'url_descarga': result.get('url_descarga'),
-                    'tamaño': result.get('tamaño')
-                }
-        
-        except requests.exceptions.RequestException as e:
+
+            response.raise_for_status()
+            result = response.json()
+
+            return {
+                'google_drive_id': result.get('google_drive_id'),
+                'url_descarga': result.get('url_descarga'),
+                'tamaño': result.get('tamaño')
+            }
+
+        except httpx.HTTPError as e:
             logger.error(f"Error al subir archivo al File Manager: {e}")
             raise Exception(f"Error al comunicarse con File Manager: {str(e)}")
-    
-    def delete_file(self, google_drive_id: str) -> bool:
+
+    async def adelete_file(self, google_drive_id: str) -> bool:
         """
         Solicita al File Manager que elimine un archivo de Google Drive.
         """
         try:
-            response = requests.delete(
-                f"{self.base_url}/api/files/{google_drive_id}",
-                timeout=self.timeout
-            )
-            
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.delete(
+                    f"{self.base_url}/api/files/{google_drive_id}"
+                )
+
             response.raise_for_status()
             return True
-        
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error al eliminar archivo del File Manager: {e}")
             raise Exception(f"Error al comunicarse con File Manager: {str(e)}")
-    
-    def get_file_info(self, google_drive_id: str) -> Optional[Dict]:
+
+    async def aget_file_info(self, google_drive_id: str) -> Optional[Dict]:
         """
         Obtiene información de un archivo desde el File Manager.
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/api/files/{google_drive_id}/info",
-                timeout=self.timeout
-            )
-            
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(
+                    f"{self.base_url}/api/files/{google_drive_id}/info"
+                )
+
             response.raise_for_status()
             return response.json()
-        
-        except requests.exceptions.HTTPError as e:
+
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 return None
             logger.error(f"Error al obtener info del archivo: {e}")
             raise Exception(f"Error al comunicarse con File Manager: {str(e)}")
-        
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error al comunicarse con File Manager: {e}")
             raise Exception(f"Error al comunicarse con File Manager: {str(e)}")
-    
-    def health_check(self) -> Dict:
+
+    async def ahealth_check(self) -> Dict:
         """
         Verifica que el File Manager esté disponible.
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/health",
-                timeout=5
-            )
-            
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(f"{self.base_url}/health")
+
             response.raise_for_status()
             return response.json()
-        
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"File Manager no disponible: {e}")
             return {
                 "status": "unavailable",
@@ -1,12 +1,26 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import ArchivoViewSet
+from . import async_views
 
 # Crear router
 router = DefaultRouter()
 router.register(r'archivos', ArchivoViewSet, basename='archivo')
 
 # URLs
+# Las rutas async (subida, eliminacion y estado del File Manager) van antes
+# del router para que tengan prioridad sobre las del ViewSet.
 urlpatterns = [
+    path('archivos/', async_views.archivo_collection, name='archivo-list'),
+    path(
+        'archivos/file_manager_status/',
+        async_views.file_manager_status,
+        name='archivo-file-manager-status',
+    ),
+    re_path(
+        r'^archivos/(?P<archivo_id>ARC\d+)/$',
+        async_views.archivo_detail,
+        name='archivo-detail',
+    ),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import Formula, FormulaComponente
+
+
+class FormulaComponenteInline(admin.TabularInline):
+    model = FormulaComponente
+    extra = 0
+
+
+@admin.register(Formula)
+class FormulaAdmin(admin.ModelAdmin):
+    list_display = ["producto", "version", "cantidad_base", "unidad", "activa"]
+    list_filter = ["activa"]
+    search_fields = ["producto__name", "producto__product_code"]
+    inlines = [FormulaComponenteInline]
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FormulaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'innoquim.apps.formula'
+
+    def ready(self):
+        """Registrar signals al iniciar la app."""
+        import innoquim.apps.formula.signals
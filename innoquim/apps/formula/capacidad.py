@@ -0,0 +1,204 @@
+"""
+Cantidad máxima fabricable de cada producto con el stock actual.
+
+Para todo el catálogo en una pasada:
+
+1. Fórmulas activas con sus componentes (dos consultas) y la unidad de
+   cada producto; requerimiento por unidad de producto de cada componente,
+   convertido a la unidad de la materia prima
+2. Saldo disponible de cada materia prima desde InventarioMaterial (que el
+   Kardex mantiene al día), sumado en la BD por materia prima (una consulta)
+3. Con arreglos NumPy: disponible / requerimiento por componente y mínimo
+   por fórmula con np.minimum.reduceat; el componente del mínimo es el
+   limitante
+
+El resultado de cada almacén (y el de todos los almacenes) se guarda en
+caché. Se invalida cuando un movimiento de Kardex cambia el saldo de una
+materia prima (upsert_inventario_material) y cuando cambia una fórmula.
+"""
+
+import logging
+import math
+from decimal import Decimal, ROUND_DOWN
+
+import numpy as np
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from innoquim.apps.inventario_material.models import InventarioMaterial
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+from innoquim.apps.unidad.conversion import factor
+
+from .models import Formula, FormulaComponente
+
+logger = logging.getLogger(__name__)
+
+CLAVE_CACHE = "formula:capacidad:{}"
+DOS_DECIMALES = Decimal("0.01")
+
+
+def _clave(almacen_id):
+    return CLAVE_CACHE.format(almacen_id or "todos")
+
+
+def calcular_capacidad(almacen_id=None):
+    """
+    Calcula la cantidad máxima fabricable de todos los productos con
+    fórmula activa, sin caché.
+
+    Retorna dict con 'fecha', 'almacen_id' y 'productos':
+    {producto_id: {'maximo', 'unidad_id', 'formula_id', 'version', 'limitante'}}
+    (maximo en la unidad del producto, redondeado hacia abajo a 2 decimales).
+    """
+    formulas = list(Formula.objects.filter(activa=True).order_by("pk").values_list(
+        "pk", "producto_id", "version", "cantidad_base", "unidad_id", "producto__unit_id"
+    ))
+    componentes = list(
+        FormulaComponente.objects.filter(formula__activa=True)
+        .order_by("formula_id", "pk")
+        .values_list("formula_id", "materia_prima_id", "cantidad", "unidad_id", "materia_prima__unidad_id")
+    )
+    resultado = {"fecha": timezone.now(), "almacen_id": almacen_id, "productos": {}}
+    if not componentes:
+        return resultado
+
+    content_type = ContentType.objects.get_for_model(MateriaPrima)
+    saldos = InventarioMaterial.objects.filter(
+        content_type=content_type,
+        object_id__in={c[1] for c in componentes},
+    )
+    if almacen_id is not None:
+        saldos = saldos.filter(almacen_id_id=almacen_id)
+    disponible = dict(
+        saldos.order_by().values("object_id").annotate(total=Sum("cantidad"))
+        .values_list("object_id", "total")
+    )
+
+    # Requerimiento por unidad de producto y disponible de cada componente
+    por_formula = {f[0]: f for f in formulas}
+    indice_formula = []
+    requerido = []
+    existencias = []
+    for formula_id, materia_prima_id, cantidad, unidad_id, unidad_materia in componentes:
+        _, _, _, cantidad_base, unidad_formula, unidad_producto = por_formula[formula_id]
+        # cantidad por cantidad_base (unidad de la fórmula) -> por 1 unidad del producto
+        por_unidad = (
+            cantidad
+            * factor(unidad_id, unidad_materia)
+            * factor(unidad_producto, unidad_formula)
+            / cantidad_base
+        )
+        indice_formula.append(formula_id)
+        requerido.append(float(por_unidad))
+        existencias.append(float(disponible.get(materia_prima_id) or 0))
+
+    indice_formula = np.array(indice_formula)
+    requerido = np.array(requerido, dtype=np.float64)
+    existencias = np.maximum(np.array(existencias, dtype=np.float64), 0.0)
+    razon = existencias / requerido
+
+    # Componentes ordenados por fórmula: inicio y número de grupo de cada uno
+    nuevo_grupo = np.r_[True, indice_formula[1:] != indice_formula[:-1]]
+    inicios = np.flatnonzero(nuevo_grupo)
+    grupo = np.cumsum(nuevo_grupo) - 1
+    minimos = np.minimum.reduceat(razon, inicios)
+    # Ordenando por (grupo, razón) el primero de cada grupo es el limitante
+    limitantes = np.lexsort((razon, grupo))[inicios]
+
+    for posicion, inicio in enumerate(inicios):
+        formula_id = int(indice_formula[inicio])
+        _, producto_id, version, _, _, unidad_producto = por_formula[formula_id]
+        # Redondeo hacia abajo tolerando el error de coma flotante
+        maximo = math.floor(minimos[posicion] * 100 + 1e-6) / 100
+        resultado["productos"][producto_id] = {
+            "maximo": Decimal(str(maximo)).quantize(DOS_DECIMALES, rounding=ROUND_DOWN),
+            "unidad_id": unidad_producto,
+            "formula_id": formula_id,
+            "version": version,
+            "limitante": componentes[int(limitantes[posicion])][1],
+        }
+    return resultado
+
+
+def obtener_capacidad(almacen_id=None, producto_ids=None):
+    """
+    Capacidad de todo el catálogo desde la caché (se calcula si no está).
+    Con producto_ids filtra el resultado.
+
+    Retorna la estructura de calcular_capacidad con 'productos' como lista
+    de dicts que incluyen producto_id, codigo y nombre.
+    """
+    datos = _leer_cache(almacen_id)
+    if datos is None:
+        datos = calcular_capacidad(almacen_id)
+        _guardar_cache(almacen_id, datos)
+
+    productos = datos["productos"]
+    if producto_ids is not None:
+        productos = {pk: productos[pk] for pk in producto_ids if pk in productos}
+    nombres = {
+        pk: (codigo, nombre)
+        for pk, codigo, nombre in Producto.objects.filter(pk__in=productos).values_list(
+            "pk", "product_code", "name"
+        )
+    }
+    return {
+        "fecha": datos["fecha"],
+        "almacen_id": almacen_id,
+        "productos": [
+            {
+                "producto_id": pk,
+                "codigo": nombres[pk][0],
+                "nombre": nombres[pk][1],
+                **capacidad,
+            }
+            for pk, capacidad in sorted(productos.items())
+            if pk in nombres
+        ],
+    }
+
+
+def invalidar(almacen_ids=None):
+    """
+    Borra la capacidad en caché de todos los almacenes y de los indicados
+    (None: de todos los almacenes registrados).
+    """
+    if almacen_ids is None:
+        from innoquim.apps.almacen.services import almacenes
+
+        almacen_ids = almacenes().keys()
+    claves = [_clave(None)] + [_clave(almacen_id) for almacen_id in set(almacen_ids)]
+    try:
+        cache.delete_many(claves)
+    except Exception as e:
+        logger.warning(f"Caché de capacidad no disponible: {str(e)}")
+
+
+def invalidar_por_movimientos(claves):
+    """
+    Invalida la capacidad si algún (content_type_id, object_id, almacen_id)
+    movido es una materia prima. Los movimientos de producto no la cambian.
+    """
+    content_type = ContentType.objects.get_for_model(MateriaPrima)
+    almacen_ids = {almacen_id for ct, _, almacen_id in claves if ct == content_type.pk}
+    if almacen_ids:
+        invalidar(almacen_ids)
+
+
+def _leer_cache(almacen_id):
+    try:
+        return cache.get(_clave(almacen_id))
+    except Exception as e:
+        # Sin Redis se calcula directo de la BD
+        logger.warning(f"Caché de capacidad no disponible: {str(e)}")
+        return None
+
+
+def _guardar_cache(almacen_id, datos):
+    try:
+        cache.set(_clave(almacen_id), datos)
+    except Exception as e:
+        logger.warning(f"Caché de capacidad no disponible: {str(e)}")
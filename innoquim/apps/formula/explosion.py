@@ -0,0 +1,175 @@
+"""
+Explosión de fórmulas: de cantidad de producto a materias primas.
+
+Para una o muchas órdenes de fabricación a la vez (sin consultas por lote
+ni por componente):
+
+1. Carga las fórmulas con sus componentes y materias primas (dos
+   consultas, sin importar cuántos productos)
+2. Escala cada fórmula a la cantidad pedida:
+   cantidad del componente x cantidad pedida / cantidad_base, convirtiendo
+   la cantidad pedida a la unidad de la fórmula y el componente a la unidad
+   de la materia prima con la caché de factores de unidad.conversion
+3. explotar_lotes crea todos los MaterialProduccion con un bulk_create y
+   actualiza el costo de los lotes con un bulk_update
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Prefetch
+
+from innoquim.apps.unidad.conversion import factor
+
+from .models import Formula, FormulaComponente
+
+CUATRO_DECIMALES = Decimal("0.0001")
+
+
+def _componentes():
+    return Prefetch(
+        "componentes",
+        queryset=FormulaComponente.objects.select_related("materia_prima").order_by("id"),
+    )
+
+
+def formulas_activas(producto_ids):
+    """{producto_id: Formula activa con sus componentes} (dos consultas)."""
+    return {
+        formula.producto_id: formula
+        for formula in Formula.objects.filter(
+            producto_id__in=set(producto_ids), activa=True
+        ).prefetch_related(_componentes())
+    }
+
+
+def cargar_formulas(formula_ids):
+    """{formula_id: Formula con sus componentes} (dos consultas)."""
+    return Formula.objects.prefetch_related(_componentes()).in_bulk(set(formula_ids))
+
+
+def explotar(planes):
+    """
+    Calcula las materias primas de varias órdenes de fabricación.
+
+    Parámetros:
+        planes: lista de dicts con producto_id, cantidad, unidad_id y
+            opcionalmente formula (objeto Formula con componentes
+            precargados); sin formula se usa la activa del producto
+
+    Retorna una lista paralela a planes; cada elemento es la lista de
+    requerimientos {'materia_prima', 'cantidad' (en la unidad de la materia
+    prima), 'unidad_id', 'formula'}.
+    Lanza ValueError si algún producto no tiene fórmula activa.
+    """
+    planes = list(planes)
+
+    activas = formulas_activas(
+        plan["producto_id"] for plan in planes if plan.get("formula") is None
+    )
+    sin_formula = sorted({
+        plan["producto_id"]
+        for plan in planes
+        if plan.get("formula") is None and plan["producto_id"] not in activas
+    })
+    if sin_formula:
+        raise ValueError(
+            f"Productos sin fórmula activa: {', '.join(str(p) for p in sin_formula)}"
+        )
+
+    resultado = []
+    for plan in planes:
+        formula = plan.get("formula") or activas[plan["producto_id"]]
+        escala = (
+            Decimal(str(plan["cantidad"]))
+            * factor(plan["unidad_id"], formula.unidad_id)
+            / formula.cantidad_base
+        )
+        resultado.append([
+            {
+                "materia_prima": componente.materia_prima,
+                "cantidad": (
+                    componente.cantidad
+                    * escala
+                    * factor(componente.unidad_id, componente.materia_prima.unidad_id_id)
+                ).quantize(CUATRO_DECIMALES, rounding=ROUND_HALF_UP),
+                "unidad_id": componente.materia_prima.unidad_id_id,
+                "formula": formula,
+            }
+            for componente in formula.componentes.all()
+        ])
+    return resultado
+
+
+@transaction.atomic
+def explotar_lotes(lotes, batch_size=1000):
+    """
+    Crea los MaterialProduccion de varios lotes de producción desde su
+    fórmula (lote.formula o, si no tiene, la activa del producto) y
+    actualiza el costo de cada lote.
+
+    Los materiales se descuentan del inventario al completar el lote
+    (LoteProduccion.completar_produccion).
+
+    Retorna la lista de MaterialProduccion creados.
+    Lanza ValueError si algún lote ya tiene materiales, no está pendiente o
+    su producto no tiene fórmula activa.
+    """
+    from innoquim.apps.lote_produccion.models import LoteProduccion
+    from innoquim.apps.material_produccion.models import MaterialProduccion
+
+    lotes = list(lotes)
+    if not lotes:
+        return []
+
+    no_pendientes = [lote.batch_code for lote in lotes if lote.status != "pending"]
+    if no_pendientes:
+        raise ValueError(f"Solo se explotan lotes pendientes: {', '.join(no_pendientes)}")
+    con_materiales = set(
+        MaterialProduccion.objects.filter(batch__in=lotes).order_by().values_list(
+            "batch__batch_code", flat=True
+        )
+    )
+    if con_materiales:
+        raise ValueError(
+            f"Los lotes ya tienen materiales: {', '.join(sorted(con_materiales))}"
+        )
+
+    elegidas = cargar_formulas(lote.formula_id for lote in lotes if lote.formula_id)
+    requerimientos = explotar(
+        {
+            "producto_id": lote.product_id,
+            "cantidad": lote.produced_quantity,
+            "unidad_id": lote.unit_id,
+            "formula": elegidas.get(lote.formula_id),
+        }
+        for lote in lotes
+    )
+
+    materiales = []
+    for lote, lineas in zip(lotes, requerimientos):
+        costo_lote = Decimal("0.00")
+        for linea in lineas:
+            material = MaterialProduccion(
+                batch=lote,
+                raw_material=linea["materia_prima"],
+                used_quantity=linea["cantidad"],
+                unit_id=linea["unidad_id"],
+            )
+            material.calcular_costos()
+            costo_lote += material.costo_total
+            materiales.append(material)
+        if lineas:
+            lote.formula = lineas[0]["formula"]
+        lote.costo_materiales = costo_lote
+        if lote.produced_quantity > 0:
+            lote.costo_unitario_producto = (
+                costo_lote / lote.produced_quantity
+            ).quantize(CUATRO_DECIMALES)
+
+    creados = MaterialProduccion.objects.bulk_create(materiales, batch_size=batch_size)
+    LoteProduccion.objects.bulk_update(
+        lotes, ["formula", "costo_materiales", "costo_unitario_producto"],
+        batch_size=batch_size,
+    )
+    return creados
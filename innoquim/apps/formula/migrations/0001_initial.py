@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:44
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('materia_prima', '0004_materiaprima_almacen_preferido'),
+        ('producto', '0003_producto_almacen_preferido'),
+        ('unidad', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Formula',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Versión')),
+                ('cantidad_base', models.DecimalField(decimal_places=4, default=Decimal('1.0000'), help_text='Cantidad de producto que rinde la fórmula', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.0001'))], verbose_name='Cantidad Base')),
+                ('activa', models.BooleanField(default=True, verbose_name='Activa')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='formulas', to='producto.producto', verbose_name='Producto')),
+                ('unidad', models.ForeignKey(help_text='Unidad de la cantidad base', on_delete=django.db.models.deletion.PROTECT, related_name='formulas', to='unidad.unidad', verbose_name='Unidad')),
+            ],
+            options={
+                'verbose_name': 'Fórmula',
+                'verbose_name_plural': 'Fórmulas',
+                'db_table': 'formula',
+                'ordering': ['producto_id', '-version'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FormulaComponente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.DecimalField(decimal_places=6, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.000001'))], verbose_name='Cantidad')),
+                ('formula', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='componentes', to='formula.formula', verbose_name='Fórmula')),
+                ('materia_prima', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='componentes_formula', to='materia_prima.materiaprima', verbose_name='Materia Prima')),
+                ('unidad', models.ForeignKey(help_text='Unidad de la cantidad; se convierte a la unidad de la materia prima', on_delete=django.db.models.deletion.PROTECT, related_name='componentes_formula', to='unidad.unidad', verbose_name='Unidad')),
+            ],
+            options={
+                'verbose_name': 'Componente de Fórmula',
+                'verbose_name_plural': 'Componentes de Fórmula',
+                'db_table': 'formula_componente',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='formula',
+            constraint=models.UniqueConstraint(condition=models.Q(('activa', True)), fields=('producto',), name='formula_una_activa_por_producto'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='formula',
+            unique_together={('producto', 'version')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='formulacomponente',
+            unique_together={('formula', 'materia_prima')},
+        ),
+    ]
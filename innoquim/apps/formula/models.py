@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.core.validators import MinValueValidator
+from django.db import models
+from django.db.models import Q
+
+
+class Formula(models.Model):
+    """
+    Fórmula (lista de materiales) versionada de un producto.
+
+    - cantidad_base y unidad: cuánto producto rinde la fórmula (ej: 100 L)
+    - Cada producto puede tener varias versiones; solo una está activa y es
+      la que se usa al explotar un lote de producción. Las versiones
+      anteriores se conservan para saber con qué fórmula se fabricó cada lote.
+    """
+
+    producto = models.ForeignKey(
+        "producto.Producto",
+        on_delete=models.PROTECT,
+        related_name="formulas",
+        verbose_name="Producto",
+    )
+    version = models.PositiveIntegerField(verbose_name="Versión")
+    cantidad_base = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=Decimal("1.0000"),
+        validators=[MinValueValidator(Decimal("0.0001"))],
+        verbose_name="Cantidad Base",
+        help_text="Cantidad de producto que rinde la fórmula",
+    )
+    unidad = models.ForeignKey(
+        "unidad.Unidad",
+        on_delete=models.PROTECT,
+        related_name="formulas",
+        verbose_name="Unidad",
+        help_text="Unidad de la cantidad base",
+    )
+    activa = models.BooleanField(default=True, verbose_name="Activa")
+    observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "formula"
+        verbose_name = "Fórmula"
+        verbose_name_plural = "Fórmulas"
+        ordering = ["producto_id", "-version"]
+        unique_together = [["producto", "version"]]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["producto"],
+                condition=Q(activa=True),
+                name="formula_una_activa_por_producto",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.producto.name} v{self.version}"
+
+
+class FormulaComponente(models.Model):
+    """Materia prima de una fórmula: cantidad por cantidad_base de producto."""
+
+    formula = models.ForeignKey(
+        Formula,
+        on_delete=models.CASCADE,
+        related_name="componentes",
+        verbose_name="Fórmula",
+    )
+    materia_prima = models.ForeignKey(
+        "materia_prima.MateriaPrima",
+        on_delete=models.PROTECT,
+        related_name="componentes_formula",
+        verbose_name="Materia Prima",
+    )
+    cantidad = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        validators=[MinValueValidator(Decimal("0.000001"))],
+        verbose_name="Cantidad",
+    )
+    unidad = models.ForeignKey(
+        "unidad.Unidad",
+        on_delete=models.PROTECT,
+        related_name="componentes_formula",
+        verbose_name="Unidad",
+        help_text="Unidad de la cantidad; se convierte a la unidad de la materia prima",
+    )
+
+    class Meta:
+        db_table = "formula_componente"
+        verbose_name = "Componente de Fórmula"
+        verbose_name_plural = "Componentes de Fórmula"
+        unique_together = [["formula", "materia_prima"]]
+
+    def __str__(self):
+        return f"{self.formula} - {self.materia_prima_id} {self.cantidad}"
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Max
+from rest_framework import serializers
+
+from innoquim.apps.producto.models import Producto
+
+from .models import Formula, FormulaComponente
+
+
+class FormulaComponenteSerializer(serializers.ModelSerializer):
+    materia_prima_nombre = serializers.CharField(source="materia_prima.nombre", read_only=True)
+    materia_prima_codigo = serializers.CharField(source="materia_prima.codigo", read_only=True)
+    unidad_simbolo = serializers.CharField(source="unidad.simbolo", read_only=True)
+
+    class Meta:
+        model = FormulaComponente
+        fields = [
+            "id",
+            "materia_prima",
+            "materia_prima_nombre",
+            "materia_prima_codigo",
+            "cantidad",
+            "unidad",
+            "unidad_simbolo",
+        ]
+
+
+class FormulaSerializer(serializers.ModelSerializer):
+    """
+    Fórmula con sus componentes.
+
+    Al crear, la versión se numera sola (última del producto + 1) y, si la
+    nueva queda activa, se desactiva la anterior. Las fórmulas no se editan:
+    un cambio de receta es una nueva versión.
+    """
+
+    producto_nombre = serializers.CharField(source="producto.name", read_only=True)
+    unidad_simbolo = serializers.CharField(source="unidad.simbolo", read_only=True)
+    componentes = FormulaComponenteSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = Formula
+        fields = [
+            "id",
+            "producto",
+            "producto_nombre",
+            "version",
+            "cantidad_base",
+            "unidad",
+            "unidad_simbolo",
+            "activa",
+            "observaciones",
+            "componentes",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["version", "created_at", "updated_at"]
+
+    def validate_componentes(self, componentes):
+        materias = [c["materia_prima"].pk for c in componentes]
+        if len(materias) != len(set(materias)):
+            raise serializers.ValidationError("Una materia prima aparece más de una vez")
+        return componentes
+
+    @transaction.atomic
+    def create(self, validated_data):
+        componentes = validated_data.pop("componentes")
+        producto = validated_data["producto"]
+
+        # Numeración de versiones serializada sobre la fila del producto
+        Producto.objects.select_for_update().filter(pk=producto.pk).exists()
+        ultima = Formula.objects.filter(producto=producto).aggregate(v=Max("version"))["v"]
+        if validated_data.get("activa", True):
+            Formula.objects.filter(producto=producto, activa=True).update(activa=False)
+
+        formula = Formula.objects.create(version=(ultima or 0) + 1, **validated_data)
+        FormulaComponente.objects.bulk_create(
+            FormulaComponente(formula=formula, **componente) for componente in componentes
+        )
+        return formula
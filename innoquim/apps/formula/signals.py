@@ -0,0 +1,20 @@
+"""
+Signals de Formula: invalidan la capacidad de producción en caché cuando
+cambia una fórmula o sus componentes.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .capacidad import invalidar
+from .models import Formula, FormulaComponente
+
+
+@receiver(post_save, sender=Formula)
+@receiver(post_delete, sender=Formula)
+@receiver(post_save, sender=FormulaComponente)
+@receiver(post_delete, sender=FormulaComponente)
+def formula_modificada(sender, **kwargs):
+    # Después del commit: los componentes se insertan en bloque tras la fórmula
+    transaction.on_commit(invalidar)
@@ -0,0 +1,164 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .explosion import explotar_lotes
+from .serializers import FormulaSerializer
+
+
+class ExplosionFormulaTest(TestCase):
+    """Tests para la explosión de fórmulas en lotes de producción"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.producto.models import Producto
+        from innoquim.apps.unidad.models import Unidad
+        from innoquim.apps.usuario.models import Usuario
+
+        self.kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        self.g = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion="0.001")
+        self.litro = Unidad.objects.create(nombre="Litro", simbolo="L", factor_conversion=1)
+        materia = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        terminado = Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT")
+        self.almacen = Almacen.objects.create(nombre="Planta", direccion="-")
+        self.usuario = Usuario.objects.create_user(
+            email="jefe@innoquim.com", username="jefe", name="Jefe", password="x"
+        )
+        self.producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=self.litro, weight=1,
+            categoria_id=terminado,
+        )
+        self.materias = [
+            MateriaPrima.objects.create(
+                nombre=f"Materia {i}", codigo=f"MP-{i}", unidad_id=self.kg,
+                categoria_id=materia, costo_promedio=2,
+            )
+            for i in range(60)
+        ]
+        # Rinde 100 L; los componentes se expresan en gramos
+        self.formula = FormulaSerializer().create({
+            "producto": self.producto,
+            "cantidad_base": Decimal("100"),
+            "unidad": self.litro,
+            "componentes": [
+                {"materia_prima": mp, "cantidad": Decimal("500"), "unidad": self.g}
+                for mp in self.materias
+            ],
+        })
+
+    def _lote(self, codigo, cantidad):
+        from innoquim.apps.lote_produccion.models import LoteProduccion
+
+        return LoteProduccion.objects.create(
+            product=self.producto, batch_code=codigo, production_date=date(2026, 1, 5),
+            produced_quantity=cantidad, unit=self.litro, almacen=self.almacen,
+            production_manager=self.usuario,
+        )
+
+    def test_explota_varios_lotes_con_conversion_de_unidades(self):
+        """Test que 60 componentes de varios lotes se creen en pocas consultas"""
+        lotes = [self._lote(f"L-{i}", 200 * (i + 1)) for i in range(5)]
+
+        with CaptureQueriesContext(connection) as consultas:
+            materiales = explotar_lotes(lotes)
+
+        # No crece con los lotes ni los componentes (SQLite parte el INSERT
+        # por su límite de parámetros)
+        self.assertLessEqual(len(consultas), 10)
+
+        self.assertEqual(len(materiales), 300)
+        # 500 g por 100 L -> 200 L = 1 kg; 1000 L = 5 kg
+        primero = lotes[0].materiales.get(raw_material=self.materias[0])
+        self.assertEqual(primero.used_quantity, Decimal("1.0000"))
+        self.assertEqual(primero.unit, self.kg)
+        lotes[4].refresh_from_db()
+        self.assertEqual(lotes[4].formula, self.formula)
+        self.assertEqual(lotes[4].costo_materiales, Decimal("600.00"))
+
+        # Nueva versión: la anterior queda inactiva y los lotes ya explotados no cambian
+        nueva = FormulaSerializer().create({
+            "producto": self.producto,
+            "unidad": self.litro,
+            "componentes": [
+                {"materia_prima": self.materias[0], "cantidad": Decimal("1"), "unidad": self.kg}
+            ],
+        })
+        self.formula.refresh_from_db()
+        self.assertEqual(nueva.version, 2)
+        self.assertFalse(self.formula.activa)
+        with self.assertRaises(ValueError):
+            explotar_lotes(lotes[:1])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CapacidadProduccionTest(TestCase):
+    """Tests para la cantidad máxima fabricable"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.producto.models import Producto
+        from innoquim.apps.unidad.models import Unidad
+
+        cache.clear()
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        g = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion="0.001")
+        litro = Unidad.objects.create(nombre="Litro", simbolo="L", factor_conversion=1)
+        materia = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="Planta", direccion="-")
+        self.producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=litro, weight=1,
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        self.acido = MateriaPrima.objects.create(
+            nombre="Ácido", codigo="AC", unidad_id=kg, categoria_id=materia
+        )
+        self.soda = MateriaPrima.objects.create(
+            nombre="Soda", codigo="SODA", unidad_id=kg, categoria_id=materia
+        )
+        # Por 100 L: 500 g de ácido y 2 kg de soda
+        with self.captureOnCommitCallbacks(execute=True):
+            FormulaSerializer().create({
+                "producto": self.producto, "cantidad_base": Decimal("100"), "unidad": litro,
+                "componentes": [
+                    {"materia_prima": self.acido, "cantidad": Decimal("500"), "unidad": g},
+                    {"materia_prima": self.soda, "cantidad": Decimal("2"), "unidad": kg},
+                ],
+            })
+        self._entrada(self.acido, 1)
+        self._entrada(self.soda, 3)
+
+    def _entrada(self, materia, cantidad):
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.inventario.signals import actualizar_inventario_material_bulk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            actualizar_inventario_material_bulk(Kardex.registrar_movimientos_bulk([{
+                "almacen": self.almacen, "item": materia, "tipo_movimiento": "ENTRADA",
+                "motivo": "COMPRA", "cantidad": cantidad, "costo_unitario": 1,
+            }]))
+
+    def test_limitante_y_cache_invalidada_por_movimientos(self):
+        """Test que el máximo sea el del componente limitante y se refresque al mover stock"""
+        from .capacidad import obtener_capacidad
+
+        capacidad = obtener_capacidad()["productos"][0]
+        # Ácido: 1 kg / 0.005 = 200 L; soda: 3 kg / 0.02 = 150 L
+        self.assertEqual(capacidad["maximo"], Decimal("150.00"))
+        self.assertEqual(capacidad["limitante"], self.soda.pk)
+
+        # Servido desde caché
+        with self.assertNumQueries(1):
+            obtener_capacidad(producto_ids=[self.producto.pk])
+
+        self._entrada(self.soda, 2)
+        capacidad = obtener_capacidad()["productos"][0]
+        self.assertEqual(capacidad["maximo"], Decimal("200.00"))
+        self.assertEqual(capacidad["limitante"], self.acido.pk)
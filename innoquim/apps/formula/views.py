@@ -0,0 +1,105 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import explosion
+from .capacidad import obtener_capacidad
+from .models import Formula
+from .serializers import FormulaSerializer
+
+
+class FormulaViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Fórmulas (listas de materiales) versionadas por producto.
+
+    Endpoints:
+    - POST /api/formulas/ - Nueva versión con sus componentes
+    - POST /api/formulas/{id}/activar/ - Vuelve a usar esta versión
+    - GET  /api/formulas/{id}/explotar/?cantidad=250&unidad=3 - Materias
+      primas para fabricar esa cantidad (unidad opcional: la de la fórmula)
+    - GET  /api/formulas/capacidad/?producto=7&almacen=1 - Cantidad máxima
+      fabricable con el stock actual (producto y almacén opcionales)
+
+    Filtros: producto, activa
+    """
+
+    queryset = Formula.objects.all().select_related("producto", "unidad").prefetch_related(
+        "componentes__materia_prima", "componentes__unidad"
+    )
+    serializer_class = FormulaSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["producto", "activa"]
+
+    @action(detail=True, methods=["post"])
+    @transaction.atomic
+    def activar(self, request, pk=None):
+        formula = self.get_object()
+        Formula.objects.filter(producto_id=formula.producto_id, activa=True).exclude(
+            pk=formula.pk
+        ).update(activa=False)
+        formula.activa = True
+        formula.save(update_fields=["activa", "updated_at"])
+        return Response(self.get_serializer(formula).data)
+
+    @action(detail=True, methods=["get"])
+    def explotar(self, request, pk=None):
+        formula = self.get_object()
+        try:
+            cantidad = Decimal(request.query_params.get("cantidad", formula.cantidad_base))
+            unidad_id = int(request.query_params.get("unidad", formula.unidad_id))
+            if cantidad <= 0:
+                raise ValueError("La cantidad debe ser mayor que 0")
+            lineas = explosion.explotar([{
+                "producto_id": formula.producto_id,
+                "cantidad": cantidad,
+                "unidad_id": unidad_id,
+                "formula": formula,
+            }])[0]
+        except (InvalidOperation, ValueError, KeyError):
+            return Response(
+                {"error": "Parámetros inválidos: cantidad debe ser un número positivo y unidad un ID existente"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            "formula": formula.id,
+            "cantidad": cantidad,
+            "unidad": unidad_id,
+            "materiales": [
+                {
+                    "materia_prima": linea["materia_prima"].pk,
+                    "nombre": linea["materia_prima"].nombre,
+                    "cantidad": linea["cantidad"],
+                    "unidad": linea["unidad_id"],
+                    "costo_estimado": (
+                        linea["cantidad"] * linea["materia_prima"].costo_promedio
+                    ).quantize(Decimal("0.01")),
+                }
+                for linea in lineas
+            ],
+        })
+
+    @action(detail=False, methods=["get"])
+    def capacidad(self, request):
+        """
+        Cantidad máxima fabricable de cada producto con fórmula activa según
+        el stock de materias primas (de un almacén o de todos), y la materia
+        prima que la limita. Se sirve desde caché.
+        """
+        from innoquim.apps.almacen.services import obtener_almacen
+
+        try:
+            almacen_id = request.query_params.get("almacen")
+            if almacen_id is not None:
+                if obtener_almacen(almacen_id) is None:
+                    raise ValueError(f"No existe el almacén {almacen_id}")
+                almacen_id = int(almacen_id)
+            producto_ids = request.query_params.getlist("producto") or None
+            if producto_ids is not None:
+                producto_ids = [int(pk) for pk in producto_ids]
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(obtener_capacidad(almacen_id, producto_ids))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Kardex
+from .models import Kardex, LoteInventario
 
 
 @admin.register(Kardex)
@@ -72,3 +72,29 @@ class KardexAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Deshabilitar edición manual"""
         return False
+
+
+@admin.register(LoteInventario)
+class LoteInventarioAdmin(admin.ModelAdmin):
+    """Lotes de inventario (solo lectura: se mueven con inventario.lotes)"""
+
+    list_display = [
+        "codigo_lote",
+        "object_id",
+        "almacen",
+        "fecha_vencimiento",
+        "cantidad_inicial",
+        "cantidad_disponible",
+    ]
+    list_filter = ["almacen", "fecha_vencimiento"]
+    search_fields = ["codigo_lote", "object_id"]
+    ordering = ["fecha_vencimiento", "fecha_ingreso"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,181 @@
+"""
+Alertas de stock bajo (stock <= stock_minimo) con cantidad sugerida de reorden.
+
+Dos vistas:
+
+- Por almacén: saldos de InventarioMaterial (que el Kardex mantiene al día)
+  contra el stock_minimo del item. La lista de cada almacén se guarda en
+  caché (Redis) y se refresca item por item cada vez que un movimiento
+  actualiza InventarioMaterial (ver refrescar_items, llamado desde
+  upsert_inventario_material), sin volver a consultar todo el almacén.
+- Global: MateriaPrima.stock / Producto.stock contra stock_minimo, con los
+  índices parciales *_stock_bajo_idx (solo contienen las filas en alerta).
+
+Cantidad sugerida: hasta stock_maximo si está definido (> 0); si no, hasta
+stock_minimo.
+
+Las listas en caché expiran con el TIMEOUT de CACHES: si dos movimientos
+del mismo almacén se refrescan a la vez y uno pisa al otro, el error dura
+como máximo hasta la siguiente expiración.
+"""
+
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from innoquim.apps.almacen.models import Almacen
+from innoquim.apps.inventario_material.models import InventarioMaterial
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+
+logger = logging.getLogger(__name__)
+
+CLAVE_CACHE = "inventario:stock_bajo:{}"
+
+# modelo -> (tipo, campo código, campo nombre)
+TIPOS = {
+    MateriaPrima: ("materia_prima", "codigo", "nombre"),
+    Producto: ("producto", "product_code", "name"),
+}
+
+
+def cantidad_sugerida(cantidad, stock_minimo, stock_maximo):
+    """Cantidad a pedir para llegar a stock_maximo (o a stock_minimo si no hay máximo)."""
+    objetivo = stock_maximo if stock_maximo else stock_minimo
+    return max(objetivo - cantidad, 0)
+
+
+def _fila(item, almacen_id, cantidad):
+    tipo, campo_codigo, campo_nombre = TIPOS[type(item)]
+    return {
+        "item_tipo": tipo,
+        "item_id": str(item.pk),
+        "codigo": getattr(item, campo_codigo),
+        "nombre": getattr(item, campo_nombre),
+        "almacen_id": almacen_id,
+        "cantidad": cantidad,
+        "stock_minimo": item.stock_minimo,
+        "stock_maximo": item.stock_maximo,
+        "cantidad_sugerida": cantidad_sugerida(cantidad, item.stock_minimo, item.stock_maximo),
+    }
+
+
+def consultar_almacen(almacen_id, claves=None):
+    """
+    Items con saldo <= stock_minimo en un almacén, según InventarioMaterial.
+
+    claves: lista opcional de (content_type_id, object_id) para consultar
+    solo esos items. Retorna {(content_type_id, object_id): fila}.
+    """
+    filas = {}
+    for modelo in TIPOS:
+        content_type = ContentType.objects.get_for_model(modelo)
+        inventario = InventarioMaterial.objects.filter(
+            almacen_id=almacen_id, content_type=content_type
+        )
+        if claves is not None:
+            object_ids = [obj for ct, obj in claves if ct == content_type.pk]
+            if not object_ids:
+                continue
+            inventario = inventario.filter(object_id__in=object_ids)
+
+        pk = OuterRef("object_id")
+        if modelo is Producto:
+            pk = Cast(pk, IntegerField())
+        # Un solo acceso por PK al item de cada fila de inventario
+        minimo = modelo.objects.filter(pk=pk).values("stock_minimo")[:1]
+        bajos = dict(
+            inventario.annotate(_stock_minimo=Subquery(minimo))
+            .filter(cantidad__lte=F("_stock_minimo"))
+            .values_list("object_id", "cantidad")
+        )
+        if not bajos:
+            continue
+        ids = [int(obj) for obj in bajos] if modelo is Producto else list(bajos)
+        for item in modelo.objects.filter(pk__in=ids):
+            filas[(content_type.pk, str(item.pk))] = _fila(
+                item, almacen_id, bajos[str(item.pk)]
+            )
+    return filas
+
+
+def consultar_global():
+    """Items cuyo stock total es <= stock_minimo (usa los índices parciales)."""
+    filas = []
+    for modelo in TIPOS:
+        for item in modelo.objects.filter(stock__lte=F("stock_minimo")).order_by("pk"):
+            filas.append(_fila(item, None, item.stock))
+    return filas
+
+
+def items_stock_bajo(almacen_id):
+    """
+    Lista de items en alerta en un almacén, desde la caché si está disponible.
+    Retorna (filas ordenadas por tipo y código, fecha de cálculo).
+    """
+    datos = _leer_cache(almacen_id)
+    if datos is None:
+        datos = {"items": consultar_almacen(almacen_id), "fecha": timezone.now()}
+        _guardar_cache(almacen_id, datos)
+    filas = sorted(datos["items"].values(), key=lambda f: (f["item_tipo"], f["codigo"]))
+    return filas, datos["fecha"]
+
+
+def resumen_stock_bajo():
+    """Cantidad de items en alerta por almacén (y por tipo de item)."""
+    resumen = []
+    for almacen_id, nombre in Almacen.objects.order_by("id").values_list("id", "nombre"):
+        filas, fecha = items_stock_bajo(almacen_id)
+        resumen.append({
+            "almacen_id": almacen_id,
+            "almacen_nombre": nombre,
+            "total": len(filas),
+            "materia_prima": sum(1 for f in filas if f["item_tipo"] == "materia_prima"),
+            "producto": sum(1 for f in filas if f["item_tipo"] == "producto"),
+            "fecha": fecha,
+        })
+    return resumen
+
+
+def refrescar_items(claves):
+    """
+    Actualiza en caché el estado de unos (content_type_id, object_id, almacen_id)
+    después de un movimiento. Solo toca almacenes que ya estén en caché; los
+    demás se calculan completos en la siguiente consulta.
+    """
+    por_almacen = {}
+    for content_type_id, object_id, almacen_id in claves:
+        por_almacen.setdefault(almacen_id, set()).add((content_type_id, str(object_id)))
+
+    for almacen_id, items in por_almacen.items():
+        datos = _leer_cache(almacen_id)
+        if datos is None:
+            continue
+        actuales = consultar_almacen(almacen_id, claves=items)
+        for clave in items:
+            if clave in actuales:
+                datos["items"][clave] = actuales[clave]
+            else:
+                datos["items"].pop(clave, None)
+        datos["fecha"] = timezone.now()
+        _guardar_cache(almacen_id, datos)
+
+
+def _leer_cache(almacen_id):
+    try:
+        return cache.get(CLAVE_CACHE.format(almacen_id))
+    except Exception as e:
+        # Sin Redis se calcula directo de la BD
+        logger.warning(f"Caché de stock bajo no disponible: {str(e)}")
+        return None
+
+
+def _guardar_cache(almacen_id, datos):
+    try:
+        cache.set(CLAVE_CACHE.format(almacen_id), datos)
+    except Exception as e:
+        logger.warning(f"Caché de stock bajo no disponible: {str(e)}")
@@ -0,0 +1,265 @@
+"""
+Analítica de valorización del Kardex con arreglos NumPy.
+
+Valor de inventario por almacén, costo de ventas por periodo y tendencia del
+costo promedio se calculan sin recorrer filas con Decimal:
+
+1. cargar_libro() lee las columnas del Kardex con values_list ya convertidas
+   a enteros en la BD (montos en centavos, cantidades en centésimas) y las
+   vuelca a arreglos int64 con np.fromiter.
+2. La variación de cada movimiento se obtiene restando el saldo guardado del
+   saldo anterior del mismo (item, almacén). Se usan los saldos del Kardex y
+   no la cantidad del movimiento: así se respetan las salidas valoradas al
+   costo promedio y los recortes de saldo negativo.
+3. Las variaciones se suman por (grupo, periodo) y se acumulan con cumsum
+   a lo largo de los periodos: el saldo al cierre de cada mes.
+
+Todo es aritmética entera, así que la conversión final a Decimal es exacta.
+Los periodos son meses, codificados como año * 12 + mes - 1.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from itertools import chain
+
+import numpy as np
+from django.db.models import BigIntegerField, Case, F, IntegerField, Value, When, Window
+from django.db.models.functions import Cast, DenseRank, ExtractMonth, ExtractYear, Round
+
+from .models import Kardex
+
+MOTIVOS = [codigo for codigo, _ in Kardex.ORIGEN_CHOICES]
+
+
+def a_decimal(valor, decimales=2):
+    """Convierte un entero en unidades de 10^-decimales a Decimal exacto."""
+    return Decimal(int(valor)).scaleb(-decimales)
+
+
+def etiqueta_periodo(periodo):
+    """año * 12 + mes - 1 -> 'AAAA-MM'"""
+    return f"{periodo // 12:04d}-{periodo % 12 + 1:02d}"
+
+
+def codigo_periodo(fecha):
+    """Fecha -> año * 12 + mes - 1"""
+    return fecha.year * 12 + fecha.month - 1
+
+
+class LibroKardex:
+    """
+    Columnas del Kardex como arreglos int64, ordenadas por
+    (item, almacén, fecha, id).
+
+    items: lista de (content_type_id, object_id); item[i] es su posición.
+    """
+
+    def __init__(self, items, item, almacen, periodo, salida, motivo, saldo_cantidad, saldo_total):
+        self.items = items
+        self.item = item
+        self.almacen = almacen
+        self.periodo = periodo
+        self.salida = salida.astype(bool)
+        self.motivo = motivo
+        self.saldo_cantidad = saldo_cantidad
+        self.saldo_total = saldo_total
+
+        # Primera fila de cada (item, almacén) y número de grupo de cada fila
+        self.inicio = np.ones(len(item), dtype=bool)
+        self.inicio[1:] = (item[1:] != item[:-1]) | (almacen[1:] != almacen[:-1])
+        self.grupo = np.cumsum(self.inicio) - 1
+
+        self.delta_cantidad = _variaciones(saldo_cantidad, self.inicio)
+        self.delta_valor = _variaciones(saldo_total, self.inicio)
+
+        self.almacenes, self.almacen_idx = np.unique(almacen, return_inverse=True)
+        if len(periodo):
+            self.primer_periodo = int(periodo.min())
+            self.periodos = int(periodo.max()) - self.primer_periodo + 1
+        else:
+            self.primer_periodo = 0
+            self.periodos = 0
+
+    def __len__(self):
+        return len(self.item)
+
+    def etiquetas(self):
+        return [etiqueta_periodo(self.primer_periodo + i) for i in range(self.periodos)]
+
+    def acumular(self, filas, valores):
+        """
+        Suma valores por (fila, periodo) y los acumula a lo largo de los
+        periodos. Retorna una matriz int64 (filas x periodos).
+        """
+        n = int(filas.max()) + 1 if len(filas) else 0
+        columnas = self.periodo - self.primer_periodo
+        matriz = np.zeros(n * self.periodos, dtype=np.int64)
+        # add.at es exacto en int64 (bincount con weights pasa por float64)
+        np.add.at(matriz, filas * self.periodos + columnas, valores)
+        return matriz.reshape(n, self.periodos).cumsum(axis=1)
+
+
+def _variaciones(saldos, inicio):
+    """Saldo menos el saldo anterior del mismo grupo (el primero, contra 0)."""
+    variaciones = np.empty_like(saldos)
+    if len(saldos):
+        variaciones[0] = saldos[0]
+        np.subtract(saldos[1:], saldos[:-1], out=variaciones[1:])
+        variaciones[inicio] = saldos[inicio]
+    return variaciones
+
+
+def _entero(campo, factor):
+    return Cast(Round(F(campo) * factor), output_field=BigIntegerField())
+
+
+def cargar_libro(hasta=None, almacen=None, content_type=None, object_ids=None, chunk_size=10000):
+    """
+    Lee el Kardex hasta una fecha como LibroKardex.
+
+    Siempre se lee desde el primer movimiento: el saldo al cierre de un mes
+    depende de toda la historia anterior. Para acotar la salida por fecha de
+    inicio se filtran los periodos del resultado.
+    """
+    queryset = Kardex.objects.all()
+    if isinstance(hasta, datetime):
+        queryset = queryset.filter(fecha__lte=hasta)
+    elif hasta:
+        # Una fecha sin hora incluye todo ese día
+        queryset = queryset.filter(fecha__date__lte=hasta)
+    if almacen:
+        queryset = queryset.filter(almacen_id=almacen)
+    if content_type:
+        queryset = queryset.filter(content_type=content_type)
+    if object_ids is not None:
+        queryset = queryset.filter(object_id__in=[str(o) for o in object_ids])
+
+    items = list(
+        queryset.order_by("content_type_id", "object_id")
+        .values_list("content_type_id", "object_id")
+        .distinct()
+    )
+
+    filas = (
+        queryset.annotate(
+            _item=Window(
+                DenseRank(), order_by=[F("content_type_id").asc(), F("object_id").asc()]
+            ),
+            _periodo=ExtractYear("fecha") * 12 + ExtractMonth("fecha") - 1,
+            _salida=Case(
+                When(tipo_movimiento="SALIDA", then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            _motivo=Case(
+                *[When(motivo=m, then=Value(i)) for i, m in enumerate(MOTIVOS)],
+                default=Value(-1),
+                output_field=IntegerField(),
+            ),
+            _saldo_cantidad=_entero("saldo_cantidad", 100),
+            _saldo_total=_entero("saldo_costo_total", 100),
+        )
+        .order_by("content_type_id", "object_id", "almacen_id", "fecha", "id")
+        .values_list(
+            "_item", "almacen_id", "_periodo", "_salida", "_motivo",
+            "_saldo_cantidad", "_saldo_total",
+        )
+    )
+    datos = np.fromiter(
+        chain.from_iterable(filas.iterator(chunk_size=chunk_size)), dtype=np.int64
+    ).reshape(-1, 7)
+
+    item, almacen_id, periodo, salida, motivo, saldo_cantidad, saldo_total = datos.T
+    return LibroKardex(
+        items, item - 1, almacen_id, periodo, salida, motivo, saldo_cantidad, saldo_total
+    )
+
+
+def valor_por_almacen(libro, desde=None):
+    """
+    Valor del inventario de cada almacén al cierre de cada periodo.
+
+    Retorna {"periodos": ["AAAA-MM", ...], "almacenes": {almacen_id: [Decimal, ...]}}
+    """
+    matriz = libro.acumular(libro.almacen_idx, libro.delta_valor)
+    inicio = _columna_desde(libro, desde)
+    return {
+        "periodos": libro.etiquetas()[inicio:],
+        "almacenes": {
+            int(almacen_id): [a_decimal(v) for v in matriz[i, inicio:]]
+            for i, almacen_id in enumerate(libro.almacenes)
+        },
+    }
+
+
+def costo_ventas_por_periodo(libro, motivos=("VENTA",), desde=None):
+    """
+    Costo de las salidas por periodo (por defecto, solo ventas), valoradas
+    como quedaron en el Kardex: la baja de saldo_costo_total de cada SALIDA.
+
+    Retorna [("AAAA-MM", Decimal), ...]
+    """
+    codigos = [MOTIVOS.index(m) for m in motivos]
+    mascara = libro.salida & np.isin(libro.motivo, codigos)
+    costos = np.zeros(libro.periodos, dtype=np.int64)
+    np.add.at(costos, libro.periodo[mascara] - libro.primer_periodo, -libro.delta_valor[mascara])
+    inicio = _columna_desde(libro, desde)
+    return list(zip(libro.etiquetas()[inicio:], [a_decimal(c) for c in costos[inicio:]]))
+
+
+def saldos_por_periodo(libro, desde=None):
+    """
+    Saldo corriente de cada (item, almacén) al cierre de cada periodo.
+
+    Retorna {"periodos": [...], "saldos": {(content_type_id, object_id, almacen_id):
+    [(cantidad, valor), ...]}} con Decimal de 2 decimales.
+    """
+    cantidades = libro.acumular(libro.grupo, libro.delta_cantidad)
+    valores = libro.acumular(libro.grupo, libro.delta_valor)
+    inicio = _columna_desde(libro, desde)
+    primeras = np.flatnonzero(libro.inicio)
+    saldos = {}
+    for grupo, fila in enumerate(primeras):
+        content_type_id, object_id = libro.items[libro.item[fila]]
+        saldos[(content_type_id, object_id, int(libro.almacen[fila]))] = [
+            (a_decimal(c), a_decimal(v))
+            for c, v in zip(cantidades[grupo, inicio:], valores[grupo, inicio:])
+        ]
+    return {"periodos": libro.etiquetas()[inicio:], "saldos": saldos}
+
+
+def tendencia_costo_promedio(libro, desde=None):
+    """
+    Costo promedio de cada item (todos sus almacenes) al cierre de cada
+    periodo: saldo en valor / saldo en cantidad, a 4 decimales con
+    redondeo ROUND_HALF_UP como Kardex. None si no hay saldo.
+
+    Retorna {"periodos": [...], "items": {(content_type_id, object_id): [Decimal | None, ...]}}
+    """
+    cantidades = libro.acumular(libro.item, libro.delta_cantidad)
+    valores = libro.acumular(libro.item, libro.delta_valor)
+
+    # centavos / centésimas = precio; x 10^4 para 4 decimales, redondeo half-up
+    positivos = cantidades > 0
+    divisor = np.where(positivos, cantidades, 1)
+    promedios = np.sign(valores) * (
+        (2 * np.abs(valores) * 10000 + divisor) // (2 * divisor)
+    )
+
+    inicio = _columna_desde(libro, desde)
+    return {
+        "periodos": libro.etiquetas()[inicio:],
+        "items": {
+            libro.items[i]: [
+                a_decimal(p, 4) if hay_saldo else None
+                for p, hay_saldo in zip(promedios[i, inicio:], positivos[i, inicio:])
+            ]
+            for i in range(len(cantidades))
+        },
+    }
+
+
+def _columna_desde(libro, desde):
+    if desde is None:
+        return 0
+    return min(max(codigo_periodo(desde) - libro.primer_periodo, 0), libro.periodos)
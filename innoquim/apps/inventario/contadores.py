@@ -0,0 +1,100 @@
+"""
+Contadores de stock desnormalizados (MateriaPrima.stock, Producto.stock).
+
+Todas las variaciones se aplican en la BD con UPDATEs atómicos, sin leer
+el valor anterior en Python:
+
+    UPDATE materia_prima
+       SET stock = stock + CASE id WHEN %s THEN %s ... END
+     WHERE id IN (...)
+       AND stock >= CASE id WHEN %s THEN %s ... ELSE stock END
+    RETURNING id
+
+Dos procesos que descuentan el mismo item a la vez no pierden
+actualizaciones (cada UPDATE bloquea la fila y parte del valor vigente), no
+se reescribe el resto de columnas y muchos items se ajustan en un solo
+UPDATE por lote. Con validar=True la guarda de disponibilidad forma parte
+del mismo UPDATE: los items sin stock suficiente no se tocan y se reportan.
+"""
+
+from decimal import Decimal
+
+from django.db import connection
+
+CERO = Decimal("0")
+
+
+def _case(columna, valores, params, otro=None):
+    ramas = " ".join("WHEN %s THEN %s" for _ in valores)
+    for pk, valor in valores:
+        params.extend([pk, valor])
+    otro = f" ELSE {otro}" if otro else ""
+    return f"CASE {columna} {ramas}{otro} END"
+
+
+def ajustar_stock(modelo, variaciones, validar=True, batch_size=500):
+    """
+    Suma a stock la variación de cada item (negativa para descontar).
+
+    variaciones: {pk: variación}; las variaciones en cero se ignoran.
+    validar: solo descuenta si stock >= cantidad a descontar (las entradas
+        no tienen guarda).
+
+    Retorna la lista de pks que no se actualizaron: sin stock suficiente o
+    inexistentes. El resto queda aplicado aunque alguno falle; quien
+    necesite todo o nada debe llamarla dentro de transaction.atomic y
+    revertir si la lista no está vacía.
+    """
+    variaciones = [
+        (pk, Decimal(str(variacion)))
+        for pk, variacion in variaciones.items()
+        if variacion
+    ]
+    if not variaciones:
+        return []
+
+    opts = modelo._meta
+    tabla = connection.ops.quote_name(opts.db_table)
+    columna_pk = connection.ops.quote_name(opts.pk.column)
+    columna_stock = connection.ops.quote_name(opts.get_field("stock").column)
+
+    aplicados = set()
+    for inicio in range(0, len(variaciones), batch_size):
+        lote = variaciones[inicio:inicio + batch_size]
+        params = []
+        sql = (
+            f"UPDATE {tabla} SET {columna_stock} = {columna_stock} + "
+            f"{_case(columna_pk, lote, params)} "
+            f"WHERE {columna_pk} IN ({', '.join(['%s'] * len(lote))})"
+        )
+        params.extend(pk for pk, _ in lote)
+        descuentos = [(pk, -variacion) for pk, variacion in lote if variacion < CERO]
+        if validar and descuentos:
+            sql += (
+                f" AND {columna_stock} >= "
+                f"{_case(columna_pk, descuentos, params, otro=columna_stock)}"
+            )
+        sql += f" RETURNING {columna_pk}"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            aplicados.update(str(fila[0]) for fila in cursor.fetchall())
+
+    return [pk for pk, _ in variaciones if str(pk) not in aplicados]
+
+
+def descontar_stock(modelo, cantidades, validar=True, batch_size=500):
+    """
+    Descuenta {pk: cantidad} del stock. Retorna los pks que no pasaron la
+    guarda de disponibilidad (ver ajustar_stock).
+    """
+    return ajustar_stock(
+        modelo,
+        {pk: -Decimal(str(cantidad)) for pk, cantidad in cantidades.items()},
+        validar=validar,
+        batch_size=batch_size,
+    )
+
+
+def sumar_stock(modelo, cantidades, batch_size=500):
+    """Suma {pk: cantidad} al stock."""
+    return ajustar_stock(modelo, cantidades, validar=False, batch_size=batch_size)
@@ -0,0 +1,388 @@
+"""
+Conteos físicos de inventario (ConteoInventario / ConteoItem).
+
+Un conteo completo de un almacén son miles de items: todo se hace por
+lotes, sin una llamada ni una escritura de Kardex por item.
+
+- iniciar_conteo: foto de los saldos del Kardex del almacén (una consulta)
+  guardada con bulk_create
+- registrar_conteos: carga cantidades contadas (CSV o JSON). Cada carga lee
+  el saldo del sistema de esos items en ese momento (una consulta) y guarda
+  cantidad, saldo y diferencia con un solo upsert. Como la diferencia se
+  mide contra el saldo al contar, las entradas y salidas registradas
+  durante el conteo no aparecen como diferencia.
+- finalizar_conteo: registra todas las diferencias como ajustes (ENTRADA o
+  SALIDA, motivo AJUSTE) con un solo Kardex.registrar_movimientos_bulk, al
+  costo promedio vigente. Los sobrantes quedan como un lote CONTEO<id> y
+  los faltantes se descuentan de los lotes por FEFO. Los movimientos posteriores al conteo se
+  conservan: el ajuste se aplica sobre el saldo actual.
+
+Las filas repetidas de un item en la misma carga se suman (un item contado
+en varias ubicaciones); cargar de nuevo un item reemplaza su conteo.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from innoquim.apps.almacen.models import Almacen
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+from innoquim.apps.recepcion_material.services import ImportacionError
+
+from .contadores import ajustar_stock
+from .lotes import consumir_lotes, registrar_ingresos
+from .models import ConteoInventario, ConteoItem, Kardex
+from .signals import actualizar_inventario_material_bulk
+
+CERO = Decimal("0.00")
+
+# tipo -> (modelo, campo código, campo nombre, campo de costo si no hay saldo)
+TIPOS = {
+    "materiaprima": (MateriaPrima, "codigo", "nombre", "costo_promedio"),
+    "producto": (Producto, "product_code", "name", "costo_unitario"),
+}
+
+CAMPOS_CONTEO = ["cantidad_contada", "cantidad_sistema", "diferencia", "fecha_conteo"]
+
+
+def _bloquear_abierto(conteo):
+    """Relee el conteo bloqueándolo y verifica que siga abierto."""
+    conteo = ConteoInventario.objects.select_for_update().get(pk=conteo.pk)
+    if conteo.estado != "ABIERTO":
+        raise ValueError(f"El conteo está {conteo.get_estado_display().lower()}")
+    return conteo
+
+
+def _nombres(claves):
+    """{(content_type_id, object_id): (código, nombre)} con una consulta por tipo."""
+    nombres = {}
+    for tipo, (modelo, campo_codigo, campo_nombre, _) in TIPOS.items():
+        content_type = ContentType.objects.get_for_model(modelo)
+        ids = [obj for ct, obj in claves if ct == content_type.pk]
+        if not ids:
+            continue
+        if modelo is Producto:
+            ids = [int(i) for i in ids]
+        for pk, codigo, nombre in modelo.objects.filter(pk__in=ids).values_list(
+            "pk", campo_codigo, campo_nombre
+        ):
+            nombres[(content_type.pk, str(pk))] = (codigo, nombre)
+    return nombres
+
+
+@transaction.atomic
+def iniciar_conteo(almacen, usuario=None, observaciones=None, batch_size=1000):
+    """
+    Abre un conteo del almacén con el saldo actual de cada item que tiene
+    movimientos en él. Lanza ValueError si el almacén ya tiene un conteo abierto.
+    """
+    # Un conteo abierto por almacén: se serializa sobre la fila del almacén
+    Almacen.objects.select_for_update().filter(pk=almacen.pk).exists()
+    if ConteoInventario.objects.filter(almacen=almacen, estado="ABIERTO").exists():
+        raise ValueError(f"El almacén {almacen.nombre} ya tiene un conteo abierto")
+
+    conteo = ConteoInventario.objects.create(
+        almacen=almacen, responsable=usuario, observaciones=observaciones
+    )
+    saldos = Kardex.ultimos_saldos(almacen=almacen)
+    nombres = _nombres({(ct, obj) for ct, obj, _ in saldos})
+    ConteoItem.objects.bulk_create(
+        [
+            ConteoItem(
+                conteo=conteo,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                codigo=nombres[(content_type_id, object_id)][0],
+                nombre=nombres[(content_type_id, object_id)][1],
+                cantidad_esperada=saldo[0],
+            )
+            for (content_type_id, object_id, _), saldo in saldos.items()
+            # Movimientos de items ya eliminados del catálogo
+            if (content_type_id, object_id) in nombres
+        ],
+        batch_size=batch_size,
+    )
+    return conteo
+
+
+def _validar_filas(filas):
+    """
+    Valida las filas y resuelve los items (por item_id o código) con dos
+    consultas por tipo como máximo.
+
+    Retorna {(content_type_id, object_id): (código, nombre, cantidad total)}.
+    Lanza ImportacionError con todas las filas inválidas.
+    """
+    if not filas:
+        raise ValueError("No hay filas de conteo")
+
+    errores = []
+    validas = []
+    for numero, fila in enumerate(filas, start=1):
+        errores_fila = {}
+        if not isinstance(fila, dict):
+            errores.append({"fila": numero, "errores": {"fila": "Debe ser un objeto"}})
+            continue
+        tipo = str(fila.get("tipo") or "materiaprima").lower()
+        if tipo not in TIPOS:
+            errores_fila["tipo"] = "Use materiaprima o producto"
+        item_id = str(fila.get("item_id") or "").strip()
+        codigo = str(fila.get("codigo") or "").strip()
+        if not item_id and not codigo:
+            errores_fila["item"] = "Indique item_id o codigo"
+        try:
+            cantidad = Decimal(str(fila.get("cantidad"))).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            )
+            if cantidad < 0:
+                errores_fila["cantidad"] = "No puede ser negativa"
+        except (InvalidOperation, ValueError):
+            errores_fila["cantidad"] = "Cantidad inválida"
+        if errores_fila:
+            errores.append({"fila": numero, "errores": errores_fila})
+        else:
+            validas.append((numero, tipo, item_id, codigo, cantidad))
+
+    encontrados = {}
+    for tipo, (modelo, campo_codigo, campo_nombre, _) in TIPOS.items():
+        content_type = ContentType.objects.get_for_model(modelo)
+        ids = {v[2] for v in validas if v[1] == tipo and v[2]}
+        codigos = {v[3] for v in validas if v[1] == tipo and not v[2]}
+        if modelo is Producto:
+            ids = {int(i) for i in ids if i.isdigit()}
+        if not ids and not codigos:
+            continue
+        filtro = Q(pk__in=ids) | Q(**{f"{campo_codigo}__in": codigos})
+        for pk, codigo, nombre in modelo.objects.filter(filtro).values_list(
+            "pk", campo_codigo, campo_nombre
+        ):
+            datos = (content_type.pk, str(pk), codigo, nombre)
+            encontrados[(tipo, "id", str(pk))] = datos
+            encontrados[(tipo, "codigo", codigo)] = datos
+
+    items = {}
+    for numero, tipo, item_id, codigo, cantidad in validas:
+        datos = encontrados.get(
+            (tipo, "id", item_id) if item_id else (tipo, "codigo", codigo)
+        )
+        if datos is None:
+            errores.append({"fila": numero, "errores": {"item": f"No existe {tipo} {item_id or codigo}"}})
+            continue
+        clave = (datos[0], datos[1])
+        anterior = items.get(clave, (None, None, CERO))[2]
+        items[clave] = (datos[2], datos[3], anterior + cantidad)
+
+    if errores:
+        raise ImportacionError(sorted(errores, key=lambda e: e["fila"]))
+    return items
+
+
+@transaction.atomic
+def registrar_conteos(conteo, filas, batch_size=1000):
+    """
+    Carga cantidades contadas en un conteo abierto.
+
+    filas: lista de dicts con cantidad e item_id o codigo, y opcionalmente
+    tipo (materiaprima por defecto). Todo o nada: si una fila es inválida no
+    se guarda ninguna (ImportacionError).
+
+    Retorna dict con 'items' cargados y 'con_diferencia'.
+    """
+    conteo = _bloquear_abierto(conteo)
+    items = _validar_filas(filas)
+
+    saldos = Kardex.ultimos_saldos(
+        {(ct, obj, conteo.almacen_id) for ct, obj in items}
+    )
+    ahora = timezone.now()
+    lineas = []
+    for (content_type_id, object_id), (codigo, nombre, cantidad) in items.items():
+        saldo = saldos.get((content_type_id, object_id, conteo.almacen_id), (CERO,))[0]
+        lineas.append(
+            ConteoItem(
+                conteo=conteo,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                codigo=codigo,
+                nombre=nombre,
+                cantidad_contada=cantidad,
+                cantidad_sistema=saldo,
+                diferencia=cantidad - saldo,
+                fecha_conteo=ahora,
+            )
+        )
+    # Items fuera de la foto inicial (sin movimientos al iniciar) se agregan
+    ConteoItem.objects.bulk_create(
+        lineas,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["conteo", "content_type", "object_id"],
+        update_fields=CAMPOS_CONTEO,
+    )
+    return {
+        "items": len(lineas),
+        "con_diferencia": sum(1 for linea in lineas if linea.diferencia != 0),
+    }
+
+
+@transaction.atomic
+def finalizar_conteo(conteo, usuario=None, no_contados_en_cero=False, batch_size=1000):
+    """
+    Registra las diferencias del conteo en el Kardex y lo cierra.
+
+    Parámetros:
+        no_contados_en_cero: si es True, los items de la foto inicial que no
+            se contaron se toman como contados en 0 (se da de baja su saldo);
+            si es False, se dejan sin ajuste.
+
+    Retorna dict con 'ajustes', 'entradas', 'salidas' y 'no_contados'.
+    """
+    conteo = _bloquear_abierto(conteo)
+    ahora = timezone.now()
+    pendientes = conteo.items.filter(cantidad_contada__isnull=True)
+
+    no_contados = 0
+    if no_contados_en_cero:
+        # Saldo actual de cada item no contado, en un solo UPDATE
+        saldo_actual = Kardex.objects.filter(
+            content_type_id=OuterRef("content_type_id"),
+            object_id=OuterRef("object_id"),
+            almacen_id=conteo.almacen_id,
+        ).order_by("-fecha", "-id").values("saldo_cantidad")[:1]
+        no_contados = pendientes.update(
+            cantidad_contada=CERO,
+            cantidad_sistema=Coalesce(Subquery(saldo_actual), Value(CERO)),
+            fecha_conteo=ahora,
+        )
+        conteo.items.filter(fecha_conteo=ahora, diferencia__isnull=True).update(
+            diferencia=F("cantidad_contada") - F("cantidad_sistema")
+        )
+    else:
+        no_contados = pendientes.count()
+
+    ajustes = list(
+        conteo.items.exclude(diferencia=0)
+        .filter(diferencia__isnull=False)
+        .order_by("content_type_id", "object_id")
+        .values_list("content_type_id", "object_id", "diferencia")
+    )
+
+    # Items y costo promedio vigente: una consulta por tipo y una de saldos
+    objetos = {}
+    costo_item = {}
+    for tipo, (modelo, _, _, campo_costo) in TIPOS.items():
+        content_type = ContentType.objects.get_for_model(modelo)
+        ids = [obj for ct, obj, _ in ajustes if ct == content_type.pk]
+        if modelo is Producto:
+            ids = [int(i) for i in ids]
+        for item in modelo.objects.filter(pk__in=ids):
+            objetos[(content_type.pk, str(item.pk))] = item
+            costo_item[(content_type.pk, str(item.pk))] = getattr(item, campo_costo) or CERO
+    saldos = Kardex.ultimos_saldos(
+        {(ct, obj, conteo.almacen_id) for ct, obj, _ in ajustes}
+    )
+
+    referencia = f"CONTEO{conteo.id}"
+    movimientos = []
+    for content_type_id, object_id, diferencia in ajustes:
+        clave = (content_type_id, object_id)
+        if clave not in objetos:
+            continue
+        saldo = saldos.get((content_type_id, object_id, conteo.almacen_id))
+        costo = saldo[2] if saldo and saldo[0] > 0 else costo_item[clave]
+        movimientos.append({
+            "almacen": conteo.almacen,
+            "item": objetos[clave],
+            "tipo_movimiento": "ENTRADA" if diferencia > 0 else "SALIDA",
+            "motivo": "AJUSTE",
+            "cantidad": abs(diferencia),
+            "costo_unitario": costo,
+            "referencia_id": referencia,
+            "observaciones": f"Diferencia de conteo físico {referencia}",
+            "usuario": usuario,
+        })
+
+    kardex = Kardex.registrar_movimientos_bulk(movimientos, batch_size=batch_size)
+    actualizar_inventario_material_bulk(kardex)
+
+    # Los sobrantes entran como un lote con la referencia del conteo, para
+    # que el consumo FEFO los alcance
+    registrar_ingresos(
+        [
+            {
+                "almacen": registro.almacen,
+                "item": objetos[(registro.content_type_id, str(registro.object_id))],
+                "codigo_lote": referencia,
+                "cantidad": registro.cantidad,
+                "costo_unitario": registro.costo_unitario,
+                "kardex": registro,
+                "referencia_id": referencia,
+            }
+            for registro in kardex
+            if registro.tipo_movimiento == "ENTRADA"
+        ],
+        batch_size=batch_size,
+    )
+
+    # Las bajas salen de los lotes por FEFO (primero los vencidos)
+    consumir_lotes(
+        [
+            {
+                "almacen": registro.almacen,
+                "item": objetos[(registro.content_type_id, str(registro.object_id))],
+                "cantidad": registro.cantidad,
+                "kardex": registro,
+                "referencia_id": referencia,
+            }
+            for registro in kardex
+            if registro.tipo_movimiento == "SALIDA"
+        ],
+        incluir_vencidos=True,
+        batch_size=batch_size,
+    )
+
+    # Stock total de cada item (las filas ya están bloqueadas por el Kardex)
+    _actualizar_stock(movimientos, batch_size)
+
+    conteo.estado = "FINALIZADO"
+    conteo.fecha_finalizacion = ahora
+    conteo.save(update_fields=["estado", "fecha_finalizacion"])
+
+    return {
+        "ajustes": len(movimientos),
+        "entradas": sum(1 for m in movimientos if m["tipo_movimiento"] == "ENTRADA"),
+        "salidas": sum(1 for m in movimientos if m["tipo_movimiento"] == "SALIDA"),
+        "no_contados": no_contados,
+    }
+
+
+def _actualizar_stock(movimientos, batch_size):
+    variacion = {}
+    for mov in movimientos:
+        signo = 1 if mov["tipo_movimiento"] == "ENTRADA" else -1
+        clave = (type(mov["item"]), mov["item"].pk)
+        variacion[clave] = variacion.get(clave, CERO) + signo * mov["cantidad"]
+
+    # El conteo físico manda: se ajusta sin guarda de disponibilidad
+    for modelo in {m for m, _ in variacion}:
+        ajustar_stock(
+            modelo,
+            {pk: cantidad for (m, pk), cantidad in variacion.items() if m is modelo},
+            validar=False,
+            batch_size=batch_size,
+        )
+
+
+@transaction.atomic
+def cancelar_conteo(conteo):
+    """Cierra un conteo abierto sin registrar ajustes."""
+    conteo = _bloquear_abierto(conteo)
+    conteo.estado = "CANCELADO"
+    conteo.fecha_finalizacion = timezone.now()
+    conteo.save(update_fields=["estado", "fecha_finalizacion"])
+    return conteo
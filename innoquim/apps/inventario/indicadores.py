@@ -0,0 +1,185 @@
+"""
+Cálculo periódico de indicadores de inventario (IndicadorInventario).
+
+Para cada MateriaPrima y Producto:
+
+- consumo del periodo: SALIDAS del Kardex de los últimos N días, agrupadas
+  en la BD (cantidad y valor al costo promedio con que salieron)
+- clase ABC por valor de consumo, por separado para materias primas y
+  productos: A hasta el 80% acumulado del valor, B hasta el 95%, C el resto
+  (los items sin consumo siempre son C)
+- rotación: consumo del periodo / stock actual
+- días de cobertura: stock actual / consumo diario promedio
+- bajo mínimo (stock <= stock_minimo) y sobre máximo (stock >= stock_maximo),
+  evaluados en la BD con las mismas reglas que las propiedades de Producto
+
+El resultado se escribe con un solo upsert por lotes y se borran los
+indicadores de items que ya no existen.
+"""
+
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import BooleanField, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+
+from .models import IndicadorInventario, Kardex
+
+UMBRAL_A = Decimal("0.80")
+UMBRAL_B = Decimal("0.95")
+CERO = Decimal("0.00")
+
+# (modelo, clave del resumen, campo código, campo nombre)
+CATALOGOS = (
+    (MateriaPrima, "materia_prima", "codigo", "nombre"),
+    (Producto, "producto", "product_code", "name"),
+)
+
+CAMPOS_ACTUALIZABLES = [
+    "codigo", "nombre", "stock", "stock_minimo", "stock_maximo",
+    "consumo_cantidad", "consumo_valor", "clase_abc", "rotacion", "dias_cobertura",
+    "bajo_minimo", "sobre_maximo", "dias_periodo", "fecha_calculo",
+]
+
+
+def consumos_por_item(desde):
+    """
+    {(content_type_id, object_id): (cantidad, valor)} de las SALIDAS desde una
+    fecha, agrupadas en una sola consulta. Las transferencias entre almacenes
+    no son consumo.
+    """
+    filas = (
+        Kardex.objects.filter(tipo_movimiento="SALIDA", fecha__gte=desde)
+        .exclude(motivo="TRANSFERENCIA")
+        .order_by()
+        .values("content_type_id", "object_id")
+        .annotate(
+            total_cantidad=Sum("cantidad"),
+            total_valor=Sum(
+                F("cantidad") * F("saldo_costo_promedio"),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            ),
+        )
+        .values_list("content_type_id", "object_id", "total_cantidad", "total_valor")
+    )
+    return {
+        (content_type_id, object_id): (
+            _redondear(cantidad, "0.01"),
+            _redondear(valor, "0.01"),
+        )
+        for content_type_id, object_id, cantidad, valor in filas
+    }
+
+
+def clasificar_abc(valores):
+    """
+    Clases ABC para una lista de valores de consumo (en el mismo orden).
+    Un item es A si el valor acumulado de los items más valiosos que él no
+    llega al 80% del total, B si no llega al 95%, y C en otro caso.
+    """
+    total = sum(valores, CERO)
+    clases = ["C"] * len(valores)
+    if total <= 0:
+        return clases
+    acumulado = CERO
+    for i in sorted(range(len(valores)), key=lambda i: valores[i], reverse=True):
+        if valores[i] <= 0:
+            break
+        participacion = acumulado / total
+        clases[i] = "A" if participacion < UMBRAL_A else "B" if participacion < UMBRAL_B else "C"
+        acumulado += valores[i]
+    return clases
+
+
+@transaction.atomic
+def calcular_indicadores(dias=90, batch_size=1000):
+    """
+    Recalcula IndicadorInventario para todo el catálogo.
+
+    Parámetros:
+        dias: largo del periodo de consumo (hacia atrás desde ahora)
+        batch_size: filas por INSERT
+
+    Retorna un resumen por tipo de item: items, clases A/B/C, bajo_minimo
+    y sobre_maximo.
+    """
+    if dias <= 0:
+        raise ValueError("dias debe ser mayor que 0")
+
+    ahora = timezone.now()
+    consumos = consumos_por_item(ahora - timedelta(days=dias))
+    resumen = {}
+    indicadores = []
+
+    for modelo, clave, campo_codigo, campo_nombre in CATALOGOS:
+        content_type = ContentType.objects.get_for_model(modelo)
+        filas = list(
+            modelo.objects.order_by()
+            .annotate(
+                _bajo_minimo=ExpressionWrapper(
+                    Q(stock__lte=F("stock_minimo")), output_field=BooleanField()
+                ),
+                _sobre_maximo=ExpressionWrapper(
+                    Q(stock_maximo__gt=0, stock__gte=F("stock_maximo")),
+                    output_field=BooleanField(),
+                ),
+            )
+            .values_list(
+                "pk", campo_codigo, campo_nombre, "stock", "stock_minimo", "stock_maximo",
+                "_bajo_minimo", "_sobre_maximo",
+            )
+        )
+        consumo = [consumos.get((content_type.pk, str(fila[0])), (CERO, CERO)) for fila in filas]
+        clases = clasificar_abc([valor for _, valor in consumo])
+
+        resumen[clave] = {"items": len(filas), "A": 0, "B": 0, "C": 0, "bajo_minimo": 0, "sobre_maximo": 0}
+        for fila, (cantidad, valor), clase in zip(filas, consumo, clases):
+            pk, codigo, nombre, stock, stock_minimo, stock_maximo, bajo, sobre = fila
+            resumen[clave][clase] += 1
+            resumen[clave]["bajo_minimo"] += bool(bajo)
+            resumen[clave]["sobre_maximo"] += bool(sobre)
+            indicadores.append(
+                IndicadorInventario(
+                    content_type=content_type,
+                    object_id=str(pk),
+                    codigo=codigo,
+                    nombre=nombre,
+                    stock=stock,
+                    stock_minimo=stock_minimo,
+                    stock_maximo=stock_maximo,
+                    consumo_cantidad=cantidad,
+                    consumo_valor=valor,
+                    clase_abc=clase,
+                    rotacion=_redondear(cantidad / stock, "0.01") if stock > 0 else None,
+                    dias_cobertura=(
+                        _redondear(stock * dias / cantidad, "0.1") if cantidad > 0 else None
+                    ),
+                    bajo_minimo=bool(bajo),
+                    sobre_maximo=bool(sobre),
+                    dias_periodo=dias,
+                    fecha_calculo=ahora,
+                )
+            )
+
+    IndicadorInventario.objects.bulk_create(
+        indicadores,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["content_type", "object_id"],
+        update_fields=CAMPOS_ACTUALIZABLES,
+    )
+    # Items eliminados del catálogo desde el cálculo anterior
+    IndicadorInventario.objects.filter(fecha_calculo__lt=ahora).delete()
+
+    return resumen
+
+
+def _redondear(valor, exponente):
+    if valor is None:
+        return CERO
+    return Decimal(valor).quantize(Decimal(exponente), rounding=ROUND_HALF_UP)
@@ -0,0 +1,207 @@
+"""
+Capa de lotes del inventario (LoteInventario / MovimientoLote) con consumo FEFO.
+
+El Kardex conserva el saldo agregado y el costo promedio de cada item; aquí
+se lleva cuánto queda de cada lote para consumir primero el que vence antes
+(FEFO; los lotes sin vencimiento van al final y, entre iguales, el que
+ingresó primero: FIFO).
+
+A diferencia de recorrer los lotes guardando uno por uno, cada llamada:
+
+1. Lee y bloquea (SELECT ... FOR UPDATE) en UNA consulta ordenada todos los
+   lotes con saldo de los items a consumir, en orden FEFO
+2. Reparte las cantidades en memoria
+3. Escribe los saldos con un bulk_update y los movimientos con un bulk_create
+
+El orden de la consulta (item, almacén, vencimiento) es el mismo para todas
+las llamadas, así que dos consumos concurrentes bloquean las filas en el
+mismo orden.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import LoteInventario, MovimientoLote
+
+CERO = Decimal("0.00")
+
+
+def _cantidad(valor):
+    """Cantidad redondeada como la guarda el Kardex (2 decimales)."""
+    return Decimal(str(valor)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _clave(item, almacen):
+    return (ContentType.objects.get_for_model(item).pk, str(item.pk), almacen.pk)
+
+
+def _filtro_claves(claves):
+    """Q que selecciona exactamente los (content_type_id, object_id, almacen_id) dados."""
+    grupos = {}
+    for content_type_id, object_id, almacen_id in claves:
+        grupos.setdefault((content_type_id, almacen_id), set()).add(object_id)
+    filtro = Q()
+    for (content_type_id, almacen_id), object_ids in grupos.items():
+        filtro |= Q(
+            content_type_id=content_type_id, almacen_id=almacen_id, object_id__in=object_ids
+        )
+    return filtro
+
+
+@transaction.atomic
+def registrar_ingresos(ingresos, batch_size=1000):
+    """
+    Registra entradas a lotes. Si el lote (item, almacén, código) ya existe,
+    se le suma la cantidad; si no, se crea.
+
+    Parámetros:
+        ingresos: lista de dicts con almacen, item, codigo_lote, cantidad y
+            opcionalmente costo_unitario, fecha_vencimiento, kardex y
+            referencia_id
+        batch_size: tamaño de lote para bulk_create / bulk_update
+
+    Retorna la lista de MovimientoLote creados.
+    """
+    if not ingresos:
+        return []
+
+    claves = {_clave(i["item"], i["almacen"]) for i in ingresos}
+    existentes = {
+        (lote.content_type_id, lote.object_id, lote.almacen_id, lote.codigo_lote): lote
+        for lote in LoteInventario.objects.select_for_update()
+        .filter(_filtro_claves(claves), codigo_lote__in={i["codigo_lote"] for i in ingresos})
+        .order_by("pk")
+    }
+
+    ahora = timezone.now()
+    nuevos = []
+    actualizados = {}
+    movimientos = []
+    for ingreso in ingresos:
+        cantidad = _cantidad(ingreso["cantidad"])
+        if cantidad <= 0:
+            raise ValueError("La cantidad de un ingreso a lote debe ser mayor que 0")
+        clave = _clave(ingreso["item"], ingreso["almacen"]) + (ingreso["codigo_lote"],)
+        lote = existentes.get(clave)
+        if lote is None:
+            lote = LoteInventario(
+                content_type_id=clave[0],
+                object_id=clave[1],
+                almacen_id=clave[2],
+                codigo_lote=ingreso["codigo_lote"],
+                fecha_vencimiento=ingreso.get("fecha_vencimiento"),
+                fecha_ingreso=ahora,
+                cantidad_inicial=cantidad,
+                cantidad_disponible=cantidad,
+                costo_unitario=ingreso.get("costo_unitario") or Decimal("0.0000"),
+            )
+            existentes[clave] = lote
+            nuevos.append(lote)
+        else:
+            lote.cantidad_inicial += cantidad
+            lote.cantidad_disponible += cantidad
+            if lote.pk:
+                actualizados[lote.pk] = lote
+        movimientos.append(
+            MovimientoLote(
+                lote=lote,
+                kardex=ingreso.get("kardex"),
+                tipo_movimiento="ENTRADA",
+                cantidad=cantidad,
+                saldo_lote=lote.cantidad_disponible,
+                referencia_id=ingreso.get("referencia_id"),
+            )
+        )
+
+    LoteInventario.objects.bulk_create(nuevos, batch_size=batch_size)
+    LoteInventario.objects.bulk_update(
+        actualizados.values(), ["cantidad_inicial", "cantidad_disponible"],
+        batch_size=batch_size,
+    )
+    return MovimientoLote.objects.bulk_create(movimientos, batch_size=batch_size)
+
+
+@transaction.atomic
+def consumir_lotes(consumos, incluir_vencidos=False, estricto=False, batch_size=1000):
+    """
+    Descuenta cantidades de los lotes por FEFO.
+
+    Parámetros:
+        consumos: lista de dicts con almacen, item, cantidad y opcionalmente
+            kardex y referencia_id (el movimiento de Kardex que origina la
+            salida). Un mismo item puede aparecer varias veces: se atiende
+            en el orden de la lista.
+        incluir_vencidos: si es False, los lotes vencidos no se consumen
+        estricto: si es True, lanza ValueError cuando los lotes no alcanzan;
+            si es False, lo que falte se reporta en 'sin_lote' (stock
+            anterior al control por lotes)
+
+    Retorna dict con:
+        'movimientos': MovimientoLote creados (SALIDA, uno por lote tocado)
+        'sin_lote': [(indice del consumo, cantidad no cubierta por lotes)]
+    """
+    if not consumos:
+        return {"movimientos": [], "sin_lote": []}
+
+    claves = [_clave(c["item"], c["almacen"]) for c in consumos]
+    queryset = LoteInventario.objects.select_for_update().filter(
+        _filtro_claves(set(claves)), cantidad_disponible__gt=0
+    )
+    if not incluir_vencidos:
+        queryset = queryset.filter(
+            Q(fecha_vencimiento__isnull=True) | Q(fecha_vencimiento__gte=timezone.localdate())
+        )
+
+    # Una sola consulta ordenada: por item/almacén y, dentro de cada uno, FEFO
+    disponibles = {}
+    for lote in queryset.order_by(
+        "content_type_id", "object_id", "almacen_id",
+        F("fecha_vencimiento").asc(nulls_last=True), "fecha_ingreso", "id",
+    ):
+        disponibles.setdefault(
+            (lote.content_type_id, lote.object_id, lote.almacen_id), []
+        ).append(lote)
+
+    tocados = {}
+    movimientos = []
+    sin_lote = []
+    for indice, (consumo, clave) in enumerate(zip(consumos, claves)):
+        pendiente = _cantidad(consumo["cantidad"])
+        lotes = disponibles.get(clave, [])
+        while pendiente > 0 and lotes:
+            lote = lotes[0]
+            usado = min(pendiente, lote.cantidad_disponible)
+            lote.cantidad_disponible -= usado
+            pendiente -= usado
+            tocados[lote.pk] = lote
+            movimientos.append(
+                MovimientoLote(
+                    lote=lote,
+                    kardex=consumo.get("kardex"),
+                    tipo_movimiento="SALIDA",
+                    cantidad=usado,
+                    saldo_lote=lote.cantidad_disponible,
+                    referencia_id=consumo.get("referencia_id"),
+                )
+            )
+            if lote.cantidad_disponible <= 0:
+                lotes.pop(0)
+        if pendiente > 0:
+            if estricto:
+                raise ValueError(
+                    f"Lotes insuficientes para el item {clave[1]} en el almacén {clave[2]}. "
+                    f"Faltan {pendiente}"
+                )
+            sin_lote.append((indice, pendiente))
+
+    LoteInventario.objects.bulk_update(
+        tocados.values(), ["cantidad_disponible"], batch_size=batch_size
+    )
+    return {
+        "movimientos": MovimientoLote.objects.bulk_create(movimientos, batch_size=batch_size),
+        "sin_lote": sin_lote,
+    }
@@ -0,0 +1,61 @@
+"""
+Recalcula los indicadores de inventario (ABC, rotación, cobertura, alertas).
+
+Uso:
+    python manage.py calcular_indicadores
+    python manage.py calcular_indicadores --dias 30
+    python manage.py calcular_indicadores --intervalo 3600   # tarea periódica
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from innoquim.apps.inventario.indicadores import calcular_indicadores
+
+
+class Command(BaseCommand):
+    help = "Precalcula clase ABC, rotación, días de cobertura y alertas de stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias", type=int, default=90, help="Días de consumo a considerar"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Filas por INSERT"
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Repetir cada N segundos (0 = ejecutar una vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.ejecutar(options)
+            except ValueError as e:
+                raise CommandError(str(e))
+            except DatabaseError as e:
+                if not options["intervalo"]:
+                    raise
+                self.stderr.write(self.style.ERROR(f"Cálculo de indicadores fallido: {e}"))
+
+            if not options["intervalo"]:
+                return
+            close_old_connections()
+            time.sleep(options["intervalo"])
+
+    def ejecutar(self, options):
+        inicio = time.monotonic()
+        resumen = calcular_indicadores(dias=options["dias"], batch_size=options["batch_size"])
+        duracion = time.monotonic() - inicio
+
+        for tipo, datos in resumen.items():
+            self.stdout.write(
+                f"{tipo:<15} items={datos['items']} A={datos['A']} B={datos['B']} C={datos['C']} "
+                f"bajo_minimo={datos['bajo_minimo']} sobre_maximo={datos['sobre_maximo']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Indicadores calculados en {duracion:.2f}s"))
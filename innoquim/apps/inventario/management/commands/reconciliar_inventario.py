@@ -0,0 +1,78 @@
+"""
+Reconcilia los contadores de stock con los saldos del Kardex.
+
+Uso:
+    python manage.py reconciliar_inventario                 # solo reporte
+    python manage.py reconciliar_inventario --reparar
+    python manage.py reconciliar_inventario --reparar --intervalo 3600   # tarea periódica
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from innoquim.apps.inventario.reconciliacion import reconciliar_inventario
+
+
+class Command(BaseCommand):
+    help = "Compara MateriaPrima/Producto/InventarioMaterial/InventarioProducto con el Kardex"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reparar", action="store_true", help="Corregir las diferencias encontradas"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Filas por UPDATE/INSERT"
+        )
+        parser.add_argument(
+            "--limite", type=int, default=50, help="Diferencias a listar en la salida"
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Repetir cada N segundos (0 = ejecutar una vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.ejecutar(options)
+            except DatabaseError as e:
+                # p. ej. conflicto de serialización: se reintenta en la siguiente vuelta
+                if not options["intervalo"]:
+                    raise
+                self.stderr.write(self.style.ERROR(f"Reconciliación fallida: {e}"))
+
+            if not options["intervalo"]:
+                return
+            close_old_connections()
+            time.sleep(options["intervalo"])
+
+    def ejecutar(self, options):
+        inicio = time.monotonic()
+        reporte = reconciliar_inventario(
+            reparar=options["reparar"],
+            batch_size=options["batch_size"],
+            limite_detalle=options["limite"],
+        )
+        duracion = time.monotonic() - inicio
+
+        for diferencia in reporte["diferencias"]:
+            almacen = f" almacén {diferencia['almacen']}" if diferencia["almacen"] else ""
+            self.stdout.write(
+                f"{diferencia['contador']}: {diferencia['item']}{almacen} "
+                f"actual={diferencia['actual']} esperado={diferencia['esperado']}"
+            )
+
+        total = 0
+        for contador, resumen in reporte["resumen"].items():
+            total += resumen["diferencias"]
+            self.stdout.write(
+                f"{contador:<30} revisados={resumen['revisados']} "
+                f"diferencias={resumen['diferencias']} reparados={resumen['reparados']}"
+            )
+
+        estilo = self.style.SUCCESS if not total or options["reparar"] else self.style.WARNING
+        self.stdout.write(estilo(f"{total} diferencias en {duracion:.2f}s"))
@@ -0,0 +1,67 @@
+"""
+Recalcula saldos y costos promedio del Kardex (replay en orden fecha, id).
+
+Uso:
+    python manage.py reconstruir_kardex                       # todo el Kardex
+    python manage.py reconstruir_kardex --item MP000001 --item MP000002
+    python manage.py reconstruir_kardex --procesos 4 --dry-run
+"""
+
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+
+from innoquim.apps.inventario.replay import reconstruir_kardex
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los saldos del Kardex tras correcciones o movimientos con fecha pasada"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--item",
+            action="append",
+            default=[],
+            help="ID de materia prima (MPnnnnnn) o de producto; repetible. Por defecto todos",
+        )
+        parser.add_argument("--procesos", type=int, default=1, help="Procesos en paralelo")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Solo contar las filas que cambiarían"
+        )
+
+    def handle(self, *args, **options):
+        items = None
+        if options["item"]:
+            items = [self.resolver_item(item) for item in options["item"]]
+
+        inicio = time.monotonic()
+        resultado = reconstruir_kardex(
+            items=items,
+            procesos=options["procesos"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        duracion = time.monotonic() - inicio
+
+        accion = "a corregir" if options["dry_run"] else "corregidos"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['items']} items, {resultado['movimientos']} movimientos, "
+                f"{resultado['corregidos']} {accion} en {duracion:.2f}s"
+            )
+        )
+
+    def resolver_item(self, item):
+        if item.upper().startswith("MP"):
+            modelo, pk = MateriaPrima, item.upper()
+        elif item.isdigit():
+            modelo, pk = Producto, int(item)
+        else:
+            raise CommandError(f"Item inválido: {item}")
+        if not modelo.objects.filter(pk=pk).exists():
+            raise CommandError(f"No existe el item {item}")
+        return (ContentType.objects.get_for_model(modelo).pk, str(pk))
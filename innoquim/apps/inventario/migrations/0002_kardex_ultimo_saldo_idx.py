@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventario', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kardex',
+            index=models.Index(fields=['content_type', 'object_id', 'almacen', '-fecha', '-id'], name='kardex_ultimo_saldo_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventario', '0002_kardex_ultimo_saldo_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicadorInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=8)),
+                ('codigo', models.CharField(max_length=50, verbose_name='Código')),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('stock', models.DecimalField(decimal_places=6, max_digits=12, verbose_name='Stock')),
+                ('stock_minimo', models.DecimalField(decimal_places=6, max_digits=10, verbose_name='Stock Mínimo')),
+                ('stock_maximo', models.DecimalField(blank=True, decimal_places=6, max_digits=10, null=True, verbose_name='Stock Máximo')),
+                ('consumo_cantidad', models.DecimalField(decimal_places=2, help_text='Suma de las SALIDAS del Kardex en los últimos dias_periodo días', max_digits=14, verbose_name='Consumo en el Periodo')),
+                ('consumo_valor', models.DecimalField(decimal_places=2, help_text='Salidas valoradas al costo promedio del Kardex', max_digits=15, verbose_name='Valor del Consumo')),
+                ('clase_abc', models.CharField(choices=[('A', 'A - alto valor de consumo'), ('B', 'B - valor de consumo medio'), ('C', 'C - bajo valor de consumo')], max_length=1, verbose_name='Clase ABC')),
+                ('rotacion', models.DecimalField(blank=True, decimal_places=2, help_text='Consumo del periodo / stock actual (vacío si no hay stock)', max_digits=12, null=True, verbose_name='Rotación')),
+                ('dias_cobertura', models.DecimalField(blank=True, decimal_places=1, help_text='Stock actual / consumo diario promedio (vacío si no hay consumo)', max_digits=12, null=True, verbose_name='Días de Cobertura')),
+                ('bajo_minimo', models.BooleanField(default=False, verbose_name='Bajo Mínimo')),
+                ('sobre_maximo', models.BooleanField(default=False, verbose_name='Sobre Máximo')),
+                ('dias_periodo', models.PositiveIntegerField(verbose_name='Días del Periodo')),
+                ('fecha_calculo', models.DateTimeField(verbose_name='Fecha de Cálculo')),
+                ('content_type', models.ForeignKey(limit_choices_to={'model__in': ('materiaprima', 'producto')}, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Indicador de Inventario',
+                'verbose_name_plural': 'Indicadores de Inventario',
+                'ordering': ['-consumo_valor', 'codigo'],
+                'indexes': [models.Index(fields=['content_type', 'clase_abc'], name='inventario__content_13032e_idx'), models.Index(fields=['bajo_minimo'], name='inventario__bajo_mi_96c5d1_idx'), models.Index(fields=['sobre_maximo'], name='inventario__sobre_m_c01d9e_idx'), models.Index(fields=['dias_cobertura'], name='inventario__dias_co_c156f5_idx')],
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
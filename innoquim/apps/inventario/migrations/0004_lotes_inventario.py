@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventario', '0003_indicador_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=8)),
+                ('codigo_lote', models.CharField(max_length=100, verbose_name='Código de Lote')),
+                ('fecha_vencimiento', models.DateField(blank=True, help_text='Vacía si el lote no vence (se consume después de los que sí vencen)', null=True, verbose_name='Fecha de Vencimiento')),
+                ('fecha_ingreso', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Ingreso')),
+                ('cantidad_inicial', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Cantidad Ingresada')),
+                ('cantidad_disponible', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Cantidad Disponible')),
+                ('costo_unitario', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=12, verbose_name='Costo Unitario de Ingreso')),
+                ('almacen', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='lotes_inventario', to='almacen.almacen', verbose_name='Almacén')),
+                ('content_type', models.ForeignKey(limit_choices_to={'model__in': ('materiaprima', 'producto')}, on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Lote de Inventario',
+                'verbose_name_plural': 'Lotes de Inventario',
+                'ordering': ['fecha_vencimiento', 'fecha_ingreso', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoLote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha del Movimiento')),
+                ('tipo_movimiento', models.CharField(choices=[('ENTRADA', 'Entrada'), ('SALIDA', 'Salida')], max_length=10, verbose_name='Tipo de Movimiento')),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Cantidad')),
+                ('saldo_lote', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Saldo del Lote después del Movimiento')),
+                ('referencia_id', models.CharField(blank=True, max_length=50, null=True, verbose_name='ID de Referencia')),
+                ('kardex', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos_lote', to='inventario.kardex', verbose_name='Movimiento de Kardex')),
+                ('lote', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='inventario.loteinventario', verbose_name='Lote')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Lote',
+                'verbose_name_plural': 'Movimientos de Lote',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='loteinventario',
+            index=models.Index(condition=models.Q(('cantidad_disponible__gt', 0)), fields=['content_type', 'object_id', 'almacen', 'fecha_vencimiento', 'fecha_ingreso'], name='lote_inventario_fefo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loteinventario',
+            index=models.Index(fields=['fecha_vencimiento'], name='inventario__fecha_v_6d1b11_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='loteinventario',
+            unique_together={('content_type', 'object_id', 'almacen', 'codigo_lote')},
+        ),
+        migrations.AddIndex(
+            model_name='movimientolote',
+            index=models.Index(fields=['referencia_id'], name='inventario__referen_931cad_idx'),
+        ),
+    ]
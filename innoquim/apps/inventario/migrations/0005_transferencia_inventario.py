@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventario', '0004_lotes_inventario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kardex',
+            name='motivo',
+            field=models.CharField(choices=[('COMPRA', 'Compra/Recepción'), ('PRODUCCION', 'Producción'), ('VENTA', 'Venta/Orden Cliente'), ('AJUSTE', 'Ajuste de Inventario'), ('DEVOLUCION', 'Devolución'), ('TRANSFERENCIA', 'Transferencia entre Almacenes')], max_length=20, verbose_name='Motivo del Movimiento'),
+        ),
+        migrations.CreateModel(
+            name='TransferenciaInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Transferencia')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('almacen_destino', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transferencias_entrada', to='almacen.almacen', verbose_name='Almacén de Destino')),
+                ('almacen_origen', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transferencias_salida', to='almacen.almacen', verbose_name='Almacén de Origen')),
+                ('responsable', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='Responsable')),
+            ],
+            options={
+                'verbose_name': 'Transferencia de Inventario',
+                'verbose_name_plural': 'Transferencias de Inventario',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransferenciaItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=8)),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Cantidad')),
+                ('costo_unitario', models.DecimalField(decimal_places=4, help_text='Costo promedio del almacén de origen al transferir', max_digits=12, verbose_name='Costo Unitario')),
+                ('content_type', models.ForeignKey(limit_choices_to={'model__in': ('materiaprima', 'producto')}, on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype')),
+                ('transferencia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='inventario.transferenciainventario', verbose_name='Transferencia')),
+            ],
+            options={
+                'verbose_name': 'Item de Transferencia',
+                'verbose_name_plural': 'Items de Transferencia',
+            },
+        ),
+    ]
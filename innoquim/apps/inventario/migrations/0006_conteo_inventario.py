@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventario', '0005_transferencia_inventario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('ABIERTO', 'Abierto'), ('FINALIZADO', 'Finalizado'), ('CANCELADO', 'Cancelado')], default='ABIERTO', max_length=10, verbose_name='Estado')),
+                ('fecha_inicio', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Inicio')),
+                ('fecha_finalizacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('almacen', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='conteos', to='almacen.almacen', verbose_name='Almacén')),
+                ('responsable', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='Responsable')),
+            ],
+            options={
+                'verbose_name': 'Conteo de Inventario',
+                'verbose_name_plural': 'Conteos de Inventario',
+                'ordering': ['-fecha_inicio', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConteoItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=8)),
+                ('codigo', models.CharField(max_length=50, verbose_name='Código')),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('cantidad_esperada', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Saldo del Kardex al iniciar el conteo', max_digits=12, verbose_name='Cantidad Esperada')),
+                ('cantidad_contada', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Cantidad Contada')),
+                ('cantidad_sistema', models.DecimalField(blank=True, decimal_places=2, help_text='Saldo del Kardex en el momento en que se cargó el conteo', max_digits=12, null=True, verbose_name='Cantidad en Sistema al Contar')),
+                ('diferencia', models.DecimalField(blank=True, decimal_places=2, help_text='cantidad_contada - cantidad_sistema', max_digits=12, null=True, verbose_name='Diferencia')),
+                ('fecha_conteo', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Conteo')),
+                ('content_type', models.ForeignKey(limit_choices_to={'model__in': ('materiaprima', 'producto')}, on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype')),
+                ('conteo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='inventario.conteoinventario', verbose_name='Conteo')),
+            ],
+            options={
+                'verbose_name': 'Item de Conteo',
+                'verbose_name_plural': 'Items de Conteo',
+                'ordering': ['codigo'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='conteoinventario',
+            index=models.Index(fields=['almacen', 'estado'], name='inventario__almacen_5f2c8b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conteoitem',
+            index=models.Index(fields=['conteo', 'diferencia'], name='inventario__conteo__58b7ad_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conteoitem',
+            unique_together={('conteo', 'content_type', 'object_id')},
+        ),
+    ]
@@ -1,10 +1,13 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 
+from innoquim.apps.unidad.conversion import normalizar_movimientos
+
 
 class Kardex(models.Model):
     """
@@ -29,6 +32,7 @@ class Kardex(models.Model):
         ("VENTA", "Venta/Orden Cliente"),
         ("AJUSTE", "Ajuste de Inventario"),
         ("DEVOLUCION", "Devolución"),
+        ("TRANSFERENCIA", "Transferencia entre Almacenes"),
     )
 
     fecha = models.DateTimeField(auto_now_add=True, verbose_name="Fecha del Movimiento")
@@ -104,6 +108,11 @@ class Kardex(models.Model):
             models.Index(fields=["almacen"]),
             models.Index(fields=["fecha"]),
             models.Index(fields=["tipo_movimiento"]),
+            # Último saldo por item/almacén (registrar_movimiento, ultimos_saldos)
+            models.Index(
+                fields=["content_type", "object_id", "almacen", "-fecha", "-id"],
+                name="kardex_ultimo_saldo_idx",
+            ),
         ]
 
     def __str__(self):
@@ -132,6 +141,7 @@ class Kardex(models.Model):
         referencia_id=None,
         observaciones=None,
         usuario=None,
+        unidad=None,
     ):
         """
         Método estático para registrar movimientos en el Kardex.
@@ -153,6 +163,9 @@ class Kardex(models.Model):
             referencia_id: ID de referencia (opcional)
             observaciones: Notas adicionales (opcional)
             usuario: Usuario que registra (opcional)
+            unidad: Unidad (o ID) de cantidad y costo_unitario si no es la
+                unidad base del item; se convierten antes de registrar
+                (opcional)
 
         Retorna:
             Objeto Kardex creado
@@ -173,6 +186,11 @@ class Kardex(models.Model):
         """
         from django.contrib.contenttypes.models import ContentType
 
+        if unidad is not None:
+            movimiento = normalizar_movimientos([{
+                "item": item, "unidad": unidad, "cantidad": cantidad, "costo_unitario": costo_unitario,
+            }])[0]
+            cantidad, costo_unitario = movimiento["cantidad"], movimiento["costo_unitario"]
         cantidad = Decimal(str(cantidad))
         costo_unitario = Decimal(str(costo_unitario))
 
@@ -188,15 +206,62 @@ class Kardex(models.Model):
             .first()
         )
 
-        # Saldos anteriores (si no hay registro previo, son 0)
+        # Calcular nuevos saldos según el tipo de movimiento
         if ultimo_kardex:
-            saldo_cantidad_anterior = ultimo_kardex.saldo_cantidad
-            saldo_costo_total_anterior = ultimo_kardex.saldo_costo_total
+            anterior = (
+                ultimo_kardex.saldo_cantidad,
+                ultimo_kardex.saldo_costo_total,
+                ultimo_kardex.saldo_costo_promedio,
+            )
+        else:
+            anterior = None
+        nuevo_saldo_cantidad, nuevo_saldo_costo_total, nuevo_costo_promedio = (
+            Kardex._calcular_saldo(tipo_movimiento, cantidad, costo_unitario, anterior)
+        )
+
+        # Crear el registro de Kardex
+        kardex = Kardex.objects.create(
+            almacen=almacen,
+            content_type=content_type,
+            object_id=item.pk,
+            tipo_movimiento=tipo_movimiento,
+            motivo=motivo,
+            cantidad=cantidad,
+            costo_unitario=costo_unitario,
+            saldo_cantidad=nuevo_saldo_cantidad,
+            saldo_costo_total=nuevo_saldo_costo_total,
+            saldo_costo_promedio=nuevo_costo_promedio,
+            referencia_id=referencia_id,
+            observaciones=observaciones,
+            usuario=usuario,
+        )
+
+        # Actualizar el costo_promedio en MateriaPrima si aplica
+        if content_type.model == "materiaprima":
+            from innoquim.apps.materia_prima.models import MateriaPrima
+
+            MateriaPrima.objects.filter(pk=item.pk).update(
+                costo_promedio=nuevo_costo_promedio
+            )
+
+        return kardex
+
+    @staticmethod
+    def _calcular_saldo(tipo_movimiento, cantidad, costo_unitario, anterior):
+        """
+        Calcula (saldo_cantidad, saldo_costo_total, saldo_costo_promedio)
+        después de un movimiento.
+
+        anterior: tupla (saldo_cantidad, saldo_costo_total, saldo_costo_promedio)
+        del último movimiento del item en el almacén, o None si no hay.
+        """
+        # Saldos anteriores (si no hay registro previo, son 0)
+        if anterior:
+            saldo_cantidad_anterior, saldo_costo_total_anterior, _ = anterior
         else:
             saldo_cantidad_anterior = Decimal("0.00")
             saldo_costo_total_anterior = Decimal("0.00")
 
-        # Calcular nuevos saldos según el tipo de movimiento
         if tipo_movimiento == "ENTRADA":
             # ENTRADA: Suma cantidad y costo
             nuevo_saldo_cantidad = saldo_cantidad_anterior + cantidad
@@ -216,8 +281,8 @@ class Kardex(models.Model):
             nuevo_saldo_cantidad = saldo_cantidad_anterior - cantidad
 
             # Obtener el costo promedio actual
-            if ultimo_kardex and ultimo_kardex.saldo_cantidad > 0:
-                costo_promedio_actual = ultimo_kardex.saldo_costo_promedio
+            if anterior and anterior[0] > 0:
+                costo_promedio_actual = anterior[2]
             else:
                 costo_promedio_actual = costo_unitario
 
@@ -236,33 +301,187 @@ class Kardex(models.Model):
         else:
             raise ValueError(f"Tipo de movimiento inválido: {tipo_movimiento}")
 
-        # Crear el registro de Kardex
-        kardex = Kardex.objects.create(
-            almacen=almacen,
-            content_type=content_type,
-            object_id=item.pk,
-            tipo_movimiento=tipo_movimiento,
-            motivo=motivo,
-            cantidad=cantidad,
-            costo_unitario=costo_unitario,
-            saldo_cantidad=nuevo_saldo_cantidad,
-            saldo_costo_total=nuevo_saldo_costo_total,
-            saldo_costo_promedio=nuevo_costo_promedio,
-            referencia_id=referencia_id,
-            observaciones=observaciones,
-            usuario=usuario,
+        return nuevo_saldo_cantidad, nuevo_saldo_costo_total, nuevo_costo_promedio
+
+    @staticmethod
+    def _redondear_saldo(saldo):
+        """Redondea un saldo como lo guarda la BD (2, 2 y 4 decimales)."""
+        cantidad, costo_total, costo_promedio = saldo
+        return (
+            cantidad.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            costo_total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            costo_promedio.quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP),
         )
 
-        # Actualizar el costo_promedio en MateriaPrima si aplica
-        if content_type.model == "materiaprima":
+    @staticmethod
+    @transaction.atomic
+    def registrar_movimientos_bulk(movimientos, batch_size=1000):
+        """
+        Registra muchos movimientos en el Kardex en pocas consultas.
+
+        Equivale a llamar registrar_movimiento() por cada movimiento, pero:
+        1. Bloquea los items involucrados en orden de PK (orden determinista,
+           sin deadlocks entre importaciones concurrentes)
+        2. Lee el último saldo de todos los (item, almacén) en una consulta
+        3. Ordena los movimientos por item/almacén (respetando el orden de
+           entrada dentro de cada uno) y encadena los saldos en memoria
+        4. Inserta todo con bulk_create y actualiza costo_promedio de las
+           materias primas con un único bulk_update
+
+        Parámetros:
+            movimientos: lista de dicts con las mismas claves que
+                registrar_movimiento() (almacen, item, tipo_movimiento, motivo,
+                cantidad, costo_unitario, referencia_id, observaciones, usuario,
+                unidad); las unidades se convierten sin consultas por línea
+            batch_size: tamaño de lote para bulk_create
+
+        Retorna:
+            Lista de objetos Kardex creados (agrupados por item/almacén)
+        """
+        from django.contrib.contenttypes.models import ContentType
+
+        if not movimientos:
+            return []
+        movimientos = normalizar_movimientos(movimientos)
+
+        preparados = []
+        for orden, mov in enumerate(movimientos):
+            content_type = ContentType.objects.get_for_model(mov["item"])
+            clave = (content_type.pk, str(mov["item"].pk), mov["almacen"].pk)
+            preparados.append((clave, orden, content_type, mov))
+        preparados.sort(key=lambda p: (p[0], p[1]))
+
+        Kardex.bloquear_items(mov["item"] for mov in movimientos)
+
+        saldos = Kardex.ultimos_saldos({p[0] for p in preparados})
+
+        registros = []
+        costo_promedio_mp = {}
+        for clave, _, content_type, mov in preparados:
+            cantidad = Decimal(str(mov["cantidad"]))
+            costo_unitario = Decimal(str(mov["costo_unitario"]))
+            # Redondear como lo guardaría la BD para encadenar el siguiente saldo
+            saldo_cantidad, saldo_costo_total, saldo_costo_promedio = (
+                Kardex._redondear_saldo(
+                    Kardex._calcular_saldo(
+                        mov["tipo_movimiento"], cantidad, costo_unitario, saldos.get(clave)
+                    )
+                )
+            )
+            saldos[clave] = (saldo_cantidad, saldo_costo_total, saldo_costo_promedio)
+
+            registros.append(
+                Kardex(
+                    almacen=mov["almacen"],
+                    content_type=content_type,
+                    object_id=mov["item"].pk,
+                    tipo_movimiento=mov["tipo_movimiento"],
+                    motivo=mov["motivo"],
+                    cantidad=cantidad,
+                    costo_unitario=costo_unitario,
+                    costo_total=(cantidad * costo_unitario).quantize(
+                        Decimal("0.01"), rounding=ROUND_HALF_UP
+                    ),
+                    saldo_cantidad=saldo_cantidad,
+                    saldo_costo_total=saldo_costo_total,
+                    saldo_costo_promedio=saldo_costo_promedio,
+                    referencia_id=mov.get("referencia_id"),
+                    observaciones=mov.get("observaciones"),
+                    usuario=mov.get("usuario"),
+                )
+            )
+            if content_type.model == "materiaprima":
+                costo_promedio_mp[mov["item"].pk] = saldo_costo_promedio
+
+        kardex = Kardex.objects.bulk_create(registros, batch_size=batch_size)
+
+        # Actualizar el costo_promedio en MateriaPrima (último movimiento de cada una)
+        if costo_promedio_mp:
             from innoquim.apps.materia_prima.models import MateriaPrima
 
-            MateriaPrima.objects.filter(pk=item.pk).update(
-                costo_promedio=nuevo_costo_promedio
+            MateriaPrima.objects.bulk_update(
+                [
+                    MateriaPrima(pk=pk, costo_promedio=costo)
+                    for pk, costo in costo_promedio_mp.items()
+                ],
+                ["costo_promedio"],
+                batch_size=batch_size,
             )
 
         return kardex
 
+    @staticmethod
+    def bloquear_items(items):
+        """
+        Bloquea (SELECT ... FOR UPDATE) las filas de varios items en un orden
+        determinista: por modelo y luego por PK. Dos transacciones que
+        bloqueen items en común los piden en el mismo orden y no se
+        bloquean mutuamente (sin deadlocks). Debe llamarse dentro de una
+        transacción.
+        """
+        pks_por_modelo = {}
+        for item in items:
+            pks_por_modelo.setdefault(type(item), set()).add(item.pk)
+        for modelo in sorted(pks_por_modelo, key=lambda m: m._meta.label):
+            list(
+                modelo.objects.select_for_update()
+                .filter(pk__in=pks_por_modelo[modelo])
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+
+    @staticmethod
+    def ultimos_saldos(claves=None, almacen=None):
+        """
+        Último saldo de varios (content_type_id, object_id, almacen_id) en
+        una sola consulta. Con claves=None retorna el de todos los items y
+        almacenes con movimientos (o solo los de almacen, si se indica).
+
+        Retorna:
+            dict clave -> (saldo_cantidad, saldo_costo_total, saldo_costo_promedio)
+            Las claves sin movimientos no aparecen en el resultado.
+        """
+        from django.db import connection
+
+        queryset = Kardex.objects.all()
+        if almacen is not None:
+            queryset = queryset.filter(almacen=almacen)
+        if claves is not None:
+            claves = set(claves)
+            if not claves:
+                return {}
+            queryset = queryset.filter(
+                content_type_id__in={c[0] for c in claves},
+                object_id__in={c[1] for c in claves},
+                almacen_id__in={c[2] for c in claves},
+            )
+        if connection.features.can_distinct_on_fields:
+            # PostgreSQL: DISTINCT ON toma la primera fila de cada grupo
+            queryset = queryset.order_by(
+                "content_type_id", "object_id", "almacen_id", "-fecha", "-id"
+            ).distinct("content_type_id", "object_id", "almacen_id")
+        else:
+            ultimo = Kardex.objects.filter(
+                content_type_id=OuterRef("content_type_id"),
+                object_id=OuterRef("object_id"),
+                almacen_id=OuterRef("almacen_id"),
+            ).order_by("-fecha", "-id")
+            queryset = queryset.filter(pk=Subquery(ultimo.values("pk")[:1]))
+
+        saldos = {}
+        for row in queryset.values_list(
+            "content_type_id",
+            "object_id",
+            "almacen_id",
+            "saldo_cantidad",
+            "saldo_costo_total",
+            "saldo_costo_promedio",
+        ):
+            clave = (row[0], row[1], row[2])
+            if claves is None or clave in claves:
+                saldos[clave] = (row[3], row[4], row[5])
+        return saldos
+
     @staticmethod
     def obtener_saldo_actual(almacen, item):
         """
@@ -428,3 +647,349 @@ class Devolucion(models.Model):
                 observaciones=f"Devolución de orden {self.orden_original.order_code if self.orden_original else 'N/A'}: {self.motivo}",
                 usuario=self.responsable,
             )
+
+
+class IndicadorInventario(models.Model):
+    """
+    Indicadores precalculados por item (MateriaPrima o Producto).
+
+    Tabla resumen que llena periódicamente el comando calcular_indicadores
+    (ver indicadores.py): los tableros filtran por estas columnas indexadas
+    en lugar de recorrer el catálogo evaluando propiedades en Python.
+    """
+
+    CLASE_ABC = (
+        ("A", "A - alto valor de consumo"),
+        ("B", "B - valor de consumo medio"),
+        ("C", "C - bajo valor de consumo"),
+    )
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        limit_choices_to={"model__in": ("materiaprima", "producto")},
+    )
+    object_id = models.CharField(max_length=8)
+    item = GenericForeignKey("content_type", "object_id")
+
+    codigo = models.CharField(max_length=50, verbose_name="Código")
+    nombre = models.CharField(max_length=255, verbose_name="Nombre")
+
+    stock = models.DecimalField(max_digits=12, decimal_places=6, verbose_name="Stock")
+    stock_minimo = models.DecimalField(max_digits=10, decimal_places=6, verbose_name="Stock Mínimo")
+    stock_maximo = models.DecimalField(
+        max_digits=10, decimal_places=6, null=True, blank=True, verbose_name="Stock Máximo"
+    )
+
+    consumo_cantidad = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Consumo en el Periodo",
+        help_text="Suma de las SALIDAS del Kardex en los últimos dias_periodo días",
+    )
+    consumo_valor = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Valor del Consumo",
+        help_text="Salidas valoradas al costo promedio del Kardex",
+    )
+    clase_abc = models.CharField(max_length=1, choices=CLASE_ABC, verbose_name="Clase ABC")
+    rotacion = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Rotación",
+        help_text="Consumo del periodo / stock actual (vacío si no hay stock)",
+    )
+    dias_cobertura = models.DecimalField(
+        max_digits=12,
+        decimal_places=1,
+        null=True,
+        blank=True,
+        verbose_name="Días de Cobertura",
+        help_text="Stock actual / consumo diario promedio (vacío si no hay consumo)",
+    )
+    bajo_minimo = models.BooleanField(default=False, verbose_name="Bajo Mínimo")
+    sobre_maximo = models.BooleanField(default=False, verbose_name="Sobre Máximo")
+
+    dias_periodo = models.PositiveIntegerField(verbose_name="Días del Periodo")
+    fecha_calculo = models.DateTimeField(verbose_name="Fecha de Cálculo")
+
+    class Meta:
+        verbose_name = "Indicador de Inventario"
+        verbose_name_plural = "Indicadores de Inventario"
+        ordering = ["-consumo_valor", "codigo"]
+        unique_together = ("content_type", "object_id")
+        indexes = [
+            models.Index(fields=["content_type", "clase_abc"]),
+            models.Index(fields=["bajo_minimo"]),
+            models.Index(fields=["sobre_maximo"]),
+            models.Index(fields=["dias_cobertura"]),
+        ]
+
+    def __str__(self):
+        return f"{self.codigo} - clase {self.clase_abc}"
+
+
+class LoteInventario(models.Model):
+    """
+    Capa de lotes del inventario: saldo de cada lote de un item en un almacén.
+
+    El Kardex sigue llevando el saldo agregado y el costo promedio; esta
+    tabla permite saber QUÉ lotes quedan, cuándo vencen y consumirlos por
+    FEFO (primero el que vence antes). Se llena al recibir material con
+    código de lote (RecepcionItem) y al completar lotes de producción, y se
+    descuenta con inventario.lotes.consumir_lotes.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.PROTECT,
+        limit_choices_to={"model__in": ("materiaprima", "producto")},
+    )
+    object_id = models.CharField(max_length=8)
+    item = GenericForeignKey("content_type", "object_id")
+    almacen = models.ForeignKey(
+        "almacen.Almacen",
+        on_delete=models.PROTECT,
+        related_name="lotes_inventario",
+        verbose_name="Almacén",
+    )
+
+    codigo_lote = models.CharField(max_length=100, verbose_name="Código de Lote")
+    fecha_vencimiento = models.DateField(
+        null=True, blank=True, verbose_name="Fecha de Vencimiento",
+        help_text="Vacía si el lote no vence (se consume después de los que sí vencen)",
+    )
+    fecha_ingreso = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Ingreso")
+
+    cantidad_inicial = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Cantidad Ingresada"
+    )
+    cantidad_disponible = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Cantidad Disponible"
+    )
+    costo_unitario = models.DecimalField(
+        max_digits=12, decimal_places=4, default=Decimal("0.0000"),
+        verbose_name="Costo Unitario de Ingreso",
+    )
+
+    class Meta:
+        verbose_name = "Lote de Inventario"
+        verbose_name_plural = "Lotes de Inventario"
+        ordering = ["fecha_vencimiento", "fecha_ingreso", "id"]
+        unique_together = ("content_type", "object_id", "almacen", "codigo_lote")
+        indexes = [
+            # Orden FEFO de los lotes con saldo (consumir_lotes)
+            models.Index(
+                fields=["content_type", "object_id", "almacen", "fecha_vencimiento", "fecha_ingreso"],
+                name="lote_inventario_fefo_idx",
+                condition=models.Q(cantidad_disponible__gt=0),
+            ),
+            models.Index(fields=["fecha_vencimiento"]),
+        ]
+
+    def __str__(self):
+        return f"{self.codigo_lote} - {self.object_id} ({self.cantidad_disponible})"
+
+
+class MovimientoLote(models.Model):
+    """
+    Movimiento de un lote: la parte de un movimiento de Kardex que entró o
+    salió de cada lote. Igual que el Kardex, no se modifica una vez creado.
+    """
+
+    lote = models.ForeignKey(
+        LoteInventario, on_delete=models.PROTECT, related_name="movimientos",
+        verbose_name="Lote",
+    )
+    kardex = models.ForeignKey(
+        Kardex, on_delete=models.PROTECT, null=True, blank=True,
+        related_name="movimientos_lote", verbose_name="Movimiento de Kardex",
+    )
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name="Fecha del Movimiento")
+    tipo_movimiento = models.CharField(
+        max_length=10, choices=Kardex.TIPO_OPERACION, verbose_name="Tipo de Movimiento"
+    )
+    cantidad = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Cantidad")
+    saldo_lote = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Saldo del Lote después del Movimiento"
+    )
+    referencia_id = models.CharField(
+        max_length=50, null=True, blank=True, verbose_name="ID de Referencia"
+    )
+
+    class Meta:
+        verbose_name = "Movimiento de Lote"
+        verbose_name_plural = "Movimientos de Lote"
+        ordering = ["-fecha", "-id"]
+        indexes = [
+            models.Index(fields=["referencia_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo_movimiento} - {self.lote.codigo_lote} - {self.cantidad}"
+
+
+class TransferenciaInventario(models.Model):
+    """
+    Transferencia de stock entre almacenes.
+
+    Se registra con inventario.transferencias.registrar_transferencia: por
+    cada línea una SALIDA en el almacén de origen y una ENTRADA en el de
+    destino (motivo TRANSFERENCIA), al costo promedio del origen, todo en
+    una sola transacción.
+    """
+
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Transferencia")
+    almacen_origen = models.ForeignKey(
+        "almacen.Almacen", on_delete=models.PROTECT,
+        related_name="transferencias_salida", verbose_name="Almacén de Origen",
+    )
+    almacen_destino = models.ForeignKey(
+        "almacen.Almacen", on_delete=models.PROTECT,
+        related_name="transferencias_entrada", verbose_name="Almacén de Destino",
+    )
+    observaciones = models.TextField(null=True, blank=True, verbose_name="Observaciones")
+    responsable = models.ForeignKey(
+        "usuario.Usuario", on_delete=models.PROTECT, null=True, blank=True,
+        verbose_name="Responsable",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Transferencia de Inventario"
+        verbose_name_plural = "Transferencias de Inventario"
+        ordering = ["-fecha", "-id"]
+
+    def __str__(self):
+        return f"TRF{self.id} - {self.almacen_origen} -> {self.almacen_destino}"
+
+
+class TransferenciaItem(models.Model):
+    """Línea de una transferencia: item, cantidad y costo con que se movió."""
+
+    transferencia = models.ForeignKey(
+        TransferenciaInventario, on_delete=models.CASCADE, related_name="items",
+        verbose_name="Transferencia",
+    )
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.PROTECT,
+        limit_choices_to={"model__in": ("materiaprima", "producto")},
+    )
+    object_id = models.CharField(max_length=8)
+    item = GenericForeignKey("content_type", "object_id")
+    cantidad = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Cantidad")
+    costo_unitario = models.DecimalField(
+        max_digits=12, decimal_places=4, verbose_name="Costo Unitario",
+        help_text="Costo promedio del almacén de origen al transferir",
+    )
+
+    class Meta:
+        verbose_name = "Item de Transferencia"
+        verbose_name_plural = "Items de Transferencia"
+
+    def __str__(self):
+        return f"{self.object_id} - {self.cantidad}"
+
+
+class ConteoInventario(models.Model):
+    """
+    Sesión de conteo físico (toma de inventario) de un almacén.
+
+    Flujo (ver inventario.conteos):
+    1. ABIERTO: al iniciar se guarda el saldo del Kardex de cada item del
+       almacén (cantidad_esperada)
+    2. Se cargan las cantidades contadas por lotes (CSV o JSON); cada carga
+       toma el saldo del sistema en ese momento, así los movimientos
+       ocurridos durante el conteo no se cuentan como diferencia
+    3. FINALIZADO: las diferencias se registran como ajustes en el Kardex
+       con una sola escritura por lotes
+    """
+
+    ESTADO_CHOICES = (
+        ("ABIERTO", "Abierto"),
+        ("FINALIZADO", "Finalizado"),
+        ("CANCELADO", "Cancelado"),
+    )
+
+    almacen = models.ForeignKey(
+        "almacen.Almacen", on_delete=models.PROTECT,
+        related_name="conteos", verbose_name="Almacén",
+    )
+    estado = models.CharField(
+        max_length=10, choices=ESTADO_CHOICES, default="ABIERTO", verbose_name="Estado"
+    )
+    fecha_inicio = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Inicio")
+    fecha_finalizacion = models.DateTimeField(
+        null=True, blank=True, verbose_name="Fecha de Finalización"
+    )
+    observaciones = models.TextField(null=True, blank=True, verbose_name="Observaciones")
+    responsable = models.ForeignKey(
+        "usuario.Usuario", on_delete=models.PROTECT, null=True, blank=True,
+        verbose_name="Responsable",
+    )
+
+    class Meta:
+        verbose_name = "Conteo de Inventario"
+        verbose_name_plural = "Conteos de Inventario"
+        ordering = ["-fecha_inicio", "-id"]
+        indexes = [
+            models.Index(fields=["almacen", "estado"]),
+        ]
+
+    def __str__(self):
+        return f"CONTEO{self.id} - {self.almacen} ({self.get_estado_display()})"
+
+
+class ConteoItem(models.Model):
+    """Línea de un conteo: saldo esperado, cantidad contada y diferencia."""
+
+    conteo = models.ForeignKey(
+        ConteoInventario, on_delete=models.CASCADE, related_name="items",
+        verbose_name="Conteo",
+    )
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.PROTECT,
+        limit_choices_to={"model__in": ("materiaprima", "producto")},
+    )
+    object_id = models.CharField(max_length=8)
+    item = GenericForeignKey("content_type", "object_id")
+    codigo = models.CharField(max_length=50, verbose_name="Código")
+    nombre = models.CharField(max_length=255, verbose_name="Nombre")
+
+    cantidad_esperada = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Cantidad Esperada",
+        help_text="Saldo del Kardex al iniciar el conteo",
+    )
+    cantidad_contada = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+        verbose_name="Cantidad Contada",
+    )
+    cantidad_sistema = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+        verbose_name="Cantidad en Sistema al Contar",
+        help_text="Saldo del Kardex en el momento en que se cargó el conteo",
+    )
+    diferencia = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+        verbose_name="Diferencia",
+        help_text="cantidad_contada - cantidad_sistema",
+    )
+    fecha_conteo = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Conteo")
+
+    class Meta:
+        verbose_name = "Item de Conteo"
+        verbose_name_plural = "Items de Conteo"
+        ordering = ["codigo"]
+        unique_together = ("conteo", "content_type", "object_id")
+        indexes = [
+            models.Index(fields=["conteo", "diferencia"]),
+        ]
+
+    def __str__(self):
+        return f"{self.codigo} - contado {self.cantidad_contada}"
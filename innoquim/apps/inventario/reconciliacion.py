@@ -0,0 +1,179 @@
+"""
+Motor de reconciliación de contadores de stock contra el Kardex.
+
+El Kardex es la fuente de verdad: el saldo del último movimiento de cada
+(item, almacén). El stock además está desnormalizado en:
+
+- MateriaPrima.stock           (suma de todos los almacenes)
+- Producto.stock               (suma de todos los almacenes)
+- InventarioMaterial.cantidad  (por item y almacén)
+- InventarioProducto.cantidad  (por producto y almacén)
+
+reconciliar_inventario() calcula los saldos del Kardex en una sola consulta,
+los compara con cada contador en memoria y, si se pide, corrige las
+diferencias con actualizaciones por lotes.
+
+Los items sin ningún movimiento en Kardex no se tocan: su stock se gestiona
+fuera del Kardex y no hay saldo contra el cual compararlo.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+
+from innoquim.apps.almacen.models import InventarioProducto
+from innoquim.apps.inventario_material.models import InventarioMaterial
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
+
+from .models import Kardex
+from .signals import upsert_inventario_material
+
+CERO = Decimal("0.00")
+
+
+def reconciliar_inventario(reparar=False, batch_size=1000, limite_detalle=500):
+    """
+    Compara los contadores de stock con los saldos del Kardex.
+
+    Parámetros:
+        reparar: si es True, corrige las diferencias encontradas
+        batch_size: filas por UPDATE/INSERT al reparar
+        limite_detalle: máximo de diferencias listadas en el detalle
+
+    Retorna:
+        dict con 'resumen' (por contador: revisados, diferencias, reparados)
+        y 'diferencias' (detalle de las primeras limite_detalle)
+
+    En PostgreSQL se ejecuta en REPEATABLE READ: todas las lecturas ven la
+    misma foto y, si un contador cambia mientras se repara, la transacción
+    falla en lugar de pisar el cambio (la siguiente ejecución lo reintenta).
+    """
+    # El nivel de aislamiento solo puede fijarse al inicio de la transacción
+    transaccion_externa = connection.in_atomic_block
+    with transaction.atomic():
+        if connection.vendor == "postgresql" and not transaccion_externa:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        return _reconciliar(reparar, batch_size, limite_detalle)
+
+
+def _reconciliar(reparar, batch_size, limite_detalle):
+    ct_mp = ContentType.objects.get_for_model(MateriaPrima)
+    ct_producto = ContentType.objects.get_for_model(Producto)
+
+    # Saldos autoritativos: {(content_type_id, object_id, almacen_id): cantidad}
+    saldos = {clave: saldo[0] for clave, saldo in Kardex.ultimos_saldos().items()}
+    totales = defaultdict(lambda: CERO)
+    for (content_type_id, object_id, _), cantidad in saldos.items():
+        totales[(content_type_id, object_id)] += cantidad
+
+    reporte = {"resumen": {}, "diferencias": []}
+
+    def registrar(contador, item, almacen, actual, esperado):
+        resumen = reporte["resumen"][contador]
+        resumen["diferencias"] += 1
+        if len(reporte["diferencias"]) < limite_detalle:
+            reporte["diferencias"].append({
+                "contador": contador,
+                "item": item,
+                "almacen": almacen,
+                "actual": actual,
+                "esperado": esperado,
+            })
+
+    def iniciar(contador):
+        reporte["resumen"][contador] = {"revisados": 0, "diferencias": 0, "reparados": 0}
+        return reporte["resumen"][contador]
+
+    # 1. Stock global de materias primas y productos
+    unidades_mp = {}
+    for modelo, content_type, contador in (
+        (MateriaPrima, ct_mp, "materia_prima.stock"),
+        (Producto, ct_producto, "producto.stock"),
+    ):
+        resumen = iniciar(contador)
+        correcciones = []
+        campos = ["pk", "stock"] + (["unidad_id_id"] if modelo is MateriaPrima else [])
+        for fila in modelo.objects.values_list(*campos).iterator(chunk_size=5000):
+            pk, stock = fila[0], fila[1]
+            if modelo is MateriaPrima:
+                unidades_mp[str(pk)] = fila[2]
+            clave = (content_type.pk, str(pk))
+            if clave not in totales:
+                continue
+            resumen["revisados"] += 1
+            esperado = totales[clave]
+            if stock != esperado:
+                registrar(contador, str(pk), None, stock, esperado)
+                correcciones.append(modelo(pk=pk, stock=esperado))
+        if reparar and correcciones:
+            modelo.objects.bulk_update(correcciones, ["stock"], batch_size=batch_size)
+            resumen["reparados"] = len(correcciones)
+
+    # 2. InventarioMaterial por item y almacén
+    resumen = iniciar("inventario_material.cantidad")
+    pendientes = {clave for clave in saldos if clave[0] == ct_mp.pk}
+    correcciones = []
+    for pk, content_type_id, object_id, almacen_id, unidad_id, cantidad in (
+        InventarioMaterial.objects.values_list(
+            "pk", "content_type_id", "object_id", "almacen_id_id", "unidad_id_id", "cantidad"
+        ).iterator(chunk_size=5000)
+    ):
+        if (content_type_id, object_id) not in totales:
+            continue
+        clave = (content_type_id, object_id, almacen_id)
+        pendientes.discard(clave)
+        resumen["revisados"] += 1
+        esperado = saldos.get(clave, CERO)
+        if cantidad != esperado:
+            registrar("inventario_material.cantidad", object_id, almacen_id, cantidad, esperado)
+            correcciones.append((content_type_id, object_id, almacen_id, unidad_id, esperado))
+    # Saldos en Kardex sin fila de inventario
+    for clave in sorted(pendientes):
+        registrar("inventario_material.cantidad", clave[1], clave[2], None, saldos[clave])
+        correcciones.append((clave[0], clave[1], clave[2], unidades_mp.get(clave[1]), saldos[clave]))
+    if reparar and correcciones:
+        upsert_inventario_material(correcciones, batch_size=batch_size)
+        resumen["reparados"] = len(correcciones)
+
+    # 3. InventarioProducto por producto y almacén
+    resumen = iniciar("inventario_producto.cantidad")
+    pendientes = {clave for clave in saldos if clave[0] == ct_producto.pk}
+    ahora = timezone.now()
+    actualizar = []
+    for pk, producto_id, almacen_id, cantidad in InventarioProducto.objects.values_list(
+        "pk", "producto_id", "almacen_id", "cantidad"
+    ).iterator(chunk_size=5000):
+        if (ct_producto.pk, str(producto_id)) not in totales:
+            continue
+        clave = (ct_producto.pk, str(producto_id), almacen_id)
+        pendientes.discard(clave)
+        resumen["revisados"] += 1
+        esperado = saldos.get(clave, CERO)
+        if cantidad != esperado:
+            registrar("inventario_producto.cantidad", str(producto_id), almacen_id, cantidad, esperado)
+            actualizar.append(
+                InventarioProducto(pk=pk, cantidad=esperado, fecha_actualizacion=ahora)
+            )
+    crear = []
+    for clave in sorted(pendientes):
+        registrar("inventario_producto.cantidad", clave[1], clave[2], None, saldos[clave])
+        crear.append(
+            InventarioProducto(
+                producto_id=int(clave[1]), almacen_id=clave[2], cantidad=saldos[clave]
+            )
+        )
+    if reparar:
+        if actualizar:
+            InventarioProducto.objects.bulk_update(
+                actualizar, ["cantidad", "fecha_actualizacion"], batch_size=batch_size
+            )
+        if crear:
+            InventarioProducto.objects.bulk_create(crear, batch_size=batch_size)
+        resumen["reparados"] = len(actualizar) + len(crear)
+
+    return reporte
@@ -0,0 +1,200 @@
+"""
+Motor de reconstrucción (replay) del Kardex.
+
+Cada movimiento depende del saldo anterior, así que un movimiento corregido o
+registrado con fecha pasada deja mal todos los saldos y costos promedio
+posteriores del mismo item/almacén. Este motor vuelve a recorrer el Kardex
+en orden (fecha, id), recalcula con Kardex._calcular_saldo (mismas reglas
+que registrar_movimiento, incluido el recorte de saldos negativos) y solo
+escribe las filas que cambian, con bulk_update por lotes.
+
+Las reconstrucciones completas se reparten por items entre varios procesos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from django.db import connection, connections, transaction
+
+# Los modelos se importan dentro de las funciones: los procesos hijos
+# importan este módulo antes de ejecutar django.setup()
+
+CAMPOS_SALDO = ["saldo_cantidad", "saldo_costo_total", "saldo_costo_promedio"]
+
+
+def reconstruir_item(content_type_id, object_id, batch_size=1000, dry_run=False):
+    """
+    Recalcula los saldos de un item en todos sus almacenes.
+    Retorna dict con 'movimientos' revisados y 'corregidos'.
+    """
+    return reconstruir_items([(content_type_id, object_id)], batch_size, dry_run)
+
+
+def reconstruir_items(items, batch_size=1000, dry_run=False):
+    """
+    Recalcula los saldos de un grupo de items en una transacción.
+
+    Por cada tipo de item hay una sola consulta, ordenada por
+    (object_id, fecha, id) y leída con iterator() (cursor del lado del
+    servidor en PostgreSQL): la memoria no depende del largo del historial.
+
+    Retorna dict con 'movimientos' revisados y 'corregidos'.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from .models import Kardex
+
+    resultado = {"movimientos": 0, "corregidos": 0}
+    por_tipo = {}
+    for content_type_id, object_id in items:
+        por_tipo.setdefault(content_type_id, set()).add(str(object_id))
+
+    with transaction.atomic():
+        for content_type_id in sorted(por_tipo):
+            modelo = ContentType.objects.get_for_id(content_type_id).model_class()
+            object_ids = por_tipo[content_type_id]
+
+            es_materia_prima = modelo._meta.model_name == "materiaprima"
+
+            # Bloquea los items en orden de PK: las altas concurrentes esperan
+            bloqueados = (
+                modelo.objects.select_for_update()
+                .filter(pk__in=object_ids)
+                .order_by("pk")
+            )
+            if es_materia_prima:
+                promedio_actual = dict(bloqueados.values_list("pk", "costo_promedio"))
+            else:
+                list(bloqueados.values_list("pk", flat=True))
+
+            filas = (
+                Kardex.objects.filter(content_type_id=content_type_id, object_id__in=object_ids)
+                .order_by("object_id", "fecha", "id")
+                .values_list(
+                    "id",
+                    "object_id",
+                    "almacen_id",
+                    "tipo_movimiento",
+                    "cantidad",
+                    "costo_unitario",
+                    *CAMPOS_SALDO,
+                )
+            )
+            saldos = {}  # (object_id, almacen_id) -> saldo anterior
+            promedios = {}  # object_id -> costo promedio del último movimiento
+            correcciones = []
+            for (
+                pk, object_id, almacen_id, tipo_movimiento, cantidad, costo_unitario, *guardado
+            ) in filas.iterator(chunk_size=batch_size):
+                resultado["movimientos"] += 1
+                nuevo = Kardex._redondear_saldo(
+                    Kardex._calcular_saldo(
+                        tipo_movimiento, cantidad, costo_unitario,
+                        saldos.get((object_id, almacen_id)),
+                    )
+                )
+                saldos[(object_id, almacen_id)] = nuevo
+                promedios[object_id] = nuevo[2]
+
+                if tuple(guardado) != nuevo:
+                    resultado["corregidos"] += 1
+                    correcciones.append(
+                        Kardex(
+                            pk=pk,
+                            saldo_cantidad=nuevo[0],
+                            saldo_costo_total=nuevo[1],
+                            saldo_costo_promedio=nuevo[2],
+                        )
+                    )
+                    if len(correcciones) >= batch_size and not dry_run:
+                        Kardex.objects.bulk_update(correcciones, CAMPOS_SALDO)
+                        correcciones = []
+
+            if dry_run:
+                continue
+            if correcciones:
+                Kardex.objects.bulk_update(correcciones, CAMPOS_SALDO)
+
+            # El costo promedio de la materia prima es el de su último movimiento
+            if es_materia_prima:
+                cambios = [
+                    modelo(pk=pk, costo_promedio=costo)
+                    for pk, costo in promedios.items()
+                    if promedio_actual.get(pk) != costo
+                ]
+                if cambios:
+                    modelo.objects.bulk_update(
+                        cambios, ["costo_promedio"], batch_size=batch_size
+                    )
+
+    return resultado
+
+
+def reconstruir_kardex(items=None, procesos=1, batch_size=1000, dry_run=False, items_por_tarea=500):
+    """
+    Reconstruye el Kardex de varios items (por defecto, todos los que tienen
+    movimientos).
+
+    Parámetros:
+        items: lista de (content_type_id, object_id) o None para todos
+        procesos: procesos en paralelo (1 = en el proceso actual)
+        batch_size: filas por lectura y por bulk_update
+        dry_run: solo contar lo que cambiaría
+        items_por_tarea: items que procesa cada tarea enviada al pool
+
+    Retorna dict con 'items', 'movimientos' y 'corregidos'.
+    """
+    from .models import Kardex
+
+    if items is None:
+        items = list(
+            Kardex.objects.order_by()
+            .values_list("content_type_id", "object_id")
+            .distinct()
+        )
+    items = sorted(set((ct, str(obj)) for ct, obj in items))
+
+    total = {"items": len(items), "movimientos": 0, "corregidos": 0}
+    tareas = [
+        items[i:i + items_por_tarea] for i in range(0, len(items), items_por_tarea)
+    ]
+
+    # SQLite no admite escrituras concurrentes desde varios procesos
+    if procesos <= 1 or len(tareas) <= 1 or connection.vendor == "sqlite":
+        resultados = (_procesar_tarea(t, batch_size, dry_run) for t in tareas)
+        return _sumar(total, resultados)
+
+    # Las conexiones abiertas no se pueden compartir con los procesos hijos
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_inicializar_proceso,
+    ) as pool:
+        resultados = pool.map(
+            _procesar_tarea,
+            tareas,
+            [batch_size] * len(tareas),
+            [dry_run] * len(tareas),
+        )
+        return _sumar(total, resultados)
+
+
+def _procesar_tarea(items, batch_size, dry_run):
+    return reconstruir_items(items, batch_size, dry_run)
+
+
+def _inicializar_proceso():
+    import os
+
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "innoquim.settings")
+    django.setup()
+
+
+def _sumar(total, resultados):
+    for resultado in resultados:
+        total["movimientos"] += resultado["movimientos"]
+        total["corregidos"] += resultado["corregidos"]
+    return total
+
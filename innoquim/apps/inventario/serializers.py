@@ -1,6 +1,19 @@
 from rest_framework import serializers
-from .models import Kardex
+from .models import (
+    ConteoInventario,
+    ConteoItem,
+    IndicadorInventario,
+    Kardex,
+    LoteInventario,
+    TransferenciaInventario,
+    TransferenciaItem,
+)
 from django.contrib.contenttypes.models import ContentType
+from decimal import Decimal
+
+from innoquim.apps.almacen.models import Almacen
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.producto.models import Producto
 
 
 class KardexSerializer(serializers.ModelSerializer):
@@ -97,3 +110,206 @@ class KardexSaldoSerializer(serializers.Serializer):
     cantidad = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     costo_total = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
     costo_promedio = serializers.DecimalField(max_digits=12, decimal_places=4, read_only=True)
+
+
+class IndicadorInventarioSerializer(serializers.ModelSerializer):
+    """
+    Serializer de solo lectura para los indicadores precalculados.
+    Se calculan con el comando calcular_indicadores.
+    """
+
+    item_tipo = serializers.CharField(source='content_type.model', read_only=True)
+
+    class Meta:
+        model = IndicadorInventario
+        fields = [
+            'id',
+            'item_tipo',
+            'object_id',
+            'codigo',
+            'nombre',
+            'stock',
+            'stock_minimo',
+            'stock_maximo',
+            'consumo_cantidad',
+            'consumo_valor',
+            'clase_abc',
+            'rotacion',
+            'dias_cobertura',
+            'bajo_minimo',
+            'sobre_maximo',
+            'dias_periodo',
+            'fecha_calculo',
+        ]
+        read_only_fields = fields
+
+
+class LoteInventarioSerializer(serializers.ModelSerializer):
+    """
+    Serializer de solo lectura para los lotes de inventario.
+    Los lotes se mueven con inventario.lotes (recepciones y producción).
+    """
+
+    item_tipo = serializers.CharField(source='content_type.model', read_only=True)
+    almacen_nombre = serializers.CharField(source='almacen.nombre', read_only=True)
+
+    class Meta:
+        model = LoteInventario
+        fields = [
+            'id',
+            'item_tipo',
+            'object_id',
+            'almacen',
+            'almacen_nombre',
+            'codigo_lote',
+            'fecha_vencimiento',
+            'fecha_ingreso',
+            'cantidad_inicial',
+            'cantidad_disponible',
+            'costo_unitario',
+        ]
+        read_only_fields = fields
+
+
+class TransferenciaItemSerializer(serializers.ModelSerializer):
+    """Línea de una transferencia (lectura)"""
+
+    item_tipo = serializers.CharField(source='content_type.model', read_only=True)
+
+    class Meta:
+        model = TransferenciaItem
+        fields = ['id', 'item_tipo', 'object_id', 'cantidad', 'costo_unitario']
+        read_only_fields = fields
+
+
+class TransferenciaInventarioSerializer(serializers.ModelSerializer):
+    """
+    Transferencia entre almacenes con sus líneas (lectura).
+    Se crean con TransferenciaCrearSerializer.
+    """
+
+    almacen_origen_nombre = serializers.CharField(source='almacen_origen.nombre', read_only=True)
+    almacen_destino_nombre = serializers.CharField(source='almacen_destino.nombre', read_only=True)
+    items = TransferenciaItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = TransferenciaInventario
+        fields = [
+            'id',
+            'fecha',
+            'almacen_origen',
+            'almacen_origen_nombre',
+            'almacen_destino',
+            'almacen_destino_nombre',
+            'observaciones',
+            'responsable',
+            'items',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+class TransferenciaLineaSerializer(serializers.Serializer):
+    """Línea de entrada: item por tipo e ID y cantidad a transferir"""
+
+    tipo = serializers.ChoiceField(choices=['materiaprima', 'producto'])
+    item_id = serializers.CharField(max_length=8)
+    cantidad = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal('0.01')
+    )
+
+
+class TransferenciaCrearSerializer(serializers.Serializer):
+    """
+    Valida una transferencia y resuelve sus items en una consulta por tipo.
+    validated_data['lineas'] queda con objetos MateriaPrima / Producto.
+    """
+
+    almacen_origen = serializers.PrimaryKeyRelatedField(queryset=Almacen.objects.all())
+    almacen_destino = serializers.PrimaryKeyRelatedField(queryset=Almacen.objects.all())
+    observaciones = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    items = TransferenciaLineaSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        if data['almacen_origen'] == data['almacen_destino']:
+            raise serializers.ValidationError(
+                'El almacén de origen y el de destino deben ser distintos'
+            )
+
+        modelos = {'materiaprima': MateriaPrima, 'producto': Producto}
+        encontrados = {}
+        for tipo, modelo in modelos.items():
+            ids = [linea['item_id'] for linea in data['items'] if linea['tipo'] == tipo]
+            if not ids:
+                continue
+            if modelo is Producto:
+                ids = [int(i) for i in ids if i.isdigit()]
+            for pk, item in modelo.objects.in_bulk(ids).items():
+                encontrados[(tipo, str(pk))] = item
+
+        faltantes = [
+            f"{linea['tipo']} {linea['item_id']}"
+            for linea in data['items']
+            if (linea['tipo'], linea['item_id']) not in encontrados
+        ]
+        if faltantes:
+            raise serializers.ValidationError({'items': f"No existen: {', '.join(faltantes)}"})
+
+        data['lineas'] = [
+            {'item': encontrados[(linea['tipo'], linea['item_id'])], 'cantidad': linea['cantidad']}
+            for linea in data['items']
+        ]
+        return data
+
+
+class ConteoItemSerializer(serializers.ModelSerializer):
+    """Línea de un conteo físico (lectura)"""
+
+    item_tipo = serializers.CharField(source='content_type.model', read_only=True)
+
+    class Meta:
+        model = ConteoItem
+        fields = [
+            'id',
+            'item_tipo',
+            'object_id',
+            'codigo',
+            'nombre',
+            'cantidad_esperada',
+            'cantidad_contada',
+            'cantidad_sistema',
+            'diferencia',
+            'fecha_conteo',
+        ]
+        read_only_fields = fields
+
+
+class ConteoInventarioSerializer(serializers.ModelSerializer):
+    """
+    Sesión de conteo con su avance. Las líneas se consultan paginadas en
+    /items/ (un almacén puede tener miles).
+    """
+
+    almacen_nombre = serializers.CharField(source='almacen.nombre', read_only=True)
+    total_items = serializers.IntegerField(read_only=True)
+    contados = serializers.IntegerField(read_only=True)
+    con_diferencia = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ConteoInventario
+        fields = [
+            'id',
+            'almacen',
+            'almacen_nombre',
+            'estado',
+            'fecha_inicio',
+            'fecha_finalizacion',
+            'observaciones',
+            'responsable',
+            'total_items',
+            'contados',
+            'con_diferencia',
+        ]
+        read_only_fields = [
+            'estado', 'fecha_inicio', 'fecha_finalizacion', 'responsable',
+        ]
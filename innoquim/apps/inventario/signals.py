@@ -2,6 +2,8 @@
 Signals para integrar automáticamente el Kardex con otros módulos.
 """
 
+from django.db import transaction
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from decimal import Decimal
@@ -21,7 +23,7 @@ def recepcion_material_saved(sender, instance, created, **kwargs):
         from innoquim.apps.inventario.models import Kardex
         
         # Registrar movimiento en Kardex
-        Kardex.registrar_movimiento(
+        kardex = Kardex.registrar_movimiento(
             almacen=instance.almacen,
             item=instance.materia_prima,
             tipo_movimiento="ENTRADA",
@@ -34,7 +36,9 @@ def recepcion_material_saved(sender, instance, created, **kwargs):
         )
         
         # Actualizar InventarioMaterial
-        actualizar_inventario_material(instance.materia_prima, instance.almacen)
+        actualizar_inventario_material(
+            instance.materia_prima, instance.almacen, kardex.saldo_cantidad
+        )
 
 
 @receiver(post_save, sender="recepcion_item.RecepcionItem")
@@ -46,7 +50,8 @@ def recepcion_item_saved(sender, instance, created, **kwargs):
     1. Se recibe material de proveedor (RecepcionItem creado)
     2. Se registra automáticamente como ENTRADA en Kardex
     3. Se actualiza el costo promedio de la materia prima
-    4. Se actualiza el saldo en inventario
+    4. Si indica su pedido_item, se suma a lo recibido del pedido
+    5. Se actualiza el saldo en inventario
     """
     if created:  # Solo cuando se crea, no cuando se actualiza
         from innoquim.apps.inventario.models import Kardex
@@ -58,8 +63,8 @@ def recepcion_item_saved(sender, instance, created, **kwargs):
         cantidad = Decimal(str(instance.cantidad))
         precio_compra = instance.precio_compra or Decimal("0.00")
 
-        # Registrar movimiento en Kardex
-        Kardex.registrar_movimiento(
+        # Registrar movimiento en Kardex (en la unidad base de la materia prima)
+        kardex = Kardex.registrar_movimiento(
             almacen=almacen,
             item=materia_prima,
             tipo_movimiento="ENTRADA",
@@ -69,55 +74,39 @@ def recepcion_item_saved(sender, instance, created, **kwargs):
             referencia_id=f"RM{recepcion.id}-ITEM{instance.id}",
             observaciones=f"Recepción de material - Lote: {instance.lote}",
             usuario=None,  # Puedes agregar el usuario si está disponible
+            unidad=instance.id_unidad_id,
         )
 
-        # Actualizar InventarioMaterial
-        actualizar_inventario_material(materia_prima, almacen)
-
-
-@receiver(post_save, sender="material_produccion.MaterialProduccion")
-def material_produccion_saved(sender, instance, created, **kwargs):
-    """
-    Cuando se consume material en producción, registra SALIDA en Kardex.
-
-    Flujo:
-    1. Se crea un lote de producción y se registran materiales usados
-    2. Se registra automáticamente como SALIDA en Kardex
-    3. Se reduce el inventario de materias primas
-    """
-    if created:  # Solo cuando se crea
-        from innoquim.apps.inventario.models import Kardex
+        # Registrar la entrada en la capa de lotes (FEFO)
+        if instance.lote and cantidad > 0:
+            from innoquim.apps.inventario.lotes import registrar_ingresos
 
-        # Obtener datos necesarios
-        lote = instance.batch
-        materia_prima = instance.raw_material
-        cantidad = Decimal(str(instance.used_quantity))
+            registrar_ingresos([
+                {
+                    "almacen": almacen,
+                    "item": materia_prima,
+                    "codigo_lote": instance.lote,
+                    "cantidad": kardex.cantidad,
+                    "costo_unitario": kardex.costo_unitario,
+                    "fecha_vencimiento": instance.fecha_vencimiento,
+                    "kardex": kardex,
+                    "referencia_id": kardex.referencia_id,
+                }
+            ])
 
-        # Obtener el costo promedio actual de la materia prima
-        costo_promedio = materia_prima.costo_promedio or Decimal("0.00")
+        # Avance del pedido que se recibe
+        if instance.pedido_item_id:
+            from innoquim.apps.pedido_material.recepcion import registrar_recibido
 
-        # Por ahora usamos un almacén por defecto
-        # TODO: Agregar campo de almacén en MaterialProduccion
-        from innoquim.apps.almacen.models import Almacen
+            registrar_recibido(instance.pedido_item_id, cantidad, instance.id_unidad_id)
 
-        almacen = Almacen.objects.first()  # Usar primer almacén
+        # Actualizar InventarioMaterial
+        actualizar_inventario_material(materia_prima, almacen, kardex.saldo_cantidad)
 
-        if almacen:
-            # Registrar movimiento en Kardex
-            Kardex.registrar_movimiento(
-                almacen=almacen,
-                item=materia_prima,
-                tipo_movimiento="SALIDA",
-                motivo="PRODUCCION",
-                cantidad=cantidad,
-                costo_unitario=costo_promedio,
-                referencia_id=f"LOTE{lote.id}-MAT{instance.id}",
-                observaciones=f"Consumo en producción - Lote: {lote.batch_code}",
-                usuario=None,
-            )
 
-            # Actualizar InventarioMaterial
-            actualizar_inventario_material(materia_prima, almacen)
+# MaterialProduccion no tiene signal: registrar un material en un lote solo
+# planifica el consumo. La SALIDA de materia prima se registra una única vez,
+# al completar el lote (LoteProduccion.completar_produccion).
 
 
 @receiver(post_save, sender="orden_item.OrdenItem")
@@ -132,26 +121,141 @@ def orden_item_saved(sender, instance, created, **kwargs):
     pass
 
 
-def actualizar_inventario_material(materia_prima, almacen):
+def actualizar_inventario_material(item, almacen, cantidad=None):
     """
-    Actualiza el registro de InventarioMaterial basándose en el Kardex.
+    Actualiza el registro de InventarioMaterial de un item en un almacén.
 
-    Este método sincroniza la tabla de inventario con los saldos del Kardex.
+    cantidad es el saldo que acaba de dejar el movimiento de Kardex
+    (kardex.saldo_cantidad); si no se pasa, se lee del Kardex.
+    Se escribe con un único INSERT ... ON CONFLICT (ver upsert_inventario_material).
     """
+    from django.contrib.contenttypes.models import ContentType
     from innoquim.apps.inventario.models import Kardex
-    from innoquim.apps.inventario_material.models import InventarioMaterial
 
-    # Obtener saldo actual del Kardex
-    saldo = Kardex.obtener_saldo_actual(almacen, materia_prima)
+    if cantidad is None:
+        cantidad = Kardex.obtener_saldo_actual(almacen, item)["cantidad"]
+
+    campo = CAMPO_UNIDAD.get(item._meta.model_name)
+    upsert_inventario_material([
+        (
+            ContentType.objects.get_for_model(item).pk,
+            str(item.pk),
+            almacen.pk,
+            getattr(item, f"{campo}_id", None) if campo else None,
+            cantidad,
+        )
+    ])
+
+
+# Campo de unidad de cada modelo inventariable
+CAMPO_UNIDAD = {"materiaprima": "unidad_id", "producto": "unit"}
+
+
+def actualizar_inventario_material_bulk(kardex):
+    """
+    Sincroniza InventarioMaterial con los saldos de una lista de movimientos
+    de Kardex (p. ej. el resultado de Kardex.registrar_movimientos_bulk).
 
-    # Buscar o crear registro en InventarioMaterial
-    inventario, created = InventarioMaterial.objects.get_or_create(
-        materia_prima_id=materia_prima,
-        almacen_id=almacen,
-        defaults={"unidad_id": materia_prima.unidad_id, "cantidad": saldo["cantidad"]},
+    Escribe una sola vez por (item, almacén), con el saldo del último
+    movimiento de cada uno, en un único upsert por lote.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    # Último saldo por (content_type, object_id, almacén)
+    saldos = {}
+    for registro in kardex:
+        clave = (registro.content_type_id, str(registro.object_id), registro.almacen_id)
+        saldos[clave] = registro.saldo_cantidad
+    if not saldos:
+        return
+
+    # Unidad de cada item (una consulta por tipo de item)
+    unidades = {}
+    for content_type_id in {clave[0] for clave in saldos}:
+        modelo = ContentType.objects.get_for_id(content_type_id).model_class()
+        campo = CAMPO_UNIDAD.get(modelo._meta.model_name)
+        if not campo:
+            continue
+        object_ids = {clave[1] for clave in saldos if clave[0] == content_type_id}
+        for pk, unidad_id in modelo.objects.filter(pk__in=object_ids).values_list(
+            "pk", f"{campo}_id"
+        ):
+            unidades[(content_type_id, str(pk))] = unidad_id
+
+    upsert_inventario_material(
+        [
+            (clave[0], clave[1], clave[2], unidades.get(clave[:2]), cantidad)
+            for clave, cantidad in saldos.items()
+        ]
     )
 
-    # Si ya existe, actualizar cantidad
-    if not created:
-        inventario.cantidad = saldo["cantidad"]
-        inventario.save()
+
+def upsert_inventario_material(filas, batch_size=1000):
+    """
+    Inserta o actualiza InventarioMaterial en bloque:
+
+        INSERT ... ON CONFLICT (content_type_id, object_id, almacen_id_id)
+        DO UPDATE SET cantidad = EXCLUDED.cantidad, ...
+
+    filas: iterable de (content_type_id, object_id, almacen_id, unidad_id, cantidad)
+
+    Las filas que ya existen conservan su ID (una consulta). Solo si hay
+    filas nuevas se reservan IDs IMnnnnnn a partir del último, leído bajo el
+    bloqueo de InventarioMaterial.siguiente_numero; una fila que otra
+    transacción creó mientras tanto cae en el conflicto y se actualiza.
+    """
+    from innoquim.apps.inventario_material.models import InventarioMaterial
+
+    filas = list(filas)
+    if not filas:
+        return
+
+    claves = [(fila[0], str(fila[1]), fila[2]) for fila in filas]
+    grupos = {}
+    for content_type_id, object_id, almacen_id in claves:
+        grupos.setdefault((content_type_id, almacen_id), set()).add(object_id)
+    filtro = Q()
+    for (content_type_id, almacen_id), object_ids in grupos.items():
+        filtro |= Q(
+            content_type_id=content_type_id, almacen_id_id=almacen_id, object_id__in=object_ids
+        )
+    ids = {
+        (content_type_id, object_id, almacen_id): pk
+        for pk, content_type_id, object_id, almacen_id in InventarioMaterial.objects.filter(
+            filtro
+        ).values_list("pk", "content_type_id", "object_id", "almacen_id_id")
+    }
+
+    with transaction.atomic():
+        nuevas = [clave for clave in dict.fromkeys(claves) if clave not in ids]
+        if nuevas:
+            siguiente = InventarioMaterial.siguiente_numero()
+            for offset, clave in enumerate(nuevas):
+                ids[clave] = f"IM{siguiente + offset:06d}"
+
+        InventarioMaterial.objects.bulk_create(
+            [
+                InventarioMaterial(
+                    inventario_material_id=ids[clave],
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    almacen_id_id=almacen_id,
+                    unidad_id_id=unidad_id,
+                    cantidad=cantidad,
+                )
+                for clave, (content_type_id, object_id, almacen_id, unidad_id, cantidad)
+                in zip(claves, filas)
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["content_type", "object_id", "almacen_id"],
+            update_fields=["cantidad", "fecha_actualizacion"],
+        )
+
+    # Alertas de stock bajo y capacidad de producción en caché: se refrescan
+    # con los saldos ya confirmados
+    from innoquim.apps.formula.capacidad import invalidar_por_movimientos
+    from innoquim.apps.inventario.alertas import refrescar_items
+
+    transaction.on_commit(lambda: refrescar_items(claves))
+    transaction.on_commit(lambda: invalidar_por_movimientos(claves))
@@ -1,3 +1,688 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from .models import Kardex
+
+
+class ReconciliacionInventarioTest(TestCase):
+    """Tests para la reconciliación de contadores de stock contra el Kardex"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen1 = Almacen.objects.create(nombre="A1", direccion="-")
+        self.almacen2 = Almacen.objects.create(nombre="A2", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria
+        )
+        self.sin_kardex = MateriaPrima.objects.create(
+            nombre="Sin movimientos", codigo="SIN-MOV", unidad_id=unidad,
+            categoria_id=categoria, stock=Decimal("7"),
+        )
+        Kardex.registrar_movimientos_bulk([
+            {"almacen": self.almacen1, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 10, "costo_unitario": 2},
+            {"almacen": self.almacen2, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 5, "costo_unitario": 2},
+            {"almacen": self.almacen1, "item": self.mp, "tipo_movimiento": "SALIDA",
+             "motivo": "PRODUCCION", "cantidad": 4, "costo_unitario": 2},
+        ])
+
+    def test_reporta_y_repara_diferencias(self):
+        """Test que detecte stock e inventario desfasados y los corrija"""
+        from innoquim.apps.inventario.reconciliacion import reconciliar_inventario
+        from innoquim.apps.inventario_material.models import InventarioMaterial
+
+        reporte = reconciliar_inventario()
+        resumen = reporte["resumen"]
+        self.assertEqual(resumen["materia_prima.stock"]["diferencias"], 1)
+        self.assertEqual(resumen["inventario_material.cantidad"]["diferencias"], 2)
+        self.assertEqual(resumen["materia_prima.stock"]["reparados"], 0)
+
+        reporte = reconciliar_inventario(reparar=True)
+        self.assertEqual(reporte["resumen"]["inventario_material.cantidad"]["reparados"], 2)
+
+        self.mp.refresh_from_db()
+        self.assertEqual(self.mp.stock, Decimal("11"))
+        self.assertEqual(
+            InventarioMaterial.objects.get(object_id=self.mp.pk, almacen_id=self.almacen1).cantidad,
+            Decimal("6.00"),
+        )
+        # Sin movimientos en Kardex: no se toca
+        self.sin_kardex.refresh_from_db()
+        self.assertEqual(self.sin_kardex.stock, Decimal("7"))
+
+        reporte = reconciliar_inventario()
+        self.assertTrue(all(r["diferencias"] == 0 for r in reporte["resumen"].values()))
+
+
+class ReconstruccionKardexTest(TestCase):
+    """Tests para el replay del Kardex"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria
+        )
+        for tipo, cantidad, costo in (
+            ("ENTRADA", 10, 2), ("ENTRADA", 10, 4), ("SALIDA", 5, 0), ("ENTRADA", 5, 6),
+        ):
+            Kardex.registrar_movimiento(
+                almacen=self.almacen, item=self.mp, tipo_movimiento=tipo,
+                motivo="COMPRA", cantidad=cantidad, costo_unitario=costo,
+            )
+
+    def test_corrige_saldos_posteriores_a_una_correccion(self):
+        """Test que corregir un movimiento antiguo recalcule los saldos siguientes"""
+        from innoquim.apps.inventario.replay import reconstruir_kardex
+
+        primero = Kardex.objects.order_by("fecha", "id").first()
+        Kardex.objects.filter(pk=primero.pk).update(costo_unitario=Decimal("8"))
+
+        resultado = reconstruir_kardex()
+        self.assertEqual(resultado["movimientos"], 4)
+        self.assertEqual(resultado["corregidos"], 4)
+
+        ultimo = Kardex.objects.order_by("-fecha", "-id").first()
+        # (80 + 40) / 20 = 6.00 -> salida de 5 -> 15 u a 6.00 = 90 -> +5 a 6 = 120 / 20
+        self.assertEqual(ultimo.saldo_cantidad, Decimal("20.00"))
+        self.assertEqual(ultimo.saldo_costo_total, Decimal("120.00"))
+        self.mp.refresh_from_db()
+        self.assertEqual(self.mp.costo_promedio, Decimal("6.0000"))
+
+        self.assertEqual(reconstruir_kardex()["corregidos"], 0)
+
+
+class AnaliticaKardexTest(TestCase):
+    """Tests para la analítica vectorizada del Kardex"""
+
+    def setUp(self):
+        from datetime import datetime
+
+        from django.utils import timezone
+
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria
+        )
+        for mes, tipo, motivo, cantidad, costo in (
+            (1, "ENTRADA", "COMPRA", 10, 2),
+            (1, "ENTRADA", "COMPRA", 10, 4),
+            (2, "SALIDA", "VENTA", 5, 0),
+            (3, "ENTRADA", "COMPRA", 5, 6),
+        ):
+            kardex = Kardex.registrar_movimiento(
+                almacen=almacen, item=self.mp, tipo_movimiento=tipo,
+                motivo=motivo, cantidad=cantidad, costo_unitario=costo,
+            )
+            Kardex.objects.filter(pk=kardex.pk).update(
+                fecha=timezone.make_aware(datetime(2025, mes, 15, 12))
+            )
+        self.almacen = almacen
+
+    def test_valor_costo_ventas_y_tendencia_por_mes(self):
+        """Test que los agregados por mes coincidan exactamente con los saldos del Kardex"""
+        from innoquim.apps.inventario import analitica
+
+        libro = analitica.cargar_libro()
+        self.assertEqual(len(libro), 4)
+
+        valor = analitica.valor_por_almacen(libro)
+        self.assertEqual(valor["periodos"], ["2025-01", "2025-02", "2025-03"])
+        self.assertEqual(
+            valor["almacenes"][self.almacen.id],
+            [Decimal("60.00"), Decimal("45.00"), Decimal("75.00")],
+        )
+
+        self.assertEqual(
+            analitica.costo_ventas_por_periodo(libro),
+            [("2025-01", Decimal("0.00")), ("2025-02", Decimal("15.00")), ("2025-03", Decimal("0.00"))],
+        )
+
+        tendencia = analitica.tendencia_costo_promedio(libro)
+        promedios = next(iter(tendencia["items"].values()))
+        self.assertEqual(promedios, [Decimal("3.0000"), Decimal("3.0000"), Decimal("3.7500")])
+
+        saldos = analitica.saldos_por_periodo(libro, desde=date(2025, 2, 1))
+        self.assertEqual(saldos["periodos"], ["2025-02", "2025-03"])
+        self.assertEqual(
+            list(saldos["saldos"].values())[0],
+            [(Decimal("15.00"), Decimal("45.00")), (Decimal("20.00"), Decimal("75.00"))],
+        )
+
+    def test_almacen_no_numerico_es_400(self):
+        """Test que un ?almacen= inválido se rechace en los endpoints de analítica"""
+        from django.contrib.auth import get_user_model
+        from rest_framework.test import APIClient
+
+        cliente = APIClient()
+        cliente.force_authenticate(get_user_model().objects.create_user(
+            email="analista@test.com", username="analista", name="Analista", password="x"
+        ))
+        for ruta in ("valorizacion", "costo_ventas", "tendencia_costo"):
+            response = cliente.get(
+                f"/api/kardex/{ruta}/", {"almacen": "central", "materia_prima_id": "MP000001"}
+            )
+            self.assertEqual(response.status_code, 400, ruta)
+        response = cliente.get("/api/kardex/valorizacion/", {"almacen": self.almacen.id})
+        self.assertEqual(response.data["total"], "75.00")
+
+
+class IndicadoresInventarioTest(TestCase):
+    """Tests para el precálculo de indicadores de inventario"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.consumida = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria,
+            stock=Decimal("15"), stock_minimo=Decimal("20"),
+        )
+        self.quieta = MateriaPrima.objects.create(
+            nombre="Ácido Bórico", codigo="AC-BOR", unidad_id=unidad, categoria_id=categoria,
+            stock=Decimal("50"), stock_maximo=Decimal("40"),
+        )
+        for tipo, cantidad in (("ENTRADA", 45), ("SALIDA", 30)):
+            Kardex.registrar_movimiento(
+                almacen=almacen, item=self.consumida, tipo_movimiento=tipo,
+                motivo="PRODUCCION", cantidad=cantidad, costo_unitario=2,
+            )
+
+    def test_calcula_abc_cobertura_y_alertas(self):
+        """Test que el cálculo llene la tabla resumen y se pueda repetir"""
+        from innoquim.apps.inventario.indicadores import calcular_indicadores
+        from innoquim.apps.inventario.models import IndicadorInventario
+
+        resumen = calcular_indicadores(dias=30)
+        self.assertEqual(resumen["materia_prima"]["items"], 2)
+        self.assertEqual(resumen["materia_prima"]["A"], 1)
+
+        consumida = IndicadorInventario.objects.get(object_id=self.consumida.pk)
+        self.assertEqual(consumida.clase_abc, "A")
+        self.assertEqual(consumida.consumo_valor, Decimal("60.00"))
+        self.assertEqual(consumida.rotacion, Decimal("2.00"))
+        self.assertEqual(consumida.dias_cobertura, Decimal("15.0"))  # 15 / (30 / 30 días)
+        self.assertTrue(consumida.bajo_minimo)
+
+        quieta = IndicadorInventario.objects.get(object_id=self.quieta.pk)
+        self.assertEqual(quieta.clase_abc, "C")
+        self.assertIsNone(quieta.dias_cobertura)
+        self.assertTrue(quieta.sobre_maximo)
+        self.assertFalse(quieta.bajo_minimo)
+
+        # Un segundo cálculo actualiza las mismas filas
+        calcular_indicadores(dias=30)
+        self.assertEqual(IndicadorInventario.objects.count(), 2)
+
+    def test_transferencia_no_es_consumo(self):
+        """Test que mover stock entre almacenes no cambie consumo, rotación ni reorden"""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.inventario.indicadores import calcular_indicadores
+        from innoquim.apps.inventario.models import IndicadorInventario
+        from innoquim.apps.inventario.transferencias import registrar_transferencia
+        from innoquim.apps.pedido_material.reorden import consumo_por_materia
+
+        desde = timezone.now() - timedelta(days=30)
+        registrar_transferencia(
+            self.almacen, Almacen.objects.create(nombre="A2", direccion="-"),
+            [{"item": self.consumida, "cantidad": 10}],
+        )
+
+        calcular_indicadores(dias=30)
+        consumida = IndicadorInventario.objects.get(object_id=self.consumida.pk)
+        self.assertEqual(consumida.consumo_cantidad, Decimal("30.00"))
+        self.assertEqual(consumida.rotacion, Decimal("2.00"))
+        self.assertEqual(consumo_por_materia(desde)[self.consumida.pk], Decimal("30"))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class StockBajoTest(TestCase):
+    """Tests para las alertas de stock bajo por almacén"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        cache.clear()
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria,
+            stock_minimo=Decimal("20"), stock_maximo=Decimal("50"),
+        )
+
+    def registrar_entrada(self, cantidad):
+        from innoquim.apps.inventario.signals import actualizar_inventario_material
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kardex = Kardex.registrar_movimiento(
+                almacen=self.almacen, item=self.mp, tipo_movimiento="ENTRADA",
+                motivo="COMPRA", cantidad=cantidad, costo_unitario=1,
+            )
+            actualizar_inventario_material(self.mp, self.almacen, kardex.saldo_cantidad)
+
+    def test_alerta_se_refresca_con_cada_movimiento(self):
+        """Test que la lista en caché siga los movimientos sin recalcular el almacén"""
+        from innoquim.apps.inventario.alertas import items_stock_bajo
+
+        self.registrar_entrada(10)
+        filas, _ = items_stock_bajo(self.almacen.id)
+        self.assertEqual(len(filas), 1)
+        self.assertEqual(filas[0]["cantidad"], Decimal("10.00"))
+        self.assertEqual(filas[0]["cantidad_sugerida"], Decimal("40.00"))  # hasta stock_maximo
+
+        # Con la lista en caché, el refresco solo consulta el item movido
+        self.registrar_entrada(5)
+        with self.assertNumQueries(0):
+            filas, _ = items_stock_bajo(self.almacen.id)
+        self.assertEqual(filas[0]["cantidad"], Decimal("15.00"))
+
+        self.registrar_entrada(30)
+        with self.assertNumQueries(0):
+            filas, _ = items_stock_bajo(self.almacen.id)
+        self.assertEqual(filas, [])
+
+
+class LotesFefoTest(TestCase):
+    """Tests para la capa de lotes y el consumo FEFO"""
+
+    def setUp(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.inventario.lotes import registrar_ingresos
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        self.unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        self.categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=self.unidad,
+            categoria_id=self.categoria, stock=Decimal("40"),
+        )
+        hoy = timezone.localdate()
+        lotes = [
+            ("L-VENCIDO", hoy - timedelta(days=1)),
+            ("L-30", hoy + timedelta(days=30)),
+            ("L-SIN-VENC", None),
+            ("L-10", hoy + timedelta(days=10)),
+        ]
+        Kardex.registrar_movimientos_bulk([
+            {"almacen": self.almacen, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 10, "costo_unitario": 2}
+            for _ in lotes
+        ])
+        registrar_ingresos([
+            {"almacen": self.almacen, "item": self.mp, "codigo_lote": codigo,
+             "cantidad": 10, "fecha_vencimiento": vencimiento}
+            for codigo, vencimiento in lotes
+        ])
+
+    def saldos(self):
+        from innoquim.apps.inventario.models import LoteInventario
+
+        return dict(LoteInventario.objects.values_list("codigo_lote", "cantidad_disponible"))
+
+    def test_consume_primero_el_que_vence_antes(self):
+        """Test que el consumo salte los vencidos y deje al final los lotes sin vencimiento"""
+        from innoquim.apps.inventario.lotes import consumir_lotes
+
+        resultado = consumir_lotes([
+            {"almacen": self.almacen, "item": self.mp, "cantidad": 15},
+            {"almacen": self.almacen, "item": self.mp, "cantidad": Decimal("7.5")},
+        ])
+        self.assertEqual(
+            [(m.lote.codigo_lote, m.cantidad) for m in resultado["movimientos"]],
+            [("L-10", Decimal("10.00")), ("L-30", Decimal("5.00")),
+             ("L-30", Decimal("5.00")), ("L-SIN-VENC", Decimal("2.50"))],
+        )
+        self.assertEqual(resultado["sin_lote"], [])
+        self.assertEqual(self.saldos(), {
+            "L-VENCIDO": Decimal("10.00"), "L-10": Decimal("0.00"),
+            "L-30": Decimal("0.00"), "L-SIN-VENC": Decimal("7.50"),
+        })
+
+        # Sin lotes suficientes: se reporta lo no cubierto o se rechaza en modo estricto
+        resultado = consumir_lotes([{"almacen": self.almacen, "item": self.mp, "cantidad": 10}])
+        self.assertEqual(resultado["sin_lote"], [(0, Decimal("2.50"))])
+        with self.assertRaises(ValueError):
+            consumir_lotes(
+                [{"almacen": self.almacen, "item": self.mp, "cantidad": 1}], estricto=True
+            )
+
+    def test_completar_produccion_descuenta_lotes(self):
+        """Test que completar un lote de producción consuma lotes y cree el del producto"""
+        from django.contrib.auth import get_user_model
+
+        from innoquim.apps.inventario.models import LoteInventario, MovimientoLote
+        from innoquim.apps.lote_produccion.models import LoteProduccion
+        from innoquim.apps.material_produccion.models import MaterialProduccion
+        from innoquim.apps.producto.models import Producto
+
+        usuario = get_user_model().objects.create_user(
+            email="jefe@test.com", username="jefe", name="Jefe", password="x"
+        )
+        producto = Producto.objects.create(
+            product_code="PT-1", name="Limpiador", unit=self.unidad, weight=1,
+            categoria_id=self.categoria,
+        )
+        lote = LoteProduccion.objects.create(
+            product=producto, batch_code="LP-001", production_date=date.today(),
+            produced_quantity=Decimal("5"), unit=self.unidad, almacen=self.almacen,
+            production_manager=usuario,
+        )
+        MaterialProduccion.objects.create(
+            batch=lote, raw_material=self.mp, used_quantity=Decimal("12"),
+            unit=self.unidad, costo_unitario=Decimal("2"),
+        )
+        # Registrar el material no consume: la SALIDA se hace al completar
+        salidas_mp = Kardex.objects.filter(object_id=str(self.mp.pk), tipo_movimiento="SALIDA")
+        self.assertFalse(salidas_mp.exists())
+
+        lote.completar_produccion(usuario=usuario)
+
+        self.assertEqual(list(salidas_mp.values_list("cantidad", flat=True)), [Decimal("12.00")])
+        self.assertEqual(self.saldos()["L-10"], Decimal("0.00"))
+        self.assertEqual(self.saldos()["L-30"], Decimal("8.00"))
+        salidas = MovimientoLote.objects.filter(referencia_id="LP-001", tipo_movimiento="SALIDA")
+        self.assertEqual(salidas.count(), 2)
+        self.assertTrue(all(m.kardex.tipo_movimiento == "SALIDA" for m in salidas))
+        self.mp.refresh_from_db()
+        self.assertEqual(self.mp.stock, Decimal("28"))
+
+        lote_producto = LoteInventario.objects.get(codigo_lote="LP-001")
+        self.assertEqual(lote_producto.object_id, str(producto.pk))
+        self.assertEqual(lote_producto.cantidad_disponible, Decimal("5.00"))
+
+
+    def test_completar_produccion_con_varias_materias(self):
+        """Test que cada material del lote descuente su propia materia prima"""
+        from django.contrib.auth import get_user_model
+
+        from innoquim.apps.inventario.lotes import registrar_ingresos
+        from innoquim.apps.lote_produccion.models import LoteProduccion
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.material_produccion.models import MaterialProduccion
+        from innoquim.apps.producto.models import Producto
+
+        mp2 = MateriaPrima.objects.create(
+            nombre="Soda Cáustica", codigo="SODA", unidad_id=self.unidad,
+            categoria_id=self.categoria, stock=Decimal("100"),
+        )
+        Kardex.registrar_movimiento(
+            almacen=self.almacen, item=mp2, tipo_movimiento="ENTRADA", motivo="COMPRA",
+            cantidad=Decimal("100"), costo_unitario=Decimal("1"),
+        )
+        registrar_ingresos([
+            {"almacen": self.almacen, "item": mp2, "codigo_lote": "L-SODA", "cantidad": 100}
+        ])
+        usuario = get_user_model().objects.create_user(
+            email="jefe@test.com", username="jefe", name="Jefe", password="x"
+        )
+        producto = Producto.objects.create(
+            product_code="PT-1", name="Limpiador", unit=self.unidad, weight=1,
+            categoria_id=self.categoria,
+        )
+        lote = LoteProduccion.objects.create(
+            product=producto, batch_code="LP-002", production_date=date.today(),
+            produced_quantity=Decimal("5"), unit=self.unidad, almacen=self.almacen,
+            production_manager=usuario,
+        )
+        for materia, cantidad in ((self.mp, "12"), (mp2, "1")):
+            MaterialProduccion.objects.create(
+                batch=lote, raw_material=materia, used_quantity=Decimal(cantidad),
+                unit=self.unidad, costo_unitario=Decimal("2"),
+            )
+
+        lote.completar_produccion(usuario=usuario)
+
+        for materia, esperado in ((self.mp, 28), (mp2, 99)):
+            materia.refresh_from_db()
+            self.assertEqual(materia.stock, Decimal(esperado))
+        self.assertEqual(self.saldos()["L-SODA"], Decimal("99.00"))
+        self.assertEqual(self.saldos()["L-30"], Decimal("8.00"))
+
+
+class TransferenciaInventarioTest(TestCase):
+    """Tests para las transferencias entre almacenes"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.inventario.lotes import registrar_ingresos
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.origen = Almacen.objects.create(nombre="Central", direccion="-")
+        self.destino = Almacen.objects.create(nombre="Planta", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria
+        )
+        self.mp2 = MateriaPrima.objects.create(
+            nombre="Soda", codigo="SODA", unidad_id=unidad, categoria_id=categoria
+        )
+        Kardex.registrar_movimientos_bulk([
+            {"almacen": self.origen, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 10, "costo_unitario": 2},
+            {"almacen": self.origen, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 10, "costo_unitario": 4},
+            {"almacen": self.destino, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 5, "costo_unitario": 6},
+            {"almacen": self.origen, "item": self.mp2, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 3, "costo_unitario": 1},
+        ])
+        registrar_ingresos([
+            {"almacen": self.origen, "item": self.mp, "codigo_lote": "L-1",
+             "cantidad": 20, "fecha_vencimiento": date(2099, 1, 1)},
+        ])
+
+    def test_transfiere_al_costo_promedio_del_origen(self):
+        """Test que la salida y la entrada se registren juntas con el costo del origen"""
+        from innoquim.apps.inventario.models import LoteInventario
+        from innoquim.apps.inventario.transferencias import registrar_transferencia
+
+        transferencia = registrar_transferencia(
+            self.origen, self.destino, [{"item": self.mp, "cantidad": 8}]
+        )
+
+        origen = Kardex.obtener_saldo_actual(self.origen, self.mp)
+        destino = Kardex.obtener_saldo_actual(self.destino, self.mp)
+        self.assertEqual(origen["cantidad"], Decimal("12.00"))
+        self.assertEqual(origen["costo_promedio"], Decimal("3.0000"))
+        # 5 a 6.00 + 8 a 3.00 (promedio del origen) = 54 / 13
+        self.assertEqual(destino["cantidad"], Decimal("13.00"))
+        self.assertEqual(destino["costo_total"], Decimal("54.00"))
+        self.assertEqual(transferencia.items.get().costo_unitario, Decimal("3.0000"))
+        self.assertEqual(
+            Kardex.objects.filter(motivo="TRANSFERENCIA", referencia_id=f"TRF{transferencia.id}").count(), 2
+        )
+
+        # El lote se reparte entre los dos almacenes con el mismo vencimiento
+        lotes = {
+            lote.almacen_id: lote
+            for lote in LoteInventario.objects.filter(codigo_lote="L-1")
+        }
+        self.assertEqual(lotes[self.origen.id].cantidad_disponible, Decimal("12.00"))
+        self.assertEqual(lotes[self.destino.id].cantidad_disponible, Decimal("8.00"))
+        self.assertEqual(lotes[self.destino.id].fecha_vencimiento, date(2099, 1, 1))
+
+    def test_stock_insuficiente_no_mueve_nada(self):
+        """Test que una línea sin saldo cancele toda la transferencia"""
+        from innoquim.apps.inventario.models import TransferenciaInventario
+        from innoquim.apps.inventario.transferencias import registrar_transferencia
+
+        movimientos = Kardex.objects.count()
+        with self.assertRaises(ValueError):
+            registrar_transferencia(
+                self.origen, self.destino,
+                [{"item": self.mp, "cantidad": 5}, {"item": self.mp2, "cantidad": 4}],
+            )
+        self.assertEqual(Kardex.objects.count(), movimientos)
+        self.assertFalse(TransferenciaInventario.objects.exists())
+
+
+class ConteoInventarioTest(TestCase):
+    """Tests para los conteos físicos de inventario"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="Central", direccion="-")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad,
+            categoria_id=categoria, stock=10,
+        )
+        self.mp2 = MateriaPrima.objects.create(
+            nombre="Soda", codigo="SODA", unidad_id=unidad, categoria_id=categoria, stock=3,
+        )
+        Kardex.registrar_movimientos_bulk([
+            {"almacen": self.almacen, "item": self.mp, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 10, "costo_unitario": 2},
+            {"almacen": self.almacen, "item": self.mp2, "tipo_movimiento": "ENTRADA",
+             "motivo": "COMPRA", "cantidad": 3, "costo_unitario": 5},
+        ])
+
+    def test_ajusta_diferencias_sin_contar_movimientos_durante_el_conteo(self):
+        """Test que solo se ajuste lo contado contra el saldo del momento del conteo"""
+        from innoquim.apps.inventario.conteos import (
+            finalizar_conteo, iniciar_conteo, registrar_conteos,
+        )
+        from innoquim.apps.inventario.models import LoteInventario
+        from innoquim.apps.recepcion_material.services import ImportacionError
+
+        conteo = iniciar_conteo(self.almacen)
+        self.assertEqual(
+            conteo.items.get(object_id=self.mp.pk).cantidad_esperada, Decimal("10.00")
+        )
+        with self.assertRaises(ValueError):
+            iniciar_conteo(self.almacen)
+
+        # Una fila inválida rechaza toda la carga
+        with self.assertRaises(ImportacionError):
+            registrar_conteos(conteo, [
+                {"codigo": "AC-CIT", "cantidad": "8"},
+                {"codigo": "NO-EXISTE", "cantidad": "1"},
+            ])
+        self.assertFalse(conteo.items.filter(cantidad_contada__isnull=False).exists())
+
+        # El mismo item contado en dos ubicaciones se suma
+        resumen = registrar_conteos(conteo, [
+            {"codigo": "AC-CIT", "cantidad": "5"},
+            {"codigo": "AC-CIT", "cantidad": "3"},
+            {"item_id": self.mp2.pk, "cantidad": "5"},
+        ])
+        self.assertEqual(resumen, {"items": 2, "con_diferencia": 2})
+
+        # Salida durante el conteo, después de contar: no es diferencia
+        Kardex.registrar_movimiento(
+            almacen=self.almacen, item=self.mp, tipo_movimiento="SALIDA",
+            motivo="VENTA", cantidad=1, costo_unitario=2,
+        )
+        resultado = finalizar_conteo(conteo)
+
+        self.assertEqual(resultado["salidas"], 1)
+        self.assertEqual(resultado["entradas"], 1)
+        self.assertEqual(Kardex.obtener_saldo_actual(self.almacen, self.mp)["cantidad"], Decimal("7.00"))
+        ajuste = Kardex.objects.get(referencia_id=f"CONTEO{conteo.id}", tipo_movimiento="ENTRADA")
+        self.assertEqual(ajuste.cantidad, Decimal("2.00"))
+        self.assertEqual(ajuste.costo_unitario, Decimal("5.0000"))
+        self.mp.refresh_from_db()
+        self.mp2.refresh_from_db()
+        self.assertEqual(self.mp.stock, Decimal("8.00"))
+        self.assertEqual(self.mp2.stock, Decimal("5.00"))
+        # El sobrante queda como un lote que el consumo FEFO puede alcanzar
+        sobrante = LoteInventario.objects.get(codigo_lote=f"CONTEO{conteo.id}")
+        self.assertEqual(
+            (sobrante.object_id, sobrante.cantidad_disponible), (str(self.mp2.pk), Decimal("2.00"))
+        )
+
+        conteo.refresh_from_db()
+        self.assertEqual(conteo.estado, "FINALIZADO")
+        with self.assertRaises(ValueError):
+            registrar_conteos(conteo, [{"codigo": "SODA", "cantidad": "1"}])
+
+
+class ContadoresStockTest(TestCase):
+    """Tests para los descuentos atómicos de stock con guarda de disponibilidad"""
+
+    def setUp(self):
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.unidad.models import Unidad
+
+        unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.materias = [
+            MateriaPrima.objects.create(
+                nombre=f"Materia {i}", codigo=f"MP-{i}", unidad_id=unidad,
+                categoria_id=categoria, stock=Decimal("10"),
+            )
+            for i in range(3)
+        ]
+
+    def test_descuenta_en_bloque_y_reporta_sin_stock(self):
+        """Test que un solo UPDATE descuente lo disponible y reporte el resto sin tocarlo"""
+        from innoquim.apps.inventario.contadores import descontar_stock, sumar_stock
+        from innoquim.apps.materia_prima.models import MateriaPrima
+
+        a, b, c = (m.pk for m in self.materias)
+        with self.assertNumQueries(1):
+            fallidos = descontar_stock(
+                MateriaPrima, {a: Decimal("4"), b: Decimal("10.5"), c: Decimal("10"), "NO-EXISTE": 1}
+            )
+        self.assertEqual(fallidos, [b, "NO-EXISTE"])
+        stocks = dict(MateriaPrima.objects.values_list("pk", "stock"))
+        self.assertEqual((stocks[a], stocks[b], stocks[c]), (Decimal("6"), Decimal("10"), Decimal("0")))
+
+        # Entradas y descuentos sin guarda siempre se aplican
+        self.assertEqual(sumar_stock(MateriaPrima, {a: 1}), [])
+        self.assertEqual(descontar_stock(MateriaPrima, {c: 2}, validar=False), [])
+        stocks = dict(MateriaPrima.objects.values_list("pk", "stock"))
+        self.assertEqual((stocks[a], stocks[c]), (Decimal("7"), Decimal("-2")))
@@ -0,0 +1,176 @@
+"""
+Transferencias de stock entre almacenes (TransferenciaInventario).
+
+Cada línea genera una SALIDA en el almacén de origen y una ENTRADA en el de
+destino con motivo TRANSFERENCIA. Todo ocurre en una transacción:
+
+1. Bloquea los items en orden determinista (Kardex.bloquear_items)
+2. Lee los saldos del origen en una consulta y valida que alcancen
+3. Registra todas las SALIDAS y ENTRADAS con un solo
+   Kardex.registrar_movimientos_bulk, al costo promedio del origen (el valor
+   que sale del origen es el que entra al destino)
+4. Sincroniza InventarioMaterial y mueve los lotes (FEFO) al destino
+   conservando código y vencimiento
+
+Una transferencia de cientos de líneas hace el mismo número de consultas
+que una de una línea.
+"""
+
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .lotes import consumir_lotes, registrar_ingresos
+from .models import Kardex, TransferenciaInventario, TransferenciaItem
+from .signals import actualizar_inventario_material_bulk
+
+
+def _clave(item, almacen):
+    return (ContentType.objects.get_for_model(item).pk, str(item.pk), almacen.pk)
+
+
+@transaction.atomic
+def registrar_transferencia(
+    almacen_origen, almacen_destino, lineas, usuario=None, observaciones=None, batch_size=1000
+):
+    """
+    Transfiere items de un almacén a otro.
+
+    Parámetros:
+        almacen_origen, almacen_destino: objetos Almacen
+        lineas: lista de dicts con 'item' (MateriaPrima o Producto) y 'cantidad'
+        usuario: usuario que registra (opcional)
+        observaciones: texto libre (opcional)
+
+    Retorna la TransferenciaInventario creada.
+    Lanza ValueError si los almacenes son el mismo, no hay líneas o el
+    origen no tiene saldo suficiente de algún item.
+    """
+    if almacen_origen.pk == almacen_destino.pk:
+        raise ValueError("El almacén de origen y el de destino deben ser distintos")
+    if not lineas:
+        raise ValueError("La transferencia no tiene items")
+
+    lineas = [
+        {
+            "item": linea["item"],
+            "cantidad": Decimal(str(linea["cantidad"])).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            ),
+        }
+        for linea in lineas
+    ]
+    if any(linea["cantidad"] <= 0 for linea in lineas):
+        raise ValueError("Las cantidades a transferir deben ser mayores que 0")
+
+    Kardex.bloquear_items(linea["item"] for linea in lineas)
+
+    # Saldo del origen de todos los items en una consulta
+    requerido = {}
+    for linea in lineas:
+        clave = _clave(linea["item"], almacen_origen)
+        requerido[clave] = requerido.get(clave, Decimal("0.00")) + linea["cantidad"]
+    saldos = Kardex.ultimos_saldos(requerido.keys())
+
+    faltantes = []
+    for clave, cantidad in requerido.items():
+        disponible = saldos[clave][0] if clave in saldos else Decimal("0.00")
+        if disponible < cantidad:
+            faltantes.append(f"{clave[1]} (requerido: {cantidad}, disponible: {disponible})")
+    if faltantes:
+        raise ValueError(
+            f"Stock insuficiente en {almacen_origen.nombre}: {', '.join(faltantes)}"
+        )
+
+    transferencia = TransferenciaInventario.objects.create(
+        almacen_origen=almacen_origen,
+        almacen_destino=almacen_destino,
+        observaciones=observaciones,
+        responsable=usuario,
+    )
+    referencia = f"TRF{transferencia.id}"
+    detalle = f"Transferencia {almacen_origen.nombre} -> {almacen_destino.nombre}"
+
+    movimientos = []
+    for linea in lineas:
+        costo = saldos[_clave(linea["item"], almacen_origen)][2]
+        linea["costo_unitario"] = costo
+        for almacen, tipo in ((almacen_origen, "SALIDA"), (almacen_destino, "ENTRADA")):
+            movimientos.append({
+                "almacen": almacen,
+                "item": linea["item"],
+                "tipo_movimiento": tipo,
+                "motivo": "TRANSFERENCIA",
+                "cantidad": linea["cantidad"],
+                "costo_unitario": costo,
+                "referencia_id": referencia,
+                "observaciones": detalle,
+                "usuario": usuario,
+            })
+    kardex = Kardex.registrar_movimientos_bulk(movimientos, batch_size=batch_size)
+    actualizar_inventario_material_bulk(kardex)
+
+    TransferenciaItem.objects.bulk_create(
+        [
+            TransferenciaItem(
+                transferencia=transferencia,
+                content_type=ContentType.objects.get_for_model(linea["item"]),
+                object_id=str(linea["item"].pk),
+                cantidad=linea["cantidad"],
+                costo_unitario=linea["costo_unitario"],
+            )
+            for linea in lineas
+        ],
+        batch_size=batch_size,
+    )
+
+    # Movimientos de Kardex de cada línea: dentro de cada (item, almacén)
+    # registrar_movimientos_bulk respeta el orden de entrada
+    por_clave = {}
+    for registro in kardex:
+        clave = (registro.content_type_id, str(registro.object_id), registro.almacen_id)
+        por_clave.setdefault(clave, deque()).append(registro)
+    pares = [
+        (
+            por_clave[_clave(linea["item"], almacen_origen)].popleft(),
+            por_clave[_clave(linea["item"], almacen_destino)].popleft(),
+        )
+        for linea in lineas
+    ]
+
+    # Los lotes salen del origen por FEFO y entran al destino con el mismo código
+    entrada_de = {salida.pk: entrada for salida, entrada in pares}
+    consumo = consumir_lotes(
+        [
+            {
+                "almacen": almacen_origen,
+                "item": linea["item"],
+                "cantidad": linea["cantidad"],
+                "kardex": salida,
+                "referencia_id": referencia,
+            }
+            for linea, (salida, _) in zip(lineas, pares)
+        ],
+        batch_size=batch_size,
+    )
+    item_de = {salida.pk: linea["item"] for linea, (salida, _) in zip(lineas, pares)}
+    registrar_ingresos(
+        [
+            {
+                "almacen": almacen_destino,
+                "item": item_de[movimiento.kardex.pk],
+                "codigo_lote": movimiento.lote.codigo_lote,
+                "cantidad": movimiento.cantidad,
+                "costo_unitario": movimiento.lote.costo_unitario,
+                "fecha_vencimiento": movimiento.lote.fecha_vencimiento,
+                "kardex": entrada_de[movimiento.kardex.pk],
+                "referencia_id": referencia,
+            }
+            for movimiento in consumo["movimientos"]
+        ],
+        batch_size=batch_size,
+    )
+
+    return transferencia
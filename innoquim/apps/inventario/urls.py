@@ -1,9 +1,26 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import KardexViewSet
+from .views import (
+    ConteoInventarioViewSet,
+    IndicadorInventarioViewSet,
+    KardexViewSet,
+    LoteInventarioViewSet,
+    TransferenciaInventarioViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"kardex", KardexViewSet, basename="kardex")
+router.register(
+    r"indicadores-inventario", IndicadorInventarioViewSet, basename="indicadorinventario"
+)
+router.register(r"lotes-inventario", LoteInventarioViewSet, basename="loteinventario")
+router.register(
+    r"transferencias-inventario", TransferenciaInventarioViewSet,
+    basename="transferenciainventario",
+)
+router.register(
+    r"conteos-inventario", ConteoInventarioViewSet, basename="conteoinventario"
+)
 
 urlpatterns = [
     path("", include(router.urls)),
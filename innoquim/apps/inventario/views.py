@@ -1,10 +1,32 @@
-from rest_framework import viewsets, status
+import os
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.contenttypes.models import ContentType
-from .models import Kardex
-from .serializers import KardexSerializer
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_date
+from innoquim.apps.recepcion_material.services import ImportacionError, leer_filas
+from .conteos import cancelar_conteo, finalizar_conteo, iniciar_conteo, registrar_conteos
+from .models import (
+    ConteoInventario,
+    IndicadorInventario,
+    Kardex,
+    LoteInventario,
+    TransferenciaInventario,
+)
+from .serializers import (
+    ConteoInventarioSerializer,
+    ConteoItemSerializer,
+    IndicadorInventarioSerializer,
+    KardexSerializer,
+    LoteInventarioSerializer,
+    TransferenciaCrearSerializer,
+    TransferenciaInventarioSerializer,
+)
+from .transferencias import registrar_transferencia
 
 
 class KardexViewSet(viewsets.ReadOnlyModelViewSet):
@@ -23,6 +45,9 @@ class KardexViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/kardex/{id}/ - Ver un movimiento específico
     - GET /api/kardex/saldo/ - Consultar saldo actual de un item
     - GET /api/kardex/historial/ - Ver historial de un item
+    - GET /api/kardex/valorizacion/ - Valor del inventario por almacén y mes
+    - GET /api/kardex/costo_ventas/ - Costo de ventas por mes
+    - GET /api/kardex/tendencia_costo/ - Costo promedio por item y mes
     """
 
     queryset = Kardex.objects.all().select_related("almacen", "usuario")
@@ -188,3 +213,413 @@ class KardexViewSet(viewsets.ReadOnlyModelViewSet):
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    def _parametros_analitica(self, request):
+        """Lee fecha_desde/fecha_hasta (AAAA-MM-DD) y almacen. Lanza ValueError."""
+        parametros = {}
+        for nombre in ("fecha_desde", "fecha_hasta"):
+            valor = request.query_params.get(nombre)
+            if valor:
+                try:
+                    fecha = parse_date(valor)
+                except ValueError:
+                    fecha = None
+                if fecha is None:
+                    raise ValueError(f"{nombre} debe tener formato AAAA-MM-DD")
+                parametros[nombre] = fecha
+        almacen = request.query_params.get("almacen")
+        if almacen and not almacen.isdigit():
+            raise ValueError("almacen debe ser el ID numérico del almacén")
+        parametros["almacen"] = int(almacen) if almacen else None
+        return parametros
+
+    @action(detail=False, methods=["get"])
+    def valorizacion(self, request):
+        """
+        Valor del inventario de cada almacén al cierre de cada mes.
+
+        Parámetros opcionales: almacen, fecha_desde, fecha_hasta
+
+        Ejemplo:
+        GET /api/kardex/valorizacion/?fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+        """
+        from . import analitica
+
+        try:
+            parametros = self._parametros_analitica(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        libro = analitica.cargar_libro(
+            hasta=parametros.get("fecha_hasta"), almacen=parametros["almacen"]
+        )
+        resultado = analitica.valor_por_almacen(libro, desde=parametros.get("fecha_desde"))
+        almacenes = [
+            {
+                "almacen_id": almacen_id,
+                "valor": str(valores[-1]) if valores else "0.00",
+                "periodos": [
+                    {"periodo": periodo, "valor": str(valor)}
+                    for periodo, valor in zip(resultado["periodos"], valores)
+                ],
+            }
+            for almacen_id, valores in resultado["almacenes"].items()
+        ]
+        total = sum(
+            (valores[-1] for valores in resultado["almacenes"].values() if valores),
+            analitica.a_decimal(0),
+        )
+        return Response({"total": str(total), "almacenes": almacenes})
+
+    @action(detail=False, methods=["get"])
+    def costo_ventas(self, request):
+        """
+        Costo de las salidas por mes, valoradas al costo del Kardex.
+
+        Parámetros opcionales:
+        - motivo: uno o varios (por defecto VENTA)
+        - almacen, fecha_desde, fecha_hasta
+
+        Ejemplo:
+        GET /api/kardex/costo_ventas/?motivo=VENTA&motivo=PRODUCCION
+        """
+        from . import analitica
+
+        motivos = request.query_params.getlist("motivo") or ["VENTA"]
+        invalidos = [m for m in motivos if m not in analitica.MOTIVOS]
+        if invalidos:
+            return Response(
+                {"error": f"Motivos inválidos: {', '.join(invalidos)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            parametros = self._parametros_analitica(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        libro = analitica.cargar_libro(
+            hasta=parametros.get("fecha_hasta"), almacen=parametros["almacen"]
+        )
+        costos = analitica.costo_ventas_por_periodo(
+            libro, motivos=motivos, desde=parametros.get("fecha_desde")
+        )
+        return Response(
+            [{"periodo": periodo, "costo": str(costo)} for periodo, costo in costos]
+        )
+
+    @action(detail=False, methods=["get"])
+    def tendencia_costo(self, request):
+        """
+        Costo promedio de un item (todos los almacenes o uno) al cierre de cada mes.
+
+        Parámetros requeridos:
+        - materia_prima_id O producto_id
+
+        Parámetros opcionales: almacen, fecha_desde, fecha_hasta
+
+        Ejemplo:
+        GET /api/kardex/tendencia_costo/?materia_prima_id=MP000001
+        """
+        from . import analitica
+
+        materia_prima_id = request.query_params.get("materia_prima_id")
+        producto_id = request.query_params.get("producto_id")
+        if not materia_prima_id and not producto_id:
+            return Response(
+                {"error": "Debe proporcionar materia_prima_id o producto_id"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            parametros = self._parametros_analitica(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if materia_prima_id:
+            from innoquim.apps.materia_prima.models import MateriaPrima
+
+            content_type = ContentType.objects.get_for_model(MateriaPrima)
+        else:
+            from innoquim.apps.producto.models import Producto
+
+            content_type = ContentType.objects.get_for_model(Producto)
+
+        libro = analitica.cargar_libro(
+            hasta=parametros.get("fecha_hasta"),
+            almacen=parametros["almacen"],
+            content_type=content_type,
+            object_ids=[materia_prima_id or producto_id],
+        )
+        tendencia = analitica.tendencia_costo_promedio(libro, desde=parametros.get("fecha_desde"))
+        promedios = next(iter(tendencia["items"].values()), [])
+        return Response(
+            {
+                "item_id": materia_prima_id or producto_id,
+                "item_tipo": "materia_prima" if materia_prima_id else "producto",
+                "periodos": [
+                    {
+                        "periodo": periodo,
+                        "costo_promedio": str(promedio) if promedio is not None else None,
+                    }
+                    for periodo, promedio in zip(tendencia["periodos"], promedios)
+                ],
+            }
+        )
+
+
+class IndicadorInventarioViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Indicadores de inventario precalculados (clase ABC, rotación, días de
+    cobertura, bajo mínimo / sobre máximo) para materias primas y productos.
+
+    Se recalculan con: python manage.py calcular_indicadores
+
+    Filtros:
+    - tipo: materiaprima o producto
+    - clase_abc, bajo_minimo, sobre_maximo
+    - dias_cobertura__lte / __gte, rotacion__lte / __gte
+    - search: código o nombre
+
+    Ejemplo:
+    GET /api/indicadores-inventario/?tipo=materiaprima&bajo_minimo=true&ordering=dias_cobertura
+    """
+
+    queryset = IndicadorInventario.objects.all().select_related("content_type")
+    serializer_class = IndicadorInventarioSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = {
+        "clase_abc": ["exact"],
+        "bajo_minimo": ["exact"],
+        "sobre_maximo": ["exact"],
+        "dias_cobertura": ["lte", "gte"],
+        "rotacion": ["lte", "gte"],
+    }
+    search_fields = ["codigo", "nombre"]
+    ordering_fields = ["consumo_valor", "rotacion", "dias_cobertura", "stock", "codigo"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tipo = self.request.query_params.get("tipo")
+        if tipo:
+            queryset = queryset.filter(content_type__model=tipo)
+        return queryset
+
+
+class LoteInventarioViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Lotes de inventario con su saldo, en orden FEFO (primero el que vence antes).
+
+    Filtros:
+    - almacen, object_id, codigo_lote
+    - tipo: materiaprima o producto
+    - con_saldo=true: solo lotes con cantidad disponible
+    - vence_antes=YYYY-MM-DD: lotes que vencen hasta esa fecha
+
+    Ejemplo:
+    GET /api/lotes-inventario/?object_id=MP000001&almacen=1&con_saldo=true
+    """
+
+    queryset = LoteInventario.objects.all().select_related("content_type", "almacen")
+    serializer_class = LoteInventarioSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["almacen", "object_id", "codigo_lote"]
+    search_fields = ["codigo_lote"]
+    ordering_fields = ["fecha_vencimiento", "fecha_ingreso", "cantidad_disponible"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tipo = self.request.query_params.get("tipo")
+        if tipo:
+            queryset = queryset.filter(content_type__model=tipo)
+        if self.request.query_params.get("con_saldo") == "true":
+            queryset = queryset.filter(cantidad_disponible__gt=0)
+        vence_antes = self.request.query_params.get("vence_antes")
+        if vence_antes:
+            fecha = parse_date(vence_antes)
+            if fecha is None:
+                raise ValidationError({"vence_antes": "Formato de fecha inválido. Use YYYY-MM-DD"})
+            queryset = queryset.filter(fecha_vencimiento__lte=fecha)
+        return queryset
+
+
+class TransferenciaInventarioViewSet(
+    mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    Transferencias de stock entre almacenes.
+
+    POST /api/transferencias-inventario/
+    {
+        "almacen_origen": 1,
+        "almacen_destino": 2,
+        "observaciones": "Reposición planta norte",
+        "items": [
+            {"tipo": "materiaprima", "item_id": "MP000001", "cantidad": "25.50"},
+            {"tipo": "producto", "item_id": "7", "cantidad": "10"}
+        ]
+    }
+
+    Registra en una transacción la SALIDA del origen y la ENTRADA al destino
+    de cada línea (motivo TRANSFERENCIA) al costo promedio del origen.
+    Si algún item no tiene saldo suficiente no se mueve nada (400).
+
+    Filtros: almacen_origen, almacen_destino
+    """
+
+    queryset = TransferenciaInventario.objects.all().select_related(
+        "almacen_origen", "almacen_destino"
+    ).prefetch_related("items__content_type")
+    serializer_class = TransferenciaInventarioSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["almacen_origen", "almacen_destino"]
+    ordering_fields = ["fecha", "created_at"]
+
+    def create(self, request, *args, **kwargs):
+        entrada = TransferenciaCrearSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        datos = entrada.validated_data
+        try:
+            transferencia = registrar_transferencia(
+                datos["almacen_origen"],
+                datos["almacen_destino"],
+                datos["lineas"],
+                usuario=request.user,
+                observaciones=datos.get("observaciones"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            self.get_serializer(self.get_queryset().get(pk=transferencia.pk)).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ConteoInventarioViewSet(
+    mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    Conteos físicos de inventario (toma de inventario) por almacén.
+
+    Endpoints:
+    - POST /api/conteos-inventario/ {"almacen": 1, "observaciones": "..."}
+      Abre el conteo con el saldo actual de cada item del almacén
+    - POST /api/conteos-inventario/{id}/registrar/ - Carga cantidades contadas
+    - GET  /api/conteos-inventario/{id}/items/ - Líneas (?con_diferencia=true,
+      ?pendientes=true)
+    - POST /api/conteos-inventario/{id}/finalizar/ - Registra las diferencias
+      como ajustes en el Kardex y cierra el conteo
+    - POST /api/conteos-inventario/{id}/cancelar/ - Cierra sin ajustar
+
+    Filtros: almacen, estado
+    """
+
+    queryset = ConteoInventario.objects.all().select_related("almacen").annotate(
+        total_items=Count("items"),
+        contados=Count("items", filter=Q(items__cantidad_contada__isnull=False)),
+        con_diferencia=Count(
+            "items", filter=Q(items__diferencia__isnull=False) & ~Q(items__diferencia=0)
+        ),
+    )
+    serializer_class = ConteoInventarioSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["almacen", "estado"]
+    ordering_fields = ["fecha_inicio"]
+
+    def _detalle(self, conteo, resumen=None, codigo=status.HTTP_200_OK):
+        datos = self.get_serializer(self.get_queryset().get(pk=conteo.pk)).data
+        if resumen is not None:
+            datos["resumen"] = resumen
+        return Response(datos, status=codigo)
+
+    def create(self, request, *args, **kwargs):
+        entrada = self.get_serializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        try:
+            conteo = iniciar_conteo(
+                entrada.validated_data["almacen"],
+                usuario=request.user,
+                observaciones=entrada.validated_data.get("observaciones"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detalle(conteo, codigo=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def registrar(self, request, pk=None):
+        """
+        Carga de cantidades contadas.
+        POST /api/conteos-inventario/{id}/registrar/
+
+        Acepta:
+        - multipart con 'archivo' (.csv o .json)
+        - JSON: lista de filas o {"conteos": [...]}
+
+        Columnas: cantidad, item_id o codigo y opcionalmente tipo
+        (materiaprima por defecto, o producto). Volver a cargar un item
+        reemplaza su conteo anterior.
+        """
+        conteo = self.get_object()
+        archivo = request.FILES.get("archivo")
+        try:
+            if archivo:
+                formato = os.path.splitext(archivo.name)[1].lstrip(".")
+                filas = leer_filas(archivo.read(), formato, clave="conteos")
+            elif isinstance(request.data, list):
+                filas = request.data
+            else:
+                filas = request.data.get("conteos")
+                if not isinstance(filas, list):
+                    raise ValueError(
+                        "Envíe un archivo 'archivo' (.csv/.json) o una lista 'conteos'"
+                    )
+            resumen = registrar_conteos(conteo, filas)
+        except ImportacionError as e:
+            return Response(
+                {"error": str(e), "errores": e.errores},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detalle(conteo, resumen)
+
+    @action(detail=True, methods=["get"])
+    def items(self, request, pk=None):
+        """Líneas del conteo, paginadas."""
+        conteo = self.get_object()
+        queryset = conteo.items.select_related("content_type")
+        if request.query_params.get("con_diferencia") == "true":
+            queryset = queryset.filter(diferencia__isnull=False).exclude(diferencia=0)
+        if request.query_params.get("pendientes") == "true":
+            queryset = queryset.filter(cantidad_contada__isnull=True)
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            return self.get_paginated_response(ConteoItemSerializer(pagina, many=True).data)
+        return Response(ConteoItemSerializer(queryset, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def finalizar(self, request, pk=None):
+        """
+        POST /api/conteos-inventario/{id}/finalizar/
+        {"no_contados_en_cero": false}
+
+        Con no_contados_en_cero=true los items no contados se dan de baja.
+        """
+        conteo = self.get_object()
+        no_contados_en_cero = str(
+            request.data.get("no_contados_en_cero", False)
+        ).lower() in ("true", "1")
+        try:
+            resumen = finalizar_conteo(
+                conteo, usuario=request.user, no_contados_en_cero=no_contados_en_cero
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detalle(conteo, resumen)
+
+    @action(detail=True, methods=["post"])
+    def cancelar(self, request, pk=None):
+        conteo = self.get_object()
+        try:
+            cancelar_conteo(conteo)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detalle(conteo)
@@ -1,11 +1,15 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import connection, models, transaction
 
 from innoquim.apps.almacen.models import Almacen
 from innoquim.apps.unidad.models import Unidad
 
 
+# Clave del advisory lock que serializa la generación de IDs IMnnnnnn
+BLOQUEO_IDS = 0x494D  # "IM"
+
+
 class InventarioMaterial(models.Model):
     """
     Control de cantidades actuales por ítem y almacén (genérico).
@@ -150,23 +154,38 @@ class InventarioMaterial(models.Model):
         Formato: IM + 6 digitos (IM000001, IM000002, ...)
         Soporta hasta 999,999 registros
         """
-        if not self.inventario_material_id:
-            # Obtener el ultimo inventario ordenado descendente
-            last_inventario = InventarioMaterial.objects.order_by(
-                "-inventario_material_id"
-            ).first()
-
-            if last_inventario and last_inventario.inventario_material_id:
-                # Extraer numero del formato IM000001 -> 1
-                # [2:] elimina los primeros 2 caracteres "IM"
-                last_number = int(last_inventario.inventario_material_id[2:])
-                new_number = last_number + 1
-            else:
-                # Primera insercion en la tabla
-                new_number = 1
+        if self.inventario_material_id:
+            super().save(*args, **kwargs)
+            return
+
+        # El bloqueo dura hasta el fin de la transacción: el ID leído no lo
+        # puede tomar otra transacción antes del INSERT
+        with transaction.atomic():
+            new_number = InventarioMaterial.siguiente_numero()
 
             # f-string con formato :06d = padding de 6 digitos con ceros
             self.inventario_material_id = f"IM{new_number:06d}"
 
-        # Llamar al save() original de Django
-        super().save(*args, **kwargs)
+            # Llamar al save() original de Django
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def siguiente_numero():
+        """
+        Número del próximo IMnnnnnn (último + 1). Debe llamarse dentro de una
+        transacción: en PostgreSQL toma antes un pg_advisory_xact_lock, así
+        dos transacciones no leen el mismo último ID (la segunda chocaría
+        con la PK de la primera) y la reserva dura hasta el commit.
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [BLOQUEO_IDS])
+
+        # Obtener el ultimo inventario ordenado descendente
+        ultimo = (
+            InventarioMaterial.objects.order_by("-inventario_material_id")
+            .values_list("inventario_material_id", flat=True)
+            .first()
+        )
+        # Extraer numero del formato IM000001 -> 1; primera insercion -> 1
+        return int(ultimo[2:]) + 1 if ultimo else 1
@@ -63,4 +63,21 @@ class InventarioMaterialSerializer(serializers.ModelSerializer):
         item = getattr(obj, 'item', None)
         if not item:
             return None
-        return getattr(item, 'nombre', None) or getattr(item, 'name', None) or str(obj.object_id)
\ No newline at end of file
+        return getattr(item, 'nombre', None) or getattr(item, 'name', None) or str(obj.object_id)
+
+class StockBajoSerializer(serializers.Serializer):
+    """
+    Item con stock <= stock_minimo y la cantidad sugerida para reponer.
+    No es un ModelSerializer: representa datos calculados (ver inventario.alertas).
+    """
+    item_tipo = serializers.CharField(read_only=True)
+    item_id = serializers.CharField(read_only=True)
+    codigo = serializers.CharField(read_only=True)
+    nombre = serializers.CharField(read_only=True)
+    almacen_id = serializers.IntegerField(read_only=True, allow_null=True)
+    cantidad = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    stock_minimo = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    stock_maximo = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True, allow_null=True
+    )
+    cantidad_sugerida = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
@@ -1,7 +1,9 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from .models import InventarioMaterial
-from .serializers import InventarioMaterialSerializer
+from .serializers import InventarioMaterialSerializer, StockBajoSerializer
 
 
 class InventarioMaterialViewSet(viewsets.ModelViewSet):
@@ -15,6 +17,8 @@ class InventarioMaterialViewSet(viewsets.ModelViewSet):
     - PUT    /api/inventario-materiales/{id}/     -> Actualizar completo
     - PATCH  /api/inventario-materiales/{id}/     -> Actualizar parcial
     - DELETE /api/inventario-materiales/{id}/     -> Eliminar
+    - GET    /api/inventario-materiales/stock-bajo/          -> Items bajo el mínimo
+    - GET    /api/inventario-materiales/stock-bajo/resumen/  -> Conteo por almacén
 
     IMPORTANTE: permission_classes = [AllowAny] es SOLO para desarrollo
     """
@@ -47,4 +51,54 @@ class InventarioMaterialViewSet(viewsets.ModelViewSet):
         if object_id:
             queryset = queryset.filter(object_id=object_id)
 
-        return queryset
\ No newline at end of file
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='stock-bajo')
+    def stock_bajo(self, request):
+        """
+        Items con stock <= stock_minimo y cantidad sugerida de reorden
+        (hasta stock_maximo, o hasta stock_minimo si no hay máximo).
+
+        Parámetros opcionales:
+        - almacen_id: saldos de ese almacén (lista en caché, se refresca con
+          cada movimiento). Sin almacen_id: stock total de cada item.
+        - tipo: materia_prima | producto
+
+        Ejemplo:
+        GET /api/inventario-materiales/stock-bajo/?almacen_id=1&tipo=materia_prima
+        """
+        from innoquim.apps.inventario.alertas import consultar_global, items_stock_bajo
+
+        almacen_id = request.query_params.get('almacen_id')
+        tipo = request.query_params.get('tipo')
+
+        if almacen_id:
+            try:
+                almacen_id = int(almacen_id)
+            except ValueError:
+                return Response({'error': 'almacen_id debe ser un número'}, status=400)
+            filas, fecha = items_stock_bajo(almacen_id)
+        else:
+            filas, fecha = consultar_global(), None
+
+        if tipo:
+            filas = [f for f in filas if f['item_tipo'] == tipo.lower()]
+
+        return Response({
+            'almacen_id': almacen_id or None,
+            'total': len(filas),
+            'fecha_calculo': fecha,
+            'items': StockBajoSerializer(filas, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='stock-bajo/resumen')
+    def stock_bajo_resumen(self, request):
+        """
+        Cantidad de items bajo el mínimo en cada almacén (desde la caché).
+
+        Ejemplo:
+        GET /api/inventario-materiales/stock-bajo/resumen/
+        """
+        from innoquim.apps.inventario.alertas import resumen_stock_bajo
+
+        return Response(resumen_stock_bajo())
@@ -0,0 +1,97 @@
+"""
+Planificación de requerimientos de materiales (MRP) de todos los lotes de
+producción y órdenes de cliente abiertos.
+
+Uso:
+    python manage.py ejecutar_mrp
+    python manage.py ejecutar_mrp --periodo dia --hasta 2026-03-31
+    python manage.py ejecutar_mrp --generar-pedidos
+    python manage.py ejecutar_mrp --pronostico   # con la demanda pronosticada
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from innoquim.apps.almacen.services import obtener_almacen
+from innoquim.apps.lote_produccion.mrp import PERIODOS, ejecutar_mrp
+
+
+class Command(BaseCommand):
+    help = "Calcula faltantes de materia prima y sugerencias de compra (MRP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--almacen", type=int, help="ID del almacén (por defecto todos)")
+        parser.add_argument("--hasta", help="Fecha límite YYYY-MM-DD")
+        parser.add_argument("--periodo", choices=PERIODOS, default="semana")
+        parser.add_argument(
+            "--sin-ordenes", action="store_true", help="No incluir órdenes de cliente"
+        )
+        parser.add_argument(
+            "--pronostico",
+            action="store_true",
+            help="Agregar la demanda semanal pronosticada no cubierta por órdenes",
+        )
+        parser.add_argument(
+            "--generar-pedidos",
+            action="store_true",
+            help="Crear pedidos BORRADOR con las sugerencias",
+        )
+
+    def handle(self, *args, **options):
+        almacen = None
+        if options["almacen"]:
+            almacen = obtener_almacen(options["almacen"])
+            if almacen is None:
+                raise CommandError(f"No existe el almacén {options['almacen']}")
+        hasta = None
+        if options["hasta"]:
+            hasta = parse_date(options["hasta"])
+            if hasta is None:
+                raise CommandError("Formato de fecha inválido. Use YYYY-MM-DD")
+
+        inicio = time.monotonic()
+        try:
+            resultado = ejecutar_mrp(
+                almacen=almacen,
+                hasta=hasta,
+                incluir_ordenes=not options["sin_ordenes"],
+                periodo=options["periodo"],
+                generar_pedidos=options["generar_pedidos"],
+                incluir_pronostico=options["pronostico"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        duracion = time.monotonic() - inicio
+
+        for sugerencia in resultado["sugerencias"]:
+            self.stdout.write(
+                f"{sugerencia['proveedor_id']} {sugerencia['materia_prima_id']}: "
+                f"pedir={sugerencia['cantidad']} necesario={sugerencia['fecha_necesaria']} "
+                f"pedir_antes_de={sugerencia['fecha_pedido']}"
+                + (" (atrasada)" if sugerencia["atrasada"] else "")
+            )
+        sin_formula = resultado["sin_formula"]
+        if sin_formula["lotes"] or sin_formula["productos"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"Sin fórmula activa: {len(sin_formula['lotes'])} lotes, "
+                    f"{len(sin_formula['productos'])} productos con órdenes"
+                )
+            )
+        if resultado["sin_proveedor"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{len(resultado['sin_proveedor'])} materias primas sin proveedor preferido: "
+                    + ", ".join(resultado["sin_proveedor"][:20])
+                )
+            )
+        faltantes = sum(1 for r in resultado["requerimientos"] if r["faltante"] > 0)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['lotes']} lotes, {resultado['lineas_orden']} líneas de orden: "
+                f"{faltantes} faltantes, {len(resultado['sugerencias'])} sugerencias, "
+                f"{len(resultado['pedidos'])} pedidos en {duracion:.2f}s"
+            )
+        )
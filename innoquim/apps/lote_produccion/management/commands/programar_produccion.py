@@ -0,0 +1,152 @@
+"""
+Programación de los lotes pendientes con capacidad finita.
+
+Uso:
+    python manage.py programar_produccion
+    python manage.py programar_produccion --desde 2026-03-02 --dias 30 --guardar
+    python manage.py programar_produccion --benchmark 5000
+
+--benchmark mide secuenciar con datos sintéticos en memoria (no usa la BD):
+N lotes repartidos en varios almacenes, con componentes tomados de un
+catálogo de materias primas, stock inicial parcial y recepciones escalonadas.
+"""
+
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from innoquim.apps.almacen.services import obtener_almacen
+from innoquim.apps.lote_produccion.programacion import programar_produccion, secuenciar
+
+
+def datos_sinteticos(lotes, almacenes=3, materias=500, componentes=12, dias=60, semilla=1):
+    """Argumentos de secuenciar con una carga sintética reproducible."""
+    azar = random.Random(semilla)
+    desde = timezone.localdate()
+    catalogo = [f"MP{i:06d}" for i in range(materias)]
+
+    programables = []
+    requerimientos = {}
+    demanda = {}
+    for lote_id in range(1, lotes + 1):
+        almacen_id = azar.randint(1, almacenes)
+        programables.append({
+            "id": lote_id,
+            "almacen_id": almacen_id,
+            "fecha": desde + timedelta(days=azar.randint(0, dias // 2)),
+        })
+        lineas = [
+            (materia, Decimal(azar.randint(1, 50)))
+            for materia in azar.sample(catalogo, componentes)
+        ]
+        requerimientos[lote_id] = lineas
+        for materia, cantidad in lineas:
+            clave = (materia, almacen_id)
+            demanda[clave] = demanda.get(clave, Decimal("0")) + cantidad
+
+    # Stock para ~60% de la demanda; el resto llega en recepciones
+    disponible = {clave: total * Decimal("0.6") for clave, total in demanda.items()}
+    recepciones = {}
+    for (materia, almacen_id), total in demanda.items():
+        if azar.random() < 0.5:
+            fecha = desde + timedelta(days=azar.randint(1, dias))
+            recepciones[(materia, almacen_id, fecha)] = total * Decimal("0.3")
+    por_dia = max(1, lotes // (almacenes * dias // 2))
+    capacidad = {almacen_id: por_dia for almacen_id in range(1, almacenes + 1)}
+    return programables, requerimientos, disponible, recepciones, capacidad, desde
+
+
+class Command(BaseCommand):
+    help = "Programa los lotes pendientes según material y capacidad diaria"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--almacen", type=int, help="ID del almacén (por defecto todos)")
+        parser.add_argument("--desde", help="Primer día programable YYYY-MM-DD (por defecto hoy)")
+        parser.add_argument("--dias", type=int, default=90, help="Horizonte en días")
+        parser.add_argument(
+            "--capacidad",
+            type=int,
+            help="Lotes por día de los almacenes sin lotes_por_dia (por defecto sin límite)",
+        )
+        parser.add_argument(
+            "--guardar", action="store_true", help="Guardar fecha_programada en los lotes"
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="LOTES",
+            help="Medir el algoritmo con LOTES lotes sintéticos (no usa la BD)",
+        )
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.benchmark(options["benchmark"], options["dias"])
+
+        almacen = None
+        if options["almacen"]:
+            almacen = obtener_almacen(options["almacen"])
+            if almacen is None:
+                raise CommandError(f"No existe el almacén {options['almacen']}")
+        desde = None
+        if options["desde"]:
+            desde = parse_date(options["desde"])
+            if desde is None:
+                raise CommandError("Formato de fecha inválido. Use YYYY-MM-DD")
+
+        inicio = time.monotonic()
+        try:
+            resultado = programar_produccion(
+                almacen=almacen,
+                desde=desde,
+                dias=options["dias"],
+                capacidad=options["capacidad"],
+                guardar=options["guardar"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        duracion = time.monotonic() - inicio
+
+        for fila in resultado["programados"]:
+            if fila["retraso_dias"]:
+                self.stdout.write(
+                    f"{fila['batch_code']}: {fila['fecha_planificada']} -> "
+                    f"{fila['fecha_programada']} (+{fila['retraso_dias']} días)"
+                )
+        for fila in resultado["sin_programar"]:
+            motivo = (
+                "sin capacidad en el horizonte"
+                if fila["motivo"] == "capacidad"
+                else f"falta {fila['faltante']} de {fila['materia_prima_id']}"
+            )
+            self.stderr.write(self.style.WARNING(f"{fila['batch_code']}: {motivo}"))
+        if resultado["sin_formula"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{len(resultado['sin_formula'])} lotes sin materiales ni fórmula activa"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['lotes']} lotes: {len(resultado['programados'])} programados, "
+                f"{len(resultado['sin_programar'])} sin programar, "
+                f"{resultado['actualizados']} guardados en {duracion:.2f}s"
+            )
+        )
+
+    def benchmark(self, lotes, dias):
+        argumentos = datos_sinteticos(lotes, dias=dias)
+        inicio = time.monotonic()
+        programados, sin_programar = secuenciar(*argumentos, dias=dias)
+        duracion = time.monotonic() - inicio
+        componentes = sum(len(lineas) for lineas in argumentos[1].values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{lotes} lotes ({componentes} componentes): {len(programados)} programados, "
+                f"{len(sin_programar)} sin programar en {duracion:.3f}s"
+            )
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0001_initial'),
+        ('lote_produccion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loteproduccion',
+            name='formula',
+            field=models.ForeignKey(blank=True, help_text='Versión de la fórmula usada para calcular los materiales', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='lotes_produccion', to='formula.formula', verbose_name='Fórmula'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0002_almacen_lotes_por_dia'),
+        ('formula', '0001_initial'),
+        ('lote_produccion', '0002_loteproduccion_formula'),
+        ('producto', '0003_producto_almacen_preferido'),
+        ('unidad', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loteproduccion',
+            name='fecha_programada',
+            field=models.DateField(blank=True, help_text='Fecha factible propuesta por el programador de producción', null=True, verbose_name='Fecha Programada'),
+        ),
+        migrations.AddField(
+            model_name='loteproduccion',
+            name='secuencia_programada',
+            field=models.PositiveIntegerField(blank=True, help_text='Orden del lote dentro de su fecha programada y almacén', null=True, verbose_name='Secuencia Programada'),
+        ),
+        migrations.AddIndex(
+            model_name='loteproduccion',
+            index=models.Index(fields=['almacen', 'fecha_programada', 'secuencia_programada'], name='lote_produc_almacen_b76d62_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
+from collections import deque
+
 from django.db import models, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Cast
 from django.conf import settings
 from decimal import Decimal
 
@@ -38,6 +42,21 @@ class LoteProduccion(models.Model):
         verbose_name="Fecha de Producción"
     )
     
+    # Programación con capacidad finita (ver programacion.py)
+    fecha_programada = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Fecha Programada",
+        help_text="Fecha factible propuesta por el programador de producción"
+    )
+    
+    secuencia_programada = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Secuencia Programada",
+        help_text="Orden del lote dentro de su fecha programada y almacén"
+    )
+    
     produced_quantity = models.DecimalField(
         max_digits=12,
         decimal_places=4,
@@ -51,6 +70,16 @@ class LoteProduccion(models.Model):
         verbose_name="Unidad de Medida"
     )
     
+    formula = models.ForeignKey(
+        "formula.Formula",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="lotes_produccion",
+        verbose_name="Fórmula",
+        help_text="Versión de la fórmula usada para calcular los materiales"
+    )
+    
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -116,6 +145,7 @@ class LoteProduccion(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['production_date']),
+            models.Index(fields=['almacen', 'fecha_programada', 'secuencia_programada']),
             models.Index(fields=['batch_code']),
         ]
 
@@ -124,14 +154,15 @@ class LoteProduccion(models.Model):
     
     def calcular_costo_materiales(self):
         """
-        Calcula el costo total de los materiales del lote.
+        Recalcula el costo total de los materiales del lote con un solo
+        SUM en la BD (reconciliación; las ediciones de materiales lo
+        mantienen con ajustar_costo_materiales).
         """
         from innoquim.apps.material_produccion.models import MaterialProduccion
         
-        materiales = MaterialProduccion.objects.filter(batch=self)
-        self.costo_materiales = sum(
-            m.costo_total for m in materiales
-        )
+        self.costo_materiales = MaterialProduccion.objects.filter(batch=self).aggregate(
+            total=Sum('costo_total')
+        )['total'] or Decimal('0.00')
         
         if self.produced_quantity > 0:
             self.costo_unitario_producto = (
@@ -140,14 +171,45 @@ class LoteProduccion(models.Model):
         
         self.save(update_fields=['costo_materiales', 'costo_unitario_producto'])
     
+    @staticmethod
+    def ajustar_costo_materiales(lote_id, diferencia):
+        """
+        Suma una diferencia al costo de materiales de un lote y recalcula
+        el costo unitario en un solo UPDATE, sin leer los materiales:
+        
+            costo_materiales = costo_materiales + diferencia
+        
+        Se usa al agregar, modificar o eliminar un MaterialProduccion.
+        """
+        if not diferencia:
+            return
+        diferencia = Value(Decimal(diferencia), output_field=models.DecimalField())
+        LoteProduccion.objects.filter(pk=lote_id).update(
+            costo_materiales=F('costo_materiales') + diferencia,
+            # El lado derecho usa los valores anteriores de la fila
+            costo_unitario_producto=Case(
+                When(
+                    produced_quantity__gt=0,
+                    # Divisor flotante: en SQLite los decimales enteros se
+                    # guardan como INTEGER y la división sería entera
+                    then=(F('costo_materiales') + diferencia)
+                    / Cast('produced_quantity', models.FloatField()),
+                ),
+                default=F('costo_unitario_producto'),
+                output_field=models.DecimalField(),
+            ),
+        )
+    
     @transaction.atomic
     def completar_produccion(self, usuario=None):
         """
         Completa el lote de producción:
         1. Valida que haya materiales
         2. Valida stock suficiente de materias primas
-        3. Descuenta materias primas del inventario (Kardex SALIDA)
-        4. Suma producto terminado al inventario (Kardex ENTRADA)
+        3. Descuenta materias primas del inventario (Kardex SALIDA) y de sus
+           lotes por FEFO
+        4. Suma producto terminado al inventario (Kardex ENTRADA) como un
+           lote con el batch_code
         5. Actualiza estado a COMPLETED
         
         Raises:
@@ -155,6 +217,11 @@ class LoteProduccion(models.Model):
         """
         from innoquim.apps.material_produccion.models import MaterialProduccion
         from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.inventario.contadores import descontar_stock, sumar_stock
+        from innoquim.apps.inventario.lotes import consumir_lotes, registrar_ingresos
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.producto.models import Producto
+        from innoquim.apps.unidad.conversion import convertir
         from django.utils import timezone
         
         if self.status == 'completed':
@@ -165,43 +232,83 @@ class LoteProduccion(models.Model):
         if not materiales.exists():
             raise ValueError("No se puede completar un lote sin materiales")
         
-        # 1. Validar stock suficiente
+        # 1. Validar stock suficiente (en la unidad base de cada materia prima)
+        materiales = list(materiales.select_related('raw_material'))
         for material in materiales:
             saldo = Kardex.obtener_saldo_actual(
                 almacen=self.almacen,
                 item=material.raw_material
             )
+            requerido = convertir(
+                material.used_quantity, material.unit_id, material.raw_material.unidad_id_id
+            )
             
-            if saldo['cantidad'] < material.used_quantity:
+            if saldo['cantidad'] < requerido:
                 raise ValueError(
                     f"Stock insuficiente de {material.raw_material.nombre}. "
-                    f"Requerido: {material.used_quantity}, "
+                    f"Requerido: {requerido}, "
                     f"Disponible: {saldo['cantidad']}"
                 )
         
-        # 2. Descontar materias primas (SALIDA)
-        for material in materiales:
-            Kardex.registrar_movimiento(
-                almacen=self.almacen,
-                item=material.raw_material,
-                tipo_movimiento='SALIDA',
-                motivo='PRODUCCION',
-                cantidad=material.used_quantity,
-                costo_unitario=material.costo_unitario,
-                referencia_id=self.batch_code,
-                observaciones=f"Usado en lote {self.batch_code}",
-                usuario=usuario
+        # 2. Descontar materias primas (SALIDA), en bloque; el Kardex
+        # convierte cantidad y costo de la unidad de cada línea a la base
+        salidas = Kardex.registrar_movimientos_bulk([
+            {
+                'almacen': self.almacen,
+                'item': material.raw_material,
+                'tipo_movimiento': 'SALIDA',
+                'motivo': 'PRODUCCION',
+                'cantidad': material.used_quantity,
+                'costo_unitario': material.costo_unitario,
+                'referencia_id': self.batch_code,
+                'observaciones': f"Usado en lote {self.batch_code}",
+                'usuario': usuario,
+                'unidad': material.unit_id,
+            }
+            for material in materiales
+        ])
+        # registrar_movimientos_bulk devuelve las salidas agrupadas por
+        # item/almacén: cada material toma la siguiente salida de su materia
+        # prima (todas salen del almacén del lote)
+        por_materia = {}
+        for salida in salidas:
+            por_materia.setdefault(str(salida.object_id), deque()).append(salida)
+        pares = [
+            (material, por_materia[str(material.raw_material_id)].popleft())
+            for material in materiales
+        ]
+        consumido = {}
+        for material, salida in pares:
+            consumido[material.raw_material_id] = (
+                consumido.get(material.raw_material_id, 0) + salida.cantidad
+            )
+        
+        # Consumir los lotes de cada materia prima por FEFO (una consulta bloqueada)
+        consumir_lotes([
+            {
+                'almacen': self.almacen,
+                'item': material.raw_material,
+                'cantidad': salida.cantidad,
+                'kardex': salida,
+                'referencia_id': self.batch_code,
+            }
+            for material, salida in pares
+        ])
+        
+        # Descontar el stock de MateriaPrima en un UPDATE atómico con guarda;
+        # si otro proceso lo consumió antes, se revierte todo el lote
+        sin_stock = descontar_stock(MateriaPrima, consumido)
+        if sin_stock:
+            raise ValueError(
+                f"Stock insuficiente de {', '.join(map(str, sin_stock))} "
+                f"al completar el lote {self.batch_code}"
             )
-            
-            # Actualizar stock en MateriaPrima
-            material.raw_material.stock -= material.used_quantity
-            material.raw_material.save(update_fields=['stock'])
         
         # 3. Calcular costos
         self.calcular_costo_materiales()
         
         # 4. Sumar producto terminado (ENTRADA)
-        Kardex.registrar_movimiento(
+        entrada = Kardex.registrar_movimiento(
             almacen=self.almacen,
             item=self.product,
             tipo_movimiento='ENTRADA',
@@ -210,12 +317,26 @@ class LoteProduccion(models.Model):
             costo_unitario=self.costo_unitario_producto,
             referencia_id=self.batch_code,
             observaciones=f"Producción lote {self.batch_code}",
-            usuario=usuario
+            usuario=usuario,
+            unidad=self.unit_id,
         )
         
+        # El producto terminado queda como un lote con el código del lote de producción
+        if self.produced_quantity > 0:
+            registrar_ingresos([
+                {
+                    'almacen': self.almacen,
+                    'item': self.product,
+                    'codigo_lote': self.batch_code,
+                    'cantidad': entrada.cantidad,
+                    'costo_unitario': entrada.costo_unitario,
+                    'kardex': entrada,
+                    'referencia_id': self.batch_code,
+                }
+            ])
+        
         # Actualizar stock en Producto
-        self.product.stock += int(self.produced_quantity)
-        self.product.save(update_fields=['stock'])
+        sumar_stock(Producto, {self.product_id: int(entrada.cantidad)})
         
         # 5. Actualizar estado del lote
         self.status = 'completed'
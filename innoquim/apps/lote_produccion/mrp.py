@@ -0,0 +1,435 @@
+"""
+Planificación de requerimientos de materiales (MRP).
+
+En una sola pasada, para todos los lotes de producción abiertos (pending e
+in_progress) y las órdenes de cliente abiertas, con un número fijo de
+consultas agrupadas (no una por lote ni por orden):
+
+1. Requerimiento bruto de materias primas por (materia prima, almacén, fecha):
+   - lotes con materiales: suma de MaterialProduccion agrupada en la BD
+   - lotes sin materiales: explosión de su fórmula (formula.explosion)
+   - órdenes de cliente: lo que no cubren el stock del producto ni los lotes
+     abiertos se explota con la fórmula activa a la fecha de la orden
+   - pronóstico (opcional): la demanda semanal pronosticada de las semanas
+     siguientes a la actual, menos lo ya ordenado esa semana, se netea
+     igual que una orden en el almacén preferido del producto
+2. Neteo por almacén contra el saldo del Kardex. Los lotes en proceso
+   reservan su material primero (columna 'reservado'); los pedidos de
+   compra REGISTRADO entran como recepciones en su fecha de entrega esperada
+   (en el almacén preferido de la materia prima)
+3. Proyección por período (día o semana, según production_date): el
+   faltante es el punto más bajo del saldo proyectado y la fecha de falta
+   es el primer período en que queda negativo
+4. Sugerencias de compra por materia prima con su proveedor preferido y la
+   fecha límite para pedir (fecha de falta - días de entrega); opcionalmente
+   se crean como pedidos BORRADOR
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_CEILING
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.utils import timezone
+
+from innoquim.apps.almacen.services import resolver_almacen
+from innoquim.apps.formula.explosion import cargar_formulas, explotar, formulas_activas
+from innoquim.apps.inventario.models import Kardex
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.material_produccion.models import MaterialProduccion
+from innoquim.apps.orden_item.models import OrdenItem
+from innoquim.apps.pedido_item.models import PedidoItem
+from innoquim.apps.pedido_material.reorden import (
+    ESTADOS_EN_CAMINO,
+    crear_pedidos_borrador,
+    materias_en_borrador,
+)
+from innoquim.apps.producto.models import Producto
+from innoquim.apps.pronostico.demanda import demanda_pronosticada
+from innoquim.apps.unidad.conversion import factor
+
+from .models import LoteProduccion
+
+CERO = Decimal("0")
+CUATRO_DECIMALES = Decimal("0.0001")
+ESTADOS_LOTE = ("pending", "in_progress")
+ESTADOS_ORDEN = ("pending", "confirmed", "in_progress")
+PERIODOS = ("dia", "semana")
+
+
+def _inicio_periodo(fecha, periodo):
+    return fecha if periodo == "dia" else fecha - timedelta(days=fecha.weekday())
+
+
+def _q(valor):
+    return valor.quantize(CUATRO_DECIMALES)
+
+
+class _Demanda:
+    """Requerimientos de materia prima acumulados por (materia, almacén, fecha)."""
+
+    def __init__(self):
+        self.bruto = defaultdict(lambda: CERO)
+        self.reservado = defaultdict(lambda: CERO)
+
+    def agregar(self, materia_prima_id, almacen_id, fecha, cantidad, reservado=False):
+        self.bruto[(materia_prima_id, almacen_id, fecha)] += cantidad
+        if reservado:
+            self.reservado[(materia_prima_id, almacen_id)] += cantidad
+
+
+def _lotes_abiertos(almacen, hasta):
+    lotes = LoteProduccion.objects.filter(status__in=ESTADOS_LOTE)
+    if almacen is not None:
+        lotes = lotes.filter(almacen=almacen)
+    if hasta is not None:
+        lotes = lotes.filter(production_date__lte=hasta)
+    return lotes
+
+
+def _demanda_de_lotes(lotes, demanda, hoy):
+    """
+    Agrega la demanda de los lotes abiertos.
+
+    Retorna (produccion_planificada, lotes_sin_formula, total_lotes):
+    produccion_planificada es {(producto_id, almacen_id): cantidad en la
+    unidad del lote} para netear las órdenes de cliente.
+    """
+    # Lotes con materiales: una consulta agrupada
+    filas = list(
+        MaterialProduccion.objects.filter(batch__in=lotes)
+        .order_by()
+        .values(
+            "raw_material_id", "raw_material__unidad_id", "unit_id",
+            "batch__almacen_id", "batch__production_date", "batch__status",
+        )
+        .annotate(total=Sum("used_quantity"))
+    )
+    for fila in filas:
+        en_proceso = fila["batch__status"] == "in_progress"
+        demanda.agregar(
+            fila["raw_material_id"],
+            fila["batch__almacen_id"],
+            # El material de los lotes en proceso se necesita ya
+            min(fila["batch__production_date"], hoy) if en_proceso else fila["batch__production_date"],
+            fila["total"] * factor(fila["unit_id"], fila["raw_material__unidad_id"]),
+            reservado=en_proceso,
+        )
+
+    # Todos los lotes abiertos (producción planificada) y cuáles no tienen materiales
+    abiertos = list(
+        lotes.annotate(
+            con_materiales=Exists(MaterialProduccion.objects.filter(batch=OuterRef("pk")))
+        ).values_list(
+            "batch_code", "product_id", "produced_quantity", "unit_id", "almacen_id",
+            "production_date", "status", "formula_id", "con_materiales",
+        )
+    )
+    produccion = defaultdict(list)
+    sin_materiales = []
+    for lote in abiertos:
+        produccion[(lote[1], lote[4])].append((lote[2], lote[3]))
+        if not lote[8]:
+            sin_materiales.append(lote)
+
+    # Lotes sin materiales: explosión de su fórmula (tres consultas en total)
+    elegidas = cargar_formulas(lote[7] for lote in sin_materiales if lote[7])
+    activas = formulas_activas(lote[1] for lote in sin_materiales if not lote[7])
+    planes = []
+    sin_formula = []
+    for lote in sin_materiales:
+        formula = elegidas.get(lote[7]) or activas.get(lote[1])
+        if formula is None:
+            sin_formula.append(lote[0])
+            continue
+        planes.append((lote, {
+            "producto_id": lote[1], "cantidad": lote[2], "unidad_id": lote[3], "formula": formula,
+        }))
+    for (lote, _), lineas in zip(planes, explotar([p for _, p in planes])):
+        en_proceso = lote[6] == "in_progress"
+        for linea in lineas:
+            demanda.agregar(
+                linea["materia_prima"].pk,
+                lote[4],
+                min(lote[5], hoy) if en_proceso else lote[5],
+                linea["cantidad"],
+                reservado=en_proceso,
+            )
+    return produccion, sin_formula, len(abiertos)
+
+
+def _demanda_de_ordenes(almacen, hasta, produccion, demanda, pronostico=()):
+    """
+    Explota la parte de las órdenes de cliente abiertas (y del pronóstico
+    semanal no cubierto por órdenes) que no cubren el stock del producto ni
+    los lotes abiertos.
+
+    Retorna (productos sin fórmula activa, líneas de orden agrupadas).
+    """
+    items = OrdenItem.objects.filter(order__status__in=ESTADOS_ORDEN)
+    if hasta is not None:
+        items = items.filter(order__order_date__lte=hasta)
+    filas = list(
+        items.order_by()
+        .values("product_id", "unit_id", "order__almacen_id", "order__order_date")
+        .annotate(total=Sum("quantity"))
+    )
+    if not filas and not pronostico:
+        return [], 0
+
+    productos = Producto.objects.only("pk", "unit", "almacen_preferido").in_bulk(
+        {fila["product_id"] for fila in filas} | {p[0] for p in pronostico}
+    )
+    pedidos = defaultdict(list)
+    ordenado = defaultdict(lambda: CERO)
+    for fila in filas:
+        producto = productos[fila["product_id"]]
+        cantidad = Decimal(fila["total"]) * factor(fila["unit_id"], producto.unit_id)
+        ordenado[(producto.pk, _inicio_periodo(fila["order__order_date"], "semana"))] += cantidad
+        almacen_id = resolver_almacen(fila["order__almacen_id"], producto).pk
+        if almacen is not None and almacen_id != almacen.pk:
+            continue
+        pedidos[(producto.pk, almacen_id)].append((fila["order__order_date"], cantidad))
+
+    # Lo pronosticado que no está ya ordenado esa semana (en cualquier almacén)
+    for producto_id, semana, cantidad in pronostico:
+        producto = productos[producto_id]
+        almacen_id = resolver_almacen(None, producto).pk
+        if almacen is not None and almacen_id != almacen.pk:
+            continue
+        restante = cantidad - ordenado[(producto_id, semana)]
+        if restante > 0:
+            pedidos[(producto_id, almacen_id)].append((semana, restante))
+
+    content_type = ContentType.objects.get_for_model(Producto)
+    saldos = Kardex.ultimos_saldos(
+        {(content_type.pk, str(producto_id), almacen_id) for producto_id, almacen_id in pedidos}
+    )
+
+    # Lo que falta de cada producto, en orden de fecha, se fabrica con su fórmula
+    faltantes = []
+    for (producto_id, almacen_id), lineas in pedidos.items():
+        producto = productos[producto_id]
+        disponible = saldos.get((content_type.pk, str(producto_id), almacen_id), (CERO,))[0]
+        disponible += sum(
+            (
+                Decimal(cantidad) * factor(unidad_id, producto.unit_id)
+                for cantidad, unidad_id in produccion.get((producto_id, almacen_id), [])
+            ),
+            CERO,
+        )
+        for fecha, cantidad in sorted(lineas):
+            cubierto = min(max(disponible, CERO), cantidad)
+            disponible -= cantidad
+            if cantidad > cubierto:
+                faltantes.append((producto_id, almacen_id, fecha, cantidad - cubierto))
+
+    activas = formulas_activas(producto_id for producto_id, _, _, _ in faltantes)
+    sin_formula = sorted({f[0] for f in faltantes if f[0] not in activas})
+    planes = [f for f in faltantes if f[0] in activas]
+    lineas_por_plan = explotar(
+        [
+            {
+                "producto_id": producto_id,
+                "cantidad": cantidad,
+                "unidad_id": productos[producto_id].unit_id,
+                "formula": activas[producto_id],
+            }
+            for producto_id, _, _, cantidad in planes
+        ]
+    )
+    for (_, almacen_id, fecha, _), lineas in zip(planes, lineas_por_plan):
+        for linea in lineas:
+            demanda.agregar(linea["materia_prima"].pk, almacen_id, fecha, linea["cantidad"])
+    return sin_formula, len(filas)
+
+
+def recepciones_pendientes(materia_ids, materias, hoy):
+    """
+    {(materia_prima_id, almacen_id, fecha): cantidad} pedida al proveedor
+    (pedidos REGISTRADO) y no recibida.
+    """
+    recepciones = defaultdict(lambda: CERO)
+    for materia_prima_id, fecha, pendiente in (
+        PedidoItem.objects.filter(
+            pedido__estado__in=ESTADOS_EN_CAMINO,
+            materia_prima_id__in=materia_ids,
+            cantidad_recibida__lt=F("cantidad_solicitada"),
+        )
+        .order_by()
+        .values("materia_prima_id", "pedido__fecha_entrega_esperada")
+        .annotate(total=Sum(F("cantidad_solicitada") - F("cantidad_recibida")))
+        .values_list("materia_prima_id", "pedido__fecha_entrega_esperada", "total")
+    ):
+        almacen_id = resolver_almacen(materias[materia_prima_id]["almacen_preferido_id"]).pk
+        recepciones[(materia_prima_id, almacen_id, fecha or hoy)] += Decimal(pendiente)
+    return recepciones
+
+
+def calcular_mrp(
+    almacen=None, hasta=None, incluir_ordenes=True, periodo="semana", incluir_pronostico=False
+):
+    """
+    Ejecuta la planificación sin escribir nada.
+
+    Parámetros:
+        almacen: limita el cálculo a un almacén (opcional)
+        hasta: ignora lotes y órdenes con fecha posterior (opcional)
+        incluir_ordenes: incluye la demanda de órdenes de cliente abiertas
+        incluir_pronostico: agrega la demanda semanal pronosticada no
+            cubierta por órdenes (requiere incluir_ordenes)
+        periodo: 'dia' o 'semana' para la proyección
+
+    Retorna dict con 'requerimientos' (uno por materia prima y almacén),
+    'sugerencias' de compra, 'sin_formula' y 'sin_proveedor'.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}. Use dia o semana")
+
+    hoy = timezone.localdate()
+    demanda = _Demanda()
+
+    produccion, lotes_sin_formula, total_lotes = _demanda_de_lotes(
+        _lotes_abiertos(almacen, hasta), demanda, hoy
+    )
+    productos_sin_formula, total_ordenes = [], 0
+    if incluir_ordenes:
+        pronostico = []
+        if incluir_pronostico:
+            # La semana actual ya la cubren las órdenes registradas
+            pronostico = demanda_pronosticada(
+                "semana", desde=_inicio_periodo(hoy, "semana") + timedelta(days=7), hasta=hasta
+            )
+        productos_sin_formula, total_ordenes = _demanda_de_ordenes(
+            almacen, hasta, produccion, demanda, pronostico
+        )
+
+    materia_ids = {clave[0] for clave in demanda.bruto}
+    materias = {
+        fila["pk"]: fila
+        for fila in MateriaPrima.objects.filter(pk__in=materia_ids).values(
+            "pk", "codigo", "nombre", "unidad_id_id", "almacen_preferido_id",
+            "proveedor_preferido_id", "proveedor_preferido__dias_entrega",
+        )
+    }
+    recepciones = recepciones_pendientes(materia_ids, materias, hoy)
+
+    # Eventos por (materia, almacén): demanda (negativa) y recepciones
+    eventos = defaultdict(lambda: defaultdict(lambda: [CERO, CERO]))
+    for (materia_prima_id, almacen_id, fecha), cantidad in demanda.bruto.items():
+        eventos[(materia_prima_id, almacen_id)][_inicio_periodo(fecha, periodo)][0] += cantidad
+    for (materia_prima_id, almacen_id, fecha), cantidad in recepciones.items():
+        if (materia_prima_id, almacen_id) in eventos:
+            eventos[(materia_prima_id, almacen_id)][_inicio_periodo(fecha, periodo)][1] += cantidad
+
+    content_type = ContentType.objects.get_for_model(MateriaPrima)
+    saldos = Kardex.ultimos_saldos(
+        {(content_type.pk, str(materia_prima_id), almacen_id) for materia_prima_id, almacen_id in eventos}
+    )
+
+    requerimientos = []
+    for (materia_prima_id, almacen_id), por_periodo in sorted(eventos.items()):
+        disponible = saldos.get((content_type.pk, str(materia_prima_id), almacen_id), (CERO,))[0]
+        proyectado = disponible
+        minimo = disponible
+        fecha_falta = None
+        periodos = []
+        for inicio in sorted(por_periodo):
+            requerido, recibido = por_periodo[inicio]
+            proyectado += recibido - requerido
+            if proyectado < 0 and fecha_falta is None:
+                fecha_falta = inicio
+            minimo = min(minimo, proyectado)
+            periodos.append({
+                "periodo": inicio,
+                "requerido": _q(requerido),
+                "recepciones": _q(recibido),
+                "proyectado": _q(proyectado),
+            })
+        materia = materias[materia_prima_id]
+        requerimientos.append({
+            "materia_prima_id": materia_prima_id,
+            "codigo": materia["codigo"],
+            "nombre": materia["nombre"],
+            "unidad_id": materia["unidad_id_id"],
+            "almacen_id": almacen_id,
+            "disponible": _q(disponible),
+            "reservado": _q(demanda.reservado[(materia_prima_id, almacen_id)]),
+            "requerido_bruto": _q(sum((p[0] for p in por_periodo.values()), CERO)),
+            "en_pedido": _q(sum((p[1] for p in por_periodo.values()), CERO)),
+            "faltante": _q(max(-minimo, CERO)),
+            "fecha_falta": fecha_falta,
+            "periodos": periodos,
+        })
+
+    # Sugerencias de compra: faltante de todos los almacenes por materia prima
+    por_materia = {}
+    for requerimiento in requerimientos:
+        if requerimiento["faltante"] <= 0:
+            continue
+        actual = por_materia.setdefault(
+            requerimiento["materia_prima_id"], {"faltante": CERO, "fecha": requerimiento["fecha_falta"]}
+        )
+        actual["faltante"] += requerimiento["faltante"]
+        actual["fecha"] = min(actual["fecha"], requerimiento["fecha_falta"])
+
+    sugerencias = []
+    sin_proveedor = []
+    for materia_prima_id, falta in sorted(por_materia.items()):
+        materia = materias[materia_prima_id]
+        if materia["proveedor_preferido_id"] is None:
+            sin_proveedor.append(materia_prima_id)
+            continue
+        dias_entrega = materia["proveedor_preferido__dias_entrega"] or 0
+        fecha_pedido = falta["fecha"] - timedelta(days=dias_entrega)
+        sugerencias.append({
+            "materia_prima_id": materia_prima_id,
+            "proveedor_id": materia["proveedor_preferido_id"],
+            "unidad_id": materia["unidad_id_id"],
+            "dias_entrega": dias_entrega,
+            # PedidoItem guarda cantidades enteras
+            "cantidad": int(falta["faltante"].to_integral_value(rounding=ROUND_CEILING)),
+            "fecha_necesaria": falta["fecha"],
+            "fecha_pedido": fecha_pedido,
+            "atrasada": fecha_pedido < hoy,
+        })
+
+    return {
+        "fecha": hoy,
+        "periodo": periodo,
+        "lotes": total_lotes,
+        "lineas_orden": total_ordenes,
+        "requerimientos": requerimientos,
+        "sugerencias": sugerencias,
+        "sin_formula": {"lotes": lotes_sin_formula, "productos": productos_sin_formula},
+        "sin_proveedor": sin_proveedor,
+    }
+
+
+@transaction.atomic
+def ejecutar_mrp(
+    almacen=None, hasta=None, incluir_ordenes=True, periodo="semana",
+    generar_pedidos=False, usuario=None, incluir_pronostico=False,
+):
+    """
+    Calcula el MRP y, con generar_pedidos, crea un pedido BORRADOR por
+    proveedor con las sugerencias (salvo las materias primas que ya tienen
+    un borrador pendiente de revisión). Retorna el resultado de calcular_mrp
+    con 'pedidos' (IDs creados).
+    """
+    resultado = calcular_mrp(almacen, hasta, incluir_ordenes, periodo, incluir_pronostico)
+    resultado["pedidos"] = []
+    if generar_pedidos and resultado["sugerencias"]:
+        en_borrador = materias_en_borrador()
+        nuevas = [
+            sugerencia
+            for sugerencia in resultado["sugerencias"]
+            if sugerencia["materia_prima_id"] not in en_borrador
+        ]
+        if nuevas:
+            resultado["pedidos"] = crear_pedidos_borrador(
+                nuevas, usuario=usuario, origen="la planificación MRP"
+            )
+    return resultado
@@ -0,0 +1,343 @@
+"""
+Programación de la producción con capacidad finita.
+
+Propone una fecha factible para cada lote pendiente considerando el
+material disponible de cada almacén y cuántos lotes puede fabricar por día
+(Almacen.lotes_por_dia):
+
+1. Carga con consultas agrupadas (no una por lote): los lotes pendientes y
+   su requerimiento de materia prima (MaterialProduccion o, si no tiene, la
+   explosión de su fórmula), el saldo del Kardex por (materia, almacén), lo
+   reservado por los lotes en proceso y los pedidos de compra REGISTRADO como
+   recepciones en su fecha de entrega esperada
+2. secuenciar: programación por lista con una cola de prioridad (heapq) por
+   almacén, avanzando día a día:
+   - un lote entra a la cola en su fecha de producción (nunca se adelanta)
+   - cada día se toman los lotes por prioridad (fecha planificada, ID) hasta
+     llenar la capacidad del almacén y se descuenta su material
+   - si el material no alcanza, el lote espera a la materia prima que le
+     falta y vuelve a la cola solo cuando llega una recepción de ella (sin
+     recepciones el stock solo baja), así cada lote se evalúa pocas veces
+   - los días sin lotes ni recepciones se saltan
+3. aplicar_programacion guarda fecha_programada y secuencia_programada de
+   todos los lotes con un bulk_update
+
+Es un heurístico voraz sin retroceso: un lote bloqueado no aparta material
+y uno de menor prioridad puede usarlo si le alcanza.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from innoquim.apps.almacen.services import almacenes
+from innoquim.apps.formula.explosion import cargar_formulas, explotar, formulas_activas
+from innoquim.apps.inventario.models import Kardex
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.material_produccion.models import MaterialProduccion
+from innoquim.apps.unidad.conversion import factor
+
+from .models import LoteProduccion
+from .mrp import recepciones_pendientes
+
+CERO = Decimal("0")
+CUATRO_DECIMALES = Decimal("0.0001")
+
+
+def requerimientos_por_lote(lotes):
+    """
+    Materia prima que necesita cada lote, en la unidad de la materia prima.
+
+    lotes: lista de dicts con id, product_id, produced_quantity, unit_id y
+    formula_id.
+
+    Retorna ({lote_id: [(materia_prima_id, cantidad)]}, [IDs sin fórmula]).
+    """
+    requerimientos = defaultdict(list)
+    # Lotes con materiales: una consulta agrupada
+    for fila in (
+        MaterialProduccion.objects.filter(batch_id__in=[lote["id"] for lote in lotes])
+        .order_by()
+        .values("batch_id", "raw_material_id", "unit_id", "raw_material__unidad_id")
+        .annotate(total=Sum("used_quantity"))
+    ):
+        requerimientos[fila["batch_id"]].append((
+            fila["raw_material_id"],
+            fila["total"] * factor(fila["unit_id"], fila["raw_material__unidad_id"]),
+        ))
+
+    # Lotes sin materiales: explosión de su fórmula
+    sin_materiales = [lote for lote in lotes if lote["id"] not in requerimientos]
+    elegidas = cargar_formulas(lote["formula_id"] for lote in sin_materiales if lote["formula_id"])
+    activas = formulas_activas(
+        lote["product_id"] for lote in sin_materiales if not lote["formula_id"]
+    )
+    planes = []
+    sin_formula = []
+    for lote in sin_materiales:
+        formula = elegidas.get(lote["formula_id"]) or activas.get(lote["product_id"])
+        if formula is None:
+            sin_formula.append(lote["id"])
+            continue
+        planes.append((lote["id"], {
+            "producto_id": lote["product_id"],
+            "cantidad": lote["produced_quantity"],
+            "unidad_id": lote["unit_id"],
+            "formula": formula,
+        }))
+    for (lote_id, _), lineas in zip(planes, explotar([p for _, p in planes])):
+        requerimientos[lote_id] = [
+            (linea["materia_prima"].pk, linea["cantidad"]) for linea in lineas
+        ]
+    return requerimientos, sin_formula
+
+
+def secuenciar(lotes, requerimientos, disponible, recepciones, capacidad, desde, dias=90):
+    """
+    Asigna fecha y secuencia a los lotes (sin acceder a la BD).
+
+    Parámetros:
+        lotes: lista de dicts con id, almacen_id y fecha (fecha planificada)
+        requerimientos: {lote_id: [(materia_prima_id, cantidad)]}
+        disponible: {(materia_prima_id, almacen_id): cantidad} al inicio
+        recepciones: {(materia_prima_id, almacen_id, fecha): cantidad};
+            las atrasadas se cuentan desde el primer día
+        capacidad: {almacen_id: lotes por día}; sin entrada, sin límite
+        desde: primer día programable
+        dias: horizonte en días
+
+    Retorna (programados, sin_programar):
+        programados: {lote_id: (fecha, secuencia)}
+        sin_programar: {lote_id: (materia_prima_id, faltante)}; materia
+            None si lo impidió la capacidad
+    """
+    hasta = desde + timedelta(days=dias - 1)
+    programados = {}
+    sin_programar = {}
+
+    por_almacen = defaultdict(list)
+    for lote in lotes:
+        por_almacen[lote["almacen_id"]].append(lote)
+    llegadas_por_almacen = defaultdict(list)
+    for (materia_prima_id, almacen_id, fecha), cantidad in recepciones.items():
+        if almacen_id in por_almacen:
+            llegadas_por_almacen[almacen_id].append((max(fecha, desde), materia_prima_id, cantidad))
+
+    for almacen_id, lotes_almacen in por_almacen.items():
+        limite = capacidad.get(almacen_id)
+        # Lotes por fecha en que pueden empezar y recepciones por fecha
+        liberaciones = sorted(
+            (max(lote["fecha"], desde), lote["fecha"], lote["id"]) for lote in lotes_almacen
+        )
+        llegadas = sorted(llegadas_por_almacen[almacen_id], key=lambda r: (r[0], r[1]))
+        stock = {}
+        cola = []
+        espera = defaultdict(list)
+        i = j = 0
+        dia = desde
+
+        while dia <= hasta:
+            while j < len(llegadas) and llegadas[j][0] <= dia:
+                _, materia_prima_id, cantidad = llegadas[j]
+                clave = (materia_prima_id, almacen_id)
+                stock[clave] = stock.get(clave, disponible.get(clave, CERO)) + cantidad
+                # Lo que esperaba esta materia vuelve a evaluarse
+                for pendiente in espera.pop(materia_prima_id, []):
+                    heapq.heappush(cola, pendiente)
+                j += 1
+            while i < len(liberaciones) and liberaciones[i][0] <= dia:
+                heapq.heappush(cola, liberaciones[i][1:])
+                i += 1
+
+            secuencia = 0
+            while cola and (limite is None or secuencia < limite):
+                prioridad = heapq.heappop(cola)
+                lote_id = prioridad[1]
+                faltante = None
+                for materia_prima_id, cantidad in requerimientos.get(lote_id, ()):
+                    clave = (materia_prima_id, almacen_id)
+                    saldo = stock.get(clave, disponible.get(clave, CERO))
+                    if saldo < cantidad:
+                        faltante = (materia_prima_id, cantidad - max(saldo, CERO))
+                        break
+                if faltante is not None:
+                    espera[faltante[0]].append(prioridad)
+                    sin_programar[lote_id] = faltante
+                    continue
+                for materia_prima_id, cantidad in requerimientos.get(lote_id, ()):
+                    clave = (materia_prima_id, almacen_id)
+                    stock[clave] = stock.get(clave, disponible.get(clave, CERO)) - cantidad
+                secuencia += 1
+                programados[lote_id] = (dia, secuencia)
+                sin_programar.pop(lote_id, None)
+
+            if cola:
+                # Capacidad llena: sigue mañana
+                dia += timedelta(days=1)
+                continue
+            siguientes = []
+            if i < len(liberaciones):
+                siguientes.append(liberaciones[i][0])
+            if j < len(llegadas) and espera:
+                siguientes.append(llegadas[j][0])
+            if not siguientes:
+                break
+            dia = max(min(siguientes), dia + timedelta(days=1))
+
+        for _, lote_id in cola:
+            sin_programar[lote_id] = (None, CERO)
+        for _, _, lote_id in liberaciones[i:]:
+            sin_programar[lote_id] = (None, CERO)
+    return programados, sin_programar
+
+
+def calcular_programacion(almacen=None, desde=None, dias=90, capacidad=None):
+    """
+    Programa los lotes pendientes sin escribir nada.
+
+    Parámetros:
+        almacen: limita la programación a un almacén (opcional)
+        desde: primer día programable (por defecto hoy)
+        dias: horizonte en días
+        capacidad: lotes por día de los almacenes sin lotes_por_dia
+            (None: sin límite)
+
+    Retorna dict con 'programados' (en orden de fecha, almacén y
+    secuencia), 'sin_programar' y 'sin_formula'.
+    """
+    if dias < 1:
+        raise ValueError("El horizonte debe ser de al menos 1 día")
+    if capacidad is not None and capacidad < 1:
+        raise ValueError("La capacidad debe ser de al menos 1 lote por día")
+
+    hoy = timezone.localdate()
+    desde = desde or hoy
+    lotes = LoteProduccion.objects.filter(status="pending")
+    en_proceso = LoteProduccion.objects.filter(status="in_progress")
+    if almacen is not None:
+        lotes = lotes.filter(almacen=almacen)
+        en_proceso = en_proceso.filter(almacen=almacen)
+    lotes = list(lotes.order_by("production_date", "pk").values(
+        "id", "batch_code", "product_id", "produced_quantity", "unit_id",
+        "formula_id", "almacen_id", "production_date",
+    ))
+    en_proceso = list(en_proceso.values(
+        "id", "product_id", "produced_quantity", "unit_id", "formula_id", "almacen_id",
+    ))
+
+    requerimientos, sin_formula = requerimientos_por_lote(lotes + en_proceso)
+
+    # Disponible = saldo del Kardex - material reservado por lotes en proceso
+    materia_ids = {m for lineas in requerimientos.values() for m, _ in lineas}
+    almacen_ids = {lote["almacen_id"] for lote in lotes}
+    content_type = ContentType.objects.get_for_model(MateriaPrima)
+    saldos = Kardex.ultimos_saldos(
+        {(content_type.pk, str(m), a) for m in materia_ids for a in almacen_ids}
+    )
+    disponible = defaultdict(lambda: CERO)
+    for (_, materia_prima_id, almacen_id), (cantidad, _, _) in saldos.items():
+        disponible[(materia_prima_id, almacen_id)] += cantidad
+    for lote in en_proceso:
+        for materia_prima_id, cantidad in requerimientos.get(lote["id"], []):
+            disponible[(materia_prima_id, lote["almacen_id"])] -= cantidad
+
+    materias = {
+        fila["pk"]: fila
+        for fila in MateriaPrima.objects.filter(pk__in=materia_ids).values(
+            "pk", "almacen_preferido_id"
+        )
+    }
+    recepciones = recepciones_pendientes(materia_ids, materias, desde)
+
+    limites = {
+        almacen_id: objeto.lotes_por_dia if objeto.lotes_por_dia is not None else capacidad
+        for almacen_id, objeto in almacenes().items()
+    }
+    limites = {a: limite for a, limite in limites.items() if limite is not None}
+
+    sin_formula = set(sin_formula)
+    programables = [
+        {"id": lote["id"], "almacen_id": lote["almacen_id"], "fecha": lote["production_date"]}
+        for lote in lotes
+        if lote["id"] not in sin_formula
+    ]
+    programados, sin_programar = secuenciar(
+        programables, requerimientos, disponible, recepciones, limites, desde, dias
+    )
+
+    por_id = {lote["id"]: lote for lote in lotes}
+    filas = []
+    for lote_id, (fecha, secuencia) in programados.items():
+        lote = por_id[lote_id]
+        filas.append({
+            "lote_id": lote_id,
+            "batch_code": lote["batch_code"],
+            "almacen_id": lote["almacen_id"],
+            "fecha_planificada": lote["production_date"],
+            "fecha_programada": fecha,
+            "secuencia": secuencia,
+            "retraso_dias": (fecha - lote["production_date"]).days,
+        })
+    filas.sort(key=lambda f: (f["fecha_programada"], f["almacen_id"], f["secuencia"]))
+
+    return {
+        "desde": desde,
+        "hasta": desde + timedelta(days=dias - 1),
+        "lotes": len(lotes),
+        "programados": filas,
+        "sin_programar": [
+            {
+                "lote_id": lote_id,
+                "batch_code": por_id[lote_id]["batch_code"],
+                "almacen_id": por_id[lote_id]["almacen_id"],
+                "fecha_planificada": por_id[lote_id]["production_date"],
+                "motivo": "capacidad" if materia_prima_id is None else "materia_prima",
+                "materia_prima_id": materia_prima_id,
+                "faltante": faltante.quantize(CUATRO_DECIMALES),
+            }
+            for lote_id, (materia_prima_id, faltante) in sorted(sin_programar.items())
+        ],
+        "sin_formula": [
+            por_id[lote_id]["batch_code"] for lote_id in sorted(sin_formula) if lote_id in por_id
+        ],
+    }
+
+
+@transaction.atomic
+def aplicar_programacion(resultado, batch_size=1000):
+    """
+    Guarda la programación calculada con un bulk_update: fecha y secuencia
+    de los programados y vacías para los que no se pudieron programar.
+    Retorna el número de lotes actualizados.
+    """
+    lotes = [
+        LoteProduccion(
+            pk=fila["lote_id"],
+            fecha_programada=fila["fecha_programada"],
+            secuencia_programada=fila["secuencia"],
+        )
+        for fila in resultado["programados"]
+    ] + [
+        LoteProduccion(pk=fila["lote_id"], fecha_programada=None, secuencia_programada=None)
+        for fila in resultado["sin_programar"]
+    ]
+    LoteProduccion.objects.bulk_update(
+        lotes, ["fecha_programada", "secuencia_programada"], batch_size=batch_size
+    )
+    return len(lotes)
+
+
+def programar_produccion(almacen=None, desde=None, dias=90, capacidad=None, guardar=False):
+    """
+    Calcula la programación y, con guardar, la escribe en los lotes.
+    Retorna el resultado de calcular_programacion con 'actualizados'.
+    """
+    resultado = calcular_programacion(almacen, desde, dias, capacidad)
+    resultado["actualizados"] = aplicar_programacion(resultado) if guardar else 0
+    return resultado
@@ -1,3 +1,5 @@
+
+from django.db import transaction
 from rest_framework import serializers
 from .models import LoteProduccion
 from innoquim.apps.material_produccion.serializers import MaterialProduccionSerializer
@@ -28,10 +30,13 @@ class LoteProduccionSerializer(serializers.ModelSerializer):
             "product_code",
             "batch_code",
             "production_date",
+            "fecha_programada",
+            "secuencia_programada",
             "produced_quantity",
             "unit",
             "unit_name",
             "unit_symbol",
+            "formula",
             "almacen",
             "almacen_name",
             "status",
@@ -51,15 +56,24 @@ class LoteProduccionSerializer(serializers.ModelSerializer):
             "updated_at",
             "completed_at",
             "costo_materiales",
-            "costo_unitario_producto"
+            "costo_unitario_producto",
+            "fecha_programada",
+            "secuencia_programada",
         ]
     
     def get_total_materiales(self, obj):
         return obj.materiales.count()
 
 
+class MaterialLoteSerializer(MaterialProduccionSerializer):
+    """Material enviado junto con el lote: el lote lo asigna create()"""
+
+    class Meta(MaterialProduccionSerializer.Meta):
+        read_only_fields = MaterialProduccionSerializer.Meta.read_only_fields + ["batch"]
+
+
 class LoteProduccionCreateSerializer(serializers.ModelSerializer):
-    materiales = MaterialProduccionSerializer(many=True, required=False)
+    materiales = MaterialLoteSerializer(many=True, required=False)
 
     class Meta:
         model = LoteProduccion
@@ -69,29 +83,55 @@ class LoteProduccionCreateSerializer(serializers.ModelSerializer):
             "production_date",
             "produced_quantity",
             "unit",
+            "formula",
             "almacen",
             "status",
             "production_manager",
             "observaciones",
             "materiales",
         ]
+
+    def validate(self, data):
+        formula = data.get('formula')
+        if formula is not None and formula.producto_id != data['product'].pk:
+            raise serializers.ValidationError(
+                {'formula': 'La fórmula no corresponde al producto del lote'}
+            )
+        return data
     
     def create(self, validated_data):
+        """
+        Crea el lote con los materiales enviados o, si no se envía ninguno,
+        los calcula desde la fórmula (la indicada o la activa del producto).
+        En ambos casos los materiales se insertan con un solo bulk_create.
+        """
+        from innoquim.apps.formula.explosion import explotar_lotes
         from innoquim.apps.material_produccion.models import MaterialProduccion
         
         materiales_data = validated_data.pop('materiales', [])
         
-        # Crear el lote
-        lote = LoteProduccion.objects.create(**validated_data)
-        
-        # Crear los materiales asociados
-        for material_data in materiales_data:
-            MaterialProduccion.objects.create(
-                batch=lote,
-                **material_data
+        with transaction.atomic():
+            lote = LoteProduccion.objects.create(**validated_data)
+            
+            if not materiales_data:
+                try:
+                    explotar_lotes([lote])
+                except ValueError as e:
+                    raise serializers.ValidationError({'materiales': str(e)})
+                return lote
+            
+            materiales = []
+            for material_data in materiales_data:
+                material = MaterialProduccion(batch=lote, **material_data)
+                # Mismo costo que save(): promedio convertido a la unidad de la línea
+                material.calcular_costos()
+                materiales.append(material)
+            MaterialProduccion.objects.bulk_create(materiales)
+            
+            # Costos iniciales con los materiales ya calculados en memoria
+            LoteProduccion.ajustar_costo_materiales(
+                lote.pk, sum(material.costo_total for material in materiales)
             )
+            lote.refresh_from_db(fields=['costo_materiales', 'costo_unitario_producto'])
         
-        # Calcular costos iniciales
-        lote.calcular_costo_materiales()
-        
-        return lote
\ No newline at end of file
+        return lote
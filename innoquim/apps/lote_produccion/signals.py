@@ -6,8 +6,6 @@ from django.dispatch import receiver
 from django.utils import timezone
 from decimal import Decimal
 from .models import LoteProduccion
-from innoquim.apps.producto.models import Producto
-from innoquim.apps.materia_prima.models import MateriaPrima
 from innoquim.apps.inventario.models import Kardex
 
 
@@ -27,54 +25,66 @@ def actualizar_stocks_al_cambiar_estado(sender, instance, created, **kwargs):
     if created:
         return
     
-    # Si el estado es COMPLETADO
-    if instance.status == "completed":
+    # completar_produccion() ya registra todo y marca completed_at; este
+    # signal solo cubre lotes marcados como completados por edición directa,
+    # una sola vez (luego se marca completed_at)
+    if instance.status == "completed" and instance.completed_at is None:
         try:
-            from django.contrib.contenttypes.models import ContentType
-            from innoquim.apps.almacen.models import Almacen
+            from innoquim.apps.almacen.services import resolver_almacen
+            from innoquim.apps.inventario.contadores import descontar_stock, sumar_stock
+            from innoquim.apps.materia_prima.models import MateriaPrima
+            from innoquim.apps.producto.models import Producto
+            from innoquim.apps.unidad.conversion import factor
             
-            # 1. Actualizar stock del PRODUCTO (sumar)
+            # 1. Almacén del lote (donde se fabrica)
             producto = instance.product
-            producto.stock += int(instance.produced_quantity)
-            producto.save()
+            almacen = resolver_almacen(instance.almacen_id, producto)
             
-            # Registrar entrada del producto terminado en Kardex
-            Kardex.registrar_movimiento(
+            # 2. Registrar entrada del producto terminado en Kardex; cantidad y
+            # costo se convierten de la unidad del lote a la del producto
+            entrada = Kardex.registrar_movimiento(
                 almacen=almacen,
                 item=producto,
                 tipo_movimiento="ENTRADA",
                 motivo="PRODUCCION",
                 cantidad=Decimal(str(instance.produced_quantity)),
-                costo_unitario=producto.costo_unitario or 0,
+                costo_unitario=(producto.costo_unitario or 0)
+                * factor(instance.unit_id, producto.unit_id),
                 referencia_id=str(instance.id),
                 observaciones=f"Producto terminado del lote {instance.batch_code}",
                 usuario=None,
+                unidad=instance.unit_id,
             )
             
-            # 2. Obtener el almacén (primera opción o predeterminado)
-            almacen = Almacen.objects.first()
-            if not almacen:
-                print(f"No hay almacén disponible para registrar movimientos del lote {instance.batch_code}")
-                return
+            # Actualizar stock del PRODUCTO (sumar)
+            sumar_stock(Producto, {producto.pk: int(entrada.cantidad)})
             
-            # 3. Actualizar stock de cada MATERIA PRIMA (restar) y crear Kardex
-            for material in instance.materiales.all():
+            # 3. Crear Kardex de cada MATERIA PRIMA y restar su stock
+            consumido = {}
+            for material in instance.materiales.select_related("raw_material"):
                 materia_prima = material.raw_material
-                materia_prima.stock_actual -= material.used_quantity
-                materia_prima.save()
                 
                 # Crear registro en Kardex (salida de materia prima)
-                Kardex.registrar_movimiento(
+                salida = Kardex.registrar_movimiento(
                     almacen=almacen,
                     item=materia_prima,
                     tipo_movimiento="SALIDA",
                     motivo="PRODUCCION",
                     cantidad=material.used_quantity,
-                    costo_unitario=materia_prima.precio_unitario or 0,
+                    costo_unitario=(materia_prima.costo_promedio or 0)
+                    * factor(material.unit_id, materia_prima.unidad_id_id),
                     referencia_id=str(instance.id),
                     observaciones=f"Material usado en lote {instance.batch_code}",
                     usuario=None,
+                    unidad=material.unit_id,
                 )
+                
+                consumido[materia_prima.pk] = consumido.get(materia_prima.pk, 0) + salida.cantidad
+            
+            # Edición directa: el lote ya se marcó completado, se descuenta sin guarda
+            descontar_stock(MateriaPrima, consumido, validar=False)
+            
+            LoteProduccion.objects.filter(pk=instance.pk).update(completed_at=timezone.now())
             
         except Exception as e:
             print(f"Error al actualizar stocks del lote {instance.batch_code}: {str(e)}")
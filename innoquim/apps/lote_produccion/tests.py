@@ -7,6 +7,7 @@ from innoquim.apps.producto.models import Producto
 from innoquim.apps.unidad.models import Unidad
 from django.contrib.auth import get_user_model
 from datetime import date
+from decimal import Decimal
 
 Usuario = get_user_model()
 
@@ -68,3 +69,274 @@ class LoteProduccionAPITest(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class MrpTest(TestCase):
+    """Tests para la planificación de requerimientos (MRP)"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from decimal import Decimal
+        from django.utils import timezone
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.cliente.models import Cliente
+        from innoquim.apps.formula.serializers import FormulaSerializer
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.material_produccion.models import MaterialProduccion
+        from innoquim.apps.orden_cliente.models import OrdenCliente
+        from innoquim.apps.orden_item.models import OrdenItem
+        from innoquim.apps.proveedor.models import Proveedor
+
+        self.hoy = timezone.localdate()
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        litro = Unidad.objects.create(nombre="Litro", simbolo="L", factor_conversion=1)
+        self.almacen = Almacen.objects.create(nombre="Planta", direccion="-")
+        proveedor = Proveedor.objects.create(
+            ruc="1790000000001", nombre_empresa="Químicos SA", dias_entrega=5
+        )
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=kg,
+            categoria_id=Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL"),
+            proveedor_preferido=proveedor,
+        )
+        producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=litro, weight=1,
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        FormulaSerializer().create({
+            "producto": producto, "unidad": litro,
+            "componentes": [{"materia_prima": self.mp, "cantidad": Decimal("2"), "unidad": kg}],
+        })
+        Kardex.registrar_movimiento(
+            almacen=self.almacen, item=self.mp, tipo_movimiento="ENTRADA",
+            motivo="COMPRA", cantidad=10, costo_unitario=1,
+        )
+        usuario = Usuario.objects.create_user(
+            email="jefe@innoquim.com", username="jefe", name="Jefe", password="x"
+        )
+        datos = dict(product=producto, unit=litro, almacen=self.almacen, production_manager=usuario)
+        # En proceso: 1 L con su material ya cargado (3 kg, reservado)
+        en_proceso = LoteProduccion.objects.create(
+            batch_code="L-1", production_date=self.hoy, produced_quantity=1,
+            status="in_progress", **datos,
+        )
+        MaterialProduccion.objects.bulk_create([
+            MaterialProduccion(batch=en_proceso, raw_material=self.mp, used_quantity=3, unit=kg)
+        ])
+        # Pendiente sin materiales: 3 L -> 6 kg por fórmula, dentro de 14 días
+        LoteProduccion.objects.create(
+            batch_code="L-2", production_date=self.hoy + timedelta(days=14),
+            produced_quantity=3, **datos,
+        )
+        # Orden de 6 L: 4 L los cubren los lotes, 2 L -> 4 kg por fórmula
+        cliente = Cliente.objects.create(
+            ruc="1790000000002", nombre_empresa="Cliente SA", email="c@c.com", direccion="-"
+        )
+        orden = OrdenCliente.objects.create(
+            client=cliente, order_code="OC-1", order_date=self.hoy + timedelta(days=21),
+            almacen=self.almacen,
+        )
+        OrdenItem.objects.bulk_create([OrdenItem(order=orden, product=producto, quantity=6, unit=litro)])
+
+    def test_netea_y_proyecta_lotes_y_ordenes(self):
+        """Test que el faltante neto y la sugerencia consideren lotes, reservas y órdenes"""
+        from datetime import timedelta
+        from decimal import Decimal
+        from innoquim.apps.pedido_material.models import PedidoMaterial
+        from .mrp import ejecutar_mrp
+
+        resultado = ejecutar_mrp(periodo="dia", generar_pedidos=True)
+
+        requerimiento = resultado["requerimientos"][0]
+        self.assertEqual(requerimiento["disponible"], Decimal("10"))
+        self.assertEqual(requerimiento["reservado"], Decimal("3"))
+        self.assertEqual(requerimiento["requerido_bruto"], Decimal("13"))
+        # 10 - 3 - 6 = 1 -> el faltante aparece con la orden
+        self.assertEqual(requerimiento["faltante"], Decimal("3"))
+        self.assertEqual(requerimiento["fecha_falta"], self.hoy + timedelta(days=21))
+
+        sugerencia = resultado["sugerencias"][0]
+        self.assertEqual(sugerencia["cantidad"], 3)
+        self.assertEqual(sugerencia["fecha_pedido"], self.hoy + timedelta(days=16))
+        self.assertFalse(sugerencia["atrasada"])
+        item = PedidoMaterial.objects.get(pk=resultado["pedidos"][0]).items.get()
+        self.assertEqual((item.materia_prima, item.cantidad_solicitada), (self.mp, 3))
+
+        # El borrador no es material en camino ni se duplica al volver a generar
+        resultado = ejecutar_mrp(periodo="dia", generar_pedidos=True)
+        self.assertEqual(len(resultado["sugerencias"]), 1)
+        self.assertEqual(resultado["pedidos"], [])
+
+        # Registrado con el proveedor, cubre el faltante en la siguiente corrida
+        PedidoMaterial.objects.filter(pk=item.pedido_id).update(estado="REGISTRADO")
+        self.assertEqual(ejecutar_mrp(periodo="dia")["sugerencias"], [])
+
+
+class CostoMaterialesIncrementalTest(TestCase):
+    """Tests para el costo del lote ajustado por diferencia"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        materia = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=kg, weight=1,
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        self.lote = LoteProduccion.objects.create(
+            product=producto, batch_code="L-1", production_date=date(2026, 1, 5),
+            produced_quantity=10, unit=kg,
+            almacen=Almacen.objects.create(nombre="Planta", direccion="-"),
+            production_manager=Usuario.objects.create_user(
+                email="jefe@innoquim.com", username="jefe", name="Jefe", password="x"
+            ),
+        )
+        self.materias = [
+            MateriaPrima.objects.create(
+                nombre=f"Materia {i}", codigo=f"MP-{i}", unidad_id=kg,
+                categoria_id=materia, costo_promedio=Decimal("2.0000"),
+            )
+            for i in range(3)
+        ]
+        self.kg = kg
+
+    def test_agregar_modificar_y_eliminar_ajustan_el_costo(self):
+        """Test que cada edición ajuste el costo sin releer los materiales"""
+        from innoquim.apps.material_produccion.models import MaterialProduccion
+
+        for materia in self.materias:
+            MaterialProduccion.objects.create(
+                batch=self.lote, raw_material=materia, used_quantity=Decimal("5.0000"), unit=self.kg
+            )
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.costo_materiales, Decimal("30.00"))
+        self.assertEqual(self.lote.costo_unitario_producto, Decimal("3.0000"))
+
+        material = MaterialProduccion.objects.get(batch=self.lote, raw_material=self.materias[0])
+        material.used_quantity = Decimal("8.0000")
+        # UPDATE del material + UPDATE del lote
+        with self.assertNumQueries(2):
+            material.save()
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.costo_materiales, Decimal("36.00"))
+
+        MaterialProduccion.objects.get(batch=self.lote, raw_material=self.materias[1]).delete()
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.costo_materiales, Decimal("26.00"))
+        self.assertEqual(self.lote.costo_unitario_producto, Decimal("2.6000"))
+
+        # La reconciliación con SUM da lo mismo
+        self.lote.calcular_costo_materiales()
+        self.assertEqual(self.lote.costo_materiales, Decimal("26.00"))
+
+    def test_materiales_enviados_en_otra_unidad(self):
+        """Test que un material en g de una materia en kg se costee por g al crear el lote"""
+        from .serializers import LoteProduccionCreateSerializer
+
+        g = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion=Decimal("0.001"))
+        serializer = LoteProduccionCreateSerializer(data={
+            "product": self.lote.product_id, "batch_code": "L-2", "production_date": "2026-01-06",
+            "produced_quantity": 10, "unit": self.kg.pk, "almacen": self.lote.almacen_id,
+            "production_manager": self.lote.production_manager_id,
+            "materiales": [
+                {"raw_material": self.materias[0].pk, "used_quantity": "500", "unit": g.pk},
+            ],
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        lote = serializer.save()
+        material = lote.materiales.get()
+        self.assertEqual(material.costo_unitario, Decimal("0.0020"))
+        self.assertEqual(material.costo_total, Decimal("1.00"))
+        self.assertEqual(lote.costo_materiales, Decimal("1.00"))
+
+
+class ProgramacionProduccionTest(TestCase):
+    """Tests para la programación con capacidad finita"""
+
+    def setUp(self):
+        from django.utils import timezone
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.formula.serializers import FormulaSerializer
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.material_produccion.models import MaterialProduccion
+
+        self.hoy = timezone.localdate()
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        almacen = Almacen.objects.create(nombre="Planta", direccion="-", lotes_por_dia=1)
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=kg,
+            categoria_id=Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL"),
+        )
+        producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=kg, weight=1,
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        FormulaSerializer().create({
+            "producto": producto, "unidad": kg,
+            "componentes": [{"materia_prima": self.mp, "cantidad": Decimal("2"), "unidad": kg}],
+        })
+        Kardex.registrar_movimiento(
+            almacen=almacen, item=self.mp, tipo_movimiento="ENTRADA",
+            motivo="COMPRA", cantidad=10, costo_unitario=1,
+        )
+        datos = dict(
+            product=producto, unit=kg, almacen=almacen,
+            production_manager=Usuario.objects.create_user(
+                email="jefe@innoquim.com", username="jefe", name="Jefe", password="x"
+            ),
+        )
+        # En proceso: reserva 2 kg de los 10
+        en_proceso = LoteProduccion.objects.create(
+            batch_code="L-0", production_date=self.hoy, produced_quantity=1,
+            status="in_progress", **datos,
+        )
+        MaterialProduccion.objects.bulk_create([
+            MaterialProduccion(batch=en_proceso, raw_material=self.mp, used_quantity=2, unit=kg)
+        ])
+        # Tres lotes de 2 kg de producto (4 kg de ácido cada uno) para hoy
+        for codigo in ("L-1", "L-2", "L-3"):
+            LoteProduccion.objects.create(
+                batch_code=codigo, production_date=self.hoy, produced_quantity=2, **datos
+            )
+
+    def test_respeta_capacidad_material_y_recepciones(self):
+        """Test que la secuencia respete lotes por día, reservas y recepciones"""
+        from datetime import timedelta
+        from innoquim.apps.pedido_material.models import PedidoMaterial
+        from innoquim.apps.pedido_material.reorden import crear_pedidos_borrador
+        from innoquim.apps.proveedor.models import Proveedor
+        from .programacion import programar_produccion
+
+        resultado = programar_produccion()
+        fechas = {f["batch_code"]: f["fecha_programada"] for f in resultado["programados"]}
+        # 8 kg libres: L-1 hoy, L-2 mañana por capacidad, L-3 sin material
+        self.assertEqual(fechas, {"L-1": self.hoy, "L-2": self.hoy + timedelta(days=1)})
+        falta = resultado["sin_programar"][0]
+        self.assertEqual((falta["batch_code"], falta["motivo"]), ("L-3", "materia_prima"))
+        self.assertEqual(falta["faltante"], Decimal("4"))
+
+        # Una compra que llega en 5 días libera L-3 ese día (el borrador no
+        # cuenta hasta registrarse con el proveedor)
+        proveedor = Proveedor.objects.create(
+            ruc="1790000000001", nombre_empresa="Químicos SA", dias_entrega=5
+        )
+        pedidos = crear_pedidos_borrador([{
+            "materia_prima_id": self.mp.pk, "proveedor_id": proveedor.pk,
+            "unidad_id": self.mp.unidad_id_id, "dias_entrega": 5, "cantidad": 4,
+        }])
+        self.assertEqual(len(programar_produccion()["sin_programar"]), 1)
+        PedidoMaterial.objects.filter(pk__in=pedidos).update(estado="REGISTRADO")
+        with self.assertNumQueries(11):
+            resultado = programar_produccion(guardar=True)
+        self.assertEqual(resultado["sin_programar"], [])
+        self.assertEqual(resultado["actualizados"], 3)
+        lote = LoteProduccion.objects.get(batch_code="L-3")
+        self.assertEqual(lote.fecha_programada, self.hoy + timedelta(days=5))
+        self.assertEqual(lote.secuencia_programada, 1)
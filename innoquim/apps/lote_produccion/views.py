@@ -48,11 +48,8 @@ class LoteProduccionViewSet(viewsets.ModelViewSet):
         
         serializer = MaterialProduccionSerializer(data=request.data)
         if serializer.is_valid():
+            # MaterialProduccion.save ajusta el costo del lote
             serializer.save(batch=lote)
-            
-            # Recalcular costos del lote
-            lote.calcular_costo_materiales()
-            
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -95,19 +92,11 @@ class LoteProduccionViewSet(viewsets.ModelViewSet):
             )
             if serializer.is_valid():
                 serializer.save()
-                
-                # Recalcular costos del lote
-                lote.calcular_costo_materiales()
-                
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         elif request.method == "DELETE":
             material.delete()
-            
-            # Recalcular costos del lote
-            lote.calcular_costo_materiales()
-            
             return Response(
                 {"message": "Material eliminado exitosamente"},
                 status=status.HTTP_204_NO_CONTENT
@@ -200,4 +189,149 @@ class LoteProduccionViewSet(viewsets.ModelViewSet):
             "valido": todo_ok,
             "almacen": lote.almacen.nombre,
             "materiales": validacion
-        })
\ No newline at end of file
+        })    
+    @action(detail=False, methods=['post'], url_path='explotar')
+    def explotar(self, request):
+        """
+        Calcula los materiales de varios lotes pendientes desde su fórmula.
+        POST /api/lotes-produccion/explotar/
+        {"lotes": [12, 13, 14]}
+        
+        Todos los lotes se explotan juntos (una sola inserción de materiales);
+        si alguno falla no se modifica ninguno.
+        """
+        from innoquim.apps.formula.explosion import explotar_lotes
+        
+        ids = request.data.get('lotes')
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {"error": "Envíe una lista 'lotes' con los IDs a explotar"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lotes = list(LoteProduccion.objects.filter(pk__in=ids).order_by('pk'))
+        faltantes = set(map(str, ids)) - {str(lote.pk) for lote in lotes}
+        if faltantes:
+            return Response(
+                {"error": f"No existen los lotes: {', '.join(sorted(faltantes))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            materiales = explotar_lotes(lotes)
+        except ValueError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            "lotes": len(lotes),
+            "materiales": len(materiales),
+            "costos": {
+                lote.batch_code: lote.costo_materiales for lote in lotes
+            }
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], url_path='mrp')
+    def mrp(self, request):
+        """
+        Planificación de requerimientos de materiales de todos los lotes
+        abiertos y las órdenes de cliente abiertas.
+        GET /api/lotes-produccion/mrp/
+        
+        Parámetros opcionales:
+        - almacen: ID del almacén
+        - hasta: YYYY-MM-DD (ignora lotes y órdenes posteriores)
+        - periodo: dia | semana (por defecto semana)
+        - incluir_ordenes: true | false (por defecto true)
+        - incluir_pronostico: true | false (por defecto false)
+        - solo_faltantes: true | false (por defecto true)
+        
+        Los pedidos sugeridos se crean con el comando ejecutar_mrp
+        --generar-pedidos.
+        """
+        from django.utils.dateparse import parse_date
+        from innoquim.apps.almacen.services import obtener_almacen
+        from .mrp import calcular_mrp
+        
+        params = request.query_params
+        almacen = None
+        hasta = None
+        try:
+            if params.get('almacen'):
+                almacen = obtener_almacen(params['almacen'])
+                if almacen is None:
+                    raise ValueError(f"No existe el almacén {params['almacen']}")
+            if params.get('hasta'):
+                hasta = parse_date(params['hasta'])
+                if hasta is None:
+                    raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+            resultado = calcular_mrp(
+                almacen=almacen,
+                hasta=hasta,
+                incluir_ordenes=params.get('incluir_ordenes', 'true') != 'false',
+                periodo=params.get('periodo', 'semana'),
+                incluir_pronostico=params.get('incluir_pronostico', 'false') == 'true',
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if params.get('solo_faltantes', 'true') != 'false':
+            resultado['requerimientos'] = [
+                r for r in resultado['requerimientos'] if r['faltante'] > 0
+            ]
+        return Response(resultado, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get', 'post'], url_path='programacion')
+    def programacion(self, request):
+        """
+        Programación de los lotes pendientes con capacidad finita: fecha
+        factible según el material disponible y los lotes por día de cada
+        almacén (Almacen.lotes_por_dia).
+        GET /api/lotes-produccion/programacion/   -> calcula sin guardar
+        POST /api/lotes-produccion/programacion/  -> guarda fecha_programada
+        
+        Parámetros opcionales (query en GET, body en POST):
+        - almacen: ID del almacén
+        - desde: YYYY-MM-DD (por defecto hoy)
+        - dias: horizonte en días (por defecto 90)
+        - capacidad: lotes por día de los almacenes sin límite propio
+        """
+        from django.utils.dateparse import parse_date
+        from innoquim.apps.almacen.services import obtener_almacen
+        from .programacion import programar_produccion
+        
+        params = request.query_params if request.method == 'GET' else request.data
+        almacen = None
+        desde = None
+        try:
+            if params.get('almacen'):
+                almacen = obtener_almacen(params['almacen'])
+                if almacen is None:
+                    raise ValueError(f"No existe el almacén {params['almacen']}")
+            if params.get('desde'):
+                desde = parse_date(str(params['desde']))
+                if desde is None:
+                    raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+            try:
+                dias = int(params.get('dias') or 90)
+                capacidad = int(params['capacidad']) if params.get('capacidad') else None
+            except (TypeError, ValueError):
+                raise ValueError("dias y capacidad deben ser números enteros")
+            resultado = programar_produccion(
+                almacen=almacen,
+                desde=desde,
+                dias=dias,
+                capacidad=capacidad,
+                guardar=request.method == 'POST',
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(resultado, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categoria', '0001_initial'),
+        ('materia_prima', '0001_initial'),
+        ('unidad', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='materiaprima',
+            index=models.Index(condition=models.Q(('stock__lte', models.F('stock_minimo'))), fields=['materia_prima_id'], name='materia_prima_stock_bajo_idx'),
+        ),
+    ]
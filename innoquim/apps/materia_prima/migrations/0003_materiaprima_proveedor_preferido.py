@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia_prima', '0002_stock_bajo_idx'),
+        ('proveedor', '0002_proveedor_dias_entrega'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materiaprima',
+            name='proveedor_preferido',
+            field=models.ForeignKey(blank=True, help_text='Proveedor para los pedidos de reposicion (opcional)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='materias_primas', to='proveedor.proveedor', verbose_name='Proveedor Preferido'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('materia_prima', '0003_materiaprima_proveedor_preferido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materiaprima',
+            name='almacen_preferido',
+            field=models.ForeignKey(blank=True, help_text='Almacen por defecto para sus movimientos (opcional)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='materias_primas_preferidas', to='almacen.almacen', verbose_name='Almacen Preferido'),
+        ),
+    ]
@@ -77,6 +77,30 @@ class MateriaPrima(models.Model):
         help_text="Unidad en que se mide (kg, litros, etc)",
     )
 
+    # proveedor_preferido: a quien se le piden las reposiciones automaticas
+    # on_delete=SET_NULL: si se borra el proveedor, la materia prima queda sin asignar
+    proveedor_preferido = models.ForeignKey(
+        "proveedor.Proveedor",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="materias_primas",
+        verbose_name="Proveedor Preferido",
+        help_text="Proveedor para los pedidos de reposicion (opcional)",
+    )
+
+    # almacen_preferido: donde se registran sus movimientos si el documento
+    # no indica almacen (ver innoquim.apps.almacen.services)
+    almacen_preferido = models.ForeignKey(
+        "almacen.Almacen",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="materias_primas_preferidas",
+        verbose_name="Almacen Preferido",
+        help_text="Almacen por defecto para sus movimientos (opcional)",
+    )
+
     # =================================================================
     # PROPIEDADES FISICAS
     # =================================================================
@@ -158,6 +182,12 @@ class MateriaPrima(models.Model):
         indexes = [
             models.Index(fields=["codigo"]),  # Busquedas por codigo
             models.Index(fields=["nombre"]),  # Busquedas por nombre
+            # Indice parcial: solo las filas en alerta (stock <= stock_minimo)
+            models.Index(
+                fields=["materia_prima_id"],
+                condition=models.Q(stock__lte=models.F("stock_minimo")),
+                name="materia_prima_stock_bajo_idx",
+            ),
         ]
 
     def __str__(self):
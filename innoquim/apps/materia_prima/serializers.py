@@ -30,6 +30,7 @@ class MateriaPrimaSerializer(serializers.ModelSerializer):
             'stock_minimo',
             'stock_maximo',
             'costo_promedio',
+            'almacen_preferido',
             'fecha_creacion',
             'fecha_actualizacion',
         ]
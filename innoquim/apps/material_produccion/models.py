@@ -74,16 +74,69 @@ class MaterialProduccion(models.Model):
     def __str__(self):
         return f"Lote {self.batch.batch_code} - {self.raw_material.nombre}"
     
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Lo que este material ya aporta al costo del lote: base para
+        # ajustarlo por diferencia al modificarlo o eliminarlo
+        instancia._aporte_guardado = (
+            instancia.__dict__.get('batch_id'), instancia.__dict__.get('costo_total')
+        )
+        return instancia
+    
+    def calcular_costos(self):
         """
-        Calcula el costo total antes de guardar.
-        Obtiene el costo_promedio actual de la materia prima si no se especifica.
+        Obtiene el costo_promedio actual de la materia prima si no se especifica,
+        convertido a la unidad de la línea (el promedio es por unidad base), y
+        calcula el costo total. Lo usan save() y las altas con bulk_create.
         """
+        from innoquim.apps.unidad.conversion import factor
+        
         if not self.costo_unitario or self.costo_unitario == 0:
-            self.costo_unitario = self.raw_material.costo_promedio
+            self.costo_unitario = (
+                (self.raw_material.costo_promedio or Decimal('0'))
+                * factor(self.unit_id, self.raw_material.unidad_id_id)
+            ).quantize(Decimal('0.0001'))
         
         self.costo_total = (self.used_quantity * self.costo_unitario).quantize(
             Decimal('0.01')
         )
+    
+    def save(self, *args, **kwargs):
+        """
+        Calcula los costos antes de guardar (ver calcular_costos).
+        
+        El costo del lote se ajusta por la diferencia con lo que el material
+        aportaba (un UPDATE con F(), sin releer los materiales del lote).
+        """
+        from innoquim.apps.lote_produccion.models import LoteProduccion
+        
+        self.calcular_costos()
+        
+        nuevo = self._state.adding
+        anterior = None if nuevo else getattr(self, '_aporte_guardado', None)
+        
+        super().save(*args, **kwargs)
+        
+        if not nuevo and (anterior is None or anterior[1] is None):
+            # Instancia sin el aporte anterior (campos diferidos): suma completa
+            self.batch.calcular_costo_materiales()
+        elif anterior is None or anterior[0] == self.batch_id:
+            LoteProduccion.ajustar_costo_materiales(
+                self.batch_id, self.costo_total - (anterior[1] if anterior else 0)
+            )
+        else:
+            # Cambió de lote: sale del anterior y entra al nuevo
+            LoteProduccion.ajustar_costo_materiales(anterior[0], -anterior[1])
+            LoteProduccion.ajustar_costo_materiales(self.batch_id, self.costo_total)
+        self._aporte_guardado = (self.batch_id, self.costo_total)
+    
+    def delete(self, *args, **kwargs):
+        from innoquim.apps.lote_produccion.models import LoteProduccion
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        batch_id, costo_total = getattr(self, '_aporte_guardado', (None, None))
+        if costo_total is None:
+            batch_id, costo_total = self.batch_id, self.costo_total
+        resultado = super().delete(*args, **kwargs)
+        LoteProduccion.ajustar_costo_materiales(batch_id, -costo_total)
+        return resultado
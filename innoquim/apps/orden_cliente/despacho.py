@@ -0,0 +1,391 @@
+"""
+Transiciones de estado de OrdenCliente y despacho de inventario.
+
+Una orden descuenta inventario una sola vez, en el paso a completada
+(confirmed/in_progress -> completed). El despacho de una o muchas órdenes:
+
+1. Bloquea las órdenes (select_for_update) y se queda con las que aún no
+   tienen completed_at: marcarlas es la reserva que impide descontar dos
+   veces, aunque la orden se vuelva a guardar o dos procesos la completen
+2. Carga las líneas de todas las órdenes en una consulta (con su producto)
+   y las lleva a la unidad de cada producto
+3. Bloquea los productos y valida la demanda de las órdenes contra el saldo
+   del Kardex (una consulta para todos los (producto, almacén))
+4. Registra una SALIDA por (producto, almacén) con Kardex.registrar_movimientos_bulk,
+   de modo que el trabajo crece con los productos distintos y no con las líneas
+5. Descuenta Producto.stock en un UPDATE por lote (inventario.contadores),
+   consume los lotes del producto por FEFO (inventario.lotes) y refresca
+   InventarioMaterial con actualizar_inventario_material_bulk
+
+Guardar una orden ya completada (editar notas, recalcular totales) no
+vuelve a registrar nada.
+
+despachar_ordenes es todo o nada (si una orden no alcanza no se despacha
+ninguna); completar_ordenes, el cierre del día por el endpoint
+bulk-complete, resuelve cada orden por separado y rechaza solo las que no
+alcanzan. Ambas comparten el mismo despacho.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from innoquim.apps.almacen.services import resolver_almacen
+from innoquim.apps.inventario.contadores import descontar_stock
+from innoquim.apps.inventario.lotes import consumir_lotes
+from innoquim.apps.inventario.models import Kardex
+from innoquim.apps.inventario.signals import actualizar_inventario_material_bulk
+from innoquim.apps.orden_item.models import OrdenItem
+from innoquim.apps.producto.models import Producto
+from innoquim.apps.unidad.conversion import factor, normalizar_movimientos
+
+from .models import OrdenCliente
+
+# Estados a los que puede pasar cada estado
+TRANSICIONES = {
+    "pending": {"confirmed", "cancelled"},
+    "confirmed": {"in_progress", "completed", "cancelled"},
+    "in_progress": {"completed", "cancelled"},
+    "completed": set(),
+    "cancelled": set(),
+}
+
+
+def validar_transicion(actual, nuevo):
+    """Lanza ValueError si la orden no puede pasar de actual a nuevo."""
+    if actual == nuevo:
+        return
+    if nuevo not in TRANSICIONES.get(actual, ()):
+        raise ValueError(f"Una orden en estado {actual} no puede pasar a {nuevo}")
+
+
+def es_despacho(anterior, nuevo):
+    """True si el cambio de estado es el paso a completada."""
+    return nuevo == "completed" and anterior is not None and anterior != "completed"
+
+
+def movimientos_de_salida(ordenes, items, usuario=None):
+    """
+    Movimientos de Kardex (SALIDA por VENTA) de las líneas de las órdenes,
+    en el orden de items. ordenes: {id: OrdenCliente}.
+    """
+    return [
+        {
+            "almacen": resolver_almacen(ordenes[item.order_id].almacen_id, item.product),
+            "item": item.product,
+            "tipo_movimiento": "SALIDA",
+            "motivo": "VENTA",
+            "cantidad": item.quantity,
+            "costo_unitario": item.product.price * factor(item.unit_id, item.product.unit_id),
+            "referencia_id": str(item.order_id),
+            "observaciones": f"Venta en orden {ordenes[item.order_id].order_code}",
+            "usuario": usuario,
+            "unidad": item.unit_id,
+        }
+        for item in items
+    ]
+
+
+def demanda_por_producto(movimientos):
+    """
+    {(producto_id, almacen_id): cantidad} de movimientos ya llevados a la
+    unidad de cada producto (normalizar_movimientos).
+    """
+    demanda = {}
+    for movimiento in movimientos:
+        clave = (movimiento["item"].pk, movimiento["almacen"].pk)
+        demanda[clave] = demanda.get(clave, 0) + movimiento["cantidad"]
+    return demanda
+
+
+def saldos_disponibles(productos, claves):
+    """
+    Bloquea los productos (Kardex.bloquear_items) y lee con una consulta
+    el saldo del Kardex de cada (producto_id, almacen_id) de claves. Debe
+    llamarse dentro de una transacción: otro despacho concurrente espera
+    y luego lee los saldos ya descontados.
+    """
+    Kardex.bloquear_items(productos)
+    ct = ContentType.objects.get_for_model(Producto)
+    saldos = Kardex.ultimos_saldos(
+        {(ct.id, str(producto_id), almacen_id) for producto_id, almacen_id in claves}
+    )
+    return {
+        (int(object_id), almacen_id): saldo[0]
+        for (_, object_id, almacen_id), saldo in saldos.items()
+    }
+
+
+def faltantes(demanda, disponible):
+    """Las claves de demanda que el saldo disponible no cubre."""
+    return [
+        {
+            "producto_id": producto_id,
+            "almacen_id": almacen_id,
+            "requerido": cantidad,
+            "disponible": disponible.get((producto_id, almacen_id), 0),
+        }
+        for (producto_id, almacen_id), cantidad in demanda.items()
+        if disponible.get((producto_id, almacen_id), 0) < cantidad
+    ]
+
+
+def registrar_salidas(movimientos, usuario=None, batch_size=1000):
+    """
+    Registra las salidas de movimientos ya normalizados (una por línea,
+    ver movimientos_de_salida) y descuenta el stock de los productos.
+
+    Las líneas se agrupan en una SALIDA por (producto, almacén), así el
+    trabajo crece con los productos distintos y no con las líneas. La
+    referencia es la orden o, si la salida junta varias, el despacho.
+    Retorna los registros de Kardex creados.
+    """
+    if not movimientos:
+        return []
+    grupos = {}
+    for movimiento in movimientos:
+        clave = (movimiento["item"].pk, movimiento["almacen"].pk)
+        grupo = grupos.setdefault(clave, {"movimiento": movimiento, "cantidad": 0, "ordenes": {}})
+        grupo["cantidad"] += movimiento["cantidad"]
+        grupo["ordenes"][movimiento["referencia_id"]] = movimiento["observaciones"]
+
+    referencia = f"DESPACHO-{timezone.now():%Y%m%d%H%M%S}"
+    salidas = []
+    for grupo in grupos.values():
+        primero = grupo["movimiento"]
+        una_orden = len(grupo["ordenes"]) == 1
+        salidas.append({
+            **primero,
+            "cantidad": grupo["cantidad"],
+            "costo_unitario": primero["item"].price,
+            "referencia_id": primero["referencia_id"] if una_orden else referencia,
+            "observaciones": "; ".join(grupo["ordenes"].values()),
+            "usuario": usuario,
+        })
+    kardex = Kardex.registrar_movimientos_bulk(salidas, batch_size=batch_size)
+
+    vendido = {}
+    for registro in kardex:
+        producto_id = int(registro.object_id)
+        vendido[producto_id] = vendido.get(producto_id, 0) + registro.cantidad
+    if descontar_stock(Producto, vendido):
+        raise ValueError("Stock insuficiente en el contador de productos")
+
+    # Lo vendido sale de los lotes del producto por FEFO (los de producción
+    # y los ingresos por recepción o ajuste)
+    productos = {str(salida["item"].pk): salida["item"] for salida in salidas}
+    consumir_lotes(
+        [
+            {
+                "almacen": registro.almacen,
+                "item": productos[str(registro.object_id)],
+                "cantidad": registro.cantidad,
+                "kardex": registro,
+                "referencia_id": registro.referencia_id,
+            }
+            for registro in kardex
+        ],
+        batch_size=batch_size,
+    )
+    actualizar_inventario_material_bulk(kardex)
+    return kardex
+
+
+def _bloquear_ordenes(orden_ids):
+    """
+    Bloquea las órdenes y las separa en (orden_ids, ordenes, candidatas,
+    omitidas, errores): candidatas son las que pueden pasar a completada,
+    omitidas las ya despachadas y errores {pk: mensaje} las inexistentes o
+    que no admiten la transición.
+    """
+    orden_ids = list(dict.fromkeys(int(pk) for pk in orden_ids))
+    ordenes = OrdenCliente.objects.select_for_update().in_bulk(orden_ids)
+
+    candidatas = {}
+    omitidas = []
+    errores = {}
+    for pk in orden_ids:
+        orden = ordenes.get(pk)
+        if orden is None:
+            errores[pk] = f"No existe la orden {pk}"
+        elif orden.status == "completed" and orden.completed_at is not None:
+            omitidas.append(pk)
+        else:
+            try:
+                validar_transicion(orden.status, "completed")
+                candidatas[pk] = orden
+            except ValueError as e:
+                errores[pk] = f"{orden.order_code}: {e}"
+    return orden_ids, ordenes, candidatas, omitidas, errores
+
+
+def _despachar(ordenes, usuario, batch_size, parcial=False):
+    """
+    Despacha las órdenes {id: OrdenCliente} ya bloqueadas, en su orden.
+
+    Con parcial=False es todo o nada: lanza ValueError si alguna no
+    alcanza. Con parcial=True se aceptan en orden mientras el saldo
+    restante cubra todas sus líneas y las demás se rechazan.
+
+    Retorna dict con 'aceptadas' (IDs), 'rechazadas' ({id: {'error', ...}}),
+    'lineas', 'kardex' y 'completed_at'.
+    """
+    items = list(
+        OrdenItem.objects.filter(order_id__in=list(ordenes))
+        .select_related("product")
+        .order_by("order_id", "id")
+    )
+    lineas = {pk: [] for pk in ordenes}
+    for item in items:
+        lineas[item.order_id].append(item)
+
+    rechazadas = {}
+    movimientos = {}
+    for pk, lineas_orden in lineas.items():
+        try:
+            movimientos[pk] = normalizar_movimientos(
+                movimientos_de_salida(ordenes, lineas_orden, usuario)
+            )
+        except ValueError as e:
+            rechazadas[pk] = {"error": str(e)}
+    demanda = {pk: demanda_por_producto(movs) for pk, movs in movimientos.items()}
+    productos = {item.product_id: item.product for item in items}
+    disponible = saldos_disponibles(
+        productos.values(), {clave for por_orden in demanda.values() for clave in por_orden}
+    )
+
+    aceptadas = []
+    for pk in ordenes:
+        if pk in rechazadas:
+            continue
+        sin_stock = faltantes(demanda[pk], disponible)
+        if sin_stock:
+            rechazadas[pk] = {"error": "Stock insuficiente", "faltantes": sin_stock}
+            continue
+        for clave, cantidad in demanda[pk].items():
+            disponible[clave] -= cantidad
+        aceptadas.append(pk)
+
+    if rechazadas and not parcial:
+        raise ValueError("; ".join(
+            f"{ordenes[pk].order_code}: {rechazo['error']}" + "".join(
+                f" ({productos[f['producto_id']].product_code} en almacén {f['almacen_id']}: "
+                f"requerido {f['requerido']}, disponible {f['disponible']})"
+                for f in rechazo.get("faltantes", [])
+            )
+            for pk, rechazo in rechazadas.items()
+        ))
+
+    ahora = timezone.now() if aceptadas else None
+    kardex = []
+    if aceptadas:
+        OrdenCliente.objects.filter(pk__in=aceptadas).update(
+            status="completed", completed_at=ahora, updated_at=ahora
+        )
+        for pk in aceptadas:
+            ordenes[pk].status, ordenes[pk].completed_at = "completed", ahora
+        kardex = registrar_salidas(
+            [movimiento for pk in aceptadas for movimiento in movimientos[pk]],
+            usuario,
+            batch_size,
+        )
+    return {
+        "aceptadas": aceptadas,
+        "rechazadas": rechazadas,
+        "lineas": sum(len(lineas[pk]) for pk in aceptadas),
+        "kardex": kardex,
+        "completed_at": ahora,
+    }
+
+
+@transaction.atomic
+def despachar_ordenes(orden_ids, usuario=None, batch_size=1000):
+    """
+    Completa las órdenes indicadas y registra sus salidas una sola vez.
+
+    Todas deben poder pasar a completada (confirmed o in_progress) y tener
+    stock; las ya completadas y despachadas se omiten. Todo o nada: si
+    alguna no existe, no admite la transición o no alcanza el stock no se
+    despacha ninguna.
+
+    Retorna dict con 'despachadas' (IDs), 'omitidas' (IDs ya despachadas),
+    'lineas', 'movimientos_kardex' y 'completed_at'.
+    Lanza ValueError con las órdenes inválidas.
+    """
+    _, _, candidatas, omitidas, errores = _bloquear_ordenes(orden_ids)
+    if errores:
+        raise ValueError("; ".join(errores.values()))
+    return _resultado_despacho(_despachar(candidatas, usuario, batch_size), omitidas)
+
+
+@transaction.atomic
+def despachar_completadas(orden_ids, usuario=None, batch_size=1000):
+    """
+    Registra las salidas de órdenes ya marcadas como completadas que aún
+    no se despacharon (p. ej. completadas al editar la orden). Las demás se
+    omiten. Mismo resultado que despachar_ordenes.
+    """
+    ordenes = OrdenCliente.objects.select_for_update().in_bulk(list(orden_ids))
+    pendientes = {
+        pk: orden
+        for pk, orden in ordenes.items()
+        if orden.status == "completed" and orden.completed_at is None
+    }
+    omitidas = [pk for pk in ordenes if pk not in pendientes]
+    return _resultado_despacho(_despachar(pendientes, usuario, batch_size), omitidas)
+
+
+def _resultado_despacho(despacho, omitidas):
+    return {
+        "despachadas": despacho["aceptadas"],
+        "omitidas": omitidas,
+        "lineas": despacho["lineas"],
+        "movimientos_kardex": len(despacho["kardex"]),
+        "completed_at": despacho["completed_at"],
+    }
+
+
+def _resultado(orden, estado, **extra):
+    return {"id": orden.pk, "order_code": orden.order_code, "estado": estado, **extra}
+
+
+@transaction.atomic
+def completar_ordenes(orden_ids, usuario=None, batch_size=1000):
+    """
+    Completa en bloque las órdenes que tengan stock suficiente (cierre del
+    día): cada orden se resuelve por separado.
+
+    Usa el mismo despacho que despachar_ordenes (_despachar con
+    parcial=True): bloquea las órdenes y sus productos, valida la demanda
+    de cada orden contra el saldo restante del Kardex (una consulta de
+    saldos para todas) y registra una SALIDA por (producto, almacén) con
+    las órdenes aceptadas.
+
+    Retorna dict con 'completadas', 'rechazadas', 'omitidas',
+    'movimientos_kardex' y 'resultados' (uno por orden, en el orden
+    recibido, con 'estado' completada/omitida/rechazada y el 'error' o los
+    'faltantes' de las rechazadas).
+    """
+    orden_ids, ordenes, candidatas, omitidas, errores = _bloquear_ordenes(orden_ids)
+    despacho = _despachar(candidatas, usuario, batch_size, parcial=True)
+
+    resultados = []
+    for pk in orden_ids:
+        if pk in errores:
+            if pk in ordenes:
+                resultados.append(_resultado(ordenes[pk], "rechazada", error=errores[pk]))
+            else:
+                resultados.append({"id": pk, "estado": "rechazada", "error": errores[pk]})
+        elif pk in omitidas:
+            resultados.append(_resultado(ordenes[pk], "omitida"))
+        elif pk in despacho["rechazadas"]:
+            resultados.append(_resultado(ordenes[pk], "rechazada", **despacho["rechazadas"][pk]))
+        else:
+            resultados.append(_resultado(ordenes[pk], "completada"))
+    return {
+        "completadas": len(despacho["aceptadas"]),
+        "rechazadas": sum(1 for r in resultados if r["estado"] == "rechazada"),
+        "omitidas": len(omitidas),
+        "movimientos_kardex": len(despacho["kardex"]),
+        "resultados": resultados,
+    }
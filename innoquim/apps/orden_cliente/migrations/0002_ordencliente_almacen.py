@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('orden_cliente', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordencliente',
+            name='almacen',
+            field=models.ForeignKey(blank=True, help_text='Almacen desde donde se despachan los productos (opcional)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ordenes_cliente', to='almacen.almacen', verbose_name='Almacen de Despacho'),
+        ),
+    ]
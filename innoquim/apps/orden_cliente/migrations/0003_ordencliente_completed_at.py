@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def marcar_completadas(apps, schema_editor):
+    # Las órdenes ya completadas descontaron inventario con el signal anterior
+    OrdenCliente = apps.get_model('orden_cliente', 'OrdenCliente')
+    OrdenCliente.objects.filter(status='completed').update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orden_cliente', '0002_ordencliente_almacen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordencliente',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, help_text='Momento en que se registraron las salidas de inventario', null=True, verbose_name='Fecha de Despacho'),
+        ),
+        migrations.RunPython(marcar_completadas, migrations.RunPython.noop),
+    ]
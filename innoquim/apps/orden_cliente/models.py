@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from decimal import Decimal, ROUND_HALF_UP
 from django.db.models import Sum
 
@@ -76,6 +76,19 @@ class OrdenCliente(models.Model):
         help_text="Observaciones o instrucciones especiales"
     )
 
+    # almacen: desde donde se despacha la orden
+    # null=True: si no se indica, cada producto sale de su almacen preferido
+    # o del almacen predeterminado (ver innoquim.apps.almacen.services)
+    almacen = models.ForeignKey(
+        "almacen.Almacen",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="ordenes_cliente",
+        verbose_name="Almacen de Despacho",
+        help_text="Almacen desde donde se despachan los productos (opcional)"
+    )
+
     # =================================================================
     # CAMPOS DE IMPUESTOS Y TOTALES (SNAPSHOT)
     # =================================================================
@@ -111,6 +124,16 @@ class OrdenCliente(models.Model):
         help_text="Monto total de la orden (autocalculado)"
     )
 
+    # completed_at: cuando se registraron las salidas de la orden
+    # Se marca una sola vez al despachar (ver despacho.py); una orden
+    # completada con completed_at ya no vuelve a descontar inventario
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fecha de Despacho",
+        help_text="Momento en que se registraron las salidas de inventario"
+    )
+
     # =================================================================
     # CAMPOS DE AUDITORIA (automaticos)
     # =================================================================
@@ -177,20 +200,27 @@ class OrdenCliente(models.Model):
         Override del metodo save() para recalcular totales cuando cambia tax_rate.
         
         Logica:
-        1. Si la orden ya existe, obtiene el tax_rate anterior de la BD
-        2. Guarda el registro con super().save()
+        1. Si la orden ya existe, obtiene el tax_rate y el estado anteriores
+           de la BD (el estado anterior queda en _estado_anterior para que
+           el signal detecte la transicion a completada)
+        2. Guarda el registro con super().save(), dentro de una transacción:
+           si el despacho del signal falla, el cambio de estado se revierte
         3. Si es nueva orden O si cambio tax_rate, recalcula totales
         
         NOTA: update_totals() usa queryset.update() internamente,
         por eso es seguro llamarlo aqui sin crear bucles infinitos
         """
         old_rate = None
+        self._estado_anterior = None
         if self.pk:
-            # Obtener tax_rate anterior si la orden ya existe
-            old_rate = self.__class__.objects.filter(pk=self.pk).values_list("tax_rate", flat=True).first()
+            # Obtener tax_rate y estado anteriores si la orden ya existe
+            anterior = self.__class__.objects.filter(pk=self.pk).values_list("tax_rate", "status").first()
+            if anterior:
+                old_rate, self._estado_anterior = anterior
         
-        # Guardar el registro normalmente
-        super().save(*args, **kwargs)
+        # Guardar el registro (el signal de post_save despacha en la misma transacción)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
         
         # Recalcular totales si es nueva O si cambio tax_rate
         if old_rate is None or old_rate != self.tax_rate:
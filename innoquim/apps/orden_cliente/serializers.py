@@ -1,4 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
+from .despacho import validar_transicion
 from .models import OrdenCliente
 from innoquim.apps.orden_item.serializers import OrdenItemSerializer
 from innoquim.apps.orden_item.models import OrdenItem
@@ -54,17 +56,28 @@ class OrdenClienteSerializer(serializers.ModelSerializer):
             "order_code",
             "order_date",
             "status",
+            "almacen",
             "notes",
             "tax_rate",
             "tax_amount",      # Calculado automaticamente
             "total_amount",    # Calculado automaticamente
             "total",           # Alias de total_amount
             "items",           # Items anidados
+            "completed_at",    # Marcado al despachar
             "created_at",
             "updated_at",
         ]
         # Campos que NO se pueden modificar via API
-        read_only_fields = ["created_at", "updated_at", "tax_amount", "total_amount"]
+        read_only_fields = ["created_at", "updated_at", "tax_amount", "total_amount", "completed_at"]
+
+    def validate_status(self, value):
+        """Solo permite las transiciones de estado definidas en despacho.TRANSICIONES"""
+        if self.instance is not None:
+            try:
+                validar_transicion(self.instance.status, value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
 
     def get_total(self, obj):
         """Retorna el total_amount de la orden"""
@@ -101,15 +114,22 @@ class OrdenClienteSerializer(serializers.ModelSerializer):
         2. Actualiza la orden (campos principales)
         3. Si se enviaron items: borra items existentes y crea los nuevos
         4. Recalcula totales de la orden
+
+        Si el paso a completada no puede despachar (ValueError, ej: sin
+        stock) no se guarda nada y se responde 400.
         """
         items_data = validated_data.pop("items", None)
-        instance = super().update(instance, validated_data)
-        
-        if items_data is not None:
-            # Estrategia simple: borrar existentes y recrear
-            instance.items.all().delete()
-            for item in items_data:
-                OrdenItem.objects.create(order=instance, **item)
+        try:
+            with transaction.atomic():
+                instance = super().update(instance, validated_data)
+                
+                if items_data is not None:
+                    # Estrategia simple: borrar existentes y recrear
+                    instance.items.all().delete()
+                    for item in items_data:
+                        OrdenItem.objects.create(order=instance, **item)
+        except ValueError as e:
+            raise serializers.ValidationError({"status": str(e)})
         
         # Recalcular totales de la orden
         instance.update_totals()
@@ -1,14 +1,14 @@
 """
 Signals para gestionar inventario cuando cambian las órdenes de cliente.
 """
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.utils import timezone
-from django.contrib.contenttypes.models import ContentType
-from decimal import Decimal
+from .despacho import despachar_completadas, es_despacho
 from .models import OrdenCliente
-from innoquim.apps.producto.models import Producto
-from innoquim.apps.inventario.models import Kardex
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=OrdenCliente)
@@ -16,7 +16,11 @@ def gestionar_inventario_orden_cliente(sender, instance, created, **kwargs):
     """
     Gestiona el inventario de productos cuando cambia el estado de una orden de cliente.
 
-    - Al completar una orden: descuenta productos del inventario y registra en Kardex
+    - Al pasar a completada: descuenta productos del inventario y registra en
+      Kardex, una sola vez y en bloque (ver despacho.py). Guardar de nuevo una
+      orden completada no vuelve a descontar. Si el despacho falla (ej: sin
+      stock) el error se registra y se propaga: OrdenCliente.save() es
+      atómico y la orden no queda completada sin sus salidas
     - Al cancelar una orden: devuelve productos al inventario (si estaban descontados)
     """
 
@@ -24,41 +28,19 @@ def gestionar_inventario_orden_cliente(sender, instance, created, **kwargs):
     if created:
         return
 
-    # Si el estado cambia a COMPLETED
-    if instance.status == "completed":
+    # Solo en el paso real a completada (save() deja el estado anterior)
+    if es_despacho(getattr(instance, "_estado_anterior", None), instance.status):
         try:
-            # Obtener el almacén (primera opción disponible)
-            from innoquim.apps.almacen.models import Almacen
-            almacen = Almacen.objects.first()
-            if not almacen:
-                print(f"No hay almacén disponible para registrar venta de orden {instance.order_code}")
-                return
-
-            # Descontar cada producto de la orden
-            for item in instance.items.all():
-                producto = item.product
-                producto.stock -= item.quantity
-                producto.save()
-
-                # Registrar en Kardex (salida por venta)
-                Kardex.registrar_movimiento(
-                    almacen=almacen,
-                    item=producto,
-                    tipo_movimiento="SALIDA",
-                    motivo="VENTA",
-                    cantidad=Decimal(str(item.quantity)),
-                    costo_unitario=producto.price,
-                    referencia_id=str(instance.id),
-                    observaciones=f"Venta en orden {instance.order_code}",
-                    usuario=None,
-                )
-
-        except Exception as e:
-            print(f"Error al gestionar inventario de orden {instance.order_code}: {str(e)}")
+            resultado = despachar_completadas([instance.pk])
+            if resultado["despachadas"]:
+                instance.completed_at = resultado["completed_at"]
+        except Exception:
+            logger.exception(f"Error al gestionar inventario de orden {instance.order_code}")
+            raise
 
     # Si el estado cambia a CANCELLED y la orden estaba completada
     elif instance.status == "cancelled":
         # Aquí podríamos implementar lógica para devolver productos al inventario
         # si se cancela una orden que ya estaba completada
         # Por ahora, solo registramos que fue cancelada
-        pass
\ No newline at end of file
+        pass
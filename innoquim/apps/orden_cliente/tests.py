@@ -1,3 +1,206 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from .despacho import completar_ordenes, despachar_ordenes
+from .models import OrdenCliente
+
+
+class DespachoOrdenTest(APITestCase):
+    """Tests para el despacho de órdenes en el paso a completada"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.cliente.models import Cliente
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.orden_item.models import OrdenItem
+        from innoquim.apps.producto.models import Producto
+        from innoquim.apps.unidad.conversion import limpiar_cache
+        from innoquim.apps.unidad.models import Unidad
+
+        limpiar_cache()
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        self.almacen = Almacen.objects.create(nombre="Almacén Principal", direccion="Planta 1")
+        self.producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=kg, weight=1,
+            price=Decimal("3"), stock=Decimal("100"),
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        Kardex.registrar_movimiento(
+            almacen=self.almacen, item=self.producto, tipo_movimiento="ENTRADA",
+            motivo="PRODUCCION", cantidad=Decimal("100"), costo_unitario=Decimal("2"),
+        )
+        cliente = Cliente.objects.create(
+            ruc="1790000000002", nombre_empresa="Cliente SA", email="c@c.com", direccion="-"
+        )
+        self.ordenes = []
+        for i in range(3):
+            orden = OrdenCliente.objects.create(
+                client=cliente, order_code=f"OC-{i}", order_date=date.today(),
+                status="confirmed", almacen=self.almacen,
+            )
+            for cantidad in (4, 6):
+                OrdenItem.objects.create(order=orden, product=self.producto, quantity=cantidad, unit=kg)
+            self.ordenes.append(orden)
+
+    def salidas(self):
+        from innoquim.apps.inventario.models import Kardex
+
+        return Kardex.objects.filter(tipo_movimiento="SALIDA", motivo="VENTA")
+
+    def test_completar_descuenta_una_sola_vez(self):
+        """Test que guardar de nuevo una orden completada no vuelva a descontar"""
+        from innoquim.apps.inventario.lotes import registrar_ingresos
+        from innoquim.apps.inventario.models import LoteInventario
+
+        registrar_ingresos([
+            {"almacen": self.almacen, "item": self.producto, "codigo_lote": "LP-1", "cantidad": 100}
+        ])
+        orden = self.ordenes[0]
+        orden.status = "completed"
+        orden.save()
+        self.assertIsNotNone(orden.completed_at)
+        # Las dos líneas del mismo producto salen en una SALIDA
+        self.assertEqual(list(self.salidas().values_list("cantidad", flat=True)), [Decimal("10.00")])
+
+        orden.notes = "Entregar en bodega"
+        orden.save()
+        OrdenCliente.objects.get(pk=orden.pk).save()
+        self.assertEqual(self.salidas().count(), 1)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, Decimal("90"))
+        # Lo vendido sale también del lote del producto
+        self.assertEqual(
+            LoteInventario.objects.get(codigo_lote="LP-1").cantidad_disponible, Decimal("90.00")
+        )
+
+    def test_stock_por_producto_con_varios_productos(self):
+        """Test que cada producto descuente su propia cantidad aunque el Kardex agrupe las líneas"""
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.orden_item.models import OrdenItem
+        from innoquim.apps.producto.models import Producto
+
+        productos = []
+        for codigo in ("JAB-01", "JAB-02"):
+            producto = Producto.objects.create(
+                product_code=codigo, name=codigo, unit=self.producto.unit, weight=1,
+                price=Decimal("1"), stock=Decimal("100"), categoria_id=self.producto.categoria_id,
+            )
+            Kardex.registrar_movimiento(
+                almacen=self.almacen, item=producto, tipo_movimiento="ENTRADA",
+                motivo="PRODUCCION", cantidad=Decimal("100"), costo_unitario=Decimal("1"),
+            )
+            productos.append(producto)
+        orden = self.ordenes[0]
+        # Líneas en orden inverso al de los PK
+        OrdenItem.objects.create(order=orden, product=productos[1], quantity=50, unit=self.producto.unit)
+        OrdenItem.objects.create(order=orden, product=productos[0], quantity=1, unit=self.producto.unit)
+
+        despachar_ordenes([orden.pk])
+        for producto, esperado in zip([self.producto] + productos, (90, 99, 50)):
+            producto.refresh_from_db()
+            self.assertEqual(producto.stock, Decimal(esperado))
+            self.assertEqual(Kardex.obtener_saldo_actual(self.almacen, producto)["cantidad"], esperado)
+
+    def test_despachar_varias_ordenes(self):
+        """Test que el despacho en bloque complete todas y omita las ya despachadas"""
+        from innoquim.apps.inventario.models import Kardex
+
+        pendiente = self.ordenes[2]
+        OrdenCliente.objects.filter(pk=pendiente.pk).update(status="pending")
+        with self.assertRaises(ValueError):
+            despachar_ordenes([o.pk for o in self.ordenes])
+        self.assertEqual(self.salidas().count(), 0)
+
+        resultado = despachar_ordenes([o.pk for o in self.ordenes[:2]])
+        self.assertEqual((len(resultado["despachadas"]), resultado["lineas"]), (2, 4))
+        self.assertEqual(
+            set(OrdenCliente.objects.values_list("status", flat=True).exclude(pk=pendiente.pk)),
+            {"completed"},
+        )
+        self.assertEqual(Kardex.obtener_saldo_actual(self.almacen, self.producto)["cantidad"], 80)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, Decimal("80"))
+
+        resultado = despachar_ordenes([self.ordenes[0].pk])
+        self.assertEqual(resultado["omitidas"], [self.ordenes[0].pk])
+        self.assertEqual(list(self.salidas().values_list("cantidad", flat=True)), [Decimal("20.00")])
+
+    def test_despachar_sin_stock(self):
+        """Test que la demanda conjunta que supera el saldo no despache nada"""
+        from innoquim.apps.orden_item.models import OrdenItem
+
+        # 30 de las tres órdenes + 75 -> 105 > 100 disponibles
+        OrdenItem.objects.create(
+            order=self.ordenes[2], product=self.producto, quantity=75, unit=self.producto.unit
+        )
+        with self.assertRaisesMessage(ValueError, "Stock insuficiente"):
+            despachar_ordenes([o.pk for o in self.ordenes])
+        self.assertEqual(self.salidas().count(), 0)
+        self.assertFalse(OrdenCliente.objects.filter(status="completed").exists())
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, Decimal("100"))
+
+    def test_bulk_complete_por_orden(self):
+        """Test que el cierre complete las órdenes con stock y agrupe las salidas por producto"""
+        from innoquim.apps.orden_item.models import OrdenItem
+
+        sin_stock = self.ordenes[2]
+        OrdenItem.objects.create(
+            order=sin_stock, product=self.producto, quantity=90, unit=self.producto.unit
+        )
+        usuario = get_user_model().objects.create_user(
+            email="bodega@test.com", username="bodega", password="x"
+        )
+        self.client.force_authenticate(user=usuario)
+        respuesta = self.client.post(
+            "/api/ordenes-clientes/bulk-complete/",
+            {"ordenes": [o.pk for o in self.ordenes] + [999]},
+            format="json",
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        resultado = respuesta.json()
+
+        self.assertEqual(
+            [r["estado"] for r in resultado["resultados"]],
+            ["completada", "completada", "rechazada", "rechazada"],
+        )
+        self.assertEqual(resultado["resultados"][2]["error"], "Stock insuficiente")
+        # Una sola salida por producto y almacén para las dos órdenes
+        self.assertEqual(list(self.salidas().values_list("cantidad", flat=True)), [Decimal("20.00")])
+        self.assertEqual(OrdenCliente.objects.get(pk=sin_stock.pk).status, "confirmed")
+
+        resultado = completar_ordenes([self.ordenes[0].pk])
+        self.assertEqual(resultado["omitidas"], 1)
+
+    def test_despacho_fallido_no_completa_la_orden(self):
+        """Test que si el despacho falla la orden no quede completada y el error llegue al cliente"""
+        from innoquim.apps.orden_item.models import OrdenItem
+        from innoquim.apps.unidad.models import Unidad
+
+        orden = self.ordenes[0]
+        # 4 g de un producto en kg se redondean a 0 en el Kardex y se rechazan
+        gramo = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion=Decimal("0.001"))
+        OrdenItem.objects.create(order=orden, product=self.producto, quantity=4, unit=gramo)
+        orden.status = "completed"
+        with self.assertLogs("innoquim.apps.orden_cliente.signals", "ERROR"):
+            with self.assertRaises(ValueError):
+                orden.save()
+        orden.refresh_from_db()
+        self.assertEqual((orden.status, orden.completed_at), ("confirmed", None))
+        self.assertEqual(self.salidas().count(), 0)
+
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="ventas@test.com", username="ventas", password="x"
+            )
+        )
+        with self.assertLogs("innoquim.apps.orden_cliente.signals", "ERROR"):
+            respuesta = self.client.patch(
+                f"/api/ordenes-clientes/{orden.pk}/", {"status": "completed"}, format="json"
+            )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(OrdenCliente.objects.get(pk=orden.pk).status, "confirmed")
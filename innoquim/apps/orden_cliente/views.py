@@ -1,4 +1,7 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .despacho import completar_ordenes
 from .models import OrdenCliente
 from .serializers import OrdenClienteSerializer
 
@@ -14,6 +17,7 @@ class OrdenClienteViewSet(viewsets.ModelViewSet):
     - PUT    /api/ordenes-clientes/{id}/     -> Actualizar orden completa
     - PATCH  /api/ordenes-clientes/{id}/     -> Actualizar orden parcial
     - DELETE /api/ordenes-clientes/{id}/     -> Eliminar orden
+    - POST   /api/ordenes-clientes/bulk-complete/ -> Cerrar las ordenes con stock (resultado por orden)
     
     Filtros disponibles:
     - ?client={id}   -> Filtrar por cliente
@@ -23,4 +27,29 @@ class OrdenClienteViewSet(viewsets.ModelViewSet):
     queryset = OrdenCliente.objects.all()
     serializer_class = OrdenClienteSerializer
     filterset_fields = ["client", "status"]
-    search_fields = ["order_code"]
\ No newline at end of file
+    search_fields = ["order_code"]
+
+    @action(detail=False, methods=['post'], url_path='bulk-complete')
+    def bulk_complete(self, request):
+        """
+        Cierre del dia: completa las ordenes con stock suficiente.
+        POST /api/ordenes-clientes/bulk-complete/
+
+        Body: {"ordenes": [1, 2, 3]}
+
+        Cada orden se resuelve por separado: las que no tienen stock o no
+        pueden pasar a completada se rechazan sin afectar a las demas.
+        Registra una salida por producto y almacen (ver despacho.py).
+        Retorna el resultado de cada orden.
+        """
+        ordenes = request.data.get('ordenes')
+        if not isinstance(ordenes, list) or not ordenes:
+            return Response(
+                {"error": "Envíe una lista 'ordenes' con los IDs a completar"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            resultado = completar_ordenes(ordenes, usuario=request.user)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
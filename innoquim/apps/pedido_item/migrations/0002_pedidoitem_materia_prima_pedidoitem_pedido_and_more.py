@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia_prima', '0003_materiaprima_proveedor_preferido'),
+        ('pedido_item', '0001_initial'),
+        ('pedido_material', '0002_pedidomaterial_estado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='materia_prima',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pedido_items', to='materia_prima.materiaprima'),
+        ),
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='pedido',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='pedido_material.pedidomaterial'),
+        ),
+        migrations.AlterField(
+            model_name='pedidoitem',
+            name='cantidad_recibida',
+            field=models.IntegerField(default=0),
+        ),
+    ]
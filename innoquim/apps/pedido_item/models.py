@@ -3,10 +3,26 @@ from ..unidad.models import Unidad
 
 # Create your models here.
 class PedidoItem(models.Model):
+    # Pedido al que pertenece y material pedido (opcionales: los items
+    # registrados antes de estas columnas no los tienen)
+    pedido = models.ForeignKey(
+        'pedido_material.PedidoMaterial',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='items'
+    )
+    materia_prima = models.ForeignKey(
+        'materia_prima.MateriaPrima',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='pedido_items'
+    )
     id_unidad_medida = models.ForeignKey(
         Unidad,
         on_delete=models.CASCADE,
         related_name='items_pedido'
     )    
     cantidad_solicitada = models.IntegerField()
-    cantidad_recibida = models.IntegerField()
\ No newline at end of file
+    cantidad_recibida = models.IntegerField(default=0)
\ No newline at end of file
@@ -8,6 +8,8 @@ class PedidoItemSerializer(serializers.ModelSerializer):
         model = PedidoItem
         fields = [
             'id',
+            'pedido',
+            'materia_prima',
             'id_unidad_medida',
             'cantidad_solicitada',
             'cantidad_recibida'
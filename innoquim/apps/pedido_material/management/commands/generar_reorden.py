@@ -0,0 +1,97 @@
+"""
+Genera pedidos BORRADOR de reposición para las materias primas bajo su
+punto de reorden, agrupados por proveedor.
+
+Uso:
+    python manage.py generar_reorden
+    python manage.py generar_reorden --dry-run
+    python manage.py generar_reorden --pronostico   # consumo según pronósticos
+    python manage.py generar_reorden --intervalo 86400   # tarea nocturna
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from innoquim.apps.pedido_material.reorden import generar_pedidos_reorden
+
+
+class Command(BaseCommand):
+    help = "Propone pedidos de materia prima según consumo, stock y tiempo de entrega"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias-historial", type=int, default=90, help="Días de consumo a promediar"
+        )
+        parser.add_argument(
+            "--dias-seguridad", type=int, default=7, help="Días de stock de seguridad"
+        )
+        parser.add_argument(
+            "--dias-cobertura",
+            type=int,
+            default=30,
+            help="Días de consumo a cubrir cuando no hay stock máximo",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Solo mostrar las propuestas"
+        )
+        parser.add_argument(
+            "--pronostico",
+            action="store_true",
+            help="Usar el consumo de la demanda pronosticada si es mayor que el histórico",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Repetir cada N segundos (0 = ejecutar una vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.ejecutar(options)
+            except ValueError as e:
+                raise CommandError(str(e))
+            except DatabaseError as e:
+                if not options["intervalo"]:
+                    raise
+                self.stderr.write(self.style.ERROR(f"Generación de reorden fallida: {e}"))
+
+            if not options["intervalo"]:
+                return
+            close_old_connections()
+            time.sleep(options["intervalo"])
+
+    def ejecutar(self, options):
+        inicio = time.monotonic()
+        resultado = generar_pedidos_reorden(
+            dias_historial=options["dias_historial"],
+            dias_seguridad=options["dias_seguridad"],
+            dias_cobertura=options["dias_cobertura"],
+            dry_run=options["dry_run"],
+            usar_pronostico=options["pronostico"],
+        )
+        duracion = time.monotonic() - inicio
+
+        if options["dry_run"]:
+            for propuesta in resultado["propuestas"]:
+                self.stdout.write(
+                    f"{propuesta['proveedor_id']} {propuesta['materia_prima_id']}: "
+                    f"stock={propuesta['stock']} en_pedido={propuesta['en_pedido']} "
+                    f"punto_reorden={propuesta['punto_reorden']} pedir={propuesta['cantidad']}"
+                )
+        if resultado["sin_proveedor"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{len(resultado['sin_proveedor'])} materias primas sin proveedor preferido: "
+                    + ", ".join(resultado["sin_proveedor"][:20])
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(resultado['pedidos'])} pedidos, {resultado['items']} items "
+                f"en {duracion:.2f}s" + (" (sin cambios)" if options["dry_run"] else "")
+            )
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido_material', '0001_initial'),
+        ('proveedor', '0002_proveedor_dias_entrega'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidomaterial',
+            name='estado',
+            field=models.CharField(choices=[('BORRADOR', 'Borrador'), ('REGISTRADO', 'Registrado')], default='REGISTRADO', max_length=10, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='pedidomaterial',
+            name='usuario_registro',
+            field=models.ForeignKey(blank=True, help_text='Empleado que registro el pedido en el sistema', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pedidos_materiales', to=settings.AUTH_USER_MODEL, verbose_name='Usuario que Registro'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidomaterial',
+            index=models.Index(fields=['estado'], name='pedido_mate_estado_5b6085_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido_material', '0002_pedidomaterial_estado_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pedidomaterial',
+            name='estado',
+            field=models.CharField(choices=[('BORRADOR', 'Borrador'), ('REGISTRADO', 'Registrado'), ('RECIBIDO', 'Recibido'), ('CANCELADO', 'Cancelado')], default='REGISTRADO', max_length=10, verbose_name='Estado'),
+        ),
+    ]
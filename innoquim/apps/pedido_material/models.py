@@ -53,14 +53,39 @@ class PedidoMaterial(models.Model):
     # on_delete=PROTECT: no permite borrar usuario si tiene pedidos
     # related_name: permite acceder a los pedidos desde el usuario
     # Ejemplo: usuario.pedidos_materiales.all()
+    # Vacio en los borradores que genera el motor de reorden
     usuario_registro = models.ForeignKey(
         Usuario,
         on_delete=models.PROTECT,
+        null=True,
+        blank=True,
         related_name="pedidos_materiales",
         verbose_name="Usuario que Registro",
         help_text="Empleado que registro el pedido en el sistema",
     )
 
+    # =================================================================
+    # ESTADO
+    # =================================================================
+
+    # BORRADOR: propuesto por el motor de reorden, pendiente de revision
+    # REGISTRADO: pedido realizado al proveedor (lo unico que cuenta como
+    #             material en camino para reorden, MRP y programacion)
+    # RECIBIDO: todos sus items llegaron (lo marcan las recepciones)
+    # CANCELADO: descartado; no cuenta como pedido
+    ESTADO_CHOICES = (
+        ("BORRADOR", "Borrador"),
+        ("REGISTRADO", "Registrado"),
+        ("RECIBIDO", "Recibido"),
+        ("CANCELADO", "Cancelado"),
+    )
+    estado = models.CharField(
+        max_length=10,
+        choices=ESTADO_CHOICES,
+        default="REGISTRADO",
+        verbose_name="Estado",
+    )
+
     # =================================================================
     # FECHAS DEL PEDIDO
     # =================================================================
@@ -124,6 +149,7 @@ class PedidoMaterial(models.Model):
             models.Index(fields=["proveedor_id"]),
             models.Index(fields=["fecha_pedido"]),
             models.Index(fields=["usuario_registro"]),
+            models.Index(fields=["estado"]),
         ]
 
     def __str__(self):
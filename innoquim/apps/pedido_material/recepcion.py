@@ -0,0 +1,58 @@
+"""
+Avance de los pedidos con las recepciones de material.
+
+Cada RecepcionItem que indica su pedido_item suma lo recibido a
+PedidoItem.cantidad_recibida con un UPDATE atómico (F()), en la unidad del
+pedido. Cuando todos los items de un pedido REGISTRADO están completos, el
+pedido pasa a RECIBIDO y deja de contar como material en camino.
+"""
+
+from decimal import ROUND_HALF_UP
+
+from django.db.models import F
+
+from innoquim.apps.pedido_item.models import PedidoItem
+from innoquim.apps.unidad.conversion import convertir
+
+from .models import PedidoMaterial
+
+
+def registrar_recibido(pedido_item_id, cantidad, unidad_id=None):
+    """
+    Suma al item del pedido la cantidad recibida (en unidad_id, o en la
+    unidad del pedido si no se indica) y cierra el pedido si quedó completo.
+    """
+    item = (
+        PedidoItem.objects.filter(pk=pedido_item_id)
+        .values("pedido_id", "id_unidad_medida_id")
+        .first()
+    )
+    if item is None:
+        raise ValueError(f"No existe el item de pedido {pedido_item_id}")
+
+    # PedidoItem guarda cantidades enteras
+    recibido = int(
+        convertir(cantidad, unidad_id or item["id_unidad_medida_id"], item["id_unidad_medida_id"])
+        .to_integral_value(rounding=ROUND_HALF_UP)
+    )
+    if recibido:
+        PedidoItem.objects.filter(pk=pedido_item_id).update(
+            cantidad_recibida=F("cantidad_recibida") + recibido
+        )
+    if item["pedido_id"]:
+        cerrar_pedidos_recibidos([item["pedido_id"]])
+    return recibido
+
+
+def cerrar_pedidos_recibidos(pedido_ids):
+    """Pasa a RECIBIDO los pedidos REGISTRADO sin items pendientes."""
+    return (
+        PedidoMaterial.objects.filter(pk__in=pedido_ids, estado="REGISTRADO")
+        .exclude(
+            pk__in=PedidoItem.objects.filter(
+                pedido_id__in=pedido_ids,
+                cantidad_recibida__lt=F("cantidad_solicitada"),
+            ).values("pedido_id")
+        )
+        .update(estado="RECIBIDO")
+    )
@@ -0,0 +1,229 @@
+"""
+Motor de reorden: propone pedidos de reposición de materias primas.
+
+Para todo el catálogo en una sola pasada (tres consultas agrupadas, sin
+consultas por item):
+
+- consumo diario: SALIDAS del Kardex de los últimos dias_historial días,
+  sumando todos los almacenes; con usar_pronostico se toma el mayor entre
+  ese consumo y el que requiere fabricar la demanda pronosticada de los
+  próximos dias_cobertura días (pronostico.demanda)
+- en pedido: cantidad solicitada y no recibida de pedidos REGISTRADO. Los
+  BORRADOR no son material en camino; solo evitan que una nueva ejecución
+  vuelva a proponer la misma materia prima mientras se revisan
+- punto de reorden: max(stock_minimo, consumo diario x (días de entrega del
+  proveedor + dias_seguridad))
+
+Si stock + en pedido <= punto de reorden, se pide hasta stock_maximo (o,
+sin máximo, hasta el punto de reorden más dias_cobertura de consumo),
+redondeado hacia arriba porque PedidoItem guarda cantidades enteras.
+
+Las propuestas se agrupan por el proveedor preferido de cada materia prima
+y se crean como pedidos BORRADOR con bulk_create. Las materias primas sin
+proveedor preferido se reportan aparte.
+"""
+
+from datetime import timedelta
+from decimal import Decimal, ROUND_CEILING
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from innoquim.apps.inventario.models import Kardex
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.pedido_item.models import PedidoItem
+from innoquim.apps.pronostico.demanda import consumo_diario_pronosticado
+
+from .models import PedidoMaterial
+
+CERO = Decimal("0")
+
+# Pedidos cuyo saldo no recibido es material en camino
+ESTADOS_EN_CAMINO = ("REGISTRADO",)
+
+
+def consumo_por_materia(desde):
+    """
+    {materia_prima_id: cantidad} de las SALIDAS desde una fecha (sin las
+    transferencias entre almacenes, que no son consumo).
+    """
+    content_type = ContentType.objects.get_for_model(MateriaPrima)
+    return dict(
+        Kardex.objects.filter(
+            content_type=content_type, tipo_movimiento="SALIDA", fecha__gte=desde
+        )
+        .exclude(motivo="TRANSFERENCIA")
+        .order_by()
+        .values("object_id")
+        .annotate(total=Sum("cantidad"))
+        .values_list("object_id", "total")
+    )
+
+
+def pendiente_por_materia():
+    """{materia_prima_id: cantidad} pedida al proveedor y aún no recibida."""
+    return dict(
+        PedidoItem.objects.filter(
+            pedido__estado__in=ESTADOS_EN_CAMINO,
+            materia_prima__isnull=False,
+            cantidad_recibida__lt=F("cantidad_solicitada"),
+        )
+        .order_by()
+        .values("materia_prima_id")
+        .annotate(total=Sum(F("cantidad_solicitada") - F("cantidad_recibida")))
+        .values_list("materia_prima_id", "total")
+    )
+
+
+def materias_en_borrador():
+    """IDs de materias primas con un pedido BORRADOR pendiente de revisión."""
+    return set(
+        PedidoItem.objects.filter(pedido__estado="BORRADOR", materia_prima__isnull=False)
+        .values_list("materia_prima_id", flat=True)
+        .distinct()
+    )
+
+
+def calcular_propuestas(
+    dias_historial=90, dias_seguridad=7, dias_cobertura=30, usar_pronostico=False
+):
+    """
+    Calcula las cantidades a pedir sin escribir nada.
+
+    Retorna (propuestas, sin_proveedor): propuestas es una lista de dicts
+    con materia_prima_id, proveedor_id, unidad_id, dias_entrega, stock,
+    en_pedido, consumo_diario, punto_reorden y cantidad; sin_proveedor
+    son los IDs que necesitan reposición pero no tienen proveedor preferido.
+    """
+    if dias_historial <= 0:
+        raise ValueError("dias_historial debe ser mayor que 0")
+    if dias_seguridad < 0 or dias_cobertura < 0:
+        raise ValueError("dias_seguridad y dias_cobertura no pueden ser negativos")
+
+    consumos = consumo_por_materia(timezone.now() - timedelta(days=dias_historial))
+    pendientes = pendiente_por_materia()
+    en_borrador = materias_en_borrador()
+    pronosticados = {}
+    if usar_pronostico:
+        pronosticados = consumo_diario_pronosticado(dias=dias_cobertura or 30)
+
+    propuestas = []
+    sin_proveedor = []
+    for (
+        pk, stock, stock_minimo, stock_maximo, unidad_id, proveedor_id, dias_entrega
+    ) in MateriaPrima.objects.order_by("pk").values_list(
+        "pk", "stock", "stock_minimo", "stock_maximo", "unidad_id_id",
+        "proveedor_preferido_id", "proveedor_preferido__dias_entrega",
+    ):
+        consumo_diario = max(
+            Decimal(consumos.get(pk) or CERO) / dias_historial, pronosticados.get(pk, CERO)
+        )
+        plazo = (dias_entrega or 0) + dias_seguridad
+        punto_reorden = max(stock_minimo, consumo_diario * plazo)
+        en_pedido = Decimal(pendientes.get(pk) or 0)
+        posicion = stock + en_pedido
+
+        if posicion > punto_reorden or pk in en_borrador:
+            continue
+        objetivo = stock_maximo or punto_reorden + consumo_diario * dias_cobertura
+        cantidad = int((objetivo - posicion).to_integral_value(rounding=ROUND_CEILING))
+        if cantidad <= 0:
+            continue
+        if proveedor_id is None:
+            sin_proveedor.append(pk)
+            continue
+
+        propuestas.append({
+            "materia_prima_id": pk,
+            "proveedor_id": proveedor_id,
+            "unidad_id": unidad_id,
+            "dias_entrega": dias_entrega,
+            "stock": stock,
+            "en_pedido": en_pedido,
+            "consumo_diario": consumo_diario.quantize(Decimal("0.0001")),
+            "punto_reorden": punto_reorden.quantize(Decimal("0.01")),
+            "cantidad": cantidad,
+        })
+    return propuestas, sin_proveedor
+
+
+@transaction.atomic
+def generar_pedidos_reorden(
+    dias_historial=90, dias_seguridad=7, dias_cobertura=30, dry_run=False, usuario=None,
+    batch_size=1000, usar_pronostico=False,
+):
+    """
+    Crea un PedidoMaterial BORRADOR por proveedor con sus PedidoItem.
+
+    Retorna dict con 'pedidos' (IDs creados), 'items', 'propuestas' y
+    'sin_proveedor'. Con dry_run solo calcula.
+    """
+    propuestas, sin_proveedor = calcular_propuestas(
+        dias_historial, dias_seguridad, dias_cobertura, usar_pronostico
+    )
+    resultado = {
+        "pedidos": [],
+        "items": len(propuestas),
+        "propuestas": propuestas,
+        "sin_proveedor": sin_proveedor,
+    }
+    if dry_run or not propuestas:
+        return resultado
+
+    resultado["pedidos"] = crear_pedidos_borrador(
+        propuestas, usuario=usuario, origen="el motor de reorden", batch_size=batch_size
+    )
+    return resultado
+
+
+def crear_pedidos_borrador(propuestas, usuario=None, origen="el motor de reorden", batch_size=1000):
+    """
+    Crea un PedidoMaterial BORRADOR por proveedor con un PedidoItem por
+    propuesta (materia_prima_id, proveedor_id, unidad_id, dias_entrega y
+    cantidad entera). Debe llamarse dentro de una transacción.
+
+    Retorna los IDs de los pedidos creados.
+    """
+    por_proveedor = {}
+    for propuesta in propuestas:
+        por_proveedor.setdefault(propuesta["proveedor_id"], []).append(propuesta)
+
+    # IDs PMnnnnnn reservados con una sola lectura (bloqueando la última fila)
+    ultimo = (
+        PedidoMaterial.objects.select_for_update()
+        .order_by("-pedido_material_id")
+        .values_list("pedido_material_id", flat=True)
+        .first()
+    )
+    siguiente = int(ultimo[2:]) + 1 if ultimo else 1
+
+    hoy = timezone.localdate()
+    pedidos = []
+    items = []
+    for offset, (proveedor_id, grupo) in enumerate(sorted(por_proveedor.items())):
+        pedido = PedidoMaterial(
+            pedido_material_id=f"PM{siguiente + offset:06d}",
+            proveedor_id_id=proveedor_id,
+            usuario_registro=usuario,
+            estado="BORRADOR",
+            fecha_pedido=hoy,
+            fecha_entrega_esperada=hoy + timedelta(days=grupo[0]["dias_entrega"] or 0),
+            observaciones=f"Generado por {origen} ({len(grupo)} materias primas)",
+        )
+        pedidos.append(pedido)
+        items.extend(
+            PedidoItem(
+                pedido=pedido,
+                materia_prima_id=propuesta["materia_prima_id"],
+                id_unidad_medida_id=propuesta["unidad_id"],
+                cantidad_solicitada=propuesta["cantidad"],
+                cantidad_recibida=0,
+            )
+            for propuesta in grupo
+        )
+
+    PedidoMaterial.objects.bulk_create(pedidos, batch_size=batch_size)
+    PedidoItem.objects.bulk_create(items, batch_size=batch_size)
+    return [pedido.pedido_material_id for pedido in pedidos]
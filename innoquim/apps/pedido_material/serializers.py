@@ -32,6 +32,7 @@ class PedidoMaterialSerializer(serializers.ModelSerializer):
             'usuario_registro',
             'nombre_usuario',
             'username',
+            'estado',
             'fecha_pedido',
             'fecha_entrega_esperada',
             'numero_orden_compra',
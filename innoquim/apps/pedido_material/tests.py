@@ -1,3 +1,105 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import PedidoMaterial
+
+
+class ReordenTest(TestCase):
+    """Tests para el motor de reorden"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.inventario.models import Kardex
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.proveedor.models import Proveedor
+        from innoquim.apps.unidad.models import Unidad
+
+        self.unidad = unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = almacen = Almacen.objects.create(nombre="A1", direccion="-")
+        self.proveedor = Proveedor.objects.create(
+            ruc="1790000000001", nombre_empresa="Químicos SA", dias_entrega=10
+        )
+        # Consume 90 kg en 90 días -> 1 kg/día; punto de reorden = 1 x (10 + 7) = 17
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=unidad, categoria_id=categoria,
+            stock=Decimal("12"), stock_maximo=Decimal("60"), proveedor_preferido=self.proveedor,
+        )
+        MateriaPrima.objects.create(
+            nombre="Ácido Bórico", codigo="AC-BOR", unidad_id=unidad, categoria_id=categoria,
+            stock=Decimal("0"), stock_minimo=Decimal("5"),
+        )
+        for tipo, cantidad in (("ENTRADA", 100), ("SALIDA", 90)):
+            Kardex.registrar_movimiento(
+                almacen=almacen, item=self.mp, tipo_movimiento=tipo,
+                motivo="PRODUCCION", cantidad=cantidad, costo_unitario=1,
+            )
+
+    def test_genera_borradores_por_proveedor_sin_duplicar(self):
+        """Test que se cree un borrador por proveedor y no se repita lo ya pedido"""
+        from .reorden import generar_pedidos_reorden
+
+        resultado = generar_pedidos_reorden()
+        self.assertEqual(len(resultado["pedidos"]), 1)
+        self.assertEqual(resultado["sin_proveedor"], ["MP000002"])
+
+        pedido = PedidoMaterial.objects.get(pk=resultado["pedidos"][0])
+        self.assertEqual(pedido.estado, "BORRADOR")
+        self.assertEqual(pedido.proveedor_id, self.proveedor)
+        item = pedido.items.get()
+        self.assertEqual(item.materia_prima, self.mp)
+        self.assertEqual(item.cantidad_solicitada, 48)  # hasta stock_maximo: 60 - 12
+
+        # Lo pedido cuenta como posición: una segunda ejecución no propone nada
+        self.assertEqual(generar_pedidos_reorden()["pedidos"], [])
+
+    def test_solo_lo_registrado_y_no_recibido_esta_en_camino(self):
+        """Test que un borrador no sea material en camino y la recepción cierre el pedido"""
+        from innoquim.apps.recepcion_item.models import RecepcionItem
+        from innoquim.apps.recepcion_material.models import RecepcionMaterial
+        from .reorden import calcular_propuestas, generar_pedidos_reorden, pendiente_por_materia
+
+        pedido = PedidoMaterial.objects.get(pk=generar_pedidos_reorden()["pedidos"][0])
+        item = pedido.items.get()
+        self.assertEqual(pendiente_por_materia(), {})
+
+        # Cancelado, el borrador deja de bloquear nuevas propuestas
+        PedidoMaterial.objects.filter(pk=pedido.pk).update(estado="CANCELADO")
+        self.assertEqual(len(calcular_propuestas()[0]), 1)
+
+        PedidoMaterial.objects.filter(pk=pedido.pk).update(estado="REGISTRADO")
+        self.assertEqual(pendiente_por_materia(), {self.mp.pk: 48})
+        self.assertEqual(calcular_propuestas()[0], [])
+
+        recepcion = RecepcionMaterial.objects.create(almacen=self.almacen, proveedor="Químicos SA")
+        for cantidad in (40, 8):
+            RecepcionItem.objects.create(
+                id_recepcion_material=recepcion, materia_prima=self.mp, cantidad=cantidad,
+                id_unidad=self.unidad, lote=f"L-{cantidad}", precio_compra=1, pedido_item=item,
+            )
+        item.refresh_from_db()
+        pedido.refresh_from_db()
+        self.assertEqual((item.cantidad_recibida, pedido.estado), (48, "RECIBIDO"))
+        self.assertEqual(pendiente_por_materia(), {})
+
+    def test_dry_run_de_formulario(self):
+        """Test que dry_run="false" enviado como formulario sí genere pedidos"""
+        from django.contrib.auth import get_user_model
+        from rest_framework.test import APIClient
+
+        cliente = APIClient()
+        cliente.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="compras@test.com", username="compras", password="x"
+            )
+        )
+        url = "/api/pedidos-materiales/generar-reorden/"
+        respuesta = cliente.post(url, {"dry_run": "true"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(PedidoMaterial.objects.exists())
+
+        respuesta = cliente.post(url, {"dry_run": "false"})
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(PedidoMaterial.objects.count(), 1)
@@ -1,9 +1,17 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from .models import PedidoMaterial
+from .reorden import generar_pedidos_reorden
 from .serializers import PedidoMaterialSerializer
 
 
+def _es_verdadero(valor):
+    """Booleano de JSON o de formulario: "false" / "0" no cuentan como verdadero."""
+    return str(valor).lower() in ("1", "true", "yes")
+
+
 class PedidoMaterialViewSet(viewsets.ModelViewSet):
     """
     ViewSet para operaciones CRUD de PedidoMaterial.
@@ -26,15 +34,55 @@ class PedidoMaterialViewSet(viewsets.ModelViewSet):
         Ejemplos:
         - /api/pedidos-materiales/?proveedor_id=PROV01
         - /api/pedidos-materiales/?fecha_pedido=2025-11-15
+        - /api/pedidos-materiales/?estado=BORRADOR
         """
         queryset = PedidoMaterial.objects.all()
         
         proveedor_id = self.request.query_params.get('proveedor_id', None)
         fecha_pedido = self.request.query_params.get('fecha_pedido', None)
+        estado = self.request.query_params.get('estado', None)
         
         if proveedor_id:
             queryset = queryset.filter(proveedor_id=proveedor_id)
         if fecha_pedido:
             queryset = queryset.filter(fecha_pedido=fecha_pedido)
+        if estado:
+            queryset = queryset.filter(estado=estado)
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+    @action(detail=False, methods=['post'], url_path='generar-reorden')
+    def generar_reorden(self, request):
+        """
+        Genera pedidos BORRADOR (uno por proveedor) para las materias primas
+        bajo su punto de reorden.
+
+        Body (opcional):
+        {
+            "dias_historial": 90,
+            "dias_seguridad": 7,
+            "dias_cobertura": 30,
+            "dry_run": false,
+            "usar_pronostico": false
+        }
+        """
+        try:
+            parametros = {
+                campo: int(request.data.get(campo, defecto))
+                for campo, defecto in (
+                    ('dias_historial', 90), ('dias_seguridad', 7), ('dias_cobertura', 30)
+                )
+            }
+            resultado = generar_pedidos_reorden(
+                dry_run=_es_verdadero(request.data.get('dry_run', False)),
+                usar_pronostico=_es_verdadero(request.data.get('usar_pronostico', False)),
+                usuario=request.user,
+                **parametros,
+            )
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            resultado,
+            status=status.HTTP_201_CREATED if resultado['pedidos'] else status.HTTP_200_OK,
+        )
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacen', '0001_initial'),
+        ('producto', '0002_stock_bajo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='almacen_preferido',
+            field=models.ForeignKey(blank=True, help_text='Almacén por defecto para sus movimientos si el documento no indica uno (opcional)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='productos_preferidos', to='almacen.almacen', verbose_name='Almacén Preferido'),
+        ),
+    ]
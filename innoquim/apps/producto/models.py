@@ -57,6 +57,15 @@ class Producto(models.Model):
         verbose_name="Stock Máximo",
         help_text="Cantidad máxima permitida en inventario (opcional, para control de sobreinventario)"
     )
+    almacen_preferido = models.ForeignKey(
+        "almacen.Almacen",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="productos_preferidos",
+        verbose_name="Almacén Preferido",
+        help_text="Almacén por defecto para sus movimientos si el documento no indica uno (opcional)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -65,6 +74,14 @@ class Producto(models.Model):
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
         ordering = ["-created_at"]
+        indexes = [
+            # Indice parcial: solo los productos en alerta (stock <= stock_minimo)
+            models.Index(
+                fields=["id"],
+                condition=models.Q(stock__lte=models.F("stock_minimo")),
+                name="producto_stock_bajo_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product_code} - {self.name}"
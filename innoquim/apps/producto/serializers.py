@@ -33,6 +33,7 @@ class ProductoSerializer(serializers.ModelSerializer):
             "stock_status",
             "necesita_reabastecimiento",
             "sobre_inventario",
+            "almacen_preferido",
             "created_at",
             "updated_at",
         ]
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import PronosticoDemanda
+
+
+@admin.register(PronosticoDemanda)
+class PronosticoDemandaAdmin(admin.ModelAdmin):
+    list_display = ["producto", "periodo", "fecha", "cantidad", "metodo", "parametro", "error_medio"]
+    list_filter = ["periodo", "metodo"]
+    search_fields = ["producto__name", "producto__product_code"]
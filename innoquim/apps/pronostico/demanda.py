@@ -0,0 +1,286 @@
+"""
+Pronóstico de demanda de productos a partir del historial de OrdenItem.
+
+Para todo el catálogo en una pasada:
+
+1. cargar_series: cantidades de OrdenItem (órdenes no canceladas) agrupadas
+   en la BD por (producto, unidad, fecha de orden) en una consulta,
+   convertidas a la unidad del producto y volcadas con np.add.at a una
+   matriz productos x períodos (día o semana)
+2. Ajuste vectorizado: cada paso de tiempo actualiza todas las series a la
+   vez (una operación NumPy por período, no por producto)
+   - suavizado exponencial simple con varios alfa simultáneos
+   - media móvil de varias ventanas con sumas acumuladas
+   Se elige por serie el modelo con menor error absoluto medio de un
+   período hacia adelante sobre el mismo tramo del historial
+3. Ambos modelos pronostican un nivel constante: se guarda en
+   PronosticoDemanda para los próximos períodos (bulk_create)
+
+Los pronósticos alimentan el motor de reorden (consumo_diario_pronosticado)
+y el MRP (demanda_pronosticada).
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from innoquim.apps.formula.explosion import explotar, formulas_activas
+from innoquim.apps.orden_item.models import OrdenItem
+from innoquim.apps.producto.models import Producto
+from innoquim.apps.unidad.conversion import factor
+
+from .models import PronosticoDemanda
+
+DIAS_PERIODO = {"dia": 1, "semana": 7}
+ALFAS = np.round(np.arange(0.1, 1.0, 0.1), 2)
+VENTANAS = {"dia": (7, 28), "semana": (4, 12)}
+CERO = Decimal("0")
+
+
+def inicio_periodo(fecha, periodo):
+    """Primer día del período (el lunes en semanas)."""
+    if periodo not in DIAS_PERIODO:
+        raise ValueError(f"Período inválido: {periodo}. Use dia o semana")
+    return fecha if periodo == "dia" else fecha - timedelta(days=fecha.weekday())
+
+
+def cargar_series(periodo="semana", historia_dias=3 * 365, hasta=None):
+    """
+    Demanda de todos los productos por período con una consulta agrupada.
+
+    La historia termina en el último período completo antes de hasta (por
+    defecto hoy). Retorna (producto_ids, primero, serie): producto_ids es un
+    arreglo con el ID de cada fila, primero la fecha del primer período y
+    serie una matriz float64 productos x períodos en la unidad de cada
+    producto.
+    """
+    paso = DIAS_PERIODO.get(periodo)
+    fin = inicio_periodo(hasta or timezone.localdate(), periodo)
+    periodos = max(historia_dias // paso, 1)
+    primero = fin - timedelta(days=periodos * paso)
+
+    filas = (
+        OrdenItem.objects.filter(order__order_date__gte=primero, order__order_date__lt=fin)
+        .exclude(order__status="cancelled")
+        .order_by()
+        .values("product_id", "unit_id", "product__unit_id", "order__order_date")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "unit_id", "product__unit_id", "order__order_date", "total")
+    )
+
+    factores = {}
+    productos, columnas, cantidades = [], [], []
+    base = primero.toordinal()
+    for producto_id, unidad_id, unidad_producto, fecha, total in filas:
+        clave = (unidad_id, unidad_producto)
+        if clave not in factores:
+            factores[clave] = float(factor(unidad_id, unidad_producto))
+        productos.append(producto_id)
+        columnas.append((fecha.toordinal() - base) // paso)
+        cantidades.append(total * factores[clave])
+
+    producto_ids, fila = np.unique(np.array(productos, dtype=np.int64), return_inverse=True)
+    serie = np.zeros((len(producto_ids), periodos), dtype=np.float64)
+    np.add.at(serie, (fila, np.array(columnas, dtype=np.int64)), np.array(cantidades))
+    return producto_ids, primero, serie
+
+
+def suavizado_exponencial(serie, alfas=ALFAS, evaluar_desde=1):
+    """
+    Suavizado exponencial simple de todas las series con cada alfa a la vez.
+
+    nivel = nivel + alfa * (demanda - nivel), con el primer período como
+    nivel inicial. Retorna (nivel final, error absoluto medio de un período
+    hacia adelante desde evaluar_desde), ambos de forma (alfas, series).
+    """
+    alfas = np.asarray(alfas, dtype=np.float64)[:, None]
+    nivel = np.repeat(serie[None, :, 0], len(alfas), axis=0)
+    error = np.zeros_like(nivel)
+    for t in range(1, serie.shape[1]):
+        demanda = serie[:, t]
+        if t >= evaluar_desde:
+            error += np.abs(demanda - nivel)
+        nivel += alfas * (demanda - nivel)
+    evaluados = max(serie.shape[1] - max(evaluar_desde, 1), 1)
+    return nivel, error / evaluados
+
+
+def media_movil(serie, ventana, evaluar_desde=None):
+    """
+    Media de los últimos `ventana` períodos de todas las series.
+
+    Retorna (pronóstico, error absoluto medio de un período hacia adelante
+    desde evaluar_desde), ambos de forma (series,).
+    """
+    evaluar_desde = max(evaluar_desde or ventana, ventana)
+    acumulado = np.zeros((serie.shape[0], serie.shape[1] + 1))
+    np.cumsum(serie, axis=1, out=acumulado[:, 1:])
+    # medias[:, k] = media de serie[:, k:k + ventana]: pronóstico del período k + ventana
+    medias = (acumulado[:, ventana:] - acumulado[:, :-ventana]) / ventana
+    errores = np.abs(serie[:, evaluar_desde:] - medias[:, evaluar_desde - ventana:-1])
+    error = errores.mean(axis=1) if errores.shape[1] else np.zeros(serie.shape[0])
+    return medias[:, -1], error
+
+
+def ajustar(serie, periodo="semana"):
+    """
+    Ajusta suavizado y media móvil a todas las series y elige por serie el
+    de menor error. Retorna (pronóstico, métodos, parámetros, errores), un
+    arreglo por serie.
+    """
+    ventanas = [v for v in VENTANAS[periodo] if v < serie.shape[1]]
+    # Todos los modelos se evalúan sobre el mismo tramo del historial
+    evaluar_desde = max(ventanas, default=1)
+
+    nivel, error = suavizado_exponencial(serie, ALFAS, evaluar_desde)
+    pronosticos = [nivel]
+    errores = [error]
+    metodos = ["suavizado"] * len(ALFAS)
+    parametros = list(ALFAS)
+    for ventana in ventanas:
+        pronostico, error = media_movil(serie, ventana, evaluar_desde)
+        pronosticos.append(pronostico[None, :])
+        errores.append(error[None, :])
+        metodos.append("media_movil")
+        parametros.append(ventana)
+
+    pronosticos = np.vstack(pronosticos)
+    errores = np.vstack(errores)
+    # argmin se queda con el primero en empates: el suavizado más suave
+    mejor = np.argmin(errores, axis=0)
+    columnas = np.arange(serie.shape[0])
+    return (
+        np.maximum(pronosticos[mejor, columnas], 0.0),
+        np.array(metodos)[mejor],
+        np.array(parametros, dtype=np.float64)[mejor],
+        errores[mejor, columnas],
+    )
+
+
+def _decimal(valor):
+    return Decimal(f"{valor:.4f}")
+
+
+@transaction.atomic
+def generar_pronosticos(
+    periodo="semana", historia_dias=3 * 365, horizonte=12, hasta=None, batch_size=5000
+):
+    """
+    Recalcula los pronósticos de todos los productos con demanda en el
+    historial y reemplaza los guardados del período.
+
+    Retorna dict con 'periodo', 'desde' (primer período pronosticado),
+    'productos', 'filas' y 'metodos' ({método: número de productos}).
+    Lanza ValueError si el período, la historia o el horizonte no son válidos.
+    """
+    if periodo not in DIAS_PERIODO:
+        raise ValueError(f"Período inválido: {periodo}. Use dia o semana")
+    if historia_dias < DIAS_PERIODO[periodo] * 2:
+        raise ValueError("La historia debe cubrir al menos dos períodos")
+    if horizonte < 1:
+        raise ValueError("El horizonte debe ser de al menos 1 período")
+
+    producto_ids, primero, serie = cargar_series(periodo, historia_dias, hasta)
+    paso = DIAS_PERIODO[periodo]
+    desde = primero + timedelta(days=serie.shape[1] * paso)
+
+    PronosticoDemanda.objects.filter(periodo=periodo).delete()
+    if not len(producto_ids):
+        return {"periodo": periodo, "desde": desde, "productos": 0, "filas": 0, "metodos": {}}
+
+    pronostico, metodos, parametros, errores = ajustar(serie, periodo)
+    fechas = [desde + timedelta(days=h * paso) for h in range(horizonte)]
+    generado_en = timezone.now()
+    filas = [
+        PronosticoDemanda(
+            producto_id=int(producto_id),
+            periodo=periodo,
+            fecha=fecha,
+            cantidad=cantidad,
+            metodo=metodo,
+            parametro=parametro,
+            error_medio=error,
+            generado_en=generado_en,
+        )
+        for producto_id, cantidad, metodo, parametro, error in zip(
+            producto_ids.tolist(),
+            map(_decimal, pronostico.tolist()),
+            metodos.tolist(),
+            (Decimal(f"{p:.2f}") for p in parametros.tolist()),
+            map(_decimal, errores.tolist()),
+        )
+        for fecha in fechas
+    ]
+    PronosticoDemanda.objects.bulk_create(filas, batch_size=batch_size)
+
+    elegidos, conteos = np.unique(metodos, return_counts=True)
+    return {
+        "periodo": periodo,
+        "desde": desde,
+        "productos": len(producto_ids),
+        "filas": len(filas),
+        "metodos": dict(zip(elegidos.tolist(), conteos.tolist())),
+    }
+
+
+def demanda_pronosticada(periodo="semana", desde=None, hasta=None, producto_ids=None):
+    """
+    [(producto_id, fecha, cantidad)] guardados para el período, entre desde
+    y hasta (inclusive), en la unidad del producto.
+    """
+    pronosticos = PronosticoDemanda.objects.filter(periodo=periodo)
+    if desde is not None:
+        pronosticos = pronosticos.filter(fecha__gte=desde)
+    if hasta is not None:
+        pronosticos = pronosticos.filter(fecha__lte=hasta)
+    if producto_ids is not None:
+        pronosticos = pronosticos.filter(producto_id__in=producto_ids)
+    return list(
+        pronosticos.order_by("producto_id", "fecha").values_list("producto_id", "fecha", "cantidad")
+    )
+
+
+def consumo_diario_pronosticado(dias=30, periodo="semana"):
+    """
+    {materia_prima_id: cantidad diaria} que requiere fabricar la demanda
+    pronosticada de los próximos días con las fórmulas activas.
+
+    Se usan los períodos completos que empiezan desde hoy dentro de esos
+    días (al menos uno). Los productos sin fórmula activa no aportan.
+    """
+    paso = DIAS_PERIODO[periodo]
+    desde = inicio_periodo(timezone.localdate(), periodo)
+    if desde < timezone.localdate():
+        desde += timedelta(days=paso)
+    periodos = max(dias // paso, 1)
+    hasta = desde + timedelta(days=(periodos - 1) * paso)
+
+    por_producto = defaultdict(lambda: CERO)
+    for producto_id, _, cantidad in demanda_pronosticada(periodo, desde, hasta):
+        por_producto[producto_id] += cantidad
+    if not por_producto:
+        return {}
+
+    activas = formulas_activas(por_producto)
+    unidades_producto = dict(
+        Producto.objects.filter(pk__in=activas).values_list("pk", "unit_id")
+    )
+    planes = [
+        {
+            "producto_id": producto_id,
+            "cantidad": por_producto[producto_id] / (periodos * paso),
+            "unidad_id": unidades_producto[producto_id],
+            "formula": formula,
+        }
+        for producto_id, formula in activas.items()
+    ]
+    consumo = defaultdict(lambda: CERO)
+    for lineas in explotar(planes):
+        for linea in lineas:
+            consumo[linea["materia_prima"].pk] += linea["cantidad"]
+    return dict(consumo)
@@ -0,0 +1,50 @@
+"""
+Recalcula los pronósticos de demanda de todos los productos a partir del
+historial de órdenes de cliente (pensado como tarea nocturna).
+
+Uso:
+    python manage.py generar_pronosticos
+    python manage.py generar_pronosticos --periodo dia --horizonte 28
+    python manage.py generar_pronosticos --historia-dias 730
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from innoquim.apps.pronostico.demanda import DIAS_PERIODO, generar_pronosticos
+
+
+class Command(BaseCommand):
+    help = "Pronostica la demanda de cada producto con suavizado exponencial o media móvil"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--periodo", choices=list(DIAS_PERIODO), default="semana")
+        parser.add_argument(
+            "--historia-dias", type=int, default=3 * 365, help="Días de historial a usar"
+        )
+        parser.add_argument(
+            "--horizonte", type=int, default=12, help="Períodos a pronosticar"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        try:
+            resultado = generar_pronosticos(
+                periodo=options["periodo"],
+                historia_dias=options["historia_dias"],
+                horizonte=options["horizonte"],
+                batch_size=options["batch_size"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        duracion = time.monotonic() - inicio
+
+        metodos = ", ".join(f"{m}: {n}" for m, n in resultado["metodos"].items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['productos']} productos, {resultado['filas']} pronósticos "
+                f"desde {resultado['desde']} ({metodos or 'sin demanda'}) en {duracion:.2f}s"
+            )
+        )
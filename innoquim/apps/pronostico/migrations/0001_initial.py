@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('producto', '0003_producto_almacen_preferido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoDemanda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(choices=[('dia', 'Día'), ('semana', 'Semana')], max_length=10, verbose_name='Período')),
+                ('fecha', models.DateField(verbose_name='Inicio del Período')),
+                ('cantidad', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Cantidad Pronosticada')),
+                ('metodo', models.CharField(choices=[('suavizado', 'Suavizado exponencial'), ('media_movil', 'Media móvil')], max_length=20, verbose_name='Método')),
+                ('parametro', models.DecimalField(decimal_places=2, help_text='Alfa del suavizado o ventana (en períodos) de la media móvil', max_digits=6, verbose_name='Parámetro')),
+                ('error_medio', models.DecimalField(decimal_places=4, help_text='Error de un período hacia adelante sobre el historial', max_digits=14, verbose_name='Error Absoluto Medio')),
+                ('generado_en', models.DateTimeField(verbose_name='Generado en')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pronosticos', to='producto.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de Demanda',
+                'verbose_name_plural': 'Pronósticos de Demanda',
+                'db_table': 'pronostico_demanda',
+                'ordering': ['producto_id', 'periodo', 'fecha'],
+                'indexes': [models.Index(fields=['periodo', 'fecha'], name='pronostico__periodo_13c239_idx')],
+                'unique_together': {('producto', 'periodo', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import models
+
+
+class PronosticoDemanda(models.Model):
+    """
+    Demanda pronosticada de un producto para un período (día o semana).
+
+    La genera pronostico.demanda.generar_pronosticos a partir del historial
+    de OrdenItem; cada corrida reemplaza los pronósticos de su período.
+    La cantidad está en la unidad del producto.
+    """
+
+    PERIODO_CHOICES = (
+        ("dia", "Día"),
+        ("semana", "Semana"),
+    )
+
+    METODO_CHOICES = (
+        ("suavizado", "Suavizado exponencial"),
+        ("media_movil", "Media móvil"),
+    )
+
+    producto = models.ForeignKey(
+        "producto.Producto",
+        on_delete=models.CASCADE,
+        related_name="pronosticos",
+        verbose_name="Producto",
+    )
+    periodo = models.CharField(max_length=10, choices=PERIODO_CHOICES, verbose_name="Período")
+    fecha = models.DateField(verbose_name="Inicio del Período")
+    cantidad = models.DecimalField(
+        max_digits=14, decimal_places=4, verbose_name="Cantidad Pronosticada"
+    )
+    metodo = models.CharField(max_length=20, choices=METODO_CHOICES, verbose_name="Método")
+    parametro = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        verbose_name="Parámetro",
+        help_text="Alfa del suavizado o ventana (en períodos) de la media móvil",
+    )
+    error_medio = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        verbose_name="Error Absoluto Medio",
+        help_text="Error de un período hacia adelante sobre el historial",
+    )
+    generado_en = models.DateTimeField(verbose_name="Generado en")
+
+    class Meta:
+        db_table = "pronostico_demanda"
+        verbose_name = "Pronóstico de Demanda"
+        verbose_name_plural = "Pronósticos de Demanda"
+        ordering = ["producto_id", "periodo", "fecha"]
+        unique_together = [["producto", "periodo", "fecha"]]
+        indexes = [
+            models.Index(fields=["periodo", "fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} {self.periodo} {self.fecha}: {self.cantidad}"
@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from .models import PronosticoDemanda
+
+
+class PronosticoDemandaSerializer(serializers.ModelSerializer):
+    product_code = serializers.CharField(source="producto.product_code", read_only=True)
+    product_name = serializers.CharField(source="producto.name", read_only=True)
+
+    class Meta:
+        model = PronosticoDemanda
+        fields = [
+            "id",
+            "producto",
+            "product_code",
+            "product_name",
+            "periodo",
+            "fecha",
+            "cantidad",
+            "metodo",
+            "parametro",
+            "error_medio",
+            "generado_en",
+        ]
+        read_only_fields = fields
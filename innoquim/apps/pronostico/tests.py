@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+
+from .demanda import ajustar, consumo_diario_pronosticado, generar_pronosticos, inicio_periodo
+from .models import PronosticoDemanda
+
+
+class PronosticoDemandaTest(TestCase):
+    """Tests para el pronóstico de demanda desde OrdenItem"""
+
+    def setUp(self):
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.cliente.models import Cliente
+        from innoquim.apps.formula.serializers import FormulaSerializer
+        from innoquim.apps.materia_prima.models import MateriaPrima
+        from innoquim.apps.orden_cliente.models import OrdenCliente
+        from innoquim.apps.orden_item.models import OrdenItem
+        from innoquim.apps.producto.models import Producto
+        from innoquim.apps.unidad.models import Unidad
+
+        kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=kg,
+            categoria_id=Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL"),
+        )
+        self.producto = Producto.objects.create(
+            product_code="DET-01", name="Detergente", unit=kg, weight=1,
+            categoria_id=Categoria.objects.create(nombre="Limpieza", tipo="PRODUCT"),
+        )
+        FormulaSerializer().create({
+            "producto": self.producto, "unidad": kg,
+            "componentes": [{"materia_prima": self.mp, "cantidad": Decimal("2"), "unidad": kg}],
+        })
+        cliente = Cliente.objects.create(
+            ruc="1790000000002", nombre_empresa="Cliente SA", email="c@c.com", direccion="-"
+        )
+        # 14 unidades por semana durante 20 semanas (dos órdenes de 7)
+        self.semana = inicio_periodo(timezone.localdate(), "semana")
+        items = []
+        for i in range(40):
+            orden = OrdenCliente.objects.create(
+                client=cliente, order_code=f"OC-{i}", status="completed",
+                order_date=self.semana - timedelta(days=7 * (i // 2 + 1) - i % 2),
+            )
+            items.append(OrdenItem(order=orden, product=self.producto, quantity=7, unit=kg))
+        # Una orden cancelada no cuenta
+        cancelada = OrdenCliente.objects.create(
+            client=cliente, order_code="OC-X", status="cancelled",
+            order_date=self.semana - timedelta(days=3),
+        )
+        items.append(OrdenItem(order=cancelada, product=self.producto, quantity=500, unit=kg))
+        OrdenItem.objects.bulk_create(items)
+
+    def test_ajuste_vectorizado(self):
+        """Test que cada serie elija un modelo y una serie constante se pronostique igual"""
+        serie = np.array([
+            [5.0] * 20,
+            [0.0] * 10 + [10.0] * 10,
+        ])
+        pronostico, metodos, _, errores = ajustar(serie, "semana")
+        self.assertAlmostEqual(pronostico[0], 5.0)
+        self.assertAlmostEqual(errores[0], 0.0)
+        # Tras el cambio de nivel, los últimos períodos dominan
+        self.assertAlmostEqual(pronostico[1], 10.0, places=2)
+        self.assertEqual(len(metodos), 2)
+
+    def test_generar_y_alimentar_reorden(self):
+        """Test que los pronósticos se guarden y se traduzcan a consumo de materia prima"""
+        # Savepoint, series, delete, insert y release
+        with self.assertNumQueries(5):
+            resultado = generar_pronosticos(periodo="semana", historia_dias=140, horizonte=4)
+        self.assertEqual((resultado["productos"], resultado["filas"]), (1, 4))
+        self.assertEqual(resultado["desde"], self.semana)
+
+        pronosticos = list(PronosticoDemanda.objects.filter(producto=self.producto))
+        self.assertEqual([p.fecha for p in pronosticos][0], self.semana)
+        self.assertTrue(all(p.cantidad == Decimal("14.0000") for p in pronosticos))
+
+        # 14 por semana = 2 por día -> 4 kg de ácido por día
+        consumo = consumo_diario_pronosticado(dias=14)
+        self.assertEqual(consumo[self.mp.pk], Decimal("4.0000"))
+
+        # Recalcular reemplaza los pronósticos del período
+        generar_pronosticos(periodo="semana", historia_dias=140, horizonte=2)
+        self.assertEqual(PronosticoDemanda.objects.count(), 2)
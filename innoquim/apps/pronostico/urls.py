@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import PronosticoDemandaViewSet
+
+router = DefaultRouter()
+router.register(r'pronosticos', PronosticoDemandaViewSet, basename='pronostico')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,49 @@
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .demanda import generar_pronosticos
+from .models import PronosticoDemanda
+from .serializers import PronosticoDemandaSerializer
+
+
+class PronosticoDemandaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Pronósticos de demanda por producto.
+
+    Endpoints:
+    - GET  /api/pronosticos/?producto=7&periodo=semana&fecha__gte=2026-03-02
+    - POST /api/pronosticos/generar/ - Recalcula los pronósticos del período
+
+    Body de generar (opcional):
+    {
+        "periodo": "semana",
+        "historia_dias": 1095,
+        "horizonte": 12
+    }
+
+    La corrida nocturna se hace con el comando generar_pronosticos.
+    """
+
+    queryset = PronosticoDemanda.objects.all().select_related("producto")
+    serializer_class = PronosticoDemandaSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = {
+        "producto": ["exact"],
+        "periodo": ["exact"],
+        "metodo": ["exact"],
+        "fecha": ["exact", "gte", "lte"],
+    }
+
+    @action(detail=False, methods=["post"])
+    def generar(self, request):
+        try:
+            resultado = generar_pronosticos(
+                periodo=request.data.get("periodo", "semana"),
+                historia_dias=int(request.data.get("historia_dias", 3 * 365)),
+                horizonte=int(request.data.get("horizonte", 12)),
+            )
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_201_CREATED)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='dias_entrega',
+            field=models.PositiveIntegerField(default=7, help_text='Dias promedio entre el pedido y la recepcion del material', verbose_name='Dias de Entrega'),
+        ),
+    ]
@@ -102,6 +102,13 @@ class Proveedor(models.Model):
         help_text='Que productos o servicios provee (ej: Quimicos industriales, Envases)'
     )
     
+    # Tiempo de entrega (lead time): lo usa el motor de reorden
+    dias_entrega = models.PositiveIntegerField(
+        default=7,
+        verbose_name='Dias de Entrega',
+        help_text='Dias promedio entre el pedido y la recepcion del material'
+    )
+    
     # =================================================================
     # CAMPOS DE AUDITORÍA 
     # =================================================================
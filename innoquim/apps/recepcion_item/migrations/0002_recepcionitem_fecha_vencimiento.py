@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recepcion_item', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recepcionitem',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido_item', '0002_pedidoitem_materia_prima_pedidoitem_pedido_and_more'),
+        ('recepcion_item', '0002_recepcionitem_fecha_vencimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recepcionitem',
+            name='pedido_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recepciones', to='pedido_item.pedidoitem'),
+        ),
+    ]
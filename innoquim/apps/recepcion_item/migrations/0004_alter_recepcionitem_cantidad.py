@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recepcion_item', '0003_recepcionitem_pedido_item'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recepcionitem',
+            name='cantidad',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+    ]
@@ -9,11 +9,12 @@ class RecepcionItem(models.Model):
     id_recepcion_material = models.ForeignKey(
         RecepcionMaterial, on_delete=models.CASCADE, related_name="items_recepcion"
     )
-    cantidad = models.IntegerField()
+    cantidad = models.DecimalField(max_digits=12, decimal_places=2)
     id_unidad = models.ForeignKey(
         Unidad, on_delete=models.CASCADE, related_name="items_recepcion"
     )
     lote = models.CharField(max_length=100)
+    fecha_vencimiento = models.DateField(blank=True, null=True)
     observaciones = models.TextField(blank=True, null=True)
     materia_prima = models.ForeignKey(
         "materia_prima.MateriaPrima",
@@ -21,6 +22,15 @@ class RecepcionItem(models.Model):
         related_name="items_recepcion",
     )  # Añadimos esta relación explícita para saber QUÉ se recibió
     precio_compra = models.DecimalField(max_digits=12, decimal_places=4, default=0.00)
+    # Item del pedido que se recibe (opcional): al crear la recepción se suma
+    # su cantidad a PedidoItem.cantidad_recibida
+    pedido_item = models.ForeignKey(
+        "pedido_item.PedidoItem",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="recepciones",
+    )
 
     def __str__(self):
         return f"Item {self.id} - Lote: {self.lote} - Cantidad: {self.cantidad}"
@@ -15,5 +15,7 @@ class RecepcionItemSerializer(serializers.ModelSerializer):
             'cantidad', 
             'id_unidad',
             'lote', 
-            'observaciones'
+            'fecha_vencimiento',
+            'observaciones',
+            'pedido_item'
         ]
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Importa recepciones de material desde un archivo CSV o JSON.
+
+Uso:
+    python manage.py importar_recepciones facturas.csv
+    python manage.py importar_recepciones facturas.json --dry-run
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from innoquim.apps.recepcion_material.services import (
+    ImportacionError,
+    importar_recepciones,
+    leer_filas,
+    validar_recepciones,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa recepciones de material (CSV/JSON) con Kardex e inventario por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("ruta", help="Archivo .csv o .json")
+        parser.add_argument(
+            "--formato",
+            choices=["csv", "json"],
+            help="Formato del archivo (por defecto según la extensión)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Filas por INSERT"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo validar, sin escribir en la base de datos",
+        )
+
+    def handle(self, *args, **options):
+        ruta = options["ruta"]
+        formato = options["formato"] or os.path.splitext(ruta)[1].lstrip(".")
+
+        try:
+            with open(ruta, "rb") as f:
+                filas = leer_filas(f.read(), formato)
+
+            if options["dry_run"]:
+                datos = validar_recepciones(filas)
+                self.stdout.write(
+                    self.style.SUCCESS(f"{len(datos)} filas válidas (sin cambios)")
+                )
+                return
+
+            resumen = importar_recepciones(filas, batch_size=options["batch_size"])
+
+        except OSError as e:
+            raise CommandError(f"No se pudo leer {ruta}: {e}")
+        except ImportacionError as e:
+            for error in e.errores:
+                self.stderr.write(f"Fila {error['fila']}: {error['errores']}")
+            raise CommandError(str(e))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resumen['recepciones_creadas']} recepciones, "
+                f"{resumen['items_creados']} items, "
+                f"{resumen['movimientos_kardex']} movimientos de Kardex, "
+                f"{resumen['inventarios_actualizados']} inventarios actualizados"
+            )
+        )
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from rest_framework import serializers
 from .models import RecepcionMaterial
 from innoquim.apps.almacen.serializers import AlmacenSerializer
@@ -52,4 +53,34 @@ class RecepcionMaterialSerializer(serializers.ModelSerializer):
         if cantidad and costo_unitario:
             data['total'] = cantidad * costo_unitario
         
-        return data
\ No newline at end of file
+        return data
+
+class RecepcionImportSerializer(serializers.Serializer):
+    """
+    Valida una fila de la importación masiva de recepciones (CSV/JSON).
+    Las FKs se reciben como IDs y se resuelven en bloque en el servicio
+    de importación, no fila por fila.
+    """
+    materia_prima = serializers.CharField(max_length=8)
+    almacen = serializers.IntegerField()
+    cantidad = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal('0.01')
+    )
+    costo_unitario = serializers.DecimalField(
+        max_digits=12, decimal_places=4, min_value=Decimal('0')
+    )
+    proveedor = serializers.CharField(
+        max_length=200, required=False, allow_blank=True, allow_null=True
+    )
+    fecha_de_recepcion = serializers.DateField(required=False, allow_null=True)
+    numero_de_factura = serializers.CharField(
+        max_length=100, required=False, allow_blank=True, allow_null=True
+    )
+    unidad = serializers.IntegerField(required=False, allow_null=True)
+    lote = serializers.CharField(
+        max_length=100, required=False, allow_blank=True, allow_null=True
+    )
+    fecha_vencimiento = serializers.DateField(required=False, allow_null=True)
+    observaciones = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True
+    )
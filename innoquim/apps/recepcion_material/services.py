@@ -0,0 +1,240 @@
+"""
+Importación masiva de recepciones de material (CSV/JSON).
+
+Crear recepciones una por una dispara recepcion_item_saved por cada línea
+(Kardex + lotes + InventarioMaterial), lo que en una factura de miles de
+líneas son decenas de miles de consultas. Aquí el flujo es por lotes:
+
+1. Valida TODAS las filas antes de escribir nada (campos + FKs en bloque)
+2. Inserta una RecepcionMaterial por factura y un RecepcionItem por fila
+   con bulk_create (no dispara signals)
+3. Registra las ENTRADAS en Kardex con Kardex.registrar_movimientos_bulk,
+   en la unidad de cada fila, y cada línea como un lote (FEFO)
+4. Sincroniza InventarioMaterial una sola vez por (item, almacén)
+"""
+
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from innoquim.apps.almacen.models import Almacen
+from innoquim.apps.inventario.lotes import registrar_ingresos
+from innoquim.apps.inventario.models import Kardex
+from innoquim.apps.inventario.signals import actualizar_inventario_material_bulk
+from innoquim.apps.materia_prima.models import MateriaPrima
+from innoquim.apps.recepcion_item.models import RecepcionItem
+from innoquim.apps.unidad.models import Unidad
+
+from .models import RecepcionMaterial
+from .serializers import RecepcionImportSerializer
+
+
+class ImportacionError(ValueError):
+    """Filas inválidas en una importación. errores: [{"fila": n, "errores": {...}}]"""
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__(f"La importación tiene {len(errores)} fila(s) con errores")
+
+
+def leer_filas(contenido, formato, clave="recepciones"):
+    """
+    Convierte el contenido de un archivo CSV o JSON en una lista de dicts.
+
+    JSON acepta una lista de filas o {clave: [...]} (por defecto
+    {"recepciones": [...]}).
+    En CSV las celdas vacías se omiten (campos opcionales).
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode("utf-8-sig")
+
+    formato = (formato or "").lower()
+    if formato == "json":
+        try:
+            datos = json.loads(contenido)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {str(e)}")
+        if isinstance(datos, dict):
+            datos = datos.get(clave)
+        if not isinstance(datos, list):
+            raise ValueError(f'El JSON debe ser una lista de filas o {{"{clave}": [...]}}')
+        return datos
+    if formato == "csv":
+        return [
+            {campo: valor for campo, valor in fila.items() if valor not in ("", None)}
+            for fila in csv.DictReader(io.StringIO(contenido))
+        ]
+    raise ValueError(f"Formato no soportado: {formato}. Use csv o json")
+
+
+def validar_recepciones(filas):
+    """
+    Valida todas las filas y resuelve materia prima, almacén y unidad con
+    una consulta cada uno.
+
+    Retorna la lista de datos validados (con objetos MateriaPrima y Almacen,
+    y unidad_id: la de la fila o la de la materia prima).
+    Lanza ImportacionError con todas las filas inválidas.
+    """
+    if not filas:
+        raise ValueError("No hay filas para importar")
+
+    validador = RecepcionImportSerializer()
+    errores = []
+    validadas = []
+    for numero, fila in enumerate(filas, start=1):
+        try:
+            validadas.append((numero, validador.run_validation(fila)))
+        except serializers.ValidationError as e:
+            errores.append({"fila": numero, "errores": e.detail})
+
+    materias = MateriaPrima.objects.in_bulk({d["materia_prima"] for _, d in validadas})
+    almacenes = Almacen.objects.in_bulk({d["almacen"] for _, d in validadas})
+    unidades = Unidad.objects.in_bulk({d["unidad"] for _, d in validadas if d.get("unidad")})
+
+    datos = []
+    for numero, dato in validadas:
+        errores_fila = {}
+        if dato["materia_prima"] not in materias:
+            errores_fila["materia_prima"] = f"No existe la materia prima {dato['materia_prima']}"
+        if dato["almacen"] not in almacenes:
+            errores_fila["almacen"] = f"No existe el almacén {dato['almacen']}"
+        if dato.get("unidad") and dato["unidad"] not in unidades:
+            errores_fila["unidad"] = f"No existe la unidad {dato['unidad']}"
+        if errores_fila:
+            errores.append({"fila": numero, "errores": errores_fila})
+            continue
+        dato["materia_prima"] = materias[dato["materia_prima"]]
+        dato["almacen"] = almacenes[dato["almacen"]]
+        dato["unidad_id"] = dato.get("unidad") or dato["materia_prima"].unidad_id_id
+        datos.append(dato)
+
+    if errores:
+        raise ImportacionError(sorted(errores, key=lambda e: e["fila"]))
+    return datos
+
+
+def _clave_factura(numero, dato):
+    """Las filas de una misma factura comparten recepción; sin factura, una por fila."""
+    if not dato.get("numero_de_factura"):
+        return ("fila", numero)
+    return (
+        dato["almacen"].pk,
+        dato.get("proveedor"),
+        dato["numero_de_factura"],
+        dato.get("fecha_de_recepcion"),
+    )
+
+
+@transaction.atomic
+def importar_recepciones(filas, usuario=None, batch_size=1000):
+    """
+    Importa recepciones con sus items, Kardex, lotes e inventario. Las filas
+    con el mismo numero_de_factura (y almacén, proveedor y fecha) forman una
+    recepción. Todo o nada: si una fila es inválida no se escribe ninguna.
+
+    Cada fila entra en su unidad (por defecto la de la materia prima) y como
+    el lote indicado, o RM<id de la recepción> si no trae lote.
+
+    Retorna un resumen con las cantidades creadas y los IDs de recepción.
+    """
+    datos = validar_recepciones(filas)
+
+    facturas = {}
+    for numero, dato in enumerate(datos):
+        facturas.setdefault(_clave_factura(numero, dato), []).append(dato)
+
+    recepciones = RecepcionMaterial.objects.bulk_create(
+        [
+            RecepcionMaterial(
+                # Materia prima principal: la de la primera línea
+                materia_prima=lineas[0]["materia_prima"],
+                cantidad=sum(d["cantidad"] for d in lineas),
+                costo_unitario=lineas[0]["costo_unitario"] if len(lineas) == 1 else None,
+                total=sum(d["cantidad"] * d["costo_unitario"] for d in lineas),
+                proveedor=lineas[0].get("proveedor"),
+                almacen=lineas[0]["almacen"],
+                fecha_de_recepcion=lineas[0].get("fecha_de_recepcion"),
+                numero_de_factura=lineas[0].get("numero_de_factura"),
+                observaciones=lineas[0].get("observaciones") if len(lineas) == 1 else None,
+            )
+            for lineas in facturas.values()
+        ],
+        batch_size=batch_size,
+    )
+
+    items = RecepcionItem.objects.bulk_create(
+        [
+            RecepcionItem(
+                id_recepcion_material=recepcion,
+                materia_prima=dato["materia_prima"],
+                cantidad=dato["cantidad"],
+                id_unidad_id=dato["unidad_id"],
+                precio_compra=dato["costo_unitario"],
+                lote=dato.get("lote") or f"RM{recepcion.id}",
+                fecha_vencimiento=dato.get("fecha_vencimiento"),
+                observaciones=dato.get("observaciones"),
+            )
+            for recepcion, lineas in zip(recepciones, facturas.values())
+            for dato in lineas
+        ],
+        batch_size=batch_size,
+    )
+
+    referencias = {
+        item.id: f"RM{item.id_recepcion_material.id}-ITEM{item.id}" for item in items
+    }
+
+    # Mismos movimientos que registra recepcion_item_saved
+    kardex = Kardex.registrar_movimientos_bulk(
+        [
+            {
+                "almacen": item.id_recepcion_material.almacen,
+                "item": item.materia_prima,
+                "tipo_movimiento": "ENTRADA",
+                "motivo": "COMPRA",
+                "cantidad": item.cantidad,
+                "costo_unitario": item.precio_compra,
+                "referencia_id": referencias[item.id],
+                "observaciones": f"Recepción de material - Lote: {item.lote}",
+                "usuario": usuario,
+                "unidad": item.id_unidad_id,
+            }
+            for item in items
+        ],
+        batch_size=batch_size,
+    )
+
+    # Cada línea entra como lote, en la unidad base que dejó el Kardex
+    entrada_de = {registro.referencia_id: registro for registro in kardex}
+    registrar_ingresos(
+        [
+            {
+                "almacen": item.id_recepcion_material.almacen,
+                "item": item.materia_prima,
+                "codigo_lote": item.lote,
+                "cantidad": entrada_de[referencias[item.id]].cantidad,
+                "costo_unitario": entrada_de[referencias[item.id]].costo_unitario,
+                "fecha_vencimiento": item.fecha_vencimiento,
+                "kardex": entrada_de[referencias[item.id]],
+                "referencia_id": referencias[item.id],
+            }
+            for item in items
+        ],
+        batch_size=batch_size,
+    )
+
+    actualizar_inventario_material_bulk(kardex)
+
+    return {
+        "recepciones_creadas": len(recepciones),
+        "items_creados": len(items),
+        "movimientos_kardex": len(kardex),
+        "inventarios_actualizados": len(
+            {(k.object_id, k.almacen_id) for k in kardex}
+        ),
+        "recepciones": [recepcion.id for recepcion in recepciones],
+    }
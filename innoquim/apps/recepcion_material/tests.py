@@ -185,7 +185,9 @@ class KardexIntegrationTest(TestCase):
         self.assertIn("Proveedor Test", kardex.observaciones)
         
         # Verificar que se llamó a actualizar inventario
-        mock_actualizar.assert_called_once_with(self.materia_prima, self.almacen)
+        mock_actualizar.assert_called_once_with(
+            self.materia_prima, self.almacen, kardex.saldo_cantidad
+        )
         
     @patch('innoquim.apps.inventario.signals.actualizar_inventario_material')
     def test_signal_recepcion_item_crea_kardex(self, mock_actualizar):
@@ -223,7 +225,9 @@ class KardexIntegrationTest(TestCase):
         self.assertIn("Recepción de material - Lote: LOT-002", kardex.observaciones)
         
         # Verificar que se llamó a actualizar inventario
-        mock_actualizar.assert_called_once_with(self.materia_prima, self.almacen)
+        mock_actualizar.assert_called_once_with(
+            self.materia_prima, self.almacen, kardex.saldo_cantidad
+        )
 
 
 class RecepcionMaterialAPITest(APITestCase):
@@ -426,4 +430,122 @@ class RecepcionMaterialSerializerTest(TestCase):
         self.assertIn('almacen_detail', serializer.data)
         self.assertIn('materia_prima_detail', serializer.data)
         self.assertEqual(serializer.data['almacen_detail']['nombre'], 'Almacén Serializer')
-        self.assertEqual(serializer.data['materia_prima_detail']['nombre'], 'Nitrato de Potasio')
\ No newline at end of file
+        self.assertEqual(serializer.data['materia_prima_detail']['nombre'], 'Nitrato de Potasio')
+
+class RecepcionImportacionTest(APITestCase):
+    """Tests para la importación masiva de recepciones"""
+
+    def setUp(self):
+        from innoquim.apps.categoria.models import Categoria
+
+        self.user = Usuario.objects.create_user(
+            email='import@example.com',
+            username='importuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.unidad = Unidad.objects.create(nombre="KG", simbolo="kg", factor_conversion=1.0)
+        categoria = Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL")
+        self.almacen = Almacen.objects.create(nombre="Almacén Import", direccion="Test")
+        self.mp1 = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=self.unidad, categoria_id=categoria
+        )
+        self.mp2 = MateriaPrima.objects.create(
+            nombre="Soda Cáustica", codigo="SO-CAU", unidad_id=self.unidad, categoria_id=categoria
+        )
+
+    def test_importar_json_kardex_e_inventario(self):
+        """Test importación: saldos encadenados por item y un inventario por item/almacén"""
+        filas = [
+            {'materia_prima': self.mp1.pk, 'almacen': self.almacen.id,
+             'cantidad': '10', 'costo_unitario': '2.00', 'numero_de_factura': 'F-1'},
+            {'materia_prima': self.mp2.pk, 'almacen': self.almacen.id,
+             'cantidad': '5', 'costo_unitario': '1.00'},
+            {'materia_prima': self.mp1.pk, 'almacen': self.almacen.id,
+             'cantidad': '30', 'costo_unitario': '4.00'},
+        ]
+        response = self.client.post('/api/recepciones/importar/', filas, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['recepciones_creadas'], 3)
+        self.assertEqual(response.data['inventarios_actualizados'], 2)
+
+        saldo = Kardex.obtener_saldo_actual(self.almacen, self.mp1)
+        self.assertEqual(saldo['cantidad'], Decimal('40.00'))
+        self.assertEqual(saldo['costo_promedio'], Decimal('3.5000'))  # (20 + 120) / 40
+        self.mp1.refresh_from_db()
+        self.assertEqual(self.mp1.costo_promedio, Decimal('3.5000'))
+
+        inventario = InventarioMaterial.objects.get(object_id=self.mp1.pk, almacen_id=self.almacen)
+        self.assertEqual(inventario.cantidad, Decimal('40.00'))
+        self.assertEqual(inventario.unidad_id, self.unidad)
+        self.assertEqual(InventarioMaterial.objects.count(), 2)
+
+    def test_importar_factura_con_unidad_y_lotes(self):
+        """Test que las filas de una factura sean items de una recepción y entren como lotes"""
+        from innoquim.apps.inventario.models import LoteInventario
+        from innoquim.apps.unidad.conversion import limpiar_cache
+
+        limpiar_cache()
+        gramo = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion=Decimal("0.001"))
+        filas = [
+            {'materia_prima': self.mp1.pk, 'almacen': self.almacen.id, 'cantidad': '2500',
+             'costo_unitario': '0.0040', 'unidad': gramo.pk, 'numero_de_factura': 'F-9',
+             'lote': 'AC-77', 'fecha_vencimiento': '2027-03-01'},
+            {'materia_prima': self.mp2.pk, 'almacen': self.almacen.id, 'cantidad': '5',
+             'costo_unitario': '1.00', 'numero_de_factura': 'F-9'},
+        ]
+        response = self.client.post('/api/recepciones/importar/', filas, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            (response.data['recepciones_creadas'], response.data['items_creados']), (1, 2)
+        )
+
+        recepcion = RecepcionMaterial.objects.get()
+        self.assertEqual(recepcion.items_recepcion.count(), 2)
+        # La línea en gramos entra al Kardex y al lote en la unidad base
+        saldo = Kardex.obtener_saldo_actual(self.almacen, self.mp1)
+        self.assertEqual(saldo['cantidad'], Decimal('2.50'))
+        self.assertEqual(saldo['costo_promedio'], Decimal('4.0000'))
+        lote = LoteInventario.objects.get(object_id=self.mp1.pk)
+        self.assertEqual(
+            (lote.codigo_lote, lote.cantidad_disponible, str(lote.fecha_vencimiento)),
+            ('AC-77', Decimal('2.50'), '2027-03-01'),
+        )
+        # Sin lote en la fila, el lote es la recepción
+        self.assertEqual(
+            LoteInventario.objects.get(object_id=self.mp2.pk).codigo_lote, f"RM{recepcion.id}"
+        )
+
+    def test_importar_csv_con_errores_no_escribe(self):
+        """Test que una fila inválida rechaza toda la importación"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        contenido = (
+            "materia_prima,almacen,cantidad,costo_unitario\n"
+            f"{self.mp1.pk},{self.almacen.id},10,2\n"
+            f"MP999999,{self.almacen.id},10,2\n"
+            f"{self.mp2.pk},{self.almacen.id},-1,2\n"
+        ).encode()
+        archivo = SimpleUploadedFile('recepciones.csv', contenido, content_type='text/csv')
+        response = self.client.post('/api/recepciones/importar/', {'archivo': archivo})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['fila'] for e in response.data['errores']], [2, 3])
+        self.assertEqual(RecepcionMaterial.objects.count(), 0)
+        self.assertEqual(Kardex.objects.count(), 0)
+
+    def test_recepcion_directa_upsert_inventario(self):
+        """Test que recepciones sucesivas actualicen el mismo InventarioMaterial"""
+        for cantidad in ("10", "15"):
+            RecepcionMaterial.objects.create(
+                materia_prima=self.mp1,
+                cantidad=Decimal(cantidad),
+                costo_unitario=Decimal("2"),
+                almacen=self.almacen,
+            )
+
+        inventario = InventarioMaterial.objects.get(object_id=self.mp1.pk, almacen_id=self.almacen)
+        self.assertEqual(InventarioMaterial.objects.count(), 1)
+        self.assertEqual(inventario.inventario_material_id, "IM000001")
+        self.assertEqual(inventario.cantidad, Decimal("25.00"))
@@ -1,9 +1,14 @@
-from rest_framework import viewsets
+import os
+
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import RecepcionMaterial
 from .serializers import RecepcionMaterialSerializer
+from .services import ImportacionError, importar_recepciones, leer_filas
 
 class RecepcionMaterialViewSet(viewsets.ModelViewSet):
     """
@@ -71,3 +76,46 @@ class RecepcionMaterialViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(total__lte=total_max)
             
         return queryset
+
+    @action(detail=False, methods=['post'], url_path='importar')
+    def importar(self, request):
+        """
+        Importación masiva de recepciones.
+        POST /api/recepciones/importar/
+
+        Acepta:
+        - multipart con 'archivo' (.csv o .json)
+        - JSON: lista de filas o {"recepciones": [...]}
+
+        Columnas: materia_prima, almacen, cantidad, costo_unitario y
+        opcionalmente proveedor, fecha_de_recepcion, numero_de_factura,
+        unidad, lote, fecha_vencimiento, observaciones. Las filas de una
+        misma factura forman una recepción con un item por fila.
+        """
+        archivo = request.FILES.get('archivo')
+        try:
+            if archivo:
+                formato = os.path.splitext(archivo.name)[1].lstrip('.')
+                filas = leer_filas(archivo.read(), formato)
+            elif isinstance(request.data, list):
+                filas = request.data
+            else:
+                filas = request.data.get('recepciones')
+                if not isinstance(filas, list):
+                    raise ValueError(
+                        "Envíe un archivo 'archivo' (.csv/.json) o una lista 'recepciones'"
+                    )
+
+            resumen = importar_recepciones(filas, usuario=request.user)
+            return Response(resumen, status=status.HTTP_201_CREATED)
+
+        except ImportacionError as e:
+            return Response(
+                {"error": str(e), "errores": e.errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UnidadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'innoquim.apps.unidad'
+
+    def ready(self):
+        """Registrar signals al iniciar la app."""
+        import innoquim.apps.unidad.signals
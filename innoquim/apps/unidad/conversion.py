@@ -0,0 +1,133 @@
+"""
+Conversión de cantidades entre unidades con Unidad.factor_conversion.
+
+factor_conversion es la equivalencia de cada unidad en la unidad base
+(ej: g = 0.001 si la base es kg), así que pasar de origen a destino es
+multiplicar por factor(origen) / factor(destino).
+
+Las unidades son pocas y casi nunca cambian: los factores se cargan una vez
+por proceso (una consulta) y las conversiones no consultan la BD, ni por
+línea ni por lote de líneas. Guardar o eliminar una Unidad invalida la
+caché en todos los procesos (ver signals.py e innoquim/cache_proceso.py);
+un ID desconocido recarga la tabla una vez.
+
+El Kardex guarda cantidades y costos en la unidad base de cada item
+(MateriaPrima.unidad_id, Producto.unit): registrar_movimiento y
+registrar_movimientos_bulk normalizan con normalizar_movimientos los
+movimientos que indican su 'unidad'.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from innoquim.cache_proceso import CacheProceso
+
+from .models import Unidad
+
+UNO = Decimal("1")
+DOS_DECIMALES = Decimal("0.01")
+CUATRO_DECIMALES = Decimal("0.0001")
+
+
+def _cargar():
+    # Factores por unidad y, aparte, los pares (origen, destino) ya calculados
+    return dict(Unidad.objects.values_list("pk", "factor_conversion")), {}
+
+
+_cache = CacheProceso("unidades", _cargar)
+
+
+def factores():
+    """{id: factor_conversion} de todas las unidades, cargado una vez por proceso."""
+    return _cache.obtener()[0]
+
+
+def limpiar_cache():
+    """Vacía la caché de este proceso."""
+    _cache.limpiar()
+
+
+def invalidar_cache():
+    """Vacía la caché de este proceso y la de los demás al confirmar."""
+    _cache.invalidar()
+
+
+def _factor_de(unidad_id):
+    tabla = factores()
+    if unidad_id not in tabla:
+        # Creada en otro proceso después de cargar la caché
+        limpiar_cache()
+        tabla = factores()
+        if unidad_id not in tabla:
+            raise ValueError(f"No existe la unidad {unidad_id}")
+    return tabla[unidad_id]
+
+
+def factor(origen_id, destino_id):
+    """
+    Factor para pasar una cantidad de la unidad origen a la destino.
+    Lanza ValueError si alguna no existe o el destino no tiene factor.
+    """
+    if origen_id == destino_id or origen_id is None or destino_id is None:
+        return UNO
+    par = (origen_id, destino_id)
+    pares = _cache.obtener()[1]
+    if par not in pares:
+        destino = _factor_de(destino_id)
+        if not destino:
+            raise ValueError(f"La unidad {destino_id} no tiene factor de conversión")
+        valor = Decimal(_factor_de(origen_id)) / Decimal(destino)
+        # _factor_de puede haber recargado la caché: guardar en la vigente
+        _cache.obtener()[1][par] = valor
+        return valor
+    return pares[par]
+
+
+def convertir(cantidad, origen_id, destino_id):
+    """Cantidad de la unidad origen expresada en la destino."""
+    return Decimal(str(cantidad)) * factor(origen_id, destino_id)
+
+
+def unidad_base_id(item):
+    """ID de la unidad en que el Kardex lleva el item (None si no tiene)."""
+    if hasattr(item, "unidad_id_id"):
+        return item.unidad_id_id
+    return getattr(item, "unit_id", None)
+
+
+def _id(unidad):
+    return getattr(unidad, "pk", unidad)
+
+
+def normalizar_movimientos(movimientos):
+    """
+    Lleva a la unidad base de su item la cantidad y el costo unitario de
+    los movimientos con clave 'unidad' (Unidad o ID), redondeados a la
+    precisión del Kardex. Retorna una lista nueva de dicts sin 'unidad';
+    los demás se devuelven tal cual.
+
+    Lanza ValueError si una cantidad distinta de cero queda en 0 al
+    redondearla en la unidad base (ej: 4 g de un item en kg): el
+    movimiento no se registraría.
+    """
+    normalizados = []
+    for movimiento in movimientos:
+        if movimiento.get("unidad") is None:
+            normalizados.append(movimiento)
+            continue
+        movimiento = dict(movimiento)
+        a_base = factor(_id(movimiento.pop("unidad")), unidad_base_id(movimiento["item"]))
+        if a_base != UNO:
+            cantidad = Decimal(str(movimiento["cantidad"]))
+            movimiento["cantidad"] = (cantidad * a_base).quantize(
+                DOS_DECIMALES, rounding=ROUND_HALF_UP
+            )
+            if cantidad and not movimiento["cantidad"]:
+                raise ValueError(
+                    f"La cantidad {cantidad} se redondea a 0 en la unidad base "
+                    f"de {movimiento['item']}"
+                )
+            movimiento["costo_unitario"] = (
+                Decimal(str(movimiento["costo_unitario"])) / a_base
+            ).quantize(CUATRO_DECIMALES, rounding=ROUND_HALF_UP)
+        normalizados.append(movimiento)
+    return normalizados
@@ -0,0 +1,15 @@
+"""
+Signals de Unidad: mantienen al día la caché de factores de conversión.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .conversion import invalidar_cache
+from .models import Unidad
+
+
+@receiver(post_save, sender=Unidad)
+@receiver(post_delete, sender=Unidad)
+def unidad_modificada(sender, **kwargs):
+    invalidar_cache()
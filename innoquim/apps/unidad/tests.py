@@ -1,3 +1,75 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from . import conversion
+from .models import Unidad
+
+
+class ConversionUnidadTest(TestCase):
+    """Tests para la normalización de movimientos a la unidad base del item"""
+
+    def setUp(self):
+        from innoquim.apps.almacen.models import Almacen
+        from innoquim.apps.categoria.models import Categoria
+        from innoquim.apps.materia_prima.models import MateriaPrima
+
+        conversion.limpiar_cache()
+        self.kg = Unidad.objects.create(nombre="Kilogramo", simbolo="kg", factor_conversion=1)
+        self.g = Unidad.objects.create(nombre="Gramo", simbolo="g", factor_conversion=Decimal("0.001"))
+        self.almacen = Almacen.objects.create(nombre="Almacén Principal", direccion="Planta 1")
+        self.mp = MateriaPrima.objects.create(
+            nombre="Ácido Cítrico", codigo="AC-CIT", unidad_id=self.kg,
+            categoria_id=Categoria.objects.create(nombre="Ácidos", tipo="RAW_MATERIAL"),
+        )
+
+    def test_registrar_en_otra_unidad(self):
+        """Test que 500 g de un item en kg se registren como 0.5 kg al costo por kg"""
+        from innoquim.apps.inventario.models import Kardex
+
+        kardex = Kardex.registrar_movimiento(
+            almacen=self.almacen, item=self.mp, tipo_movimiento="ENTRADA", motivo="COMPRA",
+            cantidad=Decimal("500"), costo_unitario=Decimal("0.002"), unidad=self.g,
+        )
+        self.assertEqual(kardex.cantidad, Decimal("0.50"))
+        self.assertEqual(kardex.costo_unitario, Decimal("2.0000"))
+        self.assertEqual(kardex.saldo_costo_total, Decimal("1.00"))
+
+    def test_normalizar_sin_consultas_por_linea(self):
+        """Test que un lote de líneas se convierta con una sola carga de factores"""
+        movimientos = [
+            {"item": self.mp, "unidad": self.g.pk, "cantidad": 250, "costo_unitario": Decimal("0.004")}
+            for _ in range(100)
+        ] + [{"item": self.mp, "cantidad": 1, "costo_unitario": 1}]
+        with self.assertNumQueries(1):
+            normalizados = conversion.normalizar_movimientos(movimientos)
+        self.assertEqual(normalizados[0]["cantidad"], Decimal("0.25"))
+        self.assertEqual(normalizados[0]["costo_unitario"], Decimal("4.0000"))
+        self.assertNotIn("unidad", normalizados[0])
+        self.assertIs(normalizados[-1], movimientos[-1])
+        with self.assertNumQueries(0):
+            conversion.normalizar_movimientos(movimientos)
+
+    def test_cache_se_invalida_al_cambiar_unidad(self):
+        """Test que editar el factor de una unidad limpie la caché"""
+        self.assertEqual(conversion.factor(self.g.pk, self.kg.pk), Decimal("0.001"))
+        self.g.factor_conversion = Decimal("0.01")
+        self.g.save()
+        self.assertEqual(conversion.factor(self.g.pk, self.kg.pk), Decimal("0.01"))
+        with self.assertRaises(ValueError):
+            conversion.factor(9999, self.kg.pk)
+
+    def test_cantidad_que_se_redondea_a_cero(self):
+        """Test que 4 g de un item en kg se rechacen en vez de registrarse como 0 kg"""
+        from innoquim.apps.inventario.models import Kardex
+
+        with self.assertRaises(ValueError):
+            Kardex.registrar_movimiento(
+                almacen=self.almacen, item=self.mp, tipo_movimiento="ENTRADA", motivo="COMPRA",
+                cantidad=Decimal("4"), costo_unitario=Decimal("0.002"), unidad=self.g,
+            )
+        self.assertFalse(Kardex.objects.exists())
+        normalizado = conversion.normalizar_movimientos(
+            [{"item": self.mp, "unidad": self.g, "cantidad": 5, "costo_unitario": 1}]
+        )
+        self.assertEqual(normalizado[0]["cantidad"], Decimal("0.01"))
@@ -2,23 +2,78 @@
 API de health check para monitorear la salud del sistema
 """
 
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-from rest_framework import status
+from asgiref.sync import sync_to_async
 from django.db import connections
 from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+import asyncio
 import logging
 
+from innoquim.db_failover import probe_connection_params
+
 logger = logging.getLogger(__name__)
 
+# Tiempo maximo por sondeo: una BD o Redis lentos no deben retener el request
+PROBE_TIMEOUT = 3
 
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def health_check(request):
+
+async def _probe_database(alias):
+    """
+    Ejecuta SELECT 1 sobre alias. PostgreSQL se sondea con una conexion
+    async propia; otros motores (SQLite en tests) usan la conexion de Django.
+    """
+    settings_dict = connections.databases[alias]
+    if "postgresql" in settings_dict["ENGINE"]:
+        import psycopg
+
+        conn = await psycopg.AsyncConnection.connect(
+            **probe_connection_params(settings_dict)
+        )
+        try:
+            await conn.execute("SELECT 1")
+        finally:
+            await conn.close()
+    else:
+        def select_one():
+            connection = connections[alias]
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+        await sync_to_async(select_one)()
+    return settings_dict.get("HOST")
+
+
+async def _probe_redis():
+    import redis.asyncio as aioredis
+
+    redis_location = settings.CACHES.get('default', {}).get('LOCATION', 'redis://redis:6379')
+    if isinstance(redis_location, tuple):
+        redis_url = f"redis://{redis_location[0]}:{redis_location[1]}"
+    else:
+        redis_url = redis_location if redis_location.startswith('redis') else f"redis://{redis_location}"
+    r = aioredis.from_url(redis_url, socket_connect_timeout=2)
+    try:
+        await r.ping()
+    finally:
+        await r.aclose()
+
+
+async def _with_timeout(coro):
+    return await asyncio.wait_for(coro, timeout=PROBE_TIMEOUT)
+
+
+@require_GET
+async def health_check(request):
     """
     Endpoint para verificar la salud del backend y las BDs
     GET /api/health/
+
+    Los sondeos de la BD principal, la replica y Redis se ejecutan en
+    paralelo: el tiempo de respuesta es el del sondeo mas lento, acotado
+    por PROBE_TIMEOUT.
     """
     health_status = {
         "status": "healthy",
@@ -27,19 +82,16 @@ def health_check(request):
         "redis": "unknown",
     }
 
-    # Verificar BD Principal
-    try:
-        connection = connections["default"]
-        # Ensure connection is open
-        connection.ensure_connection()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        health_status["databases"]["primary"] = {
-            "status": "connected",
-            "host": connection.settings_dict.get("HOST"),
-        }
-    except Exception as e:
-        error_msg = str(e)
+    has_replica = "replica" in settings.DATABASES
+    probes = [_with_timeout(_probe_database("default")), _with_timeout(_probe_redis())]
+    if has_replica:
+        probes.append(_with_timeout(_probe_database("replica")))
+    results = await asyncio.gather(*probes, return_exceptions=True)
+    primary, redis_result = results[0], results[1]
+
+    # BD Principal
+    if isinstance(primary, BaseException):
+        error_msg = str(primary) or type(primary).__name__
         # No loguear como error si es solo un problema de DNS al iniciar
         if "Name or service not known" in error_msg or "No address associated" in error_msg:
             logger.warning(f"⚠️ BD Principal no disponible (DNS): {error_msg}")
@@ -50,41 +102,38 @@ def health_check(request):
             "error": error_msg,
         }
         health_status["status"] = "degraded"
+    else:
+        health_status["databases"]["primary"] = {
+            "status": "connected",
+            "host": primary,
+        }
 
-    # Verificar BD Replica
-    if "replica" in settings.DATABASES:
-        try:
-            connection = connections["replica"]
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            health_status["databases"]["replica"] = {
-                "status": "connected",
-                "host": connection.settings_dict.get("HOST"),
-                "readonly": True,
-            }
-        except Exception as e:
+    # BD Replica
+    if has_replica:
+        replica = results[2]
+        if isinstance(replica, BaseException):
+            error_msg = str(replica) or type(replica).__name__
             health_status["databases"]["replica"] = {
                 "status": "disconnected",
-                "error": str(e),
+                "error": error_msg,
             }
             if health_status["databases"]["primary"]["status"] == "disconnected":
                 health_status["status"] = "unhealthy"
-                logger.error(f"❌ BD Replica también no disponible: {str(e)}")
-
-    # Verificar Redis
-    try:
-        import redis
-        redis_location = settings.CACHES.get('default', {}).get('LOCATION', 'redis://redis:6379')
-        if isinstance(redis_location, tuple):
-            redis_url = f"redis://{redis_location[0]}:{redis_location[1]}"
+                logger.error(f"❌ BD Replica también no disponible: {error_msg}")
         else:
-            redis_url = redis_location if redis_location.startswith('redis') else f"redis://{redis_location}"
-        r = redis.from_url(redis_url, socket_connect_timeout=2)
-        r.ping()
+            health_status["databases"]["replica"] = {
+                "status": "connected",
+                "host": replica,
+                "readonly": True,
+            }
+
+    # Redis
+    if isinstance(redis_result, BaseException):
+        error_msg = str(redis_result) or type(redis_result).__name__
+        health_status["redis"] = f"disconnected: {error_msg}"
+        logger.warning(f"⚠️ Redis no disponible: {error_msg}")
+    else:
         health_status["redis"] = "connected"
-    except Exception as e:
-        health_status["redis"] = f"disconnected: {str(e)}"
-        logger.warning(f"⚠️ Redis no disponible: {str(e)}")
 
     # Retornar con código de estado apropiado
     http_status = (
@@ -93,4 +142,4 @@ def health_check(request):
         else status.HTTP_503_SERVICE_UNAVAILABLE
     )
 
-    return Response(health_status, status=http_status)
+    return JsonResponse(health_status, status=http_status)
@@ -1,4 +1,8 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -53,3 +57,163 @@ class UsuarioAPITest(APITestCase):
         url = reverse("usuario-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                        "LOCATION": "redis://127.0.0.1:1"}}
+)
+class HealthCheckTest(TestCase):
+    def test_health_check_sondeos_en_paralelo(self):
+        """Test que el health check async reporta BD y Redis sin autenticacion"""
+        response = self.client.get("/api/health/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["status"], "healthy")
+        self.assertEqual(data["databases"]["primary"]["status"], "connected")
+        self.assertTrue(data["redis"].startswith("disconnected"))
+
+    def test_health_check_solo_get(self):
+        response = self.client.post("/api/health/")
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@override_settings(
+    DATABASE_READ_REPLICA=True,
+    DATABASE_REPLICA_MAX_LAG=5,
+    DATABASE_REPLICA_PIN_SECONDS=15,
+    DATABASE_REPLICA_READ_PATHS=[r"^/api/kardex/$"],
+)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Tests para el enrutamiento de lecturas a la replica (sin transacción abierta)"""
+
+    def setUp(self):
+        from innoquim.db_failover import DatabaseFailoverRouter
+
+        self.router = DatabaseFailoverRouter()
+        self.factory = RequestFactory()
+        self.lag = 1
+        for parche in (
+            patch.dict(connections.databases, {"replica": connections.databases["default"]}),
+            patch.object(DatabaseFailoverRouter, "_is_master_available", return_value=True),
+            patch.object(DatabaseFailoverRouter, "_get_replica_lag", lambda: self.lag),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def atender(self, request, escribir=False):
+        """Pasa el request por el middleware y retorna (alias de lectura, respuesta)"""
+        from innoquim.db_failover import ReplicaRoutingMiddleware
+
+        alias = []
+
+        def vista(request):
+            if escribir:
+                self.router.db_for_write(None)
+            alias.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(vista)(request)
+        return alias[0], response
+
+    def test_lecturas_seguras_van_a_la_replica(self):
+        """Test que solo un GET de una ruta listada, con lag bajo, lea de la replica"""
+        from innoquim.db_failover import PIN_PRIMARY_COOKIE
+
+        alias, response = self.atender(self.factory.get("/api/kardex/"))
+        self.assertEqual(alias, "replica")
+        self.assertNotIn(PIN_PRIMARY_COOKIE, response.cookies)
+
+        self.assertEqual(self.atender(self.factory.get("/api/ordenes/"))[0], "default")
+        self.lag = 30
+        self.assertEqual(self.atender(self.factory.get("/api/kardex/"))[0], "default")
+        self.lag = None
+        self.assertEqual(self.atender(self.factory.get("/api/kardex/"))[0], "default")
+
+        # Fuera de un request no hay estado: siempre master
+        self.lag = 1
+        self.assertEqual(self.router.db_for_read(None), "default")
+
+    def test_escritura_pega_el_cliente_al_master(self):
+        """Test que tras escribir se lea del master y el cliente quede pegado por cookie"""
+        from innoquim.db_failover import PIN_PRIMARY_COOKIE
+
+        alias, response = self.atender(self.factory.get("/api/kardex/"), escribir=True)
+        self.assertEqual(alias, "default")
+        self.assertEqual(response.cookies[PIN_PRIMARY_COOKIE]["max-age"], 15)
+
+        alias, response = self.atender(self.factory.post("/api/kardex/"))
+        self.assertEqual(alias, "default")
+        self.assertIn(PIN_PRIMARY_COOKIE, response.cookies)
+
+        request = self.factory.get("/api/kardex/")
+        request.COOKIES[PIN_PRIMARY_COOKIE] = "1"
+        self.assertEqual(self.atender(request)[0], "default")
+
+    def test_master_caido_lee_de_la_replica(self):
+        """Test que con el master caído cualquier lectura use la replica disponible"""
+        from innoquim.db_failover import DatabaseFailoverRouter
+
+        with patch.object(DatabaseFailoverRouter, "_is_master_available", return_value=False), \
+                patch.object(DatabaseFailoverRouter, "_is_replica_available", return_value=True), \
+                self.assertLogs("innoquim.db_failover", "WARNING"):
+            self.assertEqual(self.atender(self.factory.post("/api/ordenes/"))[0], "replica")
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    """Tests para el circuit breaker del monitor de salud de BD"""
+
+    def test_abre_prueba_y_duplica_el_backoff(self):
+        """Test closed -> open tras N fallos, half_open al vencer y backoff doble hasta el máximo"""
+        from innoquim.db_failover import CircuitBreaker
+
+        breaker = CircuitBreaker("default", failure_threshold=2, base_backoff=2, max_backoff=5)
+        with self.assertLogs("innoquim.db_failover", "ERROR"):
+            breaker.record_failure(0, "timeout")
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertTrue(breaker.available)
+            breaker.record_failure(1, "timeout")
+        self.assertEqual((breaker.state, breaker.open_until), (CircuitBreaker.OPEN, 3))
+        self.assertFalse(breaker.available)
+
+        # Abierto: no se sondea hasta que vence el backoff
+        self.assertFalse(breaker.should_probe(2))
+        self.assertTrue(breaker.should_probe(3))
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.available)
+
+        # El sondeo de prueba falla: el backoff se duplica, con tope
+        with self.assertLogs("innoquim.db_failover", "ERROR"):
+            breaker.record_failure(3, "timeout")
+            self.assertEqual((breaker.backoff, breaker.open_until), (4, 7))
+            self.assertTrue(breaker.should_probe(7))
+            breaker.record_failure(7, "timeout")
+        self.assertEqual((breaker.backoff, breaker.open_until), (5, 12))
+
+        self.assertTrue(breaker.should_probe(12))
+        with self.assertLogs("innoquim.db_failover", "INFO"):
+            breaker.record_success(12)
+        self.assertEqual(
+            (breaker.state, breaker.failures, breaker.backoff, breaker.last_error),
+            (CircuitBreaker.CLOSED, 0, 2, None),
+        )
+
+    def test_monitor_sondea_y_mide_lag_de_la_replica(self):
+        """Test que el monitor guarde el lag y lo descarte cuando la replica falla"""
+        from innoquim.db_failover import CircuitBreaker, DatabaseHealthMonitor
+
+        monitor = DatabaseHealthMonitor()
+        breaker = CircuitBreaker("replica", failure_threshold=1, base_backoff=60, max_backoff=60)
+        monitor._breakers = {"replica": breaker}
+
+        with patch.object(monitor, "_probe", side_effect=[0.5, OSError("sin conexión")]) as probe:
+            monitor.probe_all()
+            self.assertEqual(monitor._replica_lag, 0.5)
+            with self.assertLogs("innoquim.db_failover", "ERROR"):
+                monitor.probe_all()
+            self.assertIsNone(monitor._replica_lag)
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            self.assertEqual(breaker.last_error, "OSError: sin conexión")
+            # Con el circuito abierto no se vuelve a sondear
+            monitor.probe_all()
+        self.assertEqual(probe.call_count, 2)
@@ -0,0 +1,93 @@
+"""
+Cachés en memoria del proceso para catálogos pequeños que casi nunca
+cambian (almacenes, factores de unidad), invalidadas en todos los procesos.
+
+Cada caché guarda sus datos en el proceso y una versión en la caché
+compartida de Django (Redis). Quien modifica el catálogo llama a
+invalidar(): vacía su copia y, al confirmar la transacción, incrementa la
+versión compartida. Los demás procesos leen esa versión como mucho cada
+`revisar_cada` segundos y recargan si cambió, así que un cambio hecho en un
+worker llega al resto en segundos sin consultar la BD en cada acceso.
+
+Si la caché compartida no está disponible, los datos se recargan cuando
+tienen más de `expira` segundos.
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class CacheProceso:
+    """
+    Datos cargados con `cargar()` una vez por proceso y versionados en la
+    caché compartida bajo `clave`.
+    """
+
+    def __init__(self, clave, cargar, revisar_cada=5, expira=60):
+        self.clave = f"cache_proceso:{clave}:version"
+        self.cargar = cargar
+        self.revisar_cada = revisar_cada
+        self.expira = expira
+        self._datos = None
+        self._version = None
+        self._cargado = 0.0
+        self._revisado = 0.0
+        self._sin_cache = False
+
+    def obtener(self):
+        """Datos del proceso, recargados si otro proceso los invalidó."""
+        if self._datos is not None:
+            ahora = time.monotonic()
+            if ahora - self._revisado >= self.revisar_cada:
+                self._revisado = ahora
+                version = self._version_compartida()
+                if version is None:
+                    if ahora - self._cargado >= self.expira:
+                        self.limpiar()
+                elif version != self._version:
+                    self.limpiar()
+        if self._datos is None:
+            # La versión se lee antes de cargar: un cambio confirmado durante
+            # la carga deja una versión distinta y fuerza otra recarga
+            version = self._version_compartida()
+            datos = self.cargar()
+            self._version = version
+            self._cargado = self._revisado = time.monotonic()
+            self._datos = datos
+        return self._datos
+
+    def limpiar(self):
+        """Vacía solo la copia de este proceso."""
+        self._datos = None
+
+    def invalidar(self):
+        """
+        Vacía la copia de este proceso y, al confirmar la transacción en
+        curso, la de todos los demás.
+        """
+        self.limpiar()
+        transaction.on_commit(self._incrementar_version)
+
+    def _version_compartida(self):
+        try:
+            version = cache.get(self.clave, 0)
+        except Exception as e:
+            # Se avisa una vez por caída, no en cada revisión
+            if not self._sin_cache:
+                logger.warning(f"Caché compartida no disponible para {self.clave}: {str(e)}")
+            self._sin_cache = True
+            return None
+        self._sin_cache = False
+        return version
+
+    def _incrementar_version(self):
+        try:
+            cache.add(self.clave, 0, timeout=None)
+            cache.incr(self.clave)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar {self.clave} en la caché compartida: {str(e)}")
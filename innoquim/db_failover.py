@@ -2,33 +2,54 @@
 Database Failover Router y Middleware para monitorear la salud del sistema
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
 from django.db import connections
 import logging
+import os
+import re
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
 
+# Estado de enrutamiento por request (ContextVar: seguro en hilos y en async)
+# - replica_ok: el endpoint actual es de solo lectura y tolera datos con lag
+# - wrote: ya hubo una escritura en este request -> leer siempre del master
+_routing_state = ContextVar("innoquim_routing_state", default=None)
+
+# Cookie que "pega" las lecturas al master tras una escritura del cliente
+PIN_PRIMARY_COOKIE = "innoquim_pin_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
 class DatabaseFailoverRouter:
     """
     Router inteligente que:
     - SIEMPRE intenta usar el master (default) cuando está disponible
-    - Para LECTURAS: Usa replica solo si el master está DOWN
+    - Para LECTURAS: Usa replica si el master está DOWN, o si el modo de
+      escalado de lecturas está activo, el endpoint es seguro y el lag de
+      la replica está por debajo del umbral
     - Para ESCRITURAS: Solo usa master (replica es read-only)
     - Detecta dinámicamente cambios de estado
+
+    El estado de master/replica y el lag los mantiene DatabaseHealthMonitor
+    en un hilo de fondo: decidir una ruta solo lee memoria, nunca hace I/O.
     """
-    
-    # Cache de estado con timestamp para detectar cambios
-    _master_status_cache = {"available": True, "timestamp": 0}
-    _cache_timeout = 5  # Reintentar cada 5 segundos
 
     def db_for_read(self, model, **hints):
         """
-        Las lecturas van al master si está disponible.
-        Solo usan replica si el master está DOWN.
+        Las lecturas van al master si está disponible, salvo que el request
+        actual permita leer de la replica (ver _can_read_from_replica).
+        Solo usan replica de forma forzada si el master está DOWN.
         """
         # Verificar si el master está disponible
         if self._is_master_available():
+            if self._can_read_from_replica():
+                return "replica"
             return "default"
         else:
             # Master está DOWN, intentar replica
@@ -45,11 +66,23 @@ class DatabaseFailoverRouter:
         Las escrituras SIEMPRE van al master (default).
         La replica es read-only, no puede aceptar escrituras.
         """
+        # Las lecturas posteriores del mismo request deben ver esta escritura
+        state = _routing_state.get()
+        if state is not None:
+            state["wrote"] = True
+
         # Verificar que el master está disponible para escritura
         if not self._is_master_available():
             logger.error("❌ Intentando escribir pero master está DOWN")
         return "default"
 
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        default y replica contienen los mismos datos: se permiten relaciones
+        entre objetos leídos de cualquiera de las dos.
+        """
+        return True
+
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         """
         Las migraciones siempre se ejecutan en el master
@@ -57,64 +90,371 @@ class DatabaseFailoverRouter:
         return db == "default"
 
     @classmethod
-    def _is_master_available(cls):
+    def _can_read_from_replica(cls):
+        """
+        Decide si una lectura puede ir a la replica con el master disponible.
+
+        Requisitos:
+        1. DATABASE_READ_REPLICA activo y alias "replica" configurado
+        2. El request actual fue marcado como seguro por ReplicaRoutingMiddleware
+        3. No hubo escrituras en este request ni el cliente está "pegado" al master
+        4. No hay una transacción abierta en el master
+        5. El lag medido de la replica es menor a DATABASE_REPLICA_MAX_LAG
+        """
+        if not getattr(settings, "DATABASE_READ_REPLICA", False):
+            return False
+        if "replica" not in connections.databases:
+            return False
+
+        state = _routing_state.get()
+        if not state or not state["replica_ok"] or state["wrote"]:
+            return False
+
+        # Dentro de atomic() las lecturas deben ver las escrituras pendientes
+        if connections["default"].in_atomic_block:
+            return False
+
+        lag = cls._get_replica_lag()
+        max_lag = getattr(settings, "DATABASE_REPLICA_MAX_LAG", 5)
+        return lag is not None and lag <= max_lag
+
+    @staticmethod
+    def _get_replica_lag():
+        """
+        Retorna el lag de la replica en segundos (None si no se pudo medir).
+        Se mide en cada sondeo del monitor, no en cada consulta.
+        """
+        return health_monitor.replica_lag()
+
+    @staticmethod
+    def _is_master_available():
         """
-        Verifica si el master (default) está disponible
-        Implementa caché inteligente que reintentas cada N segundos
+        Verifica si el master (default) está disponible según el monitor.
         """
+        return health_monitor.is_available("default")
+
+    @staticmethod
+    def _is_replica_available():
+        """
+        Verifica si la replica está disponible según el monitor.
+        """
+        if "replica" not in connections.databases:
+            return False
+        return health_monitor.is_available("replica")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de una base de datos.
+
+    Estados:
+    - CLOSED: BD sana, se sondea cada DATABASE_HEALTH_INTERVAL segundos
+    - OPEN: BD caída tras N fallos seguidos, no se sondea hasta que vence el backoff
+    - HALF_OPEN: vencido el backoff se hace un sondeo de prueba; si pasa vuelve
+      a CLOSED, si falla vuelve a OPEN con el doble de backoff (hasta el máximo)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, alias, failure_threshold, base_backoff, max_backoff):
+        self.alias = alias
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.open_until = 0
+        self.last_error = None
+        self.last_check = 0
+
+    @property
+    def available(self):
+        return self.state == self.CLOSED
+
+    def should_probe(self, now):
+        if self.state == self.OPEN:
+            if now < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+        return True
+
+    def record_success(self, now):
+        if self.state != self.CLOSED:
+            logger.info(f"✅ BD '{self.alias}' RECUPERADA - circuito cerrado")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = self.base_backoff
+        self.last_error = None
+        self.last_check = now
+
+    def record_failure(self, now, error):
+        self.failures += 1
+        self.last_error = error
+        self.last_check = now
+        if self.state == self.HALF_OPEN:
+            # El sondeo de prueba falló: duplicar el backoff
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            self._open(now)
+        elif self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now):
+        if self.state != self.OPEN:
+            logger.error(
+                f"❌ BD '{self.alias}' no disponible ({self.last_error}) - "
+                f"circuito abierto por {self.backoff:.0f}s"
+            )
+        self.state = self.OPEN
+        self.open_until = now + self.backoff
+
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff": self.backoff,
+            "last_error": self.last_error,
+            "last_check": self.last_check,
+        }
+
+
+class DatabaseHealthMonitor:
+    """
+    Sondea master y replica en un hilo de fondo (uno por proceso/worker).
+
+    - Usa conexiones propias de psycopg (nunca cierra las conexiones de Django)
+      con connect_timeout corto para fallar rápido
+    - El sondeo de la replica mide también su lag de replicación
+    - El router solo consulta el estado en memoria
+    """
+
+    LAG_QUERY = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(
+                EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),
+                0
+            )
+        END
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._breakers = {}
+        self._probe_connections = {}
+        self._replica_lag = None
+
+    # ------------------------------------------------------------------
+    # API usada por el router (solo lectura de memoria)
+    # ------------------------------------------------------------------
+
+    def is_available(self, alias):
+        self._ensure_started()
+        breaker = self._breakers.get(alias)
+        return breaker.available if breaker else True
+
+    def replica_lag(self):
+        self._ensure_started()
+        return self._replica_lag
+
+    def status(self):
+        self._ensure_started()
+        return {
+            alias: breaker.as_dict() for alias, breaker in self._breakers.items()
+        } | {"replica_lag": self._replica_lag}
+
+    # ------------------------------------------------------------------
+    # Hilo de fondo
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        # Tras un fork (gunicorn --preload) el hilo no existe en el hijo
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._probe_connections = {}
+            self._breakers = {
+                alias: CircuitBreaker(
+                    alias,
+                    failure_threshold=getattr(settings, "DATABASE_HEALTH_FAILURE_THRESHOLD", 2),
+                    base_backoff=getattr(settings, "DATABASE_HEALTH_INTERVAL", 2),
+                    max_backoff=getattr(settings, "DATABASE_HEALTH_BACKOFF_MAX", 60),
+                )
+                for alias in ("default", "replica")
+                if alias in connections.databases
+            }
+            self._thread = threading.Thread(
+                target=self._run, name="db-health-monitor", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, "DATABASE_HEALTH_INTERVAL", 2)
+        while True:
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.exception(f"Error en el monitor de salud de BD: {str(e)}")
+            time.sleep(interval)
+
+    def probe_all(self):
         now = time.time()
-        # Reintentar cada _cache_timeout segundos
-        if now - cls._master_status_cache["timestamp"] > cls._cache_timeout:
-            cls._master_status_cache["timestamp"] = now
+        for alias, breaker in list(self._breakers.items()):
+            if not breaker.should_probe(now):
+                continue
             try:
-                connection = connections["default"]
-                # Limpiar la conexión anterior si está stale
-                if hasattr(connection, '_close_at'):
-                    connection.close()
-                
-                # Intentar conectar
-                with connection.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                    
-                # Cambio de estado: estaba DOWN, ahora UP
-                if not cls._master_status_cache["available"]:
-                    logger.info("✅ Master RECUPERADO - volviendo a usar master para todas las operaciones")
-                
-                cls._master_status_cache["available"] = True
-                return True
-            except (OSError, TimeoutError, ConnectionError) as e:
-                cls._master_status_cache["available"] = False
-                logger.debug(f"Master unavailable: {type(e).__name__}")
-                return False
+                lag = self._probe(alias)
+                breaker.record_success(now)
+                if alias == "replica":
+                    self._replica_lag = lag
             except Exception as e:
-                cls._master_status_cache["available"] = False
-                logger.debug(f"Master check failed: {str(e)}")
-                return False
-        
-        return cls._master_status_cache["available"]
+                self._drop_probe_connection(alias)
+                breaker.record_failure(now, f"{type(e).__name__}: {e}")
+                if alias == "replica":
+                    self._replica_lag = None
 
-    @staticmethod
-    def _is_replica_available():
+    def _probe(self, alias):
         """
-        Verifica si la replica está disponible
+        Ejecuta el sondeo sobre alias. Retorna el lag (solo para la replica).
+        Motores distintos de PostgreSQL (p. ej. SQLite en tests) se asumen sanos.
         """
+        settings_dict = connections.databases[alias]
+        if "postgresql" not in settings_dict["ENGINE"]:
+            return 0.0
+
+        conn = self._probe_connections.get(alias)
+        if conn is None or conn.closed:
+            conn = self._connect(settings_dict)
+            self._probe_connections[alias] = conn
+
+        with conn.cursor() as cursor:
+            if alias == "replica":
+                cursor.execute(self.LAG_QUERY)
+                row = cursor.fetchone()
+                return float(row[0]) if row and row[0] is not None else None
+            cursor.execute("SELECT 1")
+            return None
+
+    @staticmethod
+    def _connect(settings_dict):
+        import psycopg
+
+        return psycopg.connect(**probe_connection_params(settings_dict))
+
+    def _drop_probe_connection(self, alias):
+        conn = self._probe_connections.pop(alias, None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def probe_connection_params(settings_dict):
+    """
+    Parametros de psycopg para una conexion de sondeo (monitor de salud y
+    health check async): timeout de conexion y de sentencia acotados.
+    """
+    timeout = getattr(settings, "DATABASE_HEALTH_CONNECT_TIMEOUT", 2)
+    params = {
+        key: value
+        for key, value in settings_dict.get("OPTIONS", {}).items()
+        if key not in ("pool", "server_side_binding", "isolation_level", "assume_role")
+    }
+    params.update(
+        dbname=settings_dict["NAME"],
+        user=settings_dict["USER"] or None,
+        password=settings_dict["PASSWORD"] or None,
+        host=settings_dict["HOST"] or None,
+        port=settings_dict["PORT"] or None,
+        connect_timeout=timeout,
+        # Un sondeo nunca debe quedarse colgado más que el timeout
+        options=f"-c statement_timeout={int(timeout * 1000)}",
+        autocommit=True,
+    )
+    return {k: v for k, v in params.items() if v is not None}
+
+
+health_monitor = DatabaseHealthMonitor()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Marca cada request con el estado de enrutamiento que usa
+    DatabaseFailoverRouter para decidir lecturas master/replica.
+
+    - Solo GET/HEAD/OPTIONS sobre rutas de DATABASE_REPLICA_READ_PATHS
+      pueden leer de la replica.
+    - Tras un request que escribe (POST/PUT/PATCH/DELETE), el cliente queda
+      "pegado" al master durante DATABASE_REPLICA_PIN_SECONDS mediante una
+      cookie, para que lea sus propias escrituras aunque la replica vaya
+      atrasada.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.read_paths = [
+            re.compile(pattern)
+            for pattern in getattr(settings, "DATABASE_REPLICA_READ_PATHS", [])
+        ]
+        self.pin_seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 15)
+        # Bajo ASGI la cadena de middleware es async: no forzar un hilo por request
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self._new_state(request)
+        token = _routing_state.set(state)
         try:
-            if "replica" not in connections.databases:
-                return False
-            
-            connection = connections["replica"]
-            if hasattr(connection, 'connection') and connection.connection is None:
-                return False
-            
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            return True
-        except (OSError, TimeoutError, ConnectionError) as e:
-            logger.debug(f"Replica unavailable (connection error): {type(e).__name__}")
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        return self._pin_if_wrote(request, response, state)
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto, pero el dict es compartido: las
+        # escrituras hechas en el hilo del ORM marcan "wrote" aqui tambien
+        state = self._new_state(request)
+        token = _routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        return self._pin_if_wrote(request, response, state)
+
+    def _new_state(self, request):
+        return {
+            "replica_ok": self._is_replica_safe(request),
+            "wrote": False,
+        }
+
+    def _pin_if_wrote(self, request, response, state):
+        if state["wrote"] or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_PRIMARY_COOKIE, "1", max_age=self.pin_seconds, httponly=True
+            )
+        return response
+
+    def _is_replica_safe(self, request):
+        if request.method not in SAFE_METHODS:
             return False
-        except Exception as e:
-            logger.debug(f"Replica check failed: {str(e)}")
+        if request.COOKIES.get(PIN_PRIMARY_COOKIE):
             return False
+        return any(pattern.match(request.path) for pattern in self.read_paths)
 
 
 class HealthCheckMiddleware:
@@ -64,6 +64,8 @@ INSTALLED_APPS = [
     "innoquim.apps.recepcion_item",
     "innoquim.apps.recepcion_material",
     "innoquim.apps.unidad",
+    "innoquim.apps.formula",
+    "innoquim.apps.pronostico",
     "rest_framework",
     "rest_framework_simplejwt",
     "rest_framework_simplejwt.token_blacklist",
@@ -73,7 +75,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "innoquim.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -81,6 +83,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # "innoquim.db_failover.HealthCheckMiddleware",  # Comentado hasta que se agregue replica
+    "innoquim.db_failover.ReplicaRoutingMiddleware",
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -125,6 +128,8 @@ if os.getenv("DATABASE_URL"):
         replica_config = dj_db_url.parse(replica_url)
         replica_config['CONN_MAX_AGE'] = 600
         replica_config['CONN_HEALTH_CHECKS'] = True
+        # En tests la replica apunta a la misma BD de test que default
+        replica_config['TEST'] = {'MIRROR': 'default'}
         DATABASES = {
             "default": database_config,
             "replica": replica_config,
@@ -145,6 +150,43 @@ else:
         }
     }
 
+# Pool de conexiones de psycopg 3 (opcional)
+# Con DATABASE_POOL=True cada worker usa un pool en lugar de una conexión
+# persistente por hilo. Con ASGI (uvicorn) el ORM corre en los hilos de
+# sync_to_async, uno por request concurrente: el pool por worker admite
+# DATABASE_POOL_SIZE conexiones (por defecto ASGI_THREADS o, como el
+# ejecutor de asgiref, min(32, CPUs + 4)), sin que el total por servidor
+# pase de DATABASE_POOL_MAX_CONNECTIONS (reservando 1 por worker para el
+# monitor de salud de innoquim.db_failover).
+DATABASE_POOL = os.getenv("DATABASE_POOL", "False") == "True"
+if DATABASE_POOL:
+    web_workers = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+    web_threads = max(
+        int(
+            os.getenv("DATABASE_POOL_SIZE")
+            or os.getenv("ASGI_THREADS")
+            or min(32, (os.cpu_count() or 1) + 4)
+        ),
+        1,
+    )
+    pool_budget = int(os.getenv("DATABASE_POOL_MAX_CONNECTIONS", "80"))
+    pool_max_size = max(1, min(web_threads, (pool_budget - web_workers) // web_workers))
+    pool_min_size = min(int(os.getenv("DATABASE_POOL_MIN_SIZE", "1")), pool_max_size)
+
+    for db_config in DATABASES.values():
+        if "postgresql" not in db_config["ENGINE"]:
+            continue
+        # Django no permite pool junto con conexiones persistentes
+        db_config["CONN_MAX_AGE"] = 0
+        db_config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": pool_min_size,
+            "max_size": pool_max_size,
+            # Segundos que un request espera por una conexión libre
+            "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+            # Cerrar conexiones ociosas por encima de min_size
+            "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "300")),
+        }
+
 AUTH_USER_MODEL = "usuario.Usuario"
 
 # Password validation
@@ -168,6 +210,31 @@ AUTH_PASSWORD_VALIDATORS = [
 # Database Routing para Failover
 DATABASE_ROUTERS = ["innoquim.db_failover.DatabaseFailoverRouter"]
 
+# Sondeo de salud en segundo plano (circuit breaker por BD)
+# Intervalo entre sondeos (s); también es el backoff inicial con el circuito abierto
+DATABASE_HEALTH_INTERVAL = float(os.getenv("DATABASE_HEALTH_INTERVAL", "2"))
+# Timeout de conexión/consulta de cada sondeo (s)
+DATABASE_HEALTH_CONNECT_TIMEOUT = int(os.getenv("DATABASE_HEALTH_CONNECT_TIMEOUT", "2"))
+# Fallos seguidos para abrir el circuito y backoff máximo (s)
+DATABASE_HEALTH_FAILURE_THRESHOLD = int(os.getenv("DATABASE_HEALTH_FAILURE_THRESHOLD", "2"))
+DATABASE_HEALTH_BACKOFF_MAX = float(os.getenv("DATABASE_HEALTH_BACKOFF_MAX", "60"))
+
+# Escalado de lecturas: endpoints seguros leen de la replica si su lag es bajo
+DATABASE_READ_REPLICA = os.getenv("DATABASE_READ_REPLICA", "False") == "True"
+# Lag máximo tolerado (segundos) medido con pg_last_xact_replay_timestamp()
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", "5"))
+# Tras una escritura, el cliente lee del master durante estos segundos
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "15"))
+# Rutas GET de solo lectura que toleran datos con lag (regex sobre request.path)
+DATABASE_REPLICA_READ_PATHS = [
+    r"^/api/kardex/$",
+    r"^/api/kardex/\d+/$",
+    r"^/api/kardex/historial/$",
+    r"^/api/(categorias|unidades|almacenes|proveedores|clientes)/",
+    r"^/api/(materias-primas|productos)/",
+    r"^/api/archivos/(estadisticas|tipos_reporte)/$",
+]
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -246,4 +313,8 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # File Manager Service Configuration
-FILE_MANAGER_URL = os.getenv('FILE_MANAGER_URL', 'http://localhost:8001')
\ No newline at end of file
+FILE_MANAGER_URL = os.getenv('FILE_MANAGER_URL', 'http://localhost:8001')
+
+# Almacén para movimientos sin almacén explícito ni preferido del item
+# (ver innoquim.apps.almacen.services). Vacío: el almacén de menor ID.
+ALMACEN_PREDETERMINADO = os.getenv("ALMACEN_PREDETERMINADO") or None
\ No newline at end of file
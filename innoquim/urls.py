@@ -40,5 +40,7 @@ urlpatterns = [
     path("api/", include("innoquim.apps.almacen.urls")),
     path("api/", include("innoquim.apps.recepcion_material.urls")),
     path("api/", include("innoquim.apps.recepcion_item.urls")),
+    path("api/", include("innoquim.apps.formula.urls")),  # API de Fórmulas
+    path("api/", include("innoquim.apps.pronostico.urls")),  # API de Pronósticos
     path("api/", include(router.urls)),
 ]
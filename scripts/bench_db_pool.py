@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark de conexiones a PostgreSQL: conexiones persistentes vs pool de psycopg 3.
+
+Simula W workers de gunicorn (procesos) con T hilos cada uno. Cada hilo atiende
+R "requests" que hacen lecturas con el ORM y cierran la conexión igual que
+Django al terminar un request (close_old_connections). Mientras corre, el
+proceso principal muestrea pg_stat_activity para medir conexiones abiertas.
+
+Uso (con la BD de docker-compose levantada y DATABASE_URL configurado):
+    python scripts/bench_db_pool.py --workers 4 --threads 8 --requests 200
+
+Salida por modo: conexiones pico, latencia p50/p95/p99 por request y throughput.
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(pool, workers, threads):
+    os.environ["DATABASE_POOL"] = "True" if pool else "False"
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    os.environ["DATABASE_POOL_SIZE"] = str(threads)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "innoquim.settings")
+    sys.path.insert(0, BASE_DIR)
+    import django
+
+    django.setup()
+
+
+def worker(pool, workers, threads, requests, query_ms, results):
+    """Un proceso = un worker de gunicorn."""
+    setup_django(pool, workers, threads)
+    from django.db import close_old_connections, connection
+    from innoquim.apps.almacen.models import Almacen
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def handle_requests():
+        local = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                close_old_connections()  # request_started
+                Almacen.objects.count()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_sleep(%s)", [query_ms / 1000])
+                close_old_connections()  # request_finished
+            except Exception:
+                errors[0] += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    pool_threads = [threading.Thread(target=handle_requests) for _ in range(threads)]
+    for t in pool_threads:
+        t.start()
+    for t in pool_threads:
+        t.join()
+    results.put((latencies, errors[0]))
+
+
+def count_connections(stop, samples):
+    """Muestrea conexiones de la app en la BD mientras corre el benchmark."""
+    import psycopg
+    from django.db import connections
+
+    s = connections.databases["default"]
+    conn = psycopg.connect(
+        dbname=s["NAME"], user=s["USER"], password=s["PASSWORD"],
+        host=s["HOST"], port=s["PORT"] or None, autocommit=True,
+    )
+    with conn:
+        while not stop.is_set():
+            row = conn.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            ).fetchone()
+            samples.append(row[0])
+            time.sleep(0.05)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_mode(pool, args):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    stop = threading.Event()
+    samples = []
+    sampler = threading.Thread(target=count_connections, args=(stop, samples))
+    sampler.start()
+
+    started = time.perf_counter()
+    procs = [
+        ctx.Process(
+            target=worker,
+            args=(pool, args.workers, args.threads, args.requests, args.query_ms, results),
+        )
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    latencies, errors = [], 0
+    for _ in procs:
+        worker_latencies, worker_errors = results.get()
+        latencies.extend(worker_latencies)
+        errors += worker_errors
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    return {
+        "modo": "pool psycopg 3" if pool else "persistente (CONN_MAX_AGE)",
+        "conexiones_pico": max(samples) if samples else 0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "media_ms": statistics.mean(latencies) * 1000,
+        "req_s": len(latencies) / elapsed,
+        "errores": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests por hilo")
+    parser.add_argument("--query-ms", type=float, default=2.0, help="tiempo simulado de consulta")
+    parser.add_argument(
+        "--pool-budget", type=int, default=None,
+        help="DATABASE_POOL_MAX_CONNECTIONS para el modo pool",
+    )
+    args = parser.parse_args()
+
+    if args.pool_budget is not None:
+        os.environ["DATABASE_POOL_MAX_CONNECTIONS"] = str(args.pool_budget)
+    setup_django(False, args.workers, args.threads)
+
+    print(
+        f"Workers: {args.workers} | Hilos por worker: {args.threads} | "
+        f"Requests por hilo: {args.requests} | Consulta: {args.query_ms} ms"
+    )
+    for pool in (False, True):
+        r = run_mode(pool, args)
+        print(
+            f"{r['modo']:<28} conexiones pico={r['conexiones_pico']:<4} "
+            f"p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms p99={r['p99_ms']:.1f}ms "
+            f"media={r['media_ms']:.1f}ms {r['req_s']:.0f} req/s errores={r['errores']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Benchmark de analítica del Kardex: arreglos NumPy en enteros vs bucle Decimal.
+
+Genera N movimientos sintéticos (saldos con 2 decimales, varios items,
+almacenes y meses) y calcula lo mismo por los dos caminos:
+
+- valor del inventario por almacén al cierre de cada mes
+- costo de ventas por mes
+- costo promedio por item al cierre de cada mes
+
+El bucle Decimal es el que se escribiría con el ORM: una fila a la vez,
+sumando Decimal en diccionarios. Al final se verifica que ambos resultados
+sean idénticos (exactitud) y se reportan los tiempos.
+
+Uso:
+    python scripts/bench_kardex_analitica.py --movimientos 1000000
+    python scripts/bench_kardex_analitica.py --bd     # Kardex real (DATABASE_URL)
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "innoquim.settings")
+    sys.path.insert(0, BASE_DIR)
+    import django
+
+    django.setup()
+
+
+def generar(movimientos, items, almacenes, meses, semilla):
+    """Columnas enteras ordenadas por (item, almacén, fecha) y filas Decimal equivalentes."""
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    item = np.sort(rng.integers(0, items, movimientos))
+    almacen = rng.integers(1, almacenes + 1, movimientos)
+    periodo = 2024 * 12 + rng.integers(0, meses, movimientos)
+    orden = np.lexsort((periodo, almacen, item))
+    item, almacen, periodo = item[orden], almacen[orden], periodo[orden]
+    salida = rng.integers(0, 2, movimientos)
+    motivo = np.where(salida == 1, rng.integers(1, 3, movimientos), 0)  # PRODUCCION/VENTA | COMPRA
+    saldo_cantidad = rng.integers(0, 1_000_000, movimientos)  # centésimas
+    saldo_total = rng.integers(0, 100_000_000, movimientos)  # centavos
+
+    columnas = (item, almacen, periodo, salida, motivo, saldo_cantidad, saldo_total)
+    filas = [
+        (i, a, p, s, m, Decimal(c).scaleb(-2), Decimal(t).scaleb(-2))
+        for i, a, p, s, m, c, t in zip(*(col.tolist() for col in columnas))
+    ]
+    return columnas, filas
+
+
+def bucle_decimal(filas, motivos_venta):
+    """Mismos agregados que analitica.py, fila por fila con Decimal."""
+    anterior = {}
+    delta_almacen = defaultdict(Decimal)
+    costo_ventas = defaultdict(Decimal)
+    delta_item = defaultdict(lambda: [Decimal("0.00"), Decimal("0.00")])
+    periodos = set()
+    for item, almacen, periodo, salida, motivo, saldo_cantidad, saldo_total in filas:
+        cantidad_anterior, total_anterior = anterior.get((item, almacen), (0, 0))
+        anterior[(item, almacen)] = (saldo_cantidad, saldo_total)
+        delta_valor = saldo_total - total_anterior
+        delta_almacen[(almacen, periodo)] += delta_valor
+        if salida and motivo in motivos_venta:
+            costo_ventas[periodo] -= delta_valor
+        acumulado = delta_item[(item, periodo)]
+        acumulado[0] += saldo_cantidad - cantidad_anterior
+        acumulado[1] += delta_valor
+        periodos.add(periodo)
+
+    periodos = range(min(periodos), max(periodos) + 1) if periodos else range(0)
+    valor = {}
+    for almacen in sorted({a for a, _ in delta_almacen}):
+        saldo, serie = Decimal("0.00"), []
+        for periodo in periodos:
+            saldo += delta_almacen.get((almacen, periodo), 0)
+            serie.append(saldo)
+        valor[almacen] = serie
+    ventas = [costo_ventas.get(p, Decimal("0.00")) for p in periodos]
+    promedios = {}
+    for item in sorted({i for i, _ in delta_item}):
+        cantidad, total, serie = Decimal("0.00"), Decimal("0.00"), []
+        for periodo in periodos:
+            delta = delta_item.get((item, periodo))
+            if delta:
+                cantidad += delta[0]
+                total += delta[1]
+            serie.append(
+                (total / cantidad).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+                if cantidad > 0 else None
+            )
+        promedios[item] = serie
+    return valor, ventas, promedios
+
+
+def vectorizado(libro, motivos_venta):
+    from innoquim.apps.inventario import analitica
+
+    valor = analitica.valor_por_almacen(libro)["almacenes"]
+    ventas = [c for _, c in analitica.costo_ventas_por_periodo(libro, motivos_venta)]
+    promedios = analitica.tendencia_costo_promedio(libro)["items"]
+    return valor, ventas, promedios
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--movimientos", type=int, default=1_000_000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--almacenes", type=int, default=5)
+    parser.add_argument("--meses", type=int, default=24)
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument(
+        "--bd", action="store_true", help="Usar el Kardex de la base de datos configurada"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+
+    from innoquim.apps.inventario import analitica
+    from innoquim.apps.inventario.models import Kardex
+
+    motivos_venta = ("VENTA",)
+
+    if args.bd:
+        _, t_carga_np = medir(analitica.cargar_libro)
+        libro = analitica.cargar_libro()
+
+        def leer_decimal():
+            codigos = {m: i for i, m in enumerate(analitica.MOTIVOS)}
+            items = {}
+            return [
+                (
+                    items.setdefault((ct, obj), len(items)), almacen,
+                    analitica.codigo_periodo(fecha), tipo == "SALIDA", codigos[motivo],
+                    saldo_cantidad, saldo_total,
+                )
+                for ct, obj, almacen, fecha, tipo, motivo, saldo_cantidad, saldo_total in (
+                    Kardex.objects.order_by("content_type_id", "object_id", "almacen_id", "fecha", "id")
+                    .values_list(
+                        "content_type_id", "object_id", "almacen_id", "fecha",
+                        "tipo_movimiento", "motivo", "saldo_cantidad", "saldo_costo_total",
+                    )
+                    .iterator(chunk_size=10000)
+                )
+            ]
+
+        filas, t_carga_dec = medir(leer_decimal)
+        print(f"Movimientos: {len(libro)} (Kardex de la BD)")
+        print(f"{'lectura values_list -> Decimal':<36} {t_carga_dec:8.3f}s")
+        print(f"{'lectura values_list -> int64':<36} {t_carga_np:8.3f}s")
+    else:
+        (columnas, filas), t_gen = medir(
+            generar, args.movimientos, args.items, args.almacenes, args.meses, args.semilla
+        )
+        item, almacen, periodo, salida, motivo, saldo_cantidad, saldo_total = columnas
+        libro = analitica.LibroKardex(
+            [(0, str(i)) for i in range(int(item.max()) + 1)],
+            item, almacen, periodo, salida, motivo, saldo_cantidad, saldo_total,
+        )
+        print(
+            f"Movimientos: {len(filas)} | Items: {args.items} | "
+            f"Almacenes: {args.almacenes} | Meses: {args.meses} (generados en {t_gen:.1f}s)"
+        )
+
+    codigos_venta = tuple(analitica.MOTIVOS.index(m) for m in motivos_venta)
+    esperado, t_decimal = medir(bucle_decimal, filas, codigos_venta)
+    obtenido, t_numpy = medir(vectorizado, libro, motivos_venta)
+
+    valor, ventas, promedios = obtenido
+    # Las claves de items del libro son (content_type_id, object_id): se comparan en orden
+    exacto = (
+        valor == esperado[0]
+        and ventas == esperado[1]
+        and list(promedios.values()) == list(esperado[2].values())
+    )
+
+    print(f"{'bucle Decimal por fila':<36} {t_decimal:8.3f}s")
+    print(f"{'NumPy enteros + cumsum':<36} {t_numpy:8.3f}s  ({t_decimal / t_numpy:.1f}x)")
+    print(f"Resultados idénticos: {'sí' if exacto else 'NO'}")
+    print(f"NumPy {np.__version__}")
+    if not exacto:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()